@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# bench/fake_flashrom.py
+"""
+Stand-in for the flashrom binary used by the benchmarks.
+
+Behaviour is controlled through FAKE_FLASHROM_* environment variables so
+the code under test can run it exactly like flashrom:
+
+  FAKE_FLASHROM_CHIPS         rows in the -L chip table (default 600)
+  FAKE_FLASHROM_CHIP          chip reported by probing (default W25Q128.V)
+  FAKE_FLASHROM_SIZE_KB       size of that chip (default 16384)
+  FAKE_FLASHROM_PROBE_DELAY   seconds spent "probing" (default 0.05)
+  FAKE_FLASHROM_SPEED         bytes per second for read/write/verify (default 64 MiB/s)
+  FAKE_FLASHROM_BLOCK         bytes per -V block line (default 4096)
+  FAKE_FLASHROM_VERBOSE       1 to print a line per block like flashrom -V
+  FAKE_FLASHROM_FAIL          "probe", "write", "verify", "hang" or "garbage"
+  FAKE_FLASHROM_IMAGE         file returned by -r (default: an erased chip);
+                              with --layout/--ifd and -i only the included
+                              regions are read and the rest is left zeroed
+  FAKE_FLASHROM_DUMMY         path of a real flashrom; the fake then execs it
+                              with the programmer replaced by
+                              dummy:emulate=FAKE_FLASHROM_EMULATE
+"""
+import os
+import struct
+import sys
+import time
+
+VENDORS = ("AMIC", "Atmel", "EON", "GigaDevice", "Macronix", "Micron", "Spansion", "SST", "Winbond", "XMC")
+
+
+def env(name, default):
+    value = os.environ.get("FAKE_FLASHROM_" + name)
+    if value is None:
+        return default
+    return type(default)(value)
+
+
+def out(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+# Real entries listed ahead of the generated ones, so probed names can be found
+REAL_CHIPS = (
+    ("GigaDevice", "GD25Q127C/GD25Q128E", 16384),
+    ("Macronix", "MX25L12835F/MX25L12845E", 16384),
+    ("Winbond", "W25Q128.V", 16384),
+    ("Winbond", "W25Q128.V..M", 16384),
+    ("Winbond", "W25Q128.W", 16384),
+    ("Winbond", "W25Q64BV/W25Q64CV/W25Q64FV", 8192),
+    ("Winbond", "W25Q64JV-.Q", 8192),
+)
+
+
+def print_chip_list(count):
+    out("flashrom v1.3.0-fake on Linux\n\nSupported flash chips (total: %d):\n\n" % count)
+    out("Vendor      Device                            Test  Known   Size   Bus        Voltage\n")
+    out("                                              OK    Broken  [kB]              [V]\n\n")
+    out("(P = PROBE, R = READ, E = ERASE, W = WRITE, - = N/A)\n\n")
+    for index in range(count):
+        if index < len(REAL_CHIPS):
+            vendor, device, size = REAL_CHIPS[index]
+        else:
+            vendor = VENDORS[index % len(VENDORS)]
+            device = f"FAKE{index:05d}"
+            size = 64 << (index % 10)
+        out(f"{vendor:<12}{device:<34}{'PREW':<6}{'':<8}{size:<7}{'SPI':<11}2.7-3.6\n")
+    out("\nSupported chipsets (total: 1):\n\nVendor      Chipset\nIntel       FAKE\n")
+
+
+def stream(stage, size, speed, block, verbose):
+    # Same shapes flashrom prints: percentage callbacks, or -V block ranges
+    started = time.monotonic()
+    last_pc = -1
+    for offset in range(0, size, block):
+        end = min(offset + block, size)
+        if verbose:
+            out(f"0x{offset:06x}-0x{end - 1:06x}:{'S' if stage == 'READ' else 'W'}, ")
+        pc = end * 100 // size
+        if pc != last_pc:
+            out(f"[{stage}] {pc}% complete... ")
+            last_pc = pc
+        delay = started + end / speed - time.monotonic()
+        if delay > 0.001:
+            time.sleep(delay)
+    out("\n")
+
+
+def included_ranges(argv, size, image):
+    """(start, end) ranges selected by --layout/--ifd and -i, or None for the whole chip."""
+    names = [argv[i + 1] for i, arg in enumerate(argv[:-1]) if arg == "-i"]
+    if not names:
+        return None
+    regions = {}
+    if "--layout" in argv:
+        with open(argv[argv.index("--layout") + 1]) as f:
+            for line in f:
+                if line.strip():
+                    span, name = line.split()
+                    start, end = (int(value, 16) for value in span.split(":"))
+                    regions[name] = (start, end + 1)
+    elif "--ifd" in argv and image:
+        with open(image, "rb") as f:
+            head = f.read(0x1000)
+        if struct.unpack_from("<I", head, 0x10)[0] == 0x0FF0A55A:
+            frba = ((struct.unpack_from("<I", head, 0x14)[0] >> 16) & 0xff) << 4
+            for index, name in enumerate(("fd", "bios", "me", "gbe", "pd")):
+                flreg = struct.unpack_from("<I", head, frba + index * 4)[0]
+                base, limit = (flreg & 0x7fff) << 12, (((flreg >> 16) & 0x7fff) << 12) | 0xfff
+                if flreg != 0xffffffff and (index == 0 or flreg) and base <= limit:
+                    regions[name] = (base, limit + 1)
+    missing = [name for name in names if name not in regions]
+    if missing:
+        raise KeyError(missing[0])
+    return sorted(regions[name] for name in names if regions[name][0] < size)
+
+
+def write_regions(path, size, image, ranges):
+    with open(path, "wb") as f:
+        f.truncate(size)
+        source = open(image, "rb") if image else None
+        for start, end in ranges:
+            if source:
+                source.seek(start)
+                data = source.read(end - start)
+            else:
+                data = b"\xff" * (end - start)
+            f.seek(start)
+            f.write(data)
+        if source:
+            source.close()
+
+
+def write_dump(path, size, image):
+    # Written in blocks rather than truncated so pipes work as targets
+    with open(path, "wb") as f:
+        if image:
+            with open(image, "rb") as source:
+                for block in iter(lambda: source.read(1 << 20), b""):
+                    f.write(block)
+            return
+        erased = b"\xff" * (1 << 20)
+        for offset in range(0, size, len(erased)):
+            f.write(erased[:size - offset])
+
+
+def main(argv):
+    if "--version" in argv:
+        out("flashrom v1.3.0-fake\n")
+        return 0
+    if "-L" in argv:
+        print_chip_list(env("CHIPS", 600))
+        return 0
+
+    real = env("DUMMY", "")
+    if real:
+        args = list(argv)
+        if "-p" in args:
+            args[args.index("-p") + 1] = "dummy:emulate=" + env("EMULATE", "W25Q128FV")
+        os.execv(real, [real] + args)
+
+    fail = env("FAIL", "")
+    chip = env("CHIP", "W25Q128.V")
+    size = env("SIZE_KB", 16384) * 1024
+    speed = env("SPEED", 64.0 * 1024 * 1024)
+    block = env("BLOCK", 4096)
+    verbose = env("VERBOSE", 0) == 1
+
+    out("flashrom v1.3.0-fake on Linux\n")
+    out("Calibrating delay loop... OK.\n")
+    time.sleep(env("PROBE_DELAY", 0.05))
+    if fail == "hang":
+        time.sleep(3600)
+    if fail == "probe":
+        out("No EEPROM/flash device found.\n")
+        return 1
+    if fail == "garbage":
+        out("\x00\xff" * 64 + "\n")
+    out(f'Found Winbond flash chip "{chip}" ({size // 1024} kB, SPI) on fake.\n')
+
+    if "-r" in argv:
+        try:
+            ranges = included_ranges(argv, size, env("IMAGE", ""))
+        except KeyError as e:
+            out(f"Error: Region {e.args[0]} not found in layout.\n")
+            return 1
+        out("Reading flash... ")
+        if ranges is None:
+            stream("READ", size, speed, block, verbose)
+            write_dump(argv[argv.index("-r") + 1], size, env("IMAGE", ""))
+        else:
+            stream("READ", sum(end - start for start, end in ranges), speed, block, verbose)
+            write_regions(argv[argv.index("-r") + 1], size, env("IMAGE", ""), ranges)
+        out("done.\n")
+    elif "-w" in argv:
+        out("Reading old flash chip contents... ")
+        stream("READ", size, speed * 4, block, False)
+        out("done.\nErasing and writing flash chip... ")
+        stream("WRITE", size, speed, block, verbose)
+        if fail == "write":
+            out("FAILED at 0x00001000! Expected=0xff, Found=0x00, failed byte count from 0x00000000-0x0000ffff: 0x1\n")
+            return 1
+        out("Erase/write done.\nVerifying flash... ")
+        stream("READ", size, speed * 4, block, False)
+        out("VERIFIED.\n")
+    elif "-v" in argv:
+        out("Verifying flash... ")
+        stream("READ", size, speed, block, verbose)
+        if fail == "verify":
+            out("FAILED at 0x00000010! Expected=0xff, Found=0x00\n")
+            return 3
+        out("VERIFIED.\n")
+    elif "-E" in argv:
+        out("Erasing flash chip... ")
+        stream("ERASE", size, speed, block, verbose)
+        out("Erase done.\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# bench/run_bench.py
+"""
+End-to-end benchmarks against bench/fake_flashrom.py.
+
+Runs the chip catalog, detection, streaming read/write/verify, failure
+handling and log panel buffering through the same code paths the GUI
+uses, with FLASHROM_PATH pointing at the stand-in. --gui additionally
+drives a real FlashromGUI frame and measures event-loop stalls; without a
+display it re-runs itself under xvfb-run when that is installed.
+
+    python bench/run_bench.py
+    python bench/run_bench.py --size-kb 65536 --speed 8388608 --gui
+    python bench/run_bench.py --real-flashrom /usr/sbin/flashrom   # dummy programmer
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flashrom_catalog import ChipCatalog, ChipIndex  # noqa: E402
+from flashrom_jobs import JobExecutor  # noqa: E402
+from flashrom_log import LogBuffer  # noqa: E402
+from flashrom_progress import FlashromProgress, parse_found_chips  # noqa: E402
+from flashrom_regions import RegionRead  # noqa: E402
+
+FAKE = os.path.join(ROOT, "bench", "fake_flashrom.py")
+
+
+def make_wrapper(workdir):
+    """An executable named flashrom that runs the fake with this Python."""
+    path = os.path.join(workdir, "flashrom")
+    with open(path, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE}" "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+
+def configure(args, **overrides):
+    settings = {
+        "CHIPS": args.chips,
+        "SIZE_KB": args.size_kb,
+        "SPEED": args.speed,
+        "PROBE_DELAY": args.probe_delay,
+        "VERBOSE": 1 if args.verbose else 0,
+        "FAIL": "",
+    }
+    if args.real_flashrom:
+        settings["DUMMY"] = args.real_flashrom
+    settings.update(overrides)
+    for name, value in settings.items():
+        os.environ["FAKE_FLASHROM_" + name] = str(value)
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 2),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p90_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def timed(runs, func):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def bench_catalog(exe, workdir, runs):
+    cache_path = os.path.join(workdir, "catalog.json")
+
+    def cold():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        ChipCatalog(exe, cache_path).refresh()
+
+    def warm():
+        assert ChipCatalog(exe, cache_path).load_cached() is not None
+
+    results = {"catalog_cold": timed(runs, cold)}
+    results["catalog_warm"] = timed(runs, warm)
+    catalog = ChipCatalog(exe, cache_path)
+    results["catalog_chips"] = len(catalog.load_cached())
+    results["chip_index_build"] = timed(runs, lambda: ChipIndex(catalog.chips))
+
+    # One search per keystroke, as the chip picker does while typing
+    index = catalog.index()
+    keystrokes = []
+    for query in ("w25q128fv", "winbond 64", "mx25l128", "fake001"):
+        for end in range(1, len(query) + 1):
+            started = time.perf_counter()
+            index.search(query[:end])
+            keystrokes.append(time.perf_counter() - started)
+    results["chip_search_keystroke"] = percentiles(keystrokes)
+    results["chip_match_detected"] = timed(runs, lambda: [
+        index.match(name) for name in ("W25Q128.V", "W25Q128FV", "MX25L12845E", "GD25Q128", "AT25DF041A")
+    ])
+    return results
+
+
+def run_job(executor, cmd, timeout=None, collect_output=True):
+    output_bytes = [0]
+
+    def on_output(text, stream):
+        output_bytes[0] += len(text)
+
+    progress = FlashromProgress()
+    job = executor.submit(cmd, "fake", progress=progress, timeout=timeout,
+                          on_output=on_output, collect_output=collect_output)
+    job.wait()
+    return job, progress, output_bytes[0]
+
+
+def bench_detect(exe, executor, runs):
+    def detect():
+        job, _, _ = run_job(executor, [exe, "-p", "fake"])
+        assert parse_found_chips(job.output_text()), job.output_text()
+
+    return {"detect": timed(runs, detect)}
+
+
+def bench_operations(exe, executor, workdir, args):
+    image = os.path.join(workdir, "image.bin")
+    with open(image, "wb") as f:
+        f.truncate(args.size_kb * 1024)
+
+    results = {}
+    nominal = args.size_kb * 1024 / args.speed
+    for name, flag in (("read", "-r"), ("write", "-w"), ("verify", "-v")):
+        path = os.path.join(workdir, "dump.bin") if name == "read" else image
+        samples = []
+        updates = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            job, progress, _ = run_job(executor, [exe, "-p", "fake", flag, path], collect_output=False)
+            samples.append(time.perf_counter() - started)
+            updates.append(progress.revision)
+            assert job.returncode == 0, job.state
+        results[name] = percentiles(samples)
+        results[name]["nominal_ms"] = round(nominal * 1000 * (1.5 if name == "write" else 1), 1)
+        results[name]["progress_updates"] = int(statistics.median(updates))
+
+    # 8 KiB GbE region out of a layout, against the full read above
+    region_read = RegionRead(["gbe"], [(0, 0x1000, "fd"), (0x1000, 0x3000, "gbe")])
+    region_read.prepare(os.path.join(workdir, "board.layout"))
+    dump = os.path.join(workdir, "regions.bin")
+
+    def read_region():
+        job, _, _ = run_job(executor, [exe, "-p", "fake"] + region_read.read_args(dump), collect_output=False)
+        assert job.returncode == 0, job.state
+        region_read.finish(dump, split=True)
+
+    results["read_region"] = timed(args.runs, read_region)
+    return results
+
+
+def bench_failures(exe, executor, args):
+    results = {}
+    configure(args, FAIL="hang")
+    started = time.perf_counter()
+    job, _, _ = run_job(executor, [exe, "-p", "fake"], timeout=0.5)
+    results["hang_recovery_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    results["hang_state"] = job.state
+
+    configure(args, FAIL="write")
+    job, progress, _ = run_job(executor, [exe, "-p", "fake", "-w", os.devnull])
+    results["write_failure_detected"] = job.returncode != 0 and progress.failed
+
+    configure(args)
+    return results
+
+
+def bench_log(lines):
+    tracemalloc.start()
+    log = LogBuffer(spill_path=os.devnull)
+    chunk = "".join(f"0x{i * 4096:06x}-0x{i * 4096 + 4095:06x}:S\n" for i in range(64))
+    started = time.perf_counter()
+    drains = 0
+    for _ in range(lines // 64):
+        log.write(chunk)
+        if log._pending_lines > 2000:
+            log.drain()
+            drains += 1
+    log.drain()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    log.close()
+    return {
+        "log_lines": lines,
+        "log_lines_per_s": int(lines / elapsed),
+        "log_peak_kib": peak // 1024,
+        "log_drains": drains,
+    }
+
+
+def bench_gui(exe, workdir, args):
+    """Drive a real frame; needs wxPython and a display."""
+    import wx
+    import flashrom_gui
+
+    app = flashrom_gui.MyApp(show_splash=False)
+    frame = app.frame
+    jobs = {}
+    gaps = []
+    last = [time.perf_counter()]
+
+    # A 10 ms timer that records how late it fires measures UI stalls
+    def on_probe_timer(event):
+        now = time.perf_counter()
+        gaps.append(now - last[0])
+        last[0] = now
+
+    probe_timer = wx.Timer(frame)
+    frame.Bind(wx.EVT_TIMER, on_probe_timer, probe_timer)
+
+    image = os.path.join(workdir, "gui_image.bin")
+    with open(image, "wb") as f:
+        f.truncate(args.size_kb * 1024)
+
+    def step(operations):
+        if frame.current_job is None and operations:
+            name, argv = operations.pop(0)
+            frame.programmer_combo.SetValue("fake")
+            frame.run_flashrom(argv, name)
+            jobs.setdefault(name, []).append(frame.current_job)
+        elif frame.current_job is None:
+            probe_timer.Stop()
+            frame.Close()
+            return
+        wx.CallLater(20, step, operations)
+
+    operations = [
+        ("detect", ["-p", "fake"]),
+        ("read", ["-p", "fake", "-r", os.path.join(workdir, "gui_dump.bin")]),
+        ("write", ["-p", "fake", "-w", image]),
+        ("verify", ["-p", "fake", "-v", image]),
+    ] * args.runs
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    probe_timer.Start(10)
+    wx.CallLater(200, step, operations)
+    app.MainLoop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    report = {}
+    for name, entries in jobs.items():
+        durations = [job.duration for job in entries if job is not None]
+        if durations:
+            report["gui_" + name] = percentiles(durations)
+    stalls = [gap - 0.010 for gap in gaps]
+    report["ui_stall"] = percentiles(stalls) if stalls else {}
+    report["ui_stall_over_50ms"] = sum(1 for stall in stalls if stall > 0.05)
+    report["rss_growth_kib"] = rss_after - rss_before
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--chips", type=int, default=600, help="rows in the fake -L table")
+    parser.add_argument("--size-kb", type=int, default=4096, help="fake chip size")
+    parser.add_argument("--speed", type=float, default=64 * 1024 * 1024, help="fake bytes per second")
+    parser.add_argument("--probe-delay", type=float, default=0.05)
+    parser.add_argument("--verbose", action="store_true", help="fake -V block output")
+    parser.add_argument("--log-lines", type=int, default=200000)
+    parser.add_argument("--real-flashrom", help="wrap this flashrom with the dummy programmer instead of faking output")
+    parser.add_argument("--gui", action="store_true", help="also benchmark the wx frame")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    if args.gui and not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        xvfb = shutil.which("xvfb-run")
+        if xvfb and not os.environ.get("FLASHROMGUI_BENCH_XVFB"):
+            env = dict(os.environ, FLASHROMGUI_BENCH_XVFB="1")
+            return subprocess.call([xvfb, "-a", sys.executable, os.path.abspath(__file__)] + sys.argv[1:], env=env)
+
+    workdir = tempfile.mkdtemp(prefix="flashromgui-bench-")
+    try:
+        exe = make_wrapper(workdir)
+        os.environ["FLASHROM_PATH"] = exe
+        os.environ["XDG_CACHE_HOME"] = os.path.join(workdir, "cache")
+        os.environ["XDG_DATA_HOME"] = os.path.join(workdir, "data")
+        configure(args)
+
+        executor = JobExecutor()
+        report = {"config": {k: v for k, v in vars(args).items() if k != "output"}}
+        report.update(bench_catalog(exe, workdir, args.runs))
+        report.update(bench_detect(exe, executor, args.runs))
+        report.update(bench_operations(exe, executor, workdir, args))
+        report.update(bench_failures(exe, executor, args))
+        report.update(bench_log(args.log_lines))
+        if args.gui:
+            try:
+                report.update(bench_gui(exe, workdir, args))
+            except ImportError as e:
+                report["gui_error"] = f"wxPython not available: {e}"
+        report["max_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
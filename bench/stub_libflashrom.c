@@ -0,0 +1,269 @@
+/*
+ * bench/stub_libflashrom.c
+ *
+ * Stand-in for libflashrom with the subset of the API flashrom_lib.py
+ * binds. The "chip" is a buffer that lives as long as the process, so a
+ * session kept open across operations sees its own writes.
+ *
+ *   cc -shared -fPIC -O2 -o bench/libflashrom_stub.so bench/stub_libflashrom.c
+ *   FLASHROM_LIBRARY=bench/libflashrom_stub.so python flashrom_gui.py --libflashrom
+ *
+ * Controlled by the same environment variables as fake_flashrom.py:
+ * FAKE_FLASHROM_CHIP, FAKE_FLASHROM_SIZE_KB, FAKE_FLASHROM_IMAGE,
+ * FAKE_FLASHROM_PROBE_DELAY and FAKE_FLASHROM_FAIL ("probe", "write",
+ * "verify"). Every programmer init and chip probe is logged at debug
+ * level as "stub: ...", so tests can count them.
+ */
+#include <stdarg.h>
+#include <stdbool.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+enum flashrom_log_level {
+	FLASHROM_MSG_ERROR = 0,
+	FLASHROM_MSG_WARN = 1,
+	FLASHROM_MSG_INFO = 2,
+	FLASHROM_MSG_DEBUG = 3,
+};
+
+enum flashrom_progress_stage {
+	FLASHROM_PROGRESS_READ,
+	FLASHROM_PROGRESS_WRITE,
+	FLASHROM_PROGRESS_ERASE,
+};
+
+struct flashrom_flashctx;
+typedef int(flashrom_log_callback)(enum flashrom_log_level, const char *, va_list);
+typedef void(flashrom_progress_callback)(struct flashrom_flashctx *);
+
+struct flashrom_progress {
+	enum flashrom_progress_stage stage;
+	size_t current;
+	size_t total;
+	void *user_data;
+};
+
+struct flashrom_programmer {
+	char name[64];
+};
+
+struct flashrom_flashctx {
+	bool verify_after_write;
+	flashrom_progress_callback *progress_callback;
+	struct flashrom_progress *progress;
+};
+
+#define CHUNK (64 * 1024)
+
+static flashrom_log_callback *log_callback;
+static unsigned char *chip;
+static size_t chip_size;
+
+static const char *env(const char *name, const char *fallback)
+{
+	char key[64];
+	snprintf(key, sizeof(key), "FAKE_FLASHROM_%s", name);
+	const char *value = getenv(key);
+	return value ? value : fallback;
+}
+
+static int msg(enum flashrom_log_level level, const char *fmt, ...)
+{
+	int ret = 0;
+	va_list ap;
+	if (!log_callback)
+		return 0;
+	va_start(ap, fmt);
+	ret = log_callback(level, fmt, ap);
+	va_end(ap);
+	return ret;
+}
+
+static void progress(struct flashrom_flashctx *flash, enum flashrom_progress_stage stage, size_t current)
+{
+	if (!flash->progress_callback || !flash->progress)
+		return;
+	flash->progress->stage = stage;
+	flash->progress->current = current;
+	flash->progress->total = chip_size;
+	flash->progress_callback(flash);
+}
+
+static void load_chip(void)
+{
+	const char *image = env("IMAGE", "");
+	if (chip)
+		return;
+	chip_size = (size_t)atol(env("SIZE_KB", "16384")) * 1024;
+	chip = malloc(chip_size);
+	memset(chip, 0xff, chip_size);
+	if (*image) {
+		FILE *f = fopen(image, "rb");
+		if (f) {
+			size_t n = fread(chip, 1, chip_size, f);
+			(void)n;
+			fclose(f);
+		}
+	}
+}
+
+int flashrom_init(int perform_selfcheck)
+{
+	(void)perform_selfcheck;
+	return 0;
+}
+
+int flashrom_shutdown(void)
+{
+	return 0;
+}
+
+void flashrom_set_log_callback(flashrom_log_callback *callback)
+{
+	log_callback = callback;
+}
+
+int flashrom_programmer_init(struct flashrom_programmer **programmer, const char *name, const char *params)
+{
+	*programmer = calloc(1, sizeof(**programmer));
+	snprintf((*programmer)->name, sizeof((*programmer)->name), "%s", name);
+	msg(FLASHROM_MSG_DEBUG, "stub: programmer init %s%s%s\n", name, params ? ":" : "", params ? params : "");
+	return 0;
+}
+
+int flashrom_programmer_shutdown(struct flashrom_programmer *programmer)
+{
+	msg(FLASHROM_MSG_DEBUG, "stub: programmer shutdown %s\n", programmer->name);
+	free(programmer);
+	return 0;
+}
+
+int flashrom_flash_probe(struct flashrom_flashctx **flash, const struct flashrom_programmer *programmer,
+			 const char *chip_name)
+{
+	struct timespec delay;
+	double seconds = atof(env("PROBE_DELAY", "0.05"));
+	const char *name = env("CHIP", "W25Q128.V");
+
+	delay.tv_sec = (time_t)seconds;
+	delay.tv_nsec = (long)((seconds - (double)delay.tv_sec) * 1e9);
+	nanosleep(&delay, NULL);
+	msg(FLASHROM_MSG_DEBUG, "stub: probe %s\n", chip_name ? chip_name : "(any)");
+	if (!strcmp(env("FAIL", ""), "probe") || (chip_name && strcmp(chip_name, name))) {
+		msg(FLASHROM_MSG_INFO, "No EEPROM/flash device found.\n");
+		return 2;
+	}
+	load_chip();
+	*flash = calloc(1, sizeof(**flash));
+	(*flash)->verify_after_write = true;
+	msg(FLASHROM_MSG_INFO, "Found Winbond flash chip \"%s\" (%zu kB, SPI) on %s.\n",
+	    name, chip_size / 1024, programmer->name);
+	return 0;
+}
+
+size_t flashrom_flash_getsize(const struct flashrom_flashctx *flash)
+{
+	(void)flash;
+	return chip_size;
+}
+
+void flashrom_flash_release(struct flashrom_flashctx *flash)
+{
+	free(flash);
+}
+
+void flashrom_flag_set(struct flashrom_flashctx *flash, int flag, bool value)
+{
+	if (flag == 2)
+		flash->verify_after_write = value;
+}
+
+void flashrom_set_progress_callback(struct flashrom_flashctx *flash, flashrom_progress_callback *callback,
+				    struct flashrom_progress *state)
+{
+	flash->progress_callback = callback;
+	flash->progress = state;
+}
+
+int flashrom_image_read(struct flashrom_flashctx *flash, void *buffer, size_t len)
+{
+	if (len < chip_size)
+		return 1;
+	for (size_t offset = 0; offset < chip_size; offset += CHUNK) {
+		size_t n = chip_size - offset < CHUNK ? chip_size - offset : CHUNK;
+		memcpy((unsigned char *)buffer + offset, chip + offset, n);
+		progress(flash, FLASHROM_PROGRESS_READ, offset + n);
+	}
+	return 0;
+}
+
+static int verify(struct flashrom_flashctx *flash, const void *buffer)
+{
+	for (size_t offset = 0; offset < chip_size; offset += CHUNK) {
+		size_t n = chip_size - offset < CHUNK ? chip_size - offset : CHUNK;
+		if (memcmp((const unsigned char *)buffer + offset, chip + offset, n)) {
+			msg(FLASHROM_MSG_ERROR, "FAILED at 0x%08zx!\n", offset);
+			return 3;
+		}
+		progress(flash, FLASHROM_PROGRESS_READ, offset + n);
+	}
+	return 0;
+}
+
+int flashrom_image_write(struct flashrom_flashctx *flash, void *buffer, size_t len, const void *refbuffer)
+{
+	size_t changed = 0;
+	if (len != chip_size)
+		return 4;
+	if (refbuffer) {
+		msg(FLASHROM_MSG_DEBUG, "stub: using reference contents\n");
+	} else {
+		msg(FLASHROM_MSG_INFO, "Reading old flash chip contents... ");
+		progress(flash, FLASHROM_PROGRESS_READ, chip_size);
+		msg(FLASHROM_MSG_INFO, "done.\n");
+	}
+	msg(FLASHROM_MSG_INFO, "Erasing and writing flash chip... ");
+	for (size_t offset = 0; offset < chip_size; offset += CHUNK) {
+		size_t n = chip_size - offset < CHUNK ? chip_size - offset : CHUNK;
+		const unsigned char *old = refbuffer ? (const unsigned char *)refbuffer + offset : chip + offset;
+		if (memcmp(old, (unsigned char *)buffer + offset, n)) {
+			memcpy(chip + offset, (unsigned char *)buffer + offset, n);
+			changed += n;
+		}
+		progress(flash, FLASHROM_PROGRESS_WRITE, offset + n);
+	}
+	if (!strcmp(env("FAIL", ""), "write")) {
+		msg(FLASHROM_MSG_ERROR, "FAILED at 0x00001000!\n");
+		chip[0x1000] ^= 0xff;
+		return 1;
+	}
+	msg(FLASHROM_MSG_INFO, "Erase/write done.\n");
+	msg(FLASHROM_MSG_DEBUG, "stub: wrote %zu bytes\n", changed);
+	if (flash->verify_after_write) {
+		msg(FLASHROM_MSG_INFO, "Verifying flash... ");
+		if (verify(flash, buffer))
+			return 3;
+		msg(FLASHROM_MSG_INFO, "VERIFIED.\n");
+	}
+	return 0;
+}
+
+int flashrom_image_verify(struct flashrom_flashctx *flash, const void *buffer, size_t len)
+{
+	if (len != chip_size)
+		return 2;
+	if (!strcmp(env("FAIL", ""), "verify")) {
+		msg(FLASHROM_MSG_ERROR, "FAILED at 0x00000010!\n");
+		return 3;
+	}
+	return verify(flash, buffer);
+}
+
+int flashrom_flash_erase(struct flashrom_flashctx *flash)
+{
+	memset(chip, 0xff, chip_size);
+	progress(flash, FLASHROM_PROGRESS_ERASE, chip_size);
+	return 0;
+}
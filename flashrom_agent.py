@@ -0,0 +1,1011 @@
+# flashrom_agent.py
+import argparse
+import collections
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import queue
+import re
+import shutil
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+from flashrom_agent_pool import AgentPool, split_remote
+from flashrom_diff import file_sha256
+from flashrom_discovery import Programmer, discover
+from flashrom_jobs import DONE, ERROR, CANCELLED, RUNNING, FlashromJob, JobExecutor
+from flashrom_paths import get_flashrom_path, user_cache_dir
+from flashrom_progress import FlashromProgress
+
+DEFAULT_PORT = 8642
+PROTOCOL_VERSION = 1
+
+# Bytes per upload/download chunk frame.
+CHUNK_BYTES = 256 * 1024
+
+# Largest JSON header and payload accepted in one frame.
+MAX_HEADER = 1 << 20
+MAX_PAYLOAD = 4 << 20
+
+# Uploaded images kept on the agent by hash, so the same image is sent once.
+UPLOAD_CACHE_BYTES = 2 << 30
+
+# Cached uploads used this recently are never pruned (a queued job may need them).
+UPLOAD_KEEP_SECONDS = 3600
+
+# Minimum seconds between progress messages for one job.
+PROGRESS_INTERVAL = 0.1
+
+# Seconds to wait for the agent to answer a request.
+REPLY_TIMEOUT = 60
+
+# Seconds one frame may take to go out before the client counts as gone,
+# e.g. a laptop that dropped off the Wi-Fi without closing the connection.
+SEND_TIMEOUT = 30
+
+# Frames queued for a slow client; past this, job output is dropped.
+SEND_QUEUE_FRAMES = 256
+
+# Output of one job is merged into the last queued frame up to this size.
+OUTPUT_COALESCE_BYTES = 64 * 1024
+
+# flashrom options whose value is a file on the machine running flashrom.
+# Remote jobs pass those as uploads (inputs) or outputs, never as paths.
+INPUT_OPTIONS = ("-w", "--write", "-v", "--verify", "-l", "--layout", "--fmap-file")
+OUTPUT_OPTIONS = ("-r", "--read", "-o", "--output")
+
+# Other options a remote job may use, with and without a value. Anything
+# else is refused: flashrom has more options that read or write a path
+# (--flash-contents, --wp-region with a layout, ...), and the agent must
+# not hand its own files to a client.
+VALUE_OPTIONS = ("-p", "--programmer", "-c", "--chip", "-i", "--include")
+FLAG_OPTIONS = ("-E", "--erase", "-n", "--noverify", "-N", "--noverify-all", "-f", "--force",
+                "--ifd", "--fmap", "--progress", "--flash-name", "--flash-size")
+
+# Programmer parameters that name a file or device on the agent.
+PATH_PARAMETERS = ("dev", "image", "file", "path")
+
+_FRAME = struct.Struct(">II")
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class AgentError(OSError):
+    """Protocol violation, or an error reported by the other end."""
+
+
+def send_frame(sock, header, payload=b""):
+    data = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(data), len(payload)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if not count:
+            if received:
+                raise AgentError("Connection closed in the middle of a frame")
+            return None
+        received += count
+    return bytes(buffer)
+
+
+def recv_frame(sock):
+    """(header, payload), or None once the other end has closed the connection."""
+    head = _recv_exact(sock, _FRAME.size)
+    if head is None:
+        return None
+    header_size, payload_size = _FRAME.unpack(head)
+    if header_size > MAX_HEADER or payload_size > MAX_PAYLOAD:
+        raise AgentError("Frame too large")
+    data = _recv_exact(sock, header_size) if header_size else None
+    payload = _recv_exact(sock, payload_size) if payload_size else b""
+    if data is None or payload is None:
+        raise AgentError("Connection closed in the middle of a frame")
+    try:
+        header = json.loads(data)
+    except ValueError:
+        raise AgentError("Malformed frame header")
+    if not isinstance(header, dict):
+        raise AgentError("Malformed frame header")
+    return header, payload
+
+
+class Channel:
+    """A connected socket; sends from several threads never interleave frames."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._send_lock = threading.Lock()
+
+    def send(self, header, payload=b""):
+        with self._send_lock:
+            send_frame(self.sock, header, payload)
+
+    def recv(self):
+        return recv_frame(self.sock)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class UploadCache:
+    """Images received by the agent, stored by SHA-256 and shared by all connections."""
+
+    def __init__(self, root=None, max_bytes=UPLOAD_CACHE_BYTES):
+        self.root = root or os.path.join(user_cache_dir(), "agent-uploads")
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path(self, sha256):
+        if not isinstance(sha256, str) or not _SHA256_RE.match(sha256):
+            raise AgentError("Bad SHA-256")
+        return os.path.join(self.root, sha256)
+
+    def use(self, sha256):
+        """Path of a cached upload, marked as recently used; None if it is not here."""
+        path = self.path(sha256)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def begin(self, sha256, size):
+        return _Upload(self, sha256, size)
+
+    def commit(self, upload):
+        os.replace(upload.tmp_path, self.path(upload.sha256))
+        self.prune()
+
+    def prune(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                if _SHA256_RE.match(name):
+                    st = os.stat(os.path.join(self.root, name))
+                    entries.append((st.st_mtime, st.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            cutoff = time.time() - UPLOAD_KEEP_SECONDS
+            for mtime, size, name in sorted(entries):
+                if total <= self.max_bytes or mtime > cutoff:
+                    break
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError:
+                    continue
+                total -= size
+
+
+class _Upload:
+    """One image arriving in chunks; checked per chunk (CRC-32) and as a whole (SHA-256)."""
+
+    def __init__(self, cache, sha256, size):
+        cache.path(sha256)
+        self.sha256 = sha256
+        self.size = size
+        self.received = 0
+        self.error = None
+        self._digest = hashlib.sha256()
+        fd, self.tmp_path = tempfile.mkstemp(dir=cache.root, prefix=".upload-")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, offset, data, crc32):
+        if self.error is not None:
+            return
+        if offset != self.received or self.received + len(data) > self.size:
+            self.error = f"Unexpected chunk at offset {offset}"
+        elif zlib.crc32(data) != crc32:
+            self.error = f"Checksum mismatch in the chunk at offset {offset}"
+        else:
+            self._file.write(data)
+            self._digest.update(data)
+            self.received += len(data)
+
+    def finish(self):
+        """Raises AgentError unless every byte arrived intact."""
+        self._file.close()
+        if self.error is None and self.received != self.size:
+            self.error = f"Received {self.received} of {self.size} bytes"
+        if self.error is None and self._digest.hexdigest() != self.sha256:
+            self.error = "Checksum mismatch: SHA-256 of the upload differs"
+        if self.error is not None:
+            self.abort()
+            raise AgentError(self.error)
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+class AgentSession:
+    """
+    One client connection on the agent.
+
+    Jobs keep running if the client goes away: stopping a write halfway
+    because a laptop lost its Wi-Fi would be worse than finishing it.
+    Their output files are deleted once the last job is done.
+
+    Frames go out on a sender thread. Job output and progress are queued
+    from flashrom's output reader, which must never wait for the network:
+    a full pipe would stall flashrom in the middle of a write. A client
+    that stops reading gets merged, then dropped output, and is
+    disconnected once a frame has been stuck for SEND_TIMEOUT.
+    """
+
+    def __init__(self, server, sock, address):
+        self.server = server
+        self.channel = Channel(sock)
+        self.address = address
+        self.workdir = tempfile.mkdtemp(prefix="session-", dir=server.workroot)
+        self.connected = True
+        self.jobs = {}
+        self.uploads = {}
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._outbox = collections.deque()
+        self._outbox_changed = threading.Condition()
+        self._sending_since = None
+        threading.Thread(target=self._send_loop, daemon=True).start()
+        threading.Thread(target=self._watch_sends, daemon=True).start()
+
+    def send(self, header, payload=b"", droppable=False, block=False):
+        """
+        Queue a frame. droppable frames (output, progress) may be merged or
+        dropped when the client is slow; block=True waits for room in the
+        queue instead, for senders that may wait (downloads).
+        """
+        with self._outbox_changed:
+            while self.connected:
+                if not block or len(self._outbox) < SEND_QUEUE_FRAMES:
+                    self._queue(header, payload, droppable)
+                    return
+                self._outbox_changed.wait()
+
+    def _queue(self, header, payload, droppable):
+        last = self._outbox[-1][0] if self._outbox else {}
+        kind = header.get("type")
+        if droppable and kind == last.get("type") and header["job"] == last.get("job"):
+            if kind == "progress":
+                self._outbox[-1] = (header, payload)
+                return
+            if header["stream"] == last["stream"] and len(last["text"]) < OUTPUT_COALESCE_BYTES:
+                last["text"] += header["text"]
+                return
+        if droppable and len(self._outbox) >= SEND_QUEUE_FRAMES:
+            self._dropped += 1
+            return
+        if kind == "output" and self._dropped:
+            header["text"] = f"[agent: {self._dropped} output message(s) dropped, the connection is too slow]\n" \
+                + header["text"]
+            self._dropped = 0
+        self._outbox.append((header, payload))
+        self._outbox_changed.notify_all()
+
+    def _send_loop(self):
+        while True:
+            with self._outbox_changed:
+                while self.connected and not self._outbox:
+                    self._outbox_changed.wait()
+                if not self.connected:
+                    return
+                header, payload = self._outbox.popleft()
+                self._sending_since = time.monotonic()
+            try:
+                self.channel.send(header, payload)
+            except OSError:
+                self._disconnect()
+                return
+            with self._outbox_changed:
+                self._sending_since = None
+                self._outbox_changed.notify_all()
+
+    def _watch_sends(self):
+        with self._outbox_changed:
+            while self.connected:
+                if self._sending_since is not None and time.monotonic() - self._sending_since > SEND_TIMEOUT:
+                    break
+                self._outbox_changed.wait(min(1.0, SEND_TIMEOUT))
+            else:
+                return
+        self._disconnect()
+
+    def _flush(self, timeout=SEND_TIMEOUT):
+        """Wait until queued frames are sent, e.g. an error before closing."""
+        deadline = time.monotonic() + timeout
+        with self._outbox_changed:
+            while self.connected and (self._outbox or self._sending_since is not None):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._outbox_changed.wait(remaining)
+
+    def _disconnect(self):
+        with self._outbox_changed:
+            self.connected = False
+            self._outbox.clear()
+            self._outbox_changed.notify_all()
+        # Wakes the sender and the reader if they are stuck in the socket
+        self.channel.close()
+
+    def run(self):
+        try:
+            if not self._handshake():
+                return
+            while True:
+                frame = self.channel.recv()
+                if frame is None:
+                    break
+                header, payload = frame
+                handler = getattr(self, "_on_" + str(header.get("type")), None)
+                try:
+                    if handler is None:
+                        raise AgentError(f"Unknown request {header.get('type')!r}")
+                    handler(header, payload)
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    self.send({"id": header.get("id"), "error": str(e)})
+        except OSError:
+            pass
+        finally:
+            self._flush()
+            self._disconnect()
+            for upload in self.uploads.values():
+                upload.abort()
+            self._cleanup()
+
+    def _handshake(self):
+        frame = self.channel.recv()
+        if frame is None:
+            return False
+        hello = frame[0]
+        token = self.server.token
+        if hello.get("type") != "hello" or hello.get("version") != PROTOCOL_VERSION:
+            self.send({"error": f"Expected a version {PROTOCOL_VERSION} hello"})
+            return False
+        if token and not hmac.compare_digest(str(hello.get("token") or "").encode(), token.encode()):
+            self.send({"error": "Wrong token"})
+            return False
+        self.send({
+            "type": "welcome",
+            "version": PROTOCOL_VERSION,
+            "name": self.server.name,
+            "programmers": [list(entry) for entry in discover()],
+        })
+        return True
+
+    def _on_programmers(self, header, payload):
+        self.send({"id": header["id"], "programmers": [list(entry) for entry in discover()]})
+
+    def _on_upload(self, header, payload):
+        sha256 = header["sha256"]
+        if self.server.uploads.use(sha256) is not None:
+            self.send({"id": header["id"], "have": True})
+            return
+        self.uploads[header["id"]] = self.server.uploads.begin(sha256, int(header["size"]))
+        self.send({"id": header["id"], "have": False})
+
+    def _on_chunk(self, header, payload):
+        upload = self.uploads.get(header["id"])
+        if upload is not None:
+            upload.write(header["offset"], payload, header["crc32"])
+
+    def _on_upload_end(self, header, payload):
+        upload = self.uploads.pop(header["id"], None)
+        if upload is None:
+            raise AgentError("No upload in progress")
+        upload.finish()
+        self.server.uploads.commit(upload)
+        self.send({"id": header["id"], "done": True})
+
+    def _check_programmer(self, programmer):
+        """Refuse parameters naming a path, unless it is a programmer this agent listed."""
+        if programmer in {entry.programmer for entry in discover()}:
+            return
+        _, _, parameters = programmer.partition(":")
+        for parameter in filter(None, parameters.split(",")):
+            key, _, value = parameter.partition("=")
+            if key.strip() in PATH_PARAMETERS or "/" in value or os.sep in value:
+                raise AgentError(f"Programmer parameter {parameter!r} names a path on the agent")
+
+    def _resolve_args(self, args, job_id, outputs):
+        resolved = []
+        for position, item in enumerate(args):
+            previous = args[position - 1] if position else None
+            if isinstance(item, dict) and "upload" in item and previous in INPUT_OPTIONS:
+                path = self.server.uploads.use(item["upload"])
+                if path is None:
+                    raise AgentError(f"Upload {item['upload'][:12]} is not on the agent")
+                resolved.append(path)
+            elif isinstance(item, dict) and "output" in item and previous in OUTPUT_OPTIONS:
+                name = str(item["output"])
+                if not _NAME_RE.match(name):
+                    raise AgentError(f"Bad output name {name!r}")
+                outputs[name] = os.path.join(self.workdir, f"{job_id}-{name}")
+                resolved.append(outputs[name])
+            elif not isinstance(item, str) or previous in INPUT_OPTIONS + OUTPUT_OPTIONS:
+                raise AgentError(f"{previous} takes an upload or an output, not a path")
+            elif previous in VALUE_OPTIONS:
+                self._check_value(previous, item)
+                resolved.append(item)
+            elif item in INPUT_OPTIONS + OUTPUT_OPTIONS + VALUE_OPTIONS + FLAG_OPTIONS or re.match(r"^-V+$", item):
+                resolved.append(item)
+            elif item.startswith("--") and "=" in item:
+                option, value = item.split("=", 1)
+                if option in INPUT_OPTIONS + OUTPUT_OPTIONS:
+                    raise AgentError(f"{option} takes an upload or an output, not a path")
+                if option not in VALUE_OPTIONS:
+                    raise AgentError(f"{option} is not allowed on an agent")
+                self._check_value(option, value)
+                resolved.append(item)
+            elif item.startswith("-"):
+                raise AgentError(f"{item} is not allowed on an agent")
+            else:
+                raise AgentError(f"Unexpected argument {item!r}")
+        if resolved and resolved[-1] in INPUT_OPTIONS + OUTPUT_OPTIONS + VALUE_OPTIONS:
+            raise AgentError(f"{resolved[-1]} needs a value")
+        return resolved
+
+    def _check_value(self, option, value):
+        if option in ("-p", "--programmer"):
+            self._check_programmer(value)
+        elif option in ("-i", "--include") and ":" in value:
+            raise AgentError("-i region:file is not supported on an agent")
+
+    def _on_submit(self, header, payload):
+        job_id = int(header["job"])
+        outputs = {}
+        args = self._resolve_args(header["args"], job_id, outputs)
+        if "-p" not in args:
+            raise AgentError("No programmer (-p) in the arguments")
+        progress = FlashromProgress()
+        last_sent = [0.0, -1]
+
+        def on_output(text, stream):
+            self.send({"type": "output", "job": job_id, "stream": stream, "text": text}, droppable=True)
+            now = time.monotonic()
+            if progress.revision != last_sent[1] and now - last_sent[0] >= PROGRESS_INTERVAL:
+                last_sent[0] = now
+                last_sent[1] = progress.revision
+                self.send({"type": "progress", "job": job_id, "progress": progress.snapshot()}, droppable=True)
+
+        job = self.server.executor.submit(
+            [self.server.flashrom_path] + args,
+            args[args.index("-p") + 1],
+            label=str(header.get("label") or ""),
+            on_output=on_output,
+            on_done=lambda job: self._job_done(job_id, job, outputs),
+            progress=progress,
+            timeout=header.get("timeout"),
+        )
+        with self._lock:
+            self.jobs[job_id] = (job, outputs)
+        self.send({"id": header["id"], "queued": True})
+
+    def _job_done(self, job_id, job, outputs):
+        files = {}
+        for name, path in outputs.items():
+            try:
+                files[name] = {"size": os.path.getsize(path), "sha256": file_sha256(path)}
+            except OSError:
+                pass
+        self.send({
+            "type": "finished",
+            "job": job_id,
+            "state": job.state,
+            "returncode": job.returncode,
+            "error": str(job.error) if job.error else None,
+            "duration": job.duration,
+            "spawn_time": job.spawn_time,
+            "progress": job.progress.snapshot(),
+            "outputs": files,
+        })
+        if not self.connected:
+            self._cleanup()
+
+    def _on_cancel(self, header, payload):
+        with self._lock:
+            entry = self.jobs.get(int(header["job"]))
+        if entry is not None:
+            if header.get("kill"):
+                entry[0].kill()
+            else:
+                entry[0].cancel()
+
+    def _on_download(self, header, payload):
+        with self._lock:
+            entry = self.jobs.get(int(header["job"]))
+        path = entry[1].get(header["name"]) if entry else None
+        if path is None or not entry[0].is_finished:
+            raise AgentError("No such output")
+        # Off the reader thread, so a cancel can still get through
+        threading.Thread(target=self._send_file, args=(header["id"], path), daemon=True).start()
+
+    def _send_file(self, request_id, path):
+        digest = hashlib.sha256()
+        offset = 0
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+                    self.send({"id": request_id, "offset": offset, "crc32": zlib.crc32(chunk)}, chunk, block=True)
+                    digest.update(chunk)
+                    offset += len(chunk)
+        except OSError as e:
+            self.send({"id": request_id, "error": str(e)})
+            return
+        self.send({"id": request_id, "done": True, "size": offset, "sha256": digest.hexdigest()})
+
+    def _cleanup(self):
+        with self._lock:
+            if any(not job.is_finished for job, _ in self.jobs.values()):
+                return
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class _SessionHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        AgentSession(self.server, self.request, self.client_address).run()
+
+
+class AgentServer(socketserver.ThreadingTCPServer):
+    """
+    Bench agent: runs flashrom jobs for remote clients.
+
+    Every message is a frame: two big-endian 32-bit lengths, a JSON header
+    and an optional binary payload. The client opens with a hello (protocol
+    version and token) and gets the agent's name and attached programmers.
+    Requests carry an id that the replies repeat; job events (output,
+    progress, finished) carry the client's job number instead.
+
+    Files never travel as paths. Images for -w/-v/--layout are uploaded in
+    CRC-32 checked chunks and verified by SHA-256, and cached by hash so
+    the next job with the same image skips the transfer; files flashrom
+    writes (-r) are downloaded the same way once the job is done.
+
+    Jobs go through one JobExecutor, so clients share a programmer in turn.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, token=None, executor=None, flashrom_path=None, name=None, uploads=None,
+                 workroot=None):
+        self.token = token
+        self.executor = executor or JobExecutor()
+        self.flashrom_path = flashrom_path or get_flashrom_path()
+        self.name = name or socket.gethostname().split(".")[0]
+        self.uploads = uploads or UploadCache()
+        self.workroot = workroot or os.path.join(user_cache_dir(), "agent-jobs")
+        os.makedirs(self.workroot, exist_ok=True)
+        super().__init__(address, _SessionHandler)
+
+    def shutdown(self):
+        super().shutdown()
+        self.executor.shutdown()
+
+
+class _Request:
+    """Replies to one request; chunked replies arrive in order."""
+
+    def __init__(self, client, request_id):
+        self.client = client
+        self.id = request_id
+        self.replies = queue.Queue()
+
+    def reply(self, timeout=REPLY_TIMEOUT):
+        try:
+            header, payload = self.replies.get(timeout=timeout)
+        except queue.Empty:
+            raise AgentError(f"No answer from agent {self.client.name}")
+        if header is None:
+            raise AgentError(f"Connection to agent {self.client.name} lost")
+        if header.get("error"):
+            raise AgentError(header["error"])
+        return header, payload
+
+    def close(self):
+        with self.client._lock:
+            self.client._requests.pop(self.id, None)
+
+
+class RemoteJob(FlashromJob):
+    """
+    A FlashromJob that runs on an agent: same attributes and callbacks.
+
+    output, progress and on_output are fed from the agent's output stream;
+    remote_progress holds the agent's own latest progress snapshot.
+    """
+
+    def __init__(self, client, cmd, programmer, **kwargs):
+        super().__init__(cmd, programmer, **kwargs)
+        self.client = client
+        self.remote_progress = None
+        self.outputs = {}
+        self._submitted = False
+        self._result = None
+        self._remote_done = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+        if self._submitted:
+            self.client.send_cancel(self.id)
+
+    def kill(self):
+        self._cancel.set()
+        if self._submitted:
+            self.client.send_cancel(self.id, kill=True)
+
+    def _event(self, header):
+        kind = header.get("type")
+        if kind == "output":
+            if self.progress is not None:
+                self.progress.feed(header["text"], header["stream"])
+            self._handle_output(header["text"], header["stream"])
+        elif kind == "progress":
+            self.remote_progress = header["progress"]
+        elif kind == "finished":
+            self.remote_progress = header.get("progress")
+            self._result = header
+            self._remote_done.set()
+
+    def _lost(self):
+        self._result = {"state": ERROR, "error": f"Connection to agent {self.client.name} lost"}
+        self._remote_done.set()
+
+
+class AgentClient:
+    """
+    Connection to one bench agent.
+
+    Requests block the calling thread until the agent answers; replies and
+    job events are read on a single reader thread. submit() takes the same
+    arguments as JobExecutor.submit() and returns a RemoteJob: input files
+    are uploaded first (skipped when the agent already has the image),
+    and output files are downloaded before on_done runs.
+    """
+
+    def __init__(self, host, port=DEFAULT_PORT, token=None, name=None, timeout=10):
+        sock = socket.create_connection((host, port), timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.channel = Channel(sock)
+        try:
+            self.channel.send({
+                "type": "hello",
+                "version": PROTOCOL_VERSION,
+                "token": token or os.environ.get("FLASHROM_AGENT_TOKEN"),
+            })
+            frame = self.channel.recv()
+            if frame is None:
+                raise AgentError(f"{host}:{port} closed the connection")
+            if frame[0].get("error"):
+                raise AgentError(frame[0]["error"])
+        except OSError:
+            self.channel.close()
+            raise
+        sock.settimeout(None)
+        welcome = frame[0]
+        self.host = host
+        self.port = port
+        self.name = name or welcome["name"]
+        self.programmers = [Programmer(*entry) for entry in welcome["programmers"]]
+        self.connected = True
+        self.on_disconnect = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._jobs = {}
+        self._hashes = {}
+        threading.Thread(target=self._read, daemon=True).start()
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    def _read(self):
+        try:
+            while True:
+                frame = self.channel.recv()
+                if frame is None:
+                    break
+                header, payload = frame
+                if "job" in header and "type" in header:
+                    with self._lock:
+                        job = self._jobs.get(header["job"])
+                    if job is not None:
+                        job._event(header)
+                    continue
+                with self._lock:
+                    request = self._requests.get(header.get("id"))
+                if request is not None:
+                    request.replies.put((header, payload))
+        except OSError:
+            pass
+        finally:
+            self.connected = False
+            with self._lock:
+                requests = list(self._requests.values())
+                jobs = list(self._jobs.values())
+            for request in requests:
+                request.replies.put((None, b""))
+            for job in jobs:
+                job._lost()
+            if self.on_disconnect:
+                self.on_disconnect(self)
+
+    def request(self, header, payload=b""):
+        if not self.connected:
+            raise AgentError(f"Not connected to agent {self.name}")
+        request = _Request(self, next(self._ids))
+        with self._lock:
+            self._requests[request.id] = request
+        try:
+            self.channel.send(dict(header, id=request.id), payload)
+        except OSError:
+            request.close()
+            raise
+        return request
+
+    def call(self, header):
+        request = self.request(header)
+        try:
+            return request.reply()[0]
+        finally:
+            request.close()
+
+    def list_programmers(self):
+        self.programmers = [Programmer(*entry) for entry in self.call({"type": "programmers"})["programmers"]]
+        return self.programmers
+
+    def upload(self, path):
+        """Send a file to the agent unless it already has it; returns its SHA-256."""
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        sha256 = self._hashes.get(key) or file_sha256(path)
+        self._hashes[key] = sha256
+        for attempt in range(2):
+            request = self.request({"type": "upload", "sha256": sha256, "size": st.st_size})
+            try:
+                if request.reply()[0].get("have"):
+                    return sha256
+                with open(path, "rb") as f:
+                    offset = 0
+                    for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+                        self.channel.send(
+                            {"type": "chunk", "id": request.id, "offset": offset, "crc32": zlib.crc32(chunk)}, chunk
+                        )
+                        offset += len(chunk)
+                self.channel.send({"type": "upload_end", "id": request.id})
+                request.reply()
+                return sha256
+            except AgentError as e:
+                # One retry for a transfer that arrived damaged
+                if attempt or "Checksum" not in str(e):
+                    raise
+            finally:
+                request.close()
+
+    def download(self, job_id, name, path):
+        """Fetch an output file of a finished job, checking every chunk and the whole file."""
+        request = self.request({"type": "download", "job": job_id, "name": name})
+        digest = hashlib.sha256()
+        received = 0
+        try:
+            with open(path, "wb") as f:
+                while True:
+                    header, payload = request.reply()
+                    if header.get("done"):
+                        break
+                    if header["offset"] != received or zlib.crc32(payload) != header["crc32"]:
+                        raise AgentError(f"Checksum mismatch downloading {name} at offset {received}")
+                    f.write(payload)
+                    digest.update(payload)
+                    received += len(payload)
+        finally:
+            request.close()
+        if received != header["size"] or digest.hexdigest() != header["sha256"]:
+            raise AgentError(f"Checksum mismatch: {path} differs from the agent's copy")
+
+    def send_cancel(self, job_id, kill=False):
+        try:
+            self.channel.send({"type": "cancel", "job": job_id, "kill": kill})
+        except OSError:
+            pass
+
+    def _remote_args(self, job):
+        args = job.cmd[1:]
+        remote = []
+        for position, item in enumerate(args):
+            previous = args[position - 1] if position else None
+            if previous in INPUT_OPTIONS:
+                remote.append({"upload": self.upload(item)})
+            elif previous in OUTPUT_OPTIONS:
+                name = f"file{len(job.outputs)}"
+                job.outputs[name] = item
+                remote.append({"output": name})
+            elif previous == "-p":
+                remote.append(split_remote(item)[0])
+            else:
+                remote.append(item)
+        return remote
+
+    def submit(self, cmd, programmer, **kwargs):
+        job = RemoteJob(self, cmd, programmer, **kwargs)
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job
+
+    def _run(self, job):
+        try:
+            args = self._remote_args(job)
+            if job._cancel.is_set():
+                job.state = CANCELLED
+                return
+            with self._lock:
+                self._jobs[job.id] = job
+            job.state = RUNNING
+            job.started = time.monotonic()
+            self.call({"type": "submit", "job": job.id, "args": args, "label": job.label, "timeout": job.timeout})
+            job._submitted = True
+            if job._cancel.is_set():
+                self.send_cancel(job.id)
+            job._remote_done.wait()
+            result = job._result
+            job.returncode = result.get("returncode")
+            job.spawn_time = result.get("spawn_time")
+            if result.get("error"):
+                job.error = AgentError(result["error"])
+            if result["state"] == DONE:
+                for name, path in job.outputs.items():
+                    if name in result.get("outputs", {}):
+                        self.download(job.id, name, path)
+            job.state = result["state"]
+        except Exception as e:
+            job.error = e
+            job.state = ERROR
+        finally:
+            job.finished = time.monotonic()
+            if job._result and job._result.get("duration") is not None:
+                # Time on the agent, not including uploads and queueing
+                job.started = job.finished - job._result["duration"]
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            job._done.set()
+            if job.on_done:
+                job.on_done(job)
+
+    def active_jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def close(self):
+        self.connected = False
+        self.channel.close()
+
+
+def parse_address(text):
+    """(host, port) from "host", "host:port" or "[v6]:port"."""
+    host, port = text, DEFAULT_PORT
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        if rest.startswith(":"):
+            port = int(rest[1:])
+    elif text.count(":") == 1:
+        host, port = text.split(":")
+        port = int(port)
+    return host, port
+
+
+def _is_loopback(host):
+    try:
+        return all(
+            info[4][0].startswith("127.") or info[4][0] == "::1"
+            for info in socket.getaddrinfo(host, None)
+        )
+    except OSError:
+        return False
+
+
+def _serve(args):
+    token = args.token or os.environ.get("FLASHROM_AGENT_TOKEN")
+    if not token and not _is_loopback(args.host):
+        print("Error: a token (--token or FLASHROM_AGENT_TOKEN) is required off localhost", file=sys.stderr)
+        return 2
+    telemetry = oplog = None
+    if not args.no_history:
+        from flashrom_oplog import OperationLog
+        from flashrom_telemetry import TelemetryStore
+        telemetry = TelemetryStore()
+        oplog = OperationLog()
+    try:
+        server = AgentServer((args.host, args.port), token, JobExecutor(telemetry=telemetry, oplog=oplog),
+                             args.flashrom, args.name)
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    host, port = server.server_address[:2]
+    print(f"Agent {server.name} listening on {host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.executor.shutdown()
+    return 0
+
+
+def _run_command(args):
+    try:
+        client = AgentClient(*parse_address(args.agent), token=args.token)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if not args.flashrom_args:
+        for entry in client.programmers:
+            print(f"{entry.programmer:<40} {entry.description}")
+        client.close()
+        return 0
+
+    flashrom_args = args.flashrom_args[1:] if args.flashrom_args[0] == "--" else args.flashrom_args
+    if "-p" not in flashrom_args:
+        print("Error: -p is required", file=sys.stderr)
+        client.close()
+        return 2
+    programmer = flashrom_args[flashrom_args.index("-p") + 1]
+    job = client.submit(
+        ["flashrom"] + flashrom_args, programmer,
+        on_output=lambda text, stream: (sys.stdout if stream == "stdout" else sys.stderr).write(text)
+    )
+    try:
+        job.wait()
+    except KeyboardInterrupt:
+        job.cancel()
+        job.wait()
+    sys.stdout.flush()
+    if job.error is not None:
+        print(f"Error: {job.error}", file=sys.stderr)
+    client.close()
+    return job.returncode if job.returncode is not None else 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run flashrom jobs on a bench machine for remote clients")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the agent next to the programmers")
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on (default: localhost only)")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--token", help="shared secret clients must send (also FLASHROM_AGENT_TOKEN)")
+    serve.add_argument("--name", help="agent name shown to clients (default: host name)")
+    serve.add_argument("--flashrom", help="path to the flashrom executable")
+    serve.add_argument("--no-history", action="store_true", help="do not keep timings and output on the agent")
+    run = commands.add_parser("run", help="run one flashrom command on an agent; files are transferred")
+    run.add_argument("agent", help="HOST[:PORT]")
+    run.add_argument("--token", help="agent token (also FLASHROM_AGENT_TOKEN)")
+    run.add_argument("flashrom_args", nargs=argparse.REMAINDER,
+                     help="flashrom arguments, e.g. -- -p dummy -r dump.bin; none lists the programmers")
+    args = parser.parse_args(argv)
+    return _serve(args) if args.command == "serve" else _run_command(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# flashrom_agent_pool.py
+# Apart from flashrom_agent so the GUI can start with an AgentPool without
+# loading the agent protocol (sockets, zlib, ...) until an agent is connected.
+import threading
+
+from flashrom_discovery import Programmer
+from flashrom_jobs import ERROR, FlashromJob
+
+
+def split_remote(programmer):
+    """("ch341a_spi", "bench2") for "ch341a_spi@bench2"; (programmer, None) for a local one."""
+    name, at, agent = programmer.rpartition("@")
+    if at and name and agent:
+        return name, agent
+    return programmer, None
+
+
+class AgentPool:
+    """
+    Job executor spanning the local JobExecutor and connected agents.
+
+    Programmers named "<programmer>@<agent>" run on that agent, anything
+    else locally; submit(), is_busy() and shutdown() behave like
+    JobExecutor's, so the rest of the GUI does not care where a job runs.
+    Jobs on agents are recorded in the local executor's telemetry and
+    operation log too, so the history on the desk covers every bench.
+    """
+
+    def __init__(self, local):
+        self.local = local
+        self.agents = {}
+        self._lock = threading.Lock()
+
+    def add(self, client):
+        with self._lock:
+            old = self.agents.get(client.name)
+            self.agents[client.name] = client
+        if old is not None and old is not client:
+            old.close()
+
+    def remove(self, name):
+        with self._lock:
+            client = self.agents.pop(name, None)
+        if client is not None:
+            client.close()
+
+    def clients(self):
+        with self._lock:
+            return list(self.agents.values())
+
+    def remote_programmers(self):
+        """Programmer entries of every connected agent, as "<programmer>@<agent>"."""
+        return [
+            Programmer(f"{entry.programmer}@{client.name}", f"{entry.description} on {client.name}", "agent")
+            for client in self.clients() if client.connected
+            for entry in client.programmers
+        ]
+
+    def submit(self, cmd, programmer, **kwargs):
+        name, agent = split_remote(programmer)
+        if agent is None:
+            return self.local.submit(cmd, programmer, **kwargs)
+        with self._lock:
+            client = self.agents.get(agent)
+        if client is None or not client.connected:
+            from flashrom_agent import AgentError
+            return self._failed(cmd, programmer, AgentError(f"Not connected to agent {agent}"), kwargs)
+        if self.local.oplog is not None:
+            kwargs["collect_output"] = True
+        on_done = kwargs.get("on_done")
+
+        def finished(job):
+            self.local.record(job)
+            if on_done:
+                on_done(job)
+
+        kwargs["on_done"] = finished
+        return client.submit(cmd, programmer, **kwargs)
+
+    def _failed(self, cmd, programmer, error, kwargs):
+        job = FlashromJob(cmd, programmer, **kwargs)
+        job.error = error
+        job.state = ERROR
+
+        def finish():
+            job._done.set()
+            if job.on_done:
+                job.on_done(job)
+
+        threading.Thread(target=finish, daemon=True).start()
+        return job
+
+    def active_jobs(self):
+        jobs = self.local.active_jobs()
+        for client in self.clients():
+            jobs += client.active_jobs()
+        return jobs
+
+    def is_busy(self, programmer=None):
+        return any(programmer is None or job.programmer == programmer for job in self.active_jobs())
+
+    def cancel_all(self, kill=False):
+        for job in self.active_jobs():
+            if kill:
+                job.kill()
+            else:
+                job.cancel()
+
+    def shutdown(self):
+        for client in self.clients():
+            for job in client.active_jobs():
+                job.cancel()
+        self.local.shutdown()
+        for client in self.clients():
+            client.close()
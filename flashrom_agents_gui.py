@@ -0,0 +1,86 @@
+# flashrom_agents_gui.py
+import wx
+
+# Milliseconds between refreshes of the agent list.
+REFRESH_INTERVAL = 1000
+
+
+class AgentsFrame(wx.Frame):
+    """Connected bench agents; their programmers show up as "<programmer>@<agent>"."""
+
+    COLUMNS = (("Agent", 120), ("Address", 170), ("Programmers", 260), ("Jobs", 50))
+
+    def __init__(self, parent, pool, connect, on_changed):
+        super().__init__(parent, title="Bench Agents", size=wx.Size(680, 320))
+        self.pool = pool
+        self.connect = connect
+        self.on_changed = on_changed
+        self.clients = []
+        panel = wx.Panel(self)
+
+        self.address_ctrl = wx.TextCtrl(panel, style=wx.TE_PROCESS_ENTER)
+        self.address_ctrl.SetHint("host[:port]")
+        self.connect_button = wx.Button(panel, label="Connect")
+        self.disconnect_button = wx.Button(panel, label="Disconnect")
+        self.disconnect_button.SetToolTip("Jobs already running on the agent still finish there")
+        self.agent_list = wx.ListCtrl(panel, style=wx.LC_REPORT | wx.LC_SINGLE_SEL)
+        for index, (title, width) in enumerate(self.COLUMNS):
+            self.agent_list.InsertColumn(index, title, width=width)
+        self.summary = wx.StaticText(panel, label="Token: FLASHROM_AGENT_TOKEN")
+
+        toolbar = wx.BoxSizer(wx.HORIZONTAL)
+        toolbar.Add(self.address_ctrl, 1, wx.RIGHT, 5)
+        toolbar.Add(self.connect_button, 0, wx.RIGHT, 5)
+        toolbar.Add(self.disconnect_button, 0)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(toolbar, 0, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(self.agent_list, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+        sizer.Add(self.summary, 0, wx.EXPAND | wx.ALL, 10)
+        panel.SetSizer(sizer)
+
+        self.timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, lambda event: self.refresh(), self.timer)
+        self.Bind(wx.EVT_BUTTON, self.on_connect, self.connect_button)
+        self.Bind(wx.EVT_TEXT_ENTER, self.on_connect, self.address_ctrl)
+        self.Bind(wx.EVT_BUTTON, self.on_disconnect, self.disconnect_button)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+        self.timer.Start(REFRESH_INTERVAL)
+        self.refresh()
+
+    def refresh(self):
+        clients = [client for client in self.pool.clients() if client.connected]
+        rows = [
+            (client.name, client.address, ", ".join(entry.programmer for entry in client.programmers) or "-",
+             str(len(client.active_jobs())))
+            for client in clients
+        ]
+        selected = self.agent_list.GetFirstSelected()
+        selected = self.clients[selected].name if 0 <= selected < len(self.clients) else None
+        self.clients = clients
+        self.agent_list.DeleteAllItems()
+        for row, values in enumerate(rows):
+            self.agent_list.InsertItem(row, values[0])
+            for column, value in enumerate(values[1:], 1):
+                self.agent_list.SetItem(row, column, value)
+            if values[0] == selected:
+                self.agent_list.Select(row)
+
+    def on_connect(self, event):
+        address = self.address_ctrl.GetValue().strip()
+        if address:
+            # Success and failure are reported in the main log
+            self.connect([address])
+            self.address_ctrl.Clear()
+
+    def on_disconnect(self, event):
+        row = self.agent_list.GetFirstSelected()
+        if not 0 <= row < len(self.clients):
+            return
+        self.pool.remove(self.clients[row].name)
+        self.refresh()
+        self.on_changed()
+
+    def on_close(self, event):
+        self.timer.Stop()
+        event.Skip()
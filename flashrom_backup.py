@@ -0,0 +1,322 @@
+# flashrom_backup.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+
+from flashrom_paths import user_data_dir
+
+# Chunk boundaries fall on 64 KiB erase blocks, so a changed NVRAM
+# variable or serial number only adds the block it lives in.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+COMPRESS_LEVEL = 6
+
+MANIFEST_FORMAT = 1
+
+
+class BackupStore:
+    """
+    Content-addressed store for chip dumps.
+
+    Dumps are cut into chunk_size pieces; each distinct piece is stored
+    once, zlib-compressed, under chunks/<sha256>. A JSON manifest per dump
+    lists its chunks with chip, programmer, time and the sha256 of the
+    whole image, and images.json maps image hashes to manifests so "have
+    we seen this firmware before" is a single lookup.
+    """
+
+    def __init__(self, root=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.root = root or os.path.join(user_data_dir(), "backups")
+        self.chunk_size = chunk_size
+        self.chunk_dir = os.path.join(self.root, "chunks")
+        self.manifest_dir = os.path.join(self.root, "manifests")
+        self.index_path = os.path.join(self.root, "images.json")
+        self._lock = threading.Lock()
+        # Writers that have not finished; their chunks are not in a manifest yet
+        self._open_writers = set()
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_json(self, path, data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def put_chunk(self, data):
+        """Store one chunk unless it is already there; returns (sha256, bytes written)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        compressed = zlib.compress(data, COMPRESS_LEVEL)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        return digest, len(compressed)
+
+    def get_chunk(self, digest):
+        with open(self._chunk_path(digest), "rb") as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Chunk {digest[:16]} is corrupt")
+        return data
+
+    def writer(self, chip="", programmer="", source="read"):
+        writer = BackupWriter(self, chip, programmer, source)
+        with self._lock:
+            self._open_writers.add(writer)
+        return writer
+
+    def _close_writer(self, writer):
+        with self._lock:
+            self._open_writers.discard(writer)
+
+    def ingest_file(self, path, chip="", programmer="", source="import"):
+        writer = self.writer(chip, programmer, source)
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    writer.write(block)
+            return writer.finish()
+        except BaseException:
+            writer.abort()
+            raise
+
+    def _chunks_in_use(self):
+        """Chunks referenced by a manifest or an unfinished writer; call with _lock held."""
+        in_use = set()
+        for name in os.listdir(self.manifest_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(self.manifest_dir, name), "r", encoding="utf-8") as f:
+                    in_use.update(json.load(f)["chunks"])
+        for writer in self._open_writers:
+            in_use.update(writer.chunks)
+        return in_use
+
+    def _remove_chunks(self, digests):
+        for digest in digests:
+            try:
+                os.remove(self._chunk_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _add_manifest(self, manifest):
+        with self._lock:
+            self._write_json(os.path.join(self.manifest_dir, manifest["id"] + ".json"), manifest)
+            index = self._load_index()
+            earlier = index.setdefault(manifest["sha256"], [])
+            seen_before = list(earlier)
+            earlier.append(manifest["id"])
+            self._write_json(self.index_path, index)
+        return seen_before
+
+    def find_image(self, sha256):
+        """Manifest ids of earlier backups with exactly this content."""
+        with self._lock:
+            return list(self._load_index().get(sha256, ()))
+
+    def manifest(self, backup_id):
+        with open(os.path.join(self.manifest_dir, backup_id + ".json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def manifests(self):
+        """All manifests, newest first (without their chunk lists)."""
+        entries = []
+        for name in os.listdir(self.manifest_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                manifest = self.manifest(name[:-5])
+            except (OSError, ValueError):
+                continue
+            manifest.pop("chunks", None)
+            entries.append(manifest)
+        entries.sort(key=lambda manifest: manifest["time"], reverse=True)
+        return entries
+
+    def restore(self, backup_id, path):
+        """Rebuild a dump into path and check its hash; returns the manifest."""
+        manifest = self.manifest(backup_id)
+        digest = hashlib.sha256()
+        tmp_path = path + ".restore.tmp"
+        # Dumps repeat the same erased or padding chunk many times
+        last_digest = last_data = None
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in manifest["chunks"]:
+                    if chunk != last_digest:
+                        last_digest, last_data = chunk, self.get_chunk(chunk)
+                    f.write(last_data)
+                    digest.update(last_data)
+            if digest.hexdigest() != manifest["sha256"]:
+                raise ValueError(f"Restored image does not match backup {backup_id}")
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return manifest
+
+    def delete(self, backup_id):
+        """Remove a manifest; chunks no other manifest uses are removed too."""
+        manifest = self.manifest(backup_id)
+        with self._lock:
+            os.remove(os.path.join(self.manifest_dir, backup_id + ".json"))
+            index = self._load_index()
+            ids = [other for other in index.get(manifest["sha256"], ()) if other != backup_id]
+            if ids:
+                index[manifest["sha256"]] = ids
+            else:
+                index.pop(manifest["sha256"], None)
+            self._write_json(self.index_path, index)
+            self._remove_chunks(set(manifest["chunks"]) - self._chunks_in_use())
+
+    def disk_usage(self):
+        """(bytes stored on disk, bytes the manifests describe)."""
+        stored = 0
+        for folder, _, names in os.walk(self.chunk_dir):
+            stored += sum(os.path.getsize(os.path.join(folder, name)) for name in names)
+        logical = sum(manifest["size"] for manifest in self.manifests())
+        return stored, logical
+
+
+class BackupWriter:
+    """
+    Accepts a dump in pieces of any size, as they arrive from flashrom,
+    and stores it chunk by chunk; nothing is staged on disk. Call finish()
+    to keep the dump or abort() to drop the chunks it added.
+    """
+
+    def __init__(self, store, chip, programmer, source):
+        self.store = store
+        self.chip = chip
+        self.programmer = programmer
+        self.source = source
+        self.chunks = []
+        self.created = []
+        self.size = 0
+        self.new_chunks = 0
+        self.stored_bytes = 0
+        self._digest = hashlib.sha256()
+        self._pending = bytearray()
+
+    def write(self, data):
+        self._digest.update(data)
+        self.size += len(data)
+        self._pending += data
+        chunk_size = self.store.chunk_size
+        if len(self._pending) < chunk_size:
+            return
+        view = memoryview(self._pending)
+        full = len(self._pending) // chunk_size * chunk_size
+        for offset in range(0, full, chunk_size):
+            self._store(view[offset:offset + chunk_size])
+        view.release()
+        del self._pending[:full]
+
+    def _store(self, data):
+        digest, written = self.store.put_chunk(data)
+        self.chunks.append(digest)
+        if written:
+            self.created.append(digest)
+            self.new_chunks += 1
+            self.stored_bytes += written
+
+    def finish(self):
+        """Store the tail and the manifest; returns the manifest dict."""
+        if self._pending:
+            self._store(bytes(self._pending))
+            self._pending.clear()
+        if not self.size:
+            raise ValueError("Nothing was read")
+        sha256 = self._digest.hexdigest()
+        now = time.time()
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            # The random part keeps two dumps of one image in the same second apart
+            "id": time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{sha256[:12]}-{os.urandom(3).hex()}",
+            "time": now,
+            "chip": self.chip,
+            "programmer": self.programmer,
+            "source": self.source,
+            "size": self.size,
+            "sha256": sha256,
+            "chunk_size": self.store.chunk_size,
+            "chunks": self.chunks,
+        }
+        manifest["seen_before"] = self.store._add_manifest(manifest)
+        self.store._close_writer(self)
+        manifest["new_chunks"] = self.new_chunks
+        manifest["stored_bytes"] = self.stored_bytes
+        return manifest
+
+    def abort(self):
+        """
+        Drop an unfinished dump: remove the chunks this writer added,
+        unless a manifest or another writer has come to use them.
+        """
+        store = self.store
+        with store._lock:
+            store._open_writers.discard(self)
+            store._remove_chunks(set(self.created) - store._chunks_in_use())
+        self.created = []
+        self._pending.clear()
+
+
+class FifoSink:
+    """
+    Named pipe that flashrom -r writes into while a thread feeds the data
+    to a BackupWriter. Only available where os.mkfifo exists.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.directory = tempfile.mkdtemp(prefix="flashromgui-")
+        self.path = os.path.join(self.directory, "dump.bin")
+        os.mkfifo(self.path, 0o600)
+        self.received = 0
+        self.error = None
+        self._opened = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            with open(self.path, "rb", buffering=0) as f:
+                self._opened.set()
+                for block in iter(lambda: f.read(1 << 16), b""):
+                    self.received += len(block)
+                    self.writer.write(block)
+        except Exception as e:
+            self.error = e
+
+    def close(self, timeout=30):
+        """Wait for the data; returns True if flashrom wrote anything."""
+        if not self._opened.is_set():
+            # flashrom never opened the pipe; unblock the reader's open()
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+                os.close(fd)
+            except OSError:
+                pass
+        self._thread.join(timeout)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        return self.received > 0 and self.error is None
@@ -0,0 +1,147 @@
+# flashrom_backup_gui.py
+import os
+import threading
+import time
+import wx
+from flashrom_diff import file_sha256
+from flashrom_paths import user_cache_dir
+
+
+class BackupFrame(wx.Frame):
+    """Lists dumps in the backup store; restores them to a file or the chip."""
+
+    COLUMNS = ("Time", "Chip", "Programmer", "Size", "SHA-256", "Source")
+
+    def __init__(self, parent, store, on_write_image=None):
+        super().__init__(parent, title="Backups", size=wx.Size(900, 400))
+        self.store = store
+        self.on_write_image = on_write_image
+        self.entries = []
+        panel = wx.Panel(self)
+
+        self.grid = wx.ListCtrl(panel, style=wx.LC_REPORT | wx.LC_SINGLE_SEL)
+        for index, title in enumerate(self.COLUMNS):
+            self.grid.InsertColumn(index, title, width=150 if index < 3 else 110)
+        self.summary = wx.StaticText(panel, label="")
+        self.restore_button = wx.Button(panel, label="Restore...")
+        self.write_button = wx.Button(panel, label="Write to chip")
+        self.delete_button = wx.Button(panel, label="Delete")
+
+        buttons = wx.BoxSizer(wx.HORIZONTAL)
+        buttons.Add(self.summary, 1, wx.ALIGN_CENTER_VERTICAL)
+        buttons.Add(self.restore_button, 0, wx.RIGHT, 5)
+        buttons.Add(self.write_button, 0, wx.RIGHT, 5)
+        buttons.Add(self.delete_button, 0)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.grid, 1, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(buttons, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
+        panel.SetSizer(sizer)
+
+        self.Bind(wx.EVT_BUTTON, self.on_restore, self.restore_button)
+        self.Bind(wx.EVT_BUTTON, self.on_write, self.write_button)
+        self.Bind(wx.EVT_BUTTON, self.on_delete, self.delete_button)
+        self.write_button.Enable(on_write_image is not None)
+        self.refresh()
+
+    def refresh(self):
+        self.summary.SetLabel("Loading...")
+
+        def task():
+            try:
+                entries = self.store.manifests()
+                usage = self.store.disk_usage()
+                wx.CallAfter(self.on_loaded, entries, usage)
+            except OSError as e:
+                wx.CallAfter(self.on_loaded, [], None, e)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_loaded(self, entries, usage, error=None):
+        if not self:
+            return
+        self.entries = entries
+        self.grid.DeleteAllItems()
+        for entry in entries:
+            self.grid.Append([
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["time"])),
+                entry["chip"] or "?",
+                entry["programmer"],
+                f"{entry['size'] // 1024} KiB",
+                entry["sha256"][:16],
+                entry["source"],
+            ])
+        if error is not None:
+            self.summary.SetLabel(f"Could not read the store: {error}")
+            return
+        stored, logical = usage
+        ratio = f", {logical / stored:.1f}x smaller" if stored else ""
+        self.summary.SetLabel(
+            f"{len(entries)} backups, {logical / 1048576:.1f} MiB in {stored / 1048576:.1f} MiB on disk{ratio}"
+        )
+
+    def selected(self):
+        index = self.grid.GetFirstSelected()
+        if index < 0:
+            wx.MessageBox("Select a backup first.", "Backups", wx.OK | wx.ICON_INFORMATION)
+            return None
+        return self.entries[index]
+
+    def run_restore(self, entry, path, on_restored):
+        self.summary.SetLabel(f"Restoring {entry['id']}...")
+
+        def task():
+            try:
+                self.store.restore(entry["id"], path)
+                wx.CallAfter(on_restored, path)
+            except (OSError, ValueError) as e:
+                wx.CallAfter(wx.MessageBox, f"Restore failed:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_restore(self, event):
+        entry = self.selected()
+        if entry is None:
+            return
+        with wx.FileDialog(self, "Restore backup as...", defaultFile=f"{entry['id']}.bin",
+                           wildcard="ROM files (*.bin)|*.bin|All files (*.*)|*.*",
+                           style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT) as dlg:
+            if dlg.ShowModal() != wx.ID_OK:
+                return
+            path = dlg.GetPath()
+        self.run_restore(entry, path, lambda path: self.summary.SetLabel(f"Restored to {path}"))
+
+    def on_write(self, event):
+        entry = self.selected()
+        if entry is None:
+            return
+        # Kept after the write; restoring the same backup again is free
+        folder = os.path.join(user_cache_dir(), "restored")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{entry['id']}.bin")
+        self.summary.SetLabel(f"Checking {entry['id']}...")
+
+        def task():
+            # Never write a cached copy that was truncated or edited since
+            try:
+                cached = os.path.getsize(path) == entry["size"] and file_sha256(path) == entry["sha256"]
+            except OSError:
+                cached = False
+            if cached:
+                wx.CallAfter(self.on_write_image, path)
+            else:
+                wx.CallAfter(self.run_restore, entry, path, self.on_write_image)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_delete(self, event):
+        entry = self.selected()
+        if entry is None:
+            return
+        if wx.MessageBox(f"Delete backup {entry['id']}?", "Backups", wx.YES_NO | wx.ICON_WARNING) != wx.YES:
+            return
+        try:
+            self.store.delete(entry["id"])
+        except (OSError, ValueError) as e:
+            wx.MessageBox(f"Delete failed:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+        self.refresh()
@@ -0,0 +1,286 @@
+# flashrom_batch.py
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flashrom_jobs import JobExecutor, DONE
+from flashrom_paths import get_flashrom_path
+from flashrom_progress import FlashromProgress
+
+OPERATIONS = {
+    "read": "-r",
+    "write": "-w",
+    "verify": "-v",
+}
+
+PIPELINES = {
+    "read": ("read",),
+    "write": ("write",),
+    "verify": ("verify",),
+    "write+verify": ("write", "verify"),
+    "read+write+verify": ("read", "write", "verify"),
+}
+
+IDLE = "idle"
+RUNNING = "running"
+SWAP = "swap"
+PASSED = "passed"
+FAILED = "failed"
+STOPPED = "stopped"
+
+
+class BatchSlot:
+    """
+    One programmer instance on the bench.
+
+    programmer is the full flashrom -p string, including whatever selects
+    the physical device (e.g. "ch347_spi:serial=..." or
+    "dummy:emulate=W25Q128FV,image=slot1.bin"). It is also the executor's
+    lock key, so two slots never share a programmer.
+    """
+
+    def __init__(self, name, programmer, device=""):
+        self.name = name
+        self.programmer = programmer
+        self.device = device
+        self.progress = FlashromProgress()
+        self.state = IDLE
+        self.step = ""
+        self.boards = 0
+        self.failures = 0
+        self.last_duration = 0.0
+        self.message = ""
+        self.job = None
+        self.board_ready = threading.Event()
+
+
+def dummy_slots(count, chip="W25Q128FV", workdir="."):
+    """Slots backed by flashrom's dummy programmer, one image file each."""
+    slots = []
+    for index in range(1, count + 1):
+        image = os.path.abspath(os.path.join(workdir, f"dummy_slot{index}.bin"))
+        slots.append(BatchSlot(f"slot{index}", f"dummy:emulate={chip},image={image}", device="dummy"))
+    return slots
+
+
+class BatchRunner:
+    """
+    Runs the same read/write/verify pipeline on many slots concurrently.
+
+    Each slot's steps run in order on a worker from the pool; every step is
+    a separate flashrom job submitted to the shared JobExecutor. on_update
+    (slot) is called from worker threads whenever a slot changes state.
+
+    Between rounds a slot waits in the SWAP state for the next board:
+    until board_ready(slot) is called, or for swap_delay seconds when the
+    fixture swaps boards on its own.
+    """
+
+    def __init__(self, slots, pipeline, image_path=None, output_dir=".",
+                 executor=None, flashrom_path=None, workers=None, on_update=None, swap_delay=None):
+        if pipeline not in PIPELINES:
+            raise ValueError(f"Unknown pipeline: {pipeline}")
+        steps = PIPELINES[pipeline]
+        if any(step in ("write", "verify") for step in steps) and not image_path:
+            raise ValueError("An image file is required for write/verify")
+
+        self.slots = slots
+        self.steps = steps
+        self.image_path = image_path
+        self.output_dir = output_dir
+        self.executor = executor or JobExecutor()
+        self.flashrom_path = flashrom_path or get_flashrom_path()
+        self.workers = workers or len(slots)
+        self.on_update = on_update
+        self.swap_delay = swap_delay
+        self.started = None
+        self.finished = None
+        self._stop = threading.Event()
+
+    def _notify(self, slot):
+        if self.on_update:
+            self.on_update(slot)
+
+    def _step_args(self, slot, step, board):
+        if step == "read":
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(self.output_dir, f"{slot.name}-{board:04d}-{stamp}.bin")
+        else:
+            path = self.image_path
+        return ["-p", slot.programmer, OPERATIONS[step], path]
+
+    def run_slot(self, slot):
+        """Run every pipeline step once on slot; returns True on success."""
+        board = slot.boards + slot.failures + 1
+        slot.state = RUNNING
+        slot.message = ""
+        started = time.monotonic()
+
+        for step in self.steps:
+            if self._stop.is_set():
+                slot.state = STOPPED
+                break
+            slot.step = step
+            slot.progress.reset()
+            self._notify(slot)
+
+            slot.job = self.executor.submit(
+                [self.flashrom_path] + self._step_args(slot, step, board),
+                slot.programmer,
+                label=f"{slot.name}: {step}",
+                progress=slot.progress,
+                collect_output=True
+            )
+            slot.job.wait()
+            if slot.job.state != DONE:
+                slot.state = FAILED
+                slot.message = f"{step} {slot.job.state} (exit code {slot.job.returncode})"
+                if slot.job.error:
+                    slot.message = f"{step}: {slot.job.error}"
+                break
+        else:
+            slot.state = PASSED
+
+        slot.last_duration = time.monotonic() - started
+        if slot.state == PASSED:
+            slot.boards += 1
+        elif slot.state == FAILED:
+            slot.failures += 1
+        slot.step = ""
+        self._notify(slot)
+        return slot.state == PASSED
+
+    def writing_slots(self):
+        """Slots in the middle of a write, where stopping may leave the board unbootable."""
+        return [slot for slot in self.slots if slot.state == RUNNING and slot.step == "write"]
+
+    def board_ready(self, slot):
+        """The next board is in place on slot; its next round may start."""
+        slot.board_ready.set()
+
+    def wait_for_board(self, slot):
+        """Block until the next board is in place; False if the run was stopped."""
+        slot.board_ready.clear()
+        slot.state = SWAP
+        slot.message = "Waiting for the next board"
+        self._notify(slot)
+        if self.swap_delay is not None:
+            self._stop.wait(self.swap_delay)
+        else:
+            while not slot.board_ready.wait(0.2):
+                if self._stop.is_set():
+                    break
+        slot.message = ""
+        return not self._stop.is_set()
+
+    def run(self, rounds=1):
+        """Run the pipeline on rounds boards per slot; blocks until done."""
+        self._stop.clear()
+        self.started = time.monotonic()
+        self.finished = None
+
+        def slot_loop(slot):
+            for round_number in range(rounds):
+                if self._stop.is_set():
+                    break
+                if round_number and not self.wait_for_board(slot):
+                    slot.state = STOPPED
+                    self._notify(slot)
+                    break
+                self.run_slot(slot)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(slot_loop, self.slots))
+        self.finished = time.monotonic()
+        return self.report()
+
+    def start(self, rounds=1, on_finished=None):
+        """run() on a background thread."""
+        def task():
+            report = self.run(rounds)
+            if on_finished:
+                on_finished(report)
+
+        thread = threading.Thread(target=task, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self, kill=False):
+        self._stop.set()
+        for slot in self.slots:
+            if slot.job is not None and not slot.job.is_finished:
+                if kill:
+                    slot.job.kill()
+                else:
+                    slot.job.cancel()
+
+    def report(self):
+        elapsed = ((self.finished or time.monotonic()) - self.started) if self.started else 0.0
+        boards = sum(slot.boards for slot in self.slots)
+        failures = sum(slot.failures for slot in self.slots)
+        return {
+            "slots": len(self.slots),
+            "boards": boards,
+            "failures": failures,
+            "elapsed": elapsed,
+            "boards_per_hour": boards * 3600.0 / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+def format_report(report):
+    return (
+        f"{report['boards']} boards passed, {report['failures']} failed on "
+        f"{report['slots']} slots in {report['elapsed']:.1f}s "
+        f"({report['boards_per_hour']:.0f} boards/hour)"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a flashrom pipeline on several programmers at once")
+    parser.add_argument("pipeline", choices=sorted(PIPELINES))
+    parser.add_argument("-p", "--programmer", action="append", default=[],
+                        help="flashrom programmer string for one slot (repeat per slot)")
+    parser.add_argument("--dummy", type=int, default=0, metavar="N",
+                        help="add N dummy programmer slots emulating --emulate")
+    parser.add_argument("--emulate", default="W25Q128FV")
+    parser.add_argument("--image", help="image to write/verify")
+    parser.add_argument("--output-dir", default=".", help="where read dumps are stored")
+    parser.add_argument("--rounds", type=int, default=1, help="boards per slot")
+    parser.add_argument("--swap-delay", type=float, metavar="SECONDS",
+                        help="wait this long for the next board instead of asking for Enter")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    slots = [BatchSlot(f"slot{i}", p) for i, p in enumerate(args.programmer, 1)]
+    slots += dummy_slots(args.dummy, args.emulate, args.output_dir)
+    if not slots:
+        parser.error("no slots; use -p or --dummy")
+
+    def on_update(slot):
+        if slot.state == SWAP:
+            if args.swap_delay is None:
+                print(f"{slot.name}: swap the board, then press Enter", flush=True)
+        elif slot.state != RUNNING:
+            print(f"{slot.name}: {slot.state} {slot.message} ({slot.last_duration:.1f}s)", flush=True)
+
+    runner = BatchRunner(slots, args.pipeline, args.image, args.output_dir,
+                         workers=args.workers, on_update=on_update, swap_delay=args.swap_delay)
+    if args.rounds > 1 and args.swap_delay is None:
+        def read_enter():
+            # One Enter releases every slot that is waiting at that moment
+            for _ in sys.stdin:
+                for slot in slots:
+                    if slot.state == SWAP:
+                        runner.board_ready(slot)
+
+        threading.Thread(target=read_enter, daemon=True).start()
+    report = runner.run(args.rounds)
+    print(format_report(report))
+    return 0 if report["failures"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# flashrom_batch_gui.py
+import os
+import wx
+from flashrom_batch import BatchRunner, BatchSlot, PIPELINES, SWAP, format_report
+from flashrom_progress import PHASE_LABELS
+
+class BatchFrame(wx.Frame):
+    """Production-line window: one pipeline on many programmers at once."""
+
+    COLUMNS = ("Slot", "Programmer", "Step", "Status", "Progress", "Passed", "Failed", "Last")
+
+    def __init__(self, parent, executor, image_path="", programmer=""):
+        super().__init__(parent, title="Batch Flashing", size=wx.Size(900, 500))
+        self.executor = executor
+        self.runner = None
+        panel = wx.Panel(self)
+
+        self.programmers_ctrl = wx.TextCtrl(panel, value=programmer, style=wx.TE_MULTILINE, size=wx.Size(-1, 90))
+        self.pipeline_choice = wx.Choice(panel, choices=sorted(PIPELINES))
+        self.pipeline_choice.SetStringSelection("write+verify")
+        self.rounds_ctrl = wx.SpinCtrl(panel, min=1, max=100000, initial=1)
+        self.image_ctrl = wx.TextCtrl(panel, value=image_path)
+        self.output_dir_ctrl = wx.TextCtrl(panel, value=os.getcwd())
+        self.start_button = wx.Button(panel, label="Start")
+        self.stop_button = wx.Button(panel, label="Stop")
+        self.stop_button.Disable()
+        self.next_board_button = wx.Button(panel, label="Next Board")
+        self.next_board_button.SetToolTip("The next board is in place: continue the selected slot, "
+                                          "or every waiting slot if none is selected (double-click a slot works too)")
+        self.next_board_button.Disable()
+
+        self.grid = wx.ListCtrl(panel, style=wx.LC_REPORT | wx.LC_SINGLE_SEL)
+        for index, title in enumerate(self.COLUMNS):
+            self.grid.InsertColumn(index, title, width=260 if title == "Programmer" else 80)
+        self.summary = wx.StaticText(panel, label="")
+
+        form = wx.FlexGridSizer(cols=2, vgap=5, hgap=5)
+        form.AddGrowableCol(1)
+        form.Add(wx.StaticText(panel, label="Programmers\n(one per line)"))
+        form.Add(self.programmers_ctrl, 1, wx.EXPAND)
+        form.Add(wx.StaticText(panel, label="Pipeline"))
+        form.Add(self.pipeline_choice)
+        form.Add(wx.StaticText(panel, label="Boards per slot"))
+        form.Add(self.rounds_ctrl)
+        form.Add(wx.StaticText(panel, label="Image"))
+        form.Add(self.image_ctrl, 1, wx.EXPAND)
+        form.Add(wx.StaticText(panel, label="Dump folder"))
+        form.Add(self.output_dir_ctrl, 1, wx.EXPAND)
+
+        buttons = wx.BoxSizer(wx.HORIZONTAL)
+        buttons.Add(self.summary, 1, wx.ALIGN_CENTER_VERTICAL)
+        buttons.Add(self.next_board_button, 0, wx.RIGHT, 5)
+        buttons.Add(self.start_button, 0, wx.RIGHT, 5)
+        buttons.Add(self.stop_button, 0)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(form, 0, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(self.grid, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+        sizer.Add(buttons, 0, wx.EXPAND | wx.ALL, 10)
+        panel.SetSizer(sizer)
+
+        # Slots are redrawn on a timer rather than per event, so a dozen
+        # busy programmers cost one grid refresh per tick.
+        self.timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_timer_tick, self.timer)
+        self.Bind(wx.EVT_BUTTON, self.on_start, self.start_button)
+        self.Bind(wx.EVT_BUTTON, self.on_stop, self.stop_button)
+        self.Bind(wx.EVT_BUTTON, self.on_next_board, self.next_board_button)
+        self.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_next_board, self.grid)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+
+    def on_start(self, event):
+        programmers = [line.strip() for line in self.programmers_ctrl.GetValue().splitlines() if line.strip()]
+        if not programmers:
+            wx.MessageBox("Enter at least one programmer.", "Batch", wx.OK | wx.ICON_ERROR)
+            return
+        if len(set(programmers)) != len(programmers):
+            wx.MessageBox("Each slot needs its own programmer instance.", "Batch", wx.OK | wx.ICON_ERROR)
+            return
+
+        slots = [BatchSlot(f"slot{i}", programmer) for i, programmer in enumerate(programmers, 1)]
+        try:
+            self.runner = BatchRunner(
+                slots,
+                self.pipeline_choice.GetStringSelection(),
+                image_path=self.image_ctrl.GetValue(),
+                output_dir=self.output_dir_ctrl.GetValue(),
+                executor=self.executor
+            )
+        except Exception as e:
+            wx.MessageBox(str(e), "Batch", wx.OK | wx.ICON_ERROR)
+            return
+
+        self.grid.DeleteAllItems()
+        for slot in slots:
+            self.grid.Append([slot.name, slot.programmer] + [""] * (len(self.COLUMNS) - 2))
+
+        self.start_button.Disable()
+        self.stop_button.Enable()
+        self.timer.Start(250)
+        self.runner.start(self.rounds_ctrl.GetValue(), lambda report: wx.CallAfter(self.on_finished, report))
+
+    def confirm_stop(self):
+        """False if a slot is writing and the user wants the batch to go on."""
+        writing = self.runner.writing_slots() if self.runner else []
+        if writing:
+            answer = wx.MessageBox(
+                f"{', '.join(slot.name for slot in writing)} {'is' if len(writing) == 1 else 'are'} writing.\n"
+                "Stopping a write can leave the board unbootable.\nStop anyway?",
+                "Batch", wx.YES_NO | wx.NO_DEFAULT | wx.ICON_WARNING
+            )
+            return answer == wx.YES
+        return True
+
+    def on_stop(self, event):
+        if self.runner and self.confirm_stop():
+            self.runner.stop()
+
+    def on_next_board(self, event):
+        if not self.runner:
+            return
+        row = self.grid.GetFirstSelected()
+        if 0 <= row < len(self.runner.slots):
+            slots = [self.runner.slots[row]]
+        else:
+            slots = [slot for slot in self.runner.slots if slot.state == SWAP]
+        for slot in slots:
+            self.runner.board_ready(slot)
+
+    def on_timer_tick(self, event):
+        if not self.runner:
+            return
+        self.next_board_button.Enable(any(slot.state == SWAP for slot in self.runner.slots))
+        for row, slot in enumerate(self.runner.slots):
+            snapshot = slot.progress.snapshot()
+            progress = ""
+            if slot.step:
+                progress = PHASE_LABELS.get(snapshot["phase"], "")
+                if snapshot["percent"] is not None:
+                    progress += f" {snapshot['percent']}%"
+            values = (slot.step, slot.message or slot.state, progress, str(slot.boards),
+                      str(slot.failures), f"{slot.last_duration:.1f}s")
+            for column, value in enumerate(values, 2):
+                if self.grid.GetItemText(row, column) != value:
+                    self.grid.SetItem(row, column, value)
+        self.summary.SetLabel(format_report(self.runner.report()))
+
+    def on_finished(self, report):
+        if not self:
+            return
+        self.timer.Stop()
+        self.on_timer_tick(None)
+        self.summary.SetLabel(format_report(report))
+        self.start_button.Enable()
+        self.stop_button.Disable()
+        self.next_board_button.Disable()
+
+    def on_close(self, event):
+        if self.runner:
+            if event.CanVeto() and not self.confirm_stop():
+                event.Veto()
+                return
+            self.runner.stop()
+        self.timer.Stop()
+        event.Skip()
@@ -0,0 +1,360 @@
+# flashrom_catalog.py
+import bisect
+import difflib
+import json
+import os
+import re
+import subprocess
+import threading
+from collections import namedtuple
+
+from flashrom_paths import user_cache_dir
+
+CACHE_FORMAT = 1
+CACHE_NAME = "chip_catalog.json"
+
+ChipInfo = namedtuple("ChipInfo", "vendor device size_kb bus voltage tested broken")
+
+_SIZE_RE = re.compile(r"^\d+$")
+_SEPARATORS_RE = re.compile(r"[\s_-]+")
+_VOLTAGE_RE = re.compile(r"^\d+(\.\d+)?-\d+(\.\d+)?$")
+
+
+def parse_chip_list(output):
+    """
+    Parse the "Supported flash chips" table of `flashrom -L` into ChipInfo
+    records. Column offsets are taken from the table header, so the tested
+    and known-broken operation letters stay in their own columns.
+    """
+    chips = []
+    columns = None
+    in_table = False
+
+    for raw in output.splitlines():
+        line = raw.rstrip()
+        if line.startswith("Supported flash chips"):
+            in_table = True
+            continue
+        if not in_table:
+            continue
+        if line.startswith("Supported "):
+            # Next section (chipsets, boards, programmers)
+            break
+        if line.startswith("Vendor") and "Device" in line:
+            columns = _header_columns(line)
+            continue
+        if not line.strip() or columns is None or line.lstrip().startswith(("(", "OK", "[")):
+            # Blank lines, the second header row and the legend
+            continue
+
+        record = _parse_row(line, columns)
+        if record is not None:
+            chips.append(record)
+        elif chips and line[:columns["device"]].strip() and not line[columns["device"]:].strip():
+            # Long vendor names wrap onto the following lines
+            last = chips[-1]
+            chips[-1] = last._replace(vendor=f"{last.vendor} {line.strip()}")
+
+    return chips
+
+
+def _header_columns(header):
+    columns = {}
+    for name in ("Vendor", "Device", "Test", "Known", "Size", "Bus", "Voltage"):
+        columns[name.lower()] = header.find(name)
+    return columns
+
+
+def _parse_row(line, columns):
+    tail = line[columns["size"]:].split() if columns["size"] > 0 else []
+    if len(tail) < 2 or not _SIZE_RE.match(tail[0]):
+        return None
+
+    voltage = tail[-1] if _VOLTAGE_RE.match(tail[-1]) else ""
+    bus_fields = tail[1:-1] if voltage else tail[1:]
+    vendor = line[:columns["device"]].strip()
+    device = line[columns["device"]:columns["test"]].strip()
+    if not device:
+        return None
+
+    if columns["known"] > 0:
+        tested = line[columns["test"]:columns["known"]].strip()
+        broken = line[columns["known"]:columns["size"]].strip()
+    else:
+        tested = line[columns["test"]:columns["size"]].strip()
+        broken = ""
+
+    return ChipInfo(vendor, device, int(tail[0]), " ".join(bus_fields), voltage, tested, broken)
+
+
+def flashrom_version(exe_path):
+    output = subprocess.check_output(
+        [exe_path, "--version"],
+        encoding="utf-8",
+        errors="replace",
+        stderr=subprocess.STDOUT,
+        stdin=subprocess.DEVNULL
+    )
+    for line in output.splitlines():
+        if line.startswith("flashrom"):
+            return line.strip()
+    return output.strip().splitlines()[0] if output.strip() else ""
+
+
+class ChipCatalog:
+    """
+    On-disk cache of the parsed `flashrom -L` chip table.
+
+    The cache is keyed by the flashrom binary path, its mtime and the version
+    string it reports. load_cached() only stats the binary, so a warm start
+    never spawns flashrom; refresh() re-runs `-L` and is meant for a worker
+    thread.
+    """
+
+    def __init__(self, exe_path, cache_path=None):
+        self.exe_path = exe_path
+        self.cache_path = cache_path or os.path.join(user_cache_dir(), CACHE_NAME)
+        self.chips = []
+        self.version = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _binary_key(self):
+        st = os.stat(self.exe_path)
+        return {"path": os.path.abspath(self.exe_path), "mtime": st.st_mtime_ns, "size": st.st_size}
+
+    def load_cached(self):
+        """Return cached chips if the cache matches the binary, else None."""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            key = self._binary_key()
+        except (OSError, ValueError):
+            return None
+
+        if data.get("format") != CACHE_FORMAT or data.get("binary") != key:
+            return None
+
+        with self._lock:
+            self.version = data.get("version")
+            self.chips = [ChipInfo(*row) for row in data.get("chips", [])]
+            self._index = None
+            return self.chips
+
+    def refresh(self):
+        """Re-run `flashrom -L`, update the cache and return the chip list."""
+        key = self._binary_key()
+        version = flashrom_version(self.exe_path)
+        output = subprocess.check_output(
+            [self.exe_path, "-L"],
+            encoding="utf-8",
+            errors="replace",
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL
+        )
+        chips = parse_chip_list(output)
+        if not chips:
+            raise ValueError("flashrom -L returned no chip table")
+
+        self._save(key, version, chips)
+        with self._lock:
+            self.version = version
+            self.chips = chips
+            self._index = None
+            return chips
+
+    def _save(self, key, version, chips):
+        data = {
+            "format": CACHE_FORMAT,
+            "binary": key,
+            "version": version,
+            "chips": [list(chip) for chip in chips],
+        }
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
+
+    def load_async(self, on_chips, on_error=None):
+        """
+        Deliver cached chips immediately when the cache is valid, then
+        confirm the version (or refresh) in a background thread. on_chips
+        runs on the calling thread for a cache hit and on the worker thread
+        after a refresh.
+        """
+        cached = self.load_cached()
+        if cached is not None:
+            on_chips(cached, True)
+
+        def task():
+            try:
+                # A cache hit only proves path and mtime match; the version
+                # check is cheap but still a subprocess, so it runs here.
+                if cached is not None and flashrom_version(self.exe_path) == self.version:
+                    return
+                on_chips(self.refresh(), False)
+            except Exception as e:
+                if on_error:
+                    on_error(e)
+
+        thread = threading.Thread(target=task, daemon=True)
+        thread.start()
+        return thread
+
+    def index(self):
+        """ChipIndex over the current chips; built on first use, so call it off the UI thread."""
+        with self._lock:
+            if self._index is None or self._index.chips is not self.chips:
+                self._index = ChipIndex(self.chips)
+            return self._index
+
+    def find(self, device):
+        return self.index().find(device)
+
+
+def chip_names(chips):
+    """Unique device names in catalog order, as passed to `flashrom -c`."""
+    seen = set()
+    names = []
+    for chip in chips:
+        if chip.device not in seen:
+            seen.add(chip.device)
+            names.append(chip.device)
+    return names
+
+
+def normalize_chip_name(name):
+    """Upper case without spaces, dashes or underscores; "." is flashrom's one-character wildcard."""
+    return _SEPARATORS_RE.sub("", name).upper()
+
+
+def chip_aliases(device):
+    """Normalised names a device entry stands for; "A/B" lists alternatives."""
+    return [alias for alias in (normalize_chip_name(part) for part in device.split("/")) if alias]
+
+
+def _wildcard_matches(pattern, name):
+    return len(pattern) == len(name) and all(p == "." or p == c for p, c in zip(pattern, name))
+
+
+# How a query term matched a chip, best first; results sort on the sum.
+EXACT, DEVICE_PREFIX, DEVICE_SUBSTRING, VENDOR_PREFIX = range(4)
+
+# ChipIndex.match() scores at or above this name the same part; below are only similar.
+ALIAS_MATCH = 0.95
+
+
+class ChipIndex:
+    """
+    Search index over a chip catalog, built once per catalog load.
+
+    Every suffix of every device alias goes into one sorted key list, so a
+    query term is a prefix lookup (bisect) whether it starts the device
+    name or sits inside it ("25Q128"); vendor words are keyed the same way.
+    Aliases with flashrom's "." wildcard ("W25Q128.V" for W25Q128BV/FV/JV)
+    are also matched character by character, so typing the real part
+    number finds them.
+    """
+
+    def __init__(self, chips):
+        self.chips = chips
+        self._by_name = {}
+        self._aliases = {}
+        self._wildcards = []
+        keys = []
+        for number, chip in enumerate(self.chips):
+            self._by_name.setdefault(chip.device.lower(), number)
+            for alias in chip_aliases(chip.device):
+                self._aliases.setdefault(alias, []).append(number)
+                if "." in alias:
+                    self._wildcards.append((alias, number))
+                for offset in range(len(alias)):
+                    keys.append((alias[offset:], number, DEVICE_PREFIX if offset == 0 else DEVICE_SUBSTRING))
+            for word in chip.vendor.split():
+                keys.append((normalize_chip_name(word), number, VENDOR_PREFIX))
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._entries = [(number, kind) for _, number, kind in keys]
+        self._alias_names = sorted(self._aliases)
+
+    def __len__(self):
+        return len(self.chips)
+
+    def find(self, device):
+        """The chip with exactly this device name (any case), or None."""
+        number = self._by_name.get(device.lower())
+        return None if number is None else self.chips[number]
+
+    def _term(self, term):
+        """{chip number: kind} for one normalised query term."""
+        found = {}
+        start = bisect.bisect_left(self._keys, term)
+        end = bisect.bisect_left(self._keys, term + "\uffff", start)
+        for position in range(start, end):
+            number, kind = self._entries[position]
+            if kind == DEVICE_PREFIX and self._keys[position] == term:
+                kind = EXACT
+            if kind < found.get(number, VENDOR_PREFIX + 1):
+                found[number] = kind
+        for alias, number in self._wildcards:
+            for offset in range(len(alias) - len(term) + 1):
+                if _wildcard_matches(alias[offset:offset + len(term)], term):
+                    if offset:
+                        kind = DEVICE_SUBSTRING
+                    else:
+                        kind = EXACT if len(alias) == len(term) else DEVICE_PREFIX
+                    if kind < found.get(number, VENDOR_PREFIX + 1):
+                        found[number] = kind
+                    break
+        return found
+
+    def search(self, text, limit=None):
+        """
+        Chips matching every word of text, best match first (exact, then
+        device prefix, then anywhere in the device name, then vendor).
+        An empty query lists the whole catalog in its own order.
+        """
+        terms = [normalize_chip_name(word) for word in text.split()]
+        terms = [term for term in terms if term]
+        if not terms:
+            return self.chips[:limit] if limit else list(self.chips)
+        scores = None
+        # Most selective term first, so later ones only filter
+        for found in sorted((self._term(term) for term in terms), key=len):
+            if scores is None:
+                scores = found
+            else:
+                scores = {number: kind + found[number] for number, kind in scores.items() if number in found}
+            if not scores:
+                return []
+        ranked = sorted(scores, key=lambda number: (scores[number], number))
+        return [self.chips[number] for number in ranked[:limit]]
+
+    def match(self, name, cutoff=0.75):
+        """
+        (score, chip) pairs for a chip name reported by flashrom or typed
+        by hand, best first: 1.0 for the exact entry, slightly less for an
+        alternative spelling or a wildcard entry that covers the name, and
+        a similarity ratio above cutoff otherwise.
+        """
+        number = self._by_name.get(name.lower())
+        if number is not None:
+            return [(1.0, self.chips[number])]
+        results = {}
+        for alias in chip_aliases(name):
+            for number in self._aliases.get(alias, ()):
+                results[number] = max(results.get(number, 0), 0.98)
+            for pattern, number in self._wildcards:
+                if _wildcard_matches(pattern, alias):
+                    results[number] = max(results.get(number, 0), ALIAS_MATCH)
+            if results:
+                continue
+            # Only names of the same family (first two characters) are compared
+            start = bisect.bisect_left(self._alias_names, alias[:2])
+            end = bisect.bisect_left(self._alias_names, alias[:2] + "\uffff", start)
+            for close in difflib.get_close_matches(alias, self._alias_names[start:end], n=5, cutoff=cutoff):
+                ratio = difflib.SequenceMatcher(None, alias, close).ratio()
+                for number in self._aliases[close]:
+                    results[number] = max(results.get(number, 0), round(ratio * 0.9, 3))
+        ranked = sorted(results, key=lambda number: (-results[number], number))
+        return [(results[number], self.chips[number]) for number in ranked]
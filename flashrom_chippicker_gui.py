@@ -0,0 +1,174 @@
+# flashrom_chippicker_gui.py
+import wx
+from flashrom_catalog import ChipIndex
+
+# Rows visible in the drop-down before it scrolls.
+VISIBLE_ROWS = 12
+
+
+class MatchList(wx.ListCtrl):
+    """Virtual list of the picker's current matches; only visible rows are ever formatted."""
+
+    COLUMNS = (("Device", 230), ("Vendor", 110), ("Size", 70), ("Bus", 90), ("Tested", 60))
+
+    def __init__(self, parent):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.LC_VIRTUAL)
+        for index, (title, width) in enumerate(self.COLUMNS):
+            self.InsertColumn(index, title, width=width)
+        self.matches = []
+
+    def set_matches(self, matches):
+        self.matches = matches
+        self.SetItemCount(len(matches))
+        self.Refresh()
+
+    def OnGetItemText(self, row, column):
+        chip = self.matches[row]
+        if column == 2:
+            return f"{chip.size_kb} kB"
+        return (chip.device, chip.vendor, None, chip.bus, chip.tested)[column]
+
+
+class ChipPicker(wx.Panel):
+    """
+    Chip field with type-ahead over the whole catalog.
+
+    Each keystroke runs a ChipIndex search and shows the matches in a
+    virtual list under the field; Up/Down/Enter or a click picks one.
+    Picking sends EVT_COMBOBOX, so it can stand in for a wx.ComboBox.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.index = ChipIndex([])
+        self.text = wx.TextCtrl(self, style=wx.TE_PROCESS_ENTER)
+        self.text.SetHint("Type to search chips")
+        self.button = wx.Button(self, label="▾", style=wx.BU_EXACTFIT)
+        self.button.SetToolTip("List all chips")
+        self.popup = wx.PopupWindow(self.GetTopLevelParent(), wx.BORDER_SIMPLE)
+        self.list = MatchList(self.popup)
+
+        sizer = wx.BoxSizer(wx.HORIZONTAL)
+        sizer.Add(self.text, 1, wx.EXPAND)
+        sizer.Add(self.button, 0, wx.EXPAND)
+        self.SetSizer(sizer)
+        popup_sizer = wx.BoxSizer(wx.VERTICAL)
+        popup_sizer.Add(self.list, 1, wx.EXPAND)
+        self.popup.SetSizer(popup_sizer)
+
+        self.text.Bind(wx.EVT_TEXT, self.on_text)
+        self.text.Bind(wx.EVT_TEXT_ENTER, self.on_enter)
+        self.text.Bind(wx.EVT_KEY_DOWN, self.on_key)
+        self.text.Bind(wx.EVT_KILL_FOCUS, self.on_kill_focus)
+        self.button.Bind(wx.EVT_BUTTON, self.on_button)
+        self.list.Bind(wx.EVT_LEFT_DOWN, self.on_list_click)
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
+
+    def set_index(self, index):
+        self.index = index
+        if self.popup.IsShown():
+            self.refresh_matches()
+
+    def GetValue(self):
+        return self.text.GetValue()
+
+    def SetValue(self, value):
+        # ChangeValue: a programmatic value is not a search
+        self.text.ChangeValue(value)
+        self.hide_popup()
+
+    def refresh_matches(self, text=None):
+        matches = self.index.search(self.text.GetValue() if text is None else text)
+        self.list.set_matches(matches)
+        if matches:
+            self.list.Select(0)
+            self.list.EnsureVisible(0)
+        return matches
+
+    def show_popup(self):
+        row_height = self.list.GetItemRect(0).height if self.list.GetItemCount() else 20
+        width = max(self.GetSize().width, sum(width for _, width in MatchList.COLUMNS) + 30)
+        height = row_height * (min(max(self.list.GetItemCount(), 1), VISIBLE_ROWS) + 2)
+        self.popup.SetSize(self.ClientToScreen(wx.Point(0, self.GetSize().height)), wx.Size(width, height))
+        self.popup.Layout()
+        if not self.popup.IsShown():
+            self.popup.Show()
+
+    def hide_popup(self):
+        if self.popup.IsShown():
+            self.popup.Hide()
+
+    def on_text(self, event):
+        if self.refresh_matches():
+            self.show_popup()
+        else:
+            self.hide_popup()
+
+    def on_button(self, event):
+        if self.popup.IsShown():
+            self.hide_popup()
+            return
+        self.refresh_matches("")
+        value = self.index.find(self.text.GetValue())
+        if value is not None:
+            row = self.list.matches.index(value)
+            self.list.Select(row)
+            self.list.EnsureVisible(row)
+        self.show_popup()
+        self.text.SetFocus()
+
+    def on_key(self, event):
+        key = event.GetKeyCode()
+        if not self.popup.IsShown():
+            if key == wx.WXK_DOWN:
+                self.on_button(None)
+                return
+            event.Skip()
+            return
+        count = self.list.GetItemCount()
+        row = self.list.GetFirstSelected()
+        steps = {wx.WXK_DOWN: 1, wx.WXK_UP: -1, wx.WXK_PAGEDOWN: VISIBLE_ROWS, wx.WXK_PAGEUP: -VISIBLE_ROWS}
+        if key in steps and count:
+            row = min(max(row + steps[key], 0), count - 1)
+            self.list.Select(row)
+            self.list.EnsureVisible(row)
+        elif key == wx.WXK_ESCAPE:
+            self.hide_popup()
+        else:
+            event.Skip()
+
+    def on_enter(self, event):
+        row = self.list.GetFirstSelected()
+        if self.popup.IsShown() and row != -1:
+            self.choose(row)
+
+    def on_list_click(self, event):
+        row, _ = self.list.HitTest(event.GetPosition())
+        if row != wx.NOT_FOUND:
+            self.choose(row)
+
+    def on_kill_focus(self, event):
+        event.Skip()
+        # A click in the list takes the focus first; let it land
+        wx.CallLater(150, self.hide_unless_hovered)
+
+    def hide_unless_hovered(self):
+        if not self or not self.popup.IsShown():
+            return
+        if not self.popup.GetScreenRect().Contains(wx.GetMousePosition()):
+            self.hide_popup()
+
+    def choose(self, row):
+        chip = self.list.matches[row]
+        self.SetValue(chip.device)
+        self.text.SetInsertionPointEnd()
+        event = wx.CommandEvent(wx.wxEVT_COMBOBOX, self.GetId())
+        event.SetEventObject(self)
+        event.SetString(chip.device)
+        event.SetInt(row)
+        self.GetEventHandler().ProcessEvent(event)
+
+    def on_destroy(self, event):
+        if event.GetEventObject() is self and self.popup:
+            self.popup.Destroy()
+        event.Skip()
@@ -0,0 +1,201 @@
+# flashrom_cli.py
+import argparse
+import asyncio
+import json
+import sys
+
+from flashrom_core import FlashromEngine, OPERATIONS
+from flashrom_jobs import JobExecutor
+from flashrom_probe_cache import DEFAULT_TTL, ProbeCache
+from flashrom_oplog import OperationLog
+from flashrom_regions import RegionPresets, RegionRead
+from flashrom_stable_read import DEFAULT_PASSES, StableRead
+from flashrom_telemetry import TelemetryStore
+from flashrom_progress import format_progress
+
+
+def _printer(verbose, as_json):
+    last_progress = [None]
+
+    def on_event(event):
+        if event["type"] == "output" and verbose:
+            sys.stderr.write(event["text"])
+        elif event["type"] == "progress" and not verbose and not as_json:
+            text = format_progress(event["progress"])
+            if text != last_progress[0]:
+                last_progress[0] = text
+                sys.stderr.write("\r" + text.ljust(60))
+        elif event["type"] == "finished" and last_progress[0] and not verbose:
+            sys.stderr.write("\n")
+            last_progress[0] = None
+
+    return on_event
+
+
+async def read_stable(engine, args):
+    """Read until two passes agree (at most args.stable); the last pass's result."""
+    stable = StableRead(args.file, args.stable)
+    try:
+        while not stable.is_finished:
+            path = stable.next_path()
+            result = await engine.run("read", path=path, programmer=args.programmer, chip=args.chip,
+                                      extra=args.extra, timeout=args.timeout)
+            if not result.ok:
+                return result
+            print(stable.describe(stable.add_pass(path)), file=sys.stderr)
+        if not stable.is_stable:
+            print(stable.unstable_summary(), file=sys.stderr)
+            result.state = "unstable"
+            result.error = ValueError(f"no two of {stable.passes} passes agree; nothing was saved")
+            return result
+        stable.commit()
+        return result
+    finally:
+        stable.cleanup()
+
+
+async def run_operations(engine, args):
+    results = []
+    for iteration in range(args.repeat):
+        if args.stable:
+            result = await read_stable(engine, args)
+        else:
+            result = await engine.run(
+                args.operation,
+                path=args.file,
+                programmer=args.programmer,
+                chip=args.chip,
+                extra=args.extra + (args.regions.args() if args.regions else []),
+                timeout=args.timeout
+            )
+        results.append(result)
+        if args.regions and result.ok:
+            # Only the regions were read, not the chip size flashrom reports
+            result.bytes_processed = args.regions.read_bytes(args.file)
+            for path in args.regions.finish(args.file, args.split):
+                print(f"Wrote {path}", file=sys.stderr)
+        if args.json:
+            record = result.as_dict()
+            record["iteration"] = iteration + 1
+            print(json.dumps(record), flush=True)
+        else:
+            print(
+                f"{args.operation} #{iteration + 1}: {result.state} "
+                f"(exit code {result.returncode}) in {result.duration:.2f}s"
+                + (f", chip {result.chip}" if result.chip else "")
+                + (" (cached)" if result.cached_chip else "")
+                + (f", {result.bytes_processed} bytes" if result.bytes_processed else "")
+                + (f": {result.error}" if result.error else ""),
+                flush=True
+            )
+        if not result.ok and args.stop_on_error:
+            break
+    return results
+
+
+def region_read(args):
+    """RegionRead for --preset, or -i with --layout/--ifd; None for a full read."""
+    if args.preset:
+        preset = RegionPresets().get(args.preset)
+        if preset is None:
+            raise ValueError(f"No region preset named {args.preset!r}")
+        return RegionRead.from_preset(preset)
+    if not args.region:
+        if args.layout or args.ifd:
+            raise ValueError("--layout and --ifd need at least one -i/--region")
+        return None
+    if args.layout:
+        return RegionRead.from_layout(args.layout, args.region)
+    if args.ifd:
+        return RegionRead.from_ifd(args.region)
+    raise ValueError("-i/--region needs --layout or --ifd")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run flashrom operations without the GUI",
+        epilog="Arguments after -- are passed to flashrom unchanged."
+    )
+    parser.add_argument("operation", choices=OPERATIONS)
+    parser.add_argument("file", nargs="?", help="image to read into, write or verify")
+    parser.add_argument("-p", "--programmer", required=True)
+    parser.add_argument("-c", "--chip")
+    parser.add_argument("--flashrom", help="path to the flashrom executable")
+    parser.add_argument("--libflashrom", nargs="?", const="", metavar="PATH",
+                        help="run through libflashrom (optionally this library) with the programmer "
+                             "kept open between repeats; falls back to the flashrom executable")
+    parser.add_argument("--timeout", type=float, help="seconds before flashrom is stopped")
+    parser.add_argument("--probe-ttl", type=float, default=DEFAULT_TTL,
+                        help="seconds to reuse a detected chip without -c (0 disables the probe cache)")
+    parser.add_argument("--no-telemetry", action="store_true", help="do not add the runs to the timing history")
+    parser.add_argument("--no-log", action="store_true", help="do not keep the output in the searchable operation log")
+    parser.add_argument("-i", "--region", action="append", default=[], metavar="NAME",
+                        help="read only this region (repeatable), from --layout or --ifd")
+    parser.add_argument("--layout", metavar="FILE", help="flashrom layout file naming the regions")
+    parser.add_argument("--ifd", action="store_true", help="take the regions from the chip's flash descriptor")
+    parser.add_argument("--preset", help="read the regions of a saved or built-in region preset")
+    parser.add_argument("--split", action="store_true",
+                        help="also write each region to FILE.<region>.bin")
+    parser.add_argument("--stable", nargs="?", type=int, const=DEFAULT_PASSES, metavar="PASSES",
+                        help=f"read until two passes are identical, at most PASSES times (default {DEFAULT_PASSES})")
+    parser.add_argument("-n", "--repeat", type=int, default=1, help="run the operation N times")
+    parser.add_argument("--stop-on-error", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print one JSON result per operation")
+    parser.add_argument("-V", "--verbose", action="store_true", help="echo flashrom output")
+
+    if argv is None:
+        argv = sys.argv[1:]
+    extra = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, extra = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+    args.extra = extra
+    if args.operation in ("read", "write", "verify") and not args.file:
+        parser.error(f"{args.operation} needs a file")
+    try:
+        args.regions = region_read(args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.regions and args.operation != "read":
+        parser.error("regions can only be selected for read")
+    if args.stable is not None:
+        if args.operation != "read" or args.regions:
+            parser.error("--stable only applies to a full read")
+        if args.stable < 2:
+            parser.error("--stable needs at least two passes")
+
+    probe_cache = ProbeCache(ttl=args.probe_ttl) if args.probe_ttl > 0 else None
+    telemetry = None if args.no_telemetry else TelemetryStore()
+    oplog = None if args.no_log else OperationLog()
+    backend = None
+    if args.libflashrom is not None:
+        from flashrom_lib import LibflashromBackend
+        backend = LibflashromBackend.load(args.libflashrom or None)
+        if backend is None:
+            print("libflashrom not found; using the flashrom executable", file=sys.stderr)
+    executor = JobExecutor(telemetry, backend, oplog)
+    engine = FlashromEngine(args.flashrom, probe_cache=probe_cache, executor=executor)
+    engine.subscribe(_printer(args.verbose, args.json))
+    try:
+        if args.regions:
+            args.regions.prepare(args.file + ".layout")
+        results = asyncio.run(run_operations(engine, args))
+    except KeyboardInterrupt:
+        executor.shutdown()
+        return 130
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if args.regions:
+            args.regions.cleanup()
+        if backend is not None:
+            backend.close()
+        if oplog is not None:
+            oplog.close()
+    return 0 if results and all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
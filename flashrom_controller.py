@@ -1,100 +1,60 @@
 # flashrom_controller.py
-import subprocess
-import wx
+import asyncio
 
-class FlashromController:
-    def __init__(self, on_output=None):
-        self.on_output = on_output or print
-
-    def run_flashrom(self, mode, file_path, programmer="your_programmer"):
-        if mode == "read":
-            cmd = ["flashrom", "-p", programmer, "-r", file_path]
-        elif mode == "write":
-            cmd = ["flashrom", "-p", programmer, "-w", file_path]
-        elif mode == "verify":
-            cmd = ["flashrom", "-p", programmer, "-v", file_path]
-        else:
-            raise ValueError("Invalid mode")
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.stdout, result.stderr
-
-    def on_read_chip(self, event):
-        filename = self.text_ctrl.GetValue()
-        chip = self.chip_combo.GetValue()
-        programmer = self.programmer_combo.GetValue()
-
-        if not filename or not chip:
-            wx.MessageBox("Please select a ROM file and chip.", "Missing Info", wx.ICON_WARNING)
-            return
+from flashrom_core import FlashromEngine
+from flashrom_jobs import JobExecutor
 
-        stdout, stderr = self.run_flashrom("read", filename, programmer)
-        self.output_text_ctrl.SetValue(stdout)
-        if stderr:
-            self.output_text_ctrl.AppendText("\nErrors:\n" + stderr)
-        self.status_bar.SetStatusText("Read complete.")
 
-    def on_write_chip(self, event):
-        filename = self.text_ctrl.GetValue()
-        chip = self.chip_combo.GetValue()
-        programmer = self.programmer_combo.GetValue()
+class FlashromController:
+    """
+    Blocking convenience wrapper around FlashromEngine and a JobExecutor.
 
-        if not filename or not chip:
-            wx.MessageBox("Please select a ROM file and chip.", "Missing Info", wx.ICON_WARNING)
-            return
+    It has no GUI dependencies; callers get plain strings back and decide
+    how to display them.
+    """
 
-        stdout, stderr = self.run_flashrom("write", filename, programmer)
-        self.output_text_ctrl.SetValue(stdout)
-        if stderr:
-            self.output_text_ctrl.AppendText("\nErrors:\n" + stderr)
-        self.status_bar.SetStatusText("Write complete.")
+    def __init__(self, on_output=None, flashrom_path=None, backend=None):
+        self.on_output = on_output or print
+        self.engine = FlashromEngine(flashrom_path, executor=JobExecutor(backend=backend))
 
-    def on_verify_chip(self, event):
-        filename = self.text_ctrl.GetValue()
-        chip = self.chip_combo.GetValue()
-        programmer = self.programmer_combo.GetValue()
+    def _run(self, operation, **kwargs):
+        return asyncio.run(self.engine.run(operation, **kwargs))
 
-        if not filename or not chip:
-            wx.MessageBox("Please select a ROM file and chip.", "Missing Info", wx.ICON_WARNING)
-            return
+    def run_flashrom(self, mode, file_path, programmer="your_programmer", chip=None):
+        if mode not in ("read", "write", "verify"):
+            raise ValueError("Invalid mode")
 
-        stdout, stderr = self.run_flashrom("verify", filename, programmer)
-        self.output_text_ctrl.SetValue(stdout)
-        if stderr:
-            self.output_text_ctrl.AppendText("\nErrors:\n" + stderr)
-        self.status_bar.SetStatusText("Verify complete.")
+        result = self._run(mode, path=file_path, programmer=programmer, chip=chip)
+        return result.stdout, result.stderr
 
+    def read_regions(self, region_read, file_path, programmer="your_programmer", chip=None, split=False):
+        """
+        Read only the regions of a RegionRead into file_path. Returns
+        (files, stdout, stderr); files is empty if flashrom failed.
+        """
+        layout_path = file_path + ".layout"
+        try:
+            region_read.prepare(layout_path)
+            result = self._run("read", path=file_path, programmer=programmer, chip=chip, extra=region_read.args())
+        finally:
+            region_read.cleanup()
+        files = region_read.finish(file_path, split) if result.ok else []
+        return files, result.stdout, result.stderr
 
     def on_detect_chip(self, programmer="internal"):
         try:
-            result = subprocess.run(
-                ["flashrom", "-p", programmer],
-                capture_output=True,
-                text=True
-            )
-            output = result.stdout
-            if self.on_output:
-                self.on_output(f"Detecting chip with programmer '{programmer}'...\n{output}")
-
-            for line in output.splitlines():
-                if "Found chip" in line:
-                    chip_name = line.split("\"")[1] if "\"" in line else line
-                    return chip_name
-
-            return None
+            result = self._run("probe", programmer=programmer)
         except Exception as e:
             if self.on_output:
                 self.on_output(f"Detection error: {e}")
             return None
-            
-    def on_probe_chip(self):
-        try:
-            result = subprocess.run(
-                ["flashrom"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+
+        if self.on_output:
+            self.on_output(f"Detecting chip with programmer '{programmer}'...\n{result.stdout}")
+        return result.chip
+
+    def on_probe_chip(self, programmer="internal"):
+        result = self._run("probe", programmer=programmer)
+        if result.ok:
             return result.stdout
-        except subprocess.CalledProcessError as e:
-            return f"Probe failed: {e.stderr}"
+        return f"Probe failed: {result.stderr or result.stdout}"
@@ -0,0 +1,218 @@
+# flashrom_core.py
+import asyncio
+import os
+import time
+
+from flashrom_jobs import JobExecutor
+from flashrom_paths import get_flashrom_path
+from flashrom_progress import FlashromProgress, parse_found_chips
+
+OPERATIONS = ("probe", "read", "write", "verify", "erase")
+
+_OPERATION_FLAGS = {
+    "read": "-r",
+    "write": "-w",
+    "verify": "-v",
+}
+
+
+def build_args(operation, programmer, path=None, chip=None, extra=()):
+    """flashrom arguments (without the executable) for one operation."""
+    if operation not in OPERATIONS:
+        raise ValueError(f"Invalid operation: {operation}")
+    if not programmer:
+        raise ValueError("A programmer is required")
+
+    args = ["-p", programmer]
+    if chip:
+        args += ["-c", chip]
+    if operation in _OPERATION_FLAGS:
+        if not path:
+            raise ValueError(f"{operation} needs a file path")
+        args += [_OPERATION_FLAGS[operation], path]
+    elif operation == "erase":
+        args.append("-E")
+    return args + list(extra)
+
+
+class OperationResult:
+    """Outcome of one flashrom run."""
+
+    def __init__(self, operation, programmer, cmd):
+        self.operation = operation
+        self.programmer = programmer
+        self.cmd = cmd
+        self.returncode = None
+        self.state = "pending"
+        self.started = time.time()
+        self.duration = 0.0
+        self.chip = None
+        self.chip_size = 0
+        self.chips = []
+        self.cached_chip = False
+        self.spawn_time = None
+        self.bytes_processed = 0
+        self.stdout = ""
+        self.stderr = ""
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and self.error is None
+
+    def as_dict(self):
+        return {
+            "operation": self.operation,
+            "programmer": self.programmer,
+            "cmd": self.cmd,
+            "state": self.state,
+            "returncode": self.returncode,
+            "started": self.started,
+            "duration": round(self.duration, 3),
+            "chip": self.chip,
+            "chip_size": self.chip_size,
+            "chips": [chip for _, chip, _, _ in self.chips],
+            "cached_chip": self.cached_chip,
+            "bytes_processed": self.bytes_processed,
+            "error": str(self.error) if self.error else None,
+        }
+
+
+class FlashromEngine:
+    """
+    wx-free asyncio front end for flashrom.
+
+    Subscribers registered with subscribe() receive event dicts:
+    {"type": "started"|"output"|"progress"|"finished", "operation": ..., ...}.
+    Callbacks run on the event loop thread and must not block.
+
+    Runs go through a JobExecutor, the same one the GUI uses: operations on
+    the same programmer are serialised, different programmers run
+    concurrently, and its backend, telemetry and operation log apply.
+
+    With a ProbeCache, operations without an explicit chip reuse the chip
+    found by an earlier run on the same programmer and pass it as -c.
+    """
+
+    def __init__(self, flashrom_path=None, programmer=None, timeout=None, probe_cache=None, executor=None):
+        self.flashrom_path = flashrom_path
+        self.programmer = programmer
+        self.timeout = timeout
+        self.probe_cache = probe_cache
+        self.executor = executor if executor is not None else JobExecutor()
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def _emit(self, event):
+        for callback in list(self._subscribers):
+            callback(event)
+
+    def _executable(self):
+        if self.flashrom_path:
+            return self.flashrom_path
+        try:
+            return get_flashrom_path()
+        except (FileNotFoundError, RuntimeError):
+            if self.executor.backend is None:
+                raise
+            # Only the library can run it; the name is for logs and telemetry
+            return "flashrom"
+
+    async def probe(self, programmer=None, chip=None, **kwargs):
+        return await self.run("probe", programmer=programmer, chip=chip, **kwargs)
+
+    async def read(self, path, programmer=None, chip=None, **kwargs):
+        return await self.run("read", path, programmer, chip, **kwargs)
+
+    async def write(self, path, programmer=None, chip=None, **kwargs):
+        return await self.run("write", path, programmer, chip, **kwargs)
+
+    async def verify(self, path, programmer=None, chip=None, **kwargs):
+        return await self.run("verify", path, programmer, chip, **kwargs)
+
+    async def erase(self, programmer=None, chip=None, **kwargs):
+        return await self.run("erase", programmer=programmer, chip=chip, **kwargs)
+
+    async def run(self, operation, path=None, programmer=None, chip=None, extra=(), timeout=None):
+        programmer = programmer or self.programmer
+        cached = None
+        if chip is None and operation != "probe" and self.probe_cache is not None:
+            cached = self.probe_cache.lookup(programmer)
+            if cached is not None:
+                chip = cached.chip
+        args = build_args(operation, programmer, path, chip, extra)
+        cmd = [self._executable()] + args
+        result = OperationResult(operation, programmer, cmd)
+        result.cached_chip = cached is not None
+
+        await self._execute(result, timeout if timeout is not None else self.timeout)
+
+        found = parse_found_chips(result.stdout)
+        result.chips = found
+        if found:
+            result.chip = found[0][1]
+            result.chip_size = found[0][2] * 1024
+        if self.probe_cache is not None:
+            if result.ok and found:
+                self.probe_cache.store(programmer, found, chip)
+            elif cached is not None:
+                # Wrong or swapped chip; probe from scratch next time
+                self.probe_cache.invalidate(programmer)
+        if result.ok and operation in ("read", "write", "verify"):
+            try:
+                result.bytes_processed = os.path.getsize(path)
+            except OSError:
+                pass
+        elif result.ok and operation == "erase":
+            result.bytes_processed = result.chip_size
+
+        self._emit({"type": "finished", "operation": operation, "result": result})
+        return result
+
+    async def _execute(self, result, timeout):
+        loop = asyncio.get_running_loop()
+        progress = FlashromProgress()
+        stdout = []
+        stderr = []
+
+        def deliver(text, stream):
+            (stdout if stream == "stdout" else stderr).append(text)
+            self._emit({"type": "output", "operation": result.operation, "stream": stream, "text": text})
+
+        finished = loop.create_future()
+
+        def on_done(job):
+            loop.call_soon_threadsafe(lambda: finished.done() or finished.set_result(job))
+
+        job = self.executor.submit(
+            result.cmd, result.programmer, label=result.operation,
+            on_output=lambda text, stream: loop.call_soon_threadsafe(deliver, text, stream),
+            on_done=on_done, progress=progress, timeout=timeout
+        )
+        self._emit({"type": "started", "operation": result.operation, "cmd": result.cmd})
+        revision = progress.revision
+        try:
+            # Progress from libflashrom callbacks arrives without output; poll it
+            while True:
+                done, _ = await asyncio.wait({finished}, timeout=0.1)
+                if progress.revision != revision:
+                    revision = progress.revision
+                    self._emit({"type": "progress", "operation": result.operation, "progress": progress.snapshot()})
+                if done:
+                    break
+        except asyncio.CancelledError:
+            job.cancel()
+            await asyncio.shield(finished)
+            raise
+        finally:
+            # Output queued by call_soon_threadsafe runs before on_done's callback
+            result.stdout = "".join(stdout)
+            result.stderr = "".join(stderr)
+            result.state = job.state
+            result.returncode = job.returncode
+            result.error = job.error
+            result.spawn_time = job.spawn_time
+            result.duration = job.duration
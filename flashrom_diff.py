@@ -0,0 +1,246 @@
+# flashrom_diff.py
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+
+from flashrom_paths import user_data_dir
+
+# Smallest erase unit on practically every SPI NOR part; flashrom picks the
+# real erase blocks itself and preserves whatever else shares them.
+DEFAULT_BLOCK_SIZE = 4096
+
+# Older flashrom releases cap the number of layout entries; neighbouring
+# ranges are merged until we are under this.
+MAX_REGIONS = 64
+
+HISTORY_NAME = "chip_contents.json"
+
+
+def _map(path):
+    f = open(path, "rb")
+    if os.fstat(f.fileno()).st_size == 0:
+        return f, b""
+    return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def changed_blocks(old_path, new_path, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Return merged (start, end) byte ranges, end exclusive and aligned to
+    block_size, where new_path differs from old_path. Both files must have
+    the same size.
+    """
+    old_file, old = _map(old_path)
+    new_file, new = _map(new_path)
+    try:
+        if len(old) != len(new):
+            raise ValueError(
+                f"Image size {len(new)} does not match last dump size {len(old)}"
+            )
+        size = len(new)
+        ranges = []
+        # Compare in large slices first: equal slices are by far the common
+        # case and bytes equality is a single memcmp.
+        stride = max(block_size, 1 << 20) // block_size * block_size
+        for chunk_start in range(0, size, stride):
+            chunk_end = min(chunk_start + stride, size)
+            if old[chunk_start:chunk_end] == new[chunk_start:chunk_end]:
+                continue
+            for start in range(chunk_start, chunk_end, block_size):
+                end = min(start + block_size, size)
+                if old[start:end] != new[start:end]:
+                    if ranges and ranges[-1][1] == start:
+                        ranges[-1] = (ranges[-1][0], end)
+                    else:
+                        ranges.append((start, end))
+        return ranges
+    finally:
+        if isinstance(old, mmap.mmap):
+            old.close()
+        if isinstance(new, mmap.mmap):
+            new.close()
+        old_file.close()
+        new_file.close()
+
+
+def limit_regions(ranges, max_regions=MAX_REGIONS):
+    """Merge the closest neighbours until at most max_regions remain."""
+    ranges = list(ranges)
+    while len(ranges) > max_regions:
+        gaps = [(ranges[i + 1][0] - ranges[i][1], i) for i in range(len(ranges) - 1)]
+        _, i = min(gaps)
+        ranges[i:i + 2] = [(ranges[i][0], ranges[i + 1][1])]
+    return ranges
+
+
+def write_layout(ranges, path, prefix="diff"):
+    """Write a flashrom layout file; returns the region names in order."""
+    names = []
+    with open(path, "w", encoding="ascii") as f:
+        for index, (start, end) in enumerate(ranges):
+            name = f"{prefix}{index}"
+            f.write(f"{start:08x}:{end - 1:08x} {name}\n")
+            names.append(name)
+    return names
+
+
+def parse_layout(path):
+    """(start, end, name) entries of a flashrom layout file; end is exclusive."""
+    regions = []
+    with open(path, "r", encoding="ascii", errors="replace") as f:
+        for number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                span, name = line.split(None, 1)
+                start, end = (int(value, 16) for value in span.split(":"))
+            except ValueError:
+                raise ValueError(f"{path}:{number}: expected 'start:end name', got {line!r}")
+            if end < start:
+                raise ValueError(f"{path}:{number}: region {name} ends before it starts")
+            regions.append((start, end + 1, name.strip()))
+    return regions
+
+
+def layout_args(layout_path, names):
+    args = ["--layout", layout_path]
+    for name in names:
+        args += ["-i", name]
+    return args
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChipContentsHistory:
+    """
+    Remembers which file last matched a chip's contents, per chip and
+    programmer: the dump after a successful read, or the image after a
+    successful full write.
+
+    Entries store size, mtime and hash so an edited or replaced file is
+    never mistaken for the chip contents, and the session that recorded
+    them: the same chip on the same programmer may well be another board
+    by the next session.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(user_data_dir(), HISTORY_NAME)
+        self.session = os.urandom(8).hex()
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, entries):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def key(chip, programmer):
+        return f"{chip}|{programmer}"
+
+    def record(self, chip, programmer, path, source="read", sha256=None):
+        """source is "read" for a dump taken from the chip, "write" for an image written to it."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        entry = {
+            "path": path,
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "sha256": sha256 or file_sha256(path),
+            "source": source,
+            "recorded": time.time(),
+            "session": self.session,
+        }
+        with self._lock:
+            entries = self._load()
+            entries[self.key(chip, programmer)] = entry
+            self._save(entries)
+        return entry
+
+    def forget(self, chip, programmer):
+        """Drop the entry, e.g. after a failed write left the chip unknown."""
+        with self._lock:
+            entries = self._load()
+            if entries.pop(self.key(chip, programmer), None) is not None:
+                self._save(entries)
+
+    def forget_programmer(self, programmer):
+        """Drop every entry of a programmer, e.g. when it was unplugged."""
+        suffix = "|" + programmer
+        with self._lock:
+            entries = self._load()
+            kept = {key: entry for key, entry in entries.items() if not key.endswith(suffix)}
+            if len(kept) != len(entries):
+                self._save(kept)
+
+    def latest(self, chip, programmer, max_age=None, this_session=False):
+        """
+        The entry for chip/programmer if its file is still unchanged; with
+        max_age (seconds) or this_session=True only if recorded recently
+        enough, or by this ChipContentsHistory.
+        """
+        with self._lock:
+            entry = self._load().get(self.key(chip, programmer))
+        if not entry:
+            return None
+        if this_session and entry.get("session") != self.session:
+            return None
+        if max_age is not None and time.time() - entry["recorded"] > max_age:
+            return None
+        try:
+            st = os.stat(entry["path"])
+        except OSError:
+            return None
+        if st.st_size != entry["size"] or st.st_mtime_ns != entry["mtime"]:
+            return None
+        return entry
+
+
+class IncrementalWrite:
+    """Layout describing the blocks of new_path that differ from old_path."""
+
+    def __init__(self, old_path, new_path, block_size=DEFAULT_BLOCK_SIZE):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.block_size = block_size
+        self.ranges = limit_regions(changed_blocks(old_path, new_path, block_size))
+        self.layout_path = None
+        self.names = []
+
+    @property
+    def changed_bytes(self):
+        return sum(end - start for start, end in self.ranges)
+
+    def prepare(self, layout_path):
+        self.layout_path = layout_path
+        self.names = write_layout(self.ranges, layout_path)
+        return self
+
+    def write_args(self):
+        # No -N: flashrom verifies the whole chip after writing the included
+        # regions, so a reference that was not this chip's contents fails
+        # the write instead of leaving a mix of two images
+        return ["-w", self.new_path] + layout_args(self.layout_path, self.names)
+
+    def verify_args(self):
+        return ["-v", self.new_path] + layout_args(self.layout_path, self.names)
+
+    def cleanup(self):
+        if self.layout_path and os.path.exists(self.layout_path):
+            os.remove(self.layout_path)
@@ -0,0 +1,192 @@
+# flashrom_discovery.py
+import glob
+import os
+import select
+import socket
+import threading
+from collections import namedtuple
+
+from flashrom_usb import USB_PROGRAMMERS, scan_usb_devices
+
+# Every programmer driver flashrom knows, for manual selection.
+PROGRAMMERS = (
+    "ch341a_spi", "internal", "dummy", "nic3com", "nicrealtek", "nicnatsemi", "gfxnvidia",
+    "raiden_debug_spi", "drkaiser", "satasii", "atahpt", "atavia", "atapromise", "it8212",
+    "ft2232_spi", "serprog", "buspirate_spi", "dediprog", "developerbox", "rayer_spi",
+    "pony_spi", "nicintel", "nicintel_spi", "nicintel_eeprom", "ogp_spi", "satamv",
+    "linux_mtd", "linux_spi", "parade_lspcon", "mediatek_i2c_spi", "realtek_mst_i2c_spi",
+    "usbblaster_spi", "mstarddc_spi", "pickit2_spi", "ch347_spi", "digilent_spi",
+    "jlink_spi", "ni845x_spi", "stlinkv3_spi", "dirtyjtag_spi", "spidriver"
+)
+
+# ft2232_spi needs type= for anything but the default FT2232H
+FTDI_TYPES = {
+    0x6010: "2232H",
+    0x6011: "4232H",
+    0x6014: "232H",
+}
+
+# Seconds between rescans when kernel uevents are not available.
+POLL_INTERVAL = 1.0
+
+# Quiet time after a uevent before rescanning; one plug produces a burst.
+SETTLE_TIME = 0.3
+
+Programmer = namedtuple("Programmer", "programmer description source")
+
+_USB_IDS = {ids: name for name, id_list in USB_PROGRAMMERS.items() for ids in id_list}
+
+
+def _usb_programmer(device, duplicates):
+    name = _USB_IDS.get((device.vid, device.pid))
+    if name is None:
+        return None
+    params = []
+    if name == "ft2232_spi":
+        ftdi_type = FTDI_TYPES.get(device.pid)
+        if ftdi_type and ftdi_type != "2232H":
+            params.append(f"type={ftdi_type}")
+        if device.serial and duplicates > 1:
+            params.append(f"serial={device.serial}")
+    programmer = name + (":" + ",".join(params) if params else "")
+    product = device.product or f"{device.vid:04x}:{device.pid:04x}"
+    serial = f", serial {device.serial}" if device.serial else ""
+    return Programmer(programmer, f"{product} on USB {device.name}{serial}", "usb")
+
+
+def discover(sysfs_root="/sys", dev_root="/dev"):
+    """
+    Programmers that are attached right now: USB devices with a known
+    VID/PID, spidev nodes (linux_spi) and MTD devices (linux_mtd).
+    """
+    found = []
+    devices = scan_usb_devices(sysfs_root)
+    counts = {}
+    for device in devices:
+        name = _USB_IDS.get((device.vid, device.pid))
+        counts[name] = counts.get(name, 0) + 1
+    for device in devices:
+        entry = _usb_programmer(device, counts.get(_USB_IDS.get((device.vid, device.pid)), 0))
+        if entry is not None and entry not in found:
+            found.append(entry)
+
+    for path in sorted(glob.glob(os.path.join(dev_root, "spidev*"))):
+        found.append(Programmer(f"linux_spi:dev={path}", f"SPI controller {os.path.basename(path)}", "spidev"))
+
+    for path in sorted(glob.glob(os.path.join(dev_root, "mtd[0-9]*"))):
+        name = os.path.basename(path)
+        if not name[3:].isdigit():
+            # mtd0ro and friends
+            continue
+        label = _read_mtd_name(sysfs_root, name)
+        found.append(Programmer(f"linux_mtd:dev={name[3:]}", f"MTD {name}{' ' + label if label else ''}", "mtd"))
+    return found
+
+
+def _read_mtd_name(sysfs_root, name):
+    try:
+        with open(os.path.join(sysfs_root, "class", "mtd", name, "name"), "r", encoding="ascii", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def programmer_choices(connected, current=""):
+    """Combo box entries: connected programmers first, then every driver once."""
+    choices = [entry.programmer for entry in connected]
+    drivers = {choice.split(":", 1)[0] for choice in choices}
+    choices += [name for name in PROGRAMMERS if name not in drivers]
+    if current and current not in choices:
+        choices.insert(len(connected), current)
+    return choices
+
+
+def _open_uevent_socket():
+    """Kernel uevent socket, or None where netlink is unavailable."""
+    if not hasattr(socket, "AF_NETLINK"):
+        return None
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, getattr(socket, "NETLINK_KOBJECT_UEVENT", 15))
+        sock.bind((0, 1))
+        return sock
+    except OSError:
+        return None
+
+
+class HotplugWatcher:
+    """
+    Calls on_change(programmers) from a background thread whenever the
+    result of discover() changes, and once right after start().
+
+    Kernel uevents wake the watcher on Linux; elsewhere, or when watching a
+    fake sysfs tree, it rescans every poll_interval seconds. Rescans only
+    list a few directories, so polling is cheap.
+    """
+
+    def __init__(self, on_change, sysfs_root="/sys", dev_root="/dev", poll_interval=POLL_INTERVAL,
+                 use_uevents=None):
+        self.on_change = on_change
+        self.sysfs_root = sysfs_root
+        self.dev_root = dev_root
+        self.poll_interval = poll_interval
+        if use_uevents is None:
+            use_uevents = sysfs_root == "/sys"
+        self.use_uevents = use_uevents
+        self.programmers = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def rescan(self):
+        programmers = discover(self.sysfs_root, self.dev_root)
+        if programmers != self.programmers:
+            self.programmers = programmers
+            self.on_change(programmers)
+        return programmers
+
+    def _run(self):
+        sock = _open_uevent_socket() if self.use_uevents else None
+        try:
+            self.rescan()
+            while not self._stop.is_set():
+                if sock is None:
+                    self._stop.wait(self.poll_interval)
+                elif self._wait_uevent(sock):
+                    # Let the burst of events for one device settle
+                    self._stop.wait(SETTLE_TIME)
+                    self._drain(sock)
+                else:
+                    continue
+                if not self._stop.is_set():
+                    self.rescan()
+        finally:
+            if sock is not None:
+                sock.close()
+
+    def _wait_uevent(self, sock):
+        # Wake up regularly so stop() is honoured
+        readable, _, _ = select.select([sock], [], [], 0.5)
+        if not readable:
+            return False
+        return _is_relevant(sock.recv(8192))
+
+    def _drain(self, sock):
+        while select.select([sock], [], [], 0)[0]:
+            sock.recv(8192)
+
+
+def _is_relevant(message):
+    # "add@/devices/...\0ACTION=add\0SUBSYSTEM=usb\0..."
+    for field in message.split(b"\0"):
+        if field.startswith(b"SUBSYSTEM="):
+            return field[10:] in (b"usb", b"spidev", b"mtd", b"tty")
+    return False
@@ -1,57 +1,68 @@
+# Imported first so its timestamp is as close to process start as possible
+from flashrom_startup import StartupTimer
 import wx
+import argparse
 import os
-import platform
-import shutil
 import sys
-import wx.adv
-import subprocess
-import re
+import tempfile
 import threading
-from flashrom_controller import FlashromController
-from PIL import Image
-
-def get_flashrom_path(): 
-    system = platform.system() 
-    
-    if system == "Windows":
-        # Your bundled EXE 
-        return os.path.join(os.getcwd(), "flashrom", "flashrom.exe")
-
-        if system == "Darwin": # macOS
-            # 1. Try MacPorts 
-            macports_path = "/opt/local/bin/flashrom"
-            if os.path.exists(macports_path):
-                return macports_path
-
-            # 2. Try Homebrew (Intel)
-            brew_path_intel = "/usr/local/bin/flashrom"
-            if os.path.exists(brew_path_intel):
-                return brew_path_intel
-
-            # 3. Try Homebrew (Apple Silicon) 
-            brew_path_arm = "/opt/homebrew/bin/flashrom"
-            if os.path.exists(brew_path_arm):
-                return brew_path_arm
-
-            # 4. Try PATH
-            path = shutil.which("flashrom")
-            if path:
-                return path
-
-            raise FileNotFoundError("flashrom not found on macOS")
-
-        if system == "Linux":
-            path = shutil.which("flashrom")
-            if path:
-                return path
-            raise FileNotFoundError("flashrom not found on Linux")
-            
-        raise RuntimeError("Unsupported OS")
+import time
+from flashrom_agent_pool import AgentPool, split_remote
+from flashrom_catalog import ALIAS_MATCH, ChipCatalog, ChipInfo
+from flashrom_chippicker_gui import ChipPicker
+from flashrom_diff import ChipContentsHistory, IncrementalWrite
+from flashrom_discovery import HotplugWatcher, PROGRAMMERS, programmer_choices
+from flashrom_jobs import JobExecutor, CANCELLED, TIMED_OUT, ERROR
+from flashrom_log import LogBuffer, session_log_path
+from flashrom_paths import get_flashrom_path
+from flashrom_probe_cache import ProbeCache
+from flashrom_progress import FlashromProgress, format_progress, parse_found_chips
+from flashrom_stable_read import DEFAULT_PASSES, MAX_PASSES
+from flashrom_telemetry import TelemetryStore
+
+# Detection and probing never take this long unless the programmer hangs.
+PROBE_TIMEOUT = 60
+
+# Dumps older than this are not trusted for verification or as the base of
+# an incremental write; the chip is read again by flashrom instead.
+DUMP_MAX_AGE = 15 * 60
+
+# Milliseconds between log panel updates.
+LOG_FLUSH_INTERVAL = 100
+
+# Seconds a detected chip is passed as -c without probing again, unless the
+# programmer is re-plugged first.
+PROBE_CACHE_TTL = 10 * 60
 
 class MyApp(wx.App):
+    def __init__(self, show_splash=True, startup_bench=False, use_libflashrom=False, agents=()):
+        # Set before wx.App.__init__, which calls OnInit
+        self.show_splash = show_splash
+        self.startup_bench = startup_bench
+        self.use_libflashrom = use_libflashrom
+        self.agents = agents
+        self.startup = StartupTimer()
+        self.splash = None
+        super().__init__(0)
+
     def OnInit(self):
+        self.startup.mark("wx_ready")
+        if self.show_splash:
+            self.splash = self.create_splash()
+        self.frame = FlashromGUI(None, "Flashrom GUI", startup=self.startup, use_libflashrom=self.use_libflashrom,
+                                 agents=self.agents)
+        self.frame.on_first_paint = self.on_frame_painted
+        self.frame.on_interactive = self.on_frame_interactive
+        self.SetTopWindow(self.frame)
+        self.frame.Show()
+        return True
+
+    def create_splash(self):
+        import wx.adv
         splash_path = resource_path("assets/splashscreen.png")
         bitmap = wx.Bitmap(splash_path, wx.BITMAP_TYPE_PNG)
+        # The timeout is only an upper bound; the splash goes away as soon
+        # as the main frame has painted.
         splash = wx.adv.SplashScreen(
             bitmap,
             wx.adv.SPLASH_CENTRE_ON_SCREEN | wx.adv.SPLASH_TIMEOUT,
@@ -63,58 +74,102 @@ class MyApp(wx.App):
             wx.BORDER_SIMPLE | wx.STAY_ON_TOP
         )
         wx.Yield()
-        self.frame = FlashromGUI(None, "Flashrom GUI")
-        self.SetTopWindow(self.frame)
-        self.frame.Show()
-        return True
+        return splash
+
+    def on_frame_painted(self):
+        # A splash that already timed out is a dead (falsy) wx object
+        if self.splash:
+            self.splash.Destroy()
+        self.splash = None
+
+    def on_frame_interactive(self):
+        if self.startup_bench:
+            self.startup.print_report()
+            self.frame.Close()
+
+class BitmapCache:
+    """
+    Decoded icon bundles shared by every ZoomableBitmap, keyed by path.
+
+    A "name@2x.png" next to "name.png" is added to the bundle as the HiDPI
+    variant. Each file is read and decoded at most once per process.
+    """
+
+    def __init__(self):
+        self._bundles = {}
+
+    def get(self, path):
+        bundle = self._bundles.get(path)
+        if bundle is None:
+            bitmap = wx.Bitmap(path, wx.BITMAP_TYPE_PNG)
+            root, ext = os.path.splitext(path)
+            hidpi_path = f"{root}@2x{ext}"
+            if os.path.exists(hidpi_path):
+                bundle = wx.BitmapBundle.FromBitmaps(bitmap, wx.Bitmap(hidpi_path, wx.BITMAP_TYPE_PNG))
+            else:
+                bundle = wx.BitmapBundle.FromBitmap(bitmap)
+            self._bundles[path] = bundle
+        return bundle
+
+    def preload(self, paths):
+        for path in paths:
+            if path:
+                self.get(path)
+
+bitmap_cache = BitmapCache()
 
 class ZoomableBitmap(wx.StaticBitmap):
     def __init__(self, parent, normal_path, zoomed_path, callback, grey_path=None, zoomed_grey_path=None):
-        super().__init__(
-            parent,
-            bitmap=wx.BitmapBundle.FromBitmap(
-                wx.Bitmap(normal_path, wx.BITMAP_TYPE_PNG)
-            )
-        )
+        super().__init__(parent, bitmap=bitmap_cache.get(normal_path))
         self.normal_path = normal_path
         self.zoomed_path = zoomed_path
         self.grey_path = grey_path
         self.zoomed_grey_path = zoomed_grey_path
         self.callback = callback
+        self.hovered = False
+        self.state_path = normal_path
         self.Bind(wx.EVT_ENTER_WINDOW, self.on_mouse_enter)
         self.Bind(wx.EVT_LEAVE_WINDOW, self.on_mouse_leave)
         self.Bind(wx.EVT_LEFT_DOWN, self.on_click)
-        
-    def Enable(self, enable=True):
-        super().Enable(enable)
-        if enable:
-            self.SetBitmap(
-                wx.BitmapBundle.FromBitmap(
-                    wx.Bitmap(self.normal_path, wx.BITMAP_TYPE_PNG)
-                )
-            )
+
+    def state_paths(self):
+        return (self.normal_path, self.zoomed_path, self.grey_path, self.zoomed_grey_path)
+
+    def update_bitmap(self):
+        enabled = self.IsEnabled()
+        if self.hovered:
+            path = self.zoomed_path if enabled else (self.zoomed_grey_path or self.zoomed_path)
         else:
-             if self.grey_path:
-                 self.SetBitmap(
-                     wx.BitmapBundle.FromBitmap(
-                         wx.Bitmap(self.grey_path, wx.BITMAP_TYPE_PNG)
-                     )
-                 )
-        
-    def on_mouse_enter(self, event):
-        bmp = wx.Bitmap(self.zoomed_path)
-        self.SetBitmap(wx.BitmapBundle.FromBitmap(bmp))
-        self.SetSize(bmp.GetSize())
-        self.GetParent().Layout()
+            path = self.normal_path if enabled else (self.grey_path or self.normal_path)
+        if path == self.state_path:
+            return
+
+        old_size = bitmap_cache.get(self.state_path).GetDefaultSize()
+        bundle = bitmap_cache.get(path)
+        self.state_path = path
+        self.SetBitmap(bundle)
+        size = bundle.GetDefaultSize()
+        if size != old_size:
+            # Only a zoom changes the footprint; greying out does not
+            self.InvalidateBestSize()
+            self.SetSize(self.FromDIP(size))
+            self.GetParent().Layout()
         self.Refresh()
+
+    def Enable(self, enable=True):
+        changed = super().Enable(enable)
+        if changed:
+            self.update_bitmap()
+        return changed
+
+    def on_mouse_enter(self, event):
+        self.hovered = True
+        self.update_bitmap()
         event.Skip()
 
     def on_mouse_leave(self, event):
-        bmp = wx.Bitmap(self.normal_path)
-        self.SetBitmap(wx.BitmapBundle.FromBitmap(bmp))
-        self.SetSize(bmp.GetSize())
-        self.GetParent().Layout()
-        self.Refresh()
+        self.hovered = False
+        self.update_bitmap()
         event.Skip()
 
     def on_click(self, event):
@@ -150,47 +205,72 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 class FlashromGUI(wx.Frame):
-    def load_chip_list(self):
-        chips = []
+    def populate_chip_list(self):
         try:
             exe_path = get_flashrom_path()
-
-            # Optional: helpful for debugging
-            if hasattr(self, "log_ctrl"):
-                self.log_output(f"Running: {exe_path} -L")
-
-            output = subprocess.check_output(
-                [exe_path, "-L"],
-                encoding="utf-8",
-                stderr=subprocess.STDOUT
-            )
-
-            if not output.strip():
-                self.log_output("Flashrom returned no chip list output.")
-
-            for line in output.splitlines():
-                line = line.strip()
-                if line and not line.startswith("Supported"):
-                    chips.append(line)
-
         except Exception as e:
-            message = f"Failed to load chip list:\n{e}"
-            if hasattr(self, "log_ctrl"):
-                self.log_output(message)
-            else:
-                print(message)
-
-        return chips
+            self.log_output(f"Failed to load chip list:\n{e}")
+            self.on_chip_list_ready()
+            return
 
+        self.catalog = ChipCatalog(exe_path)
+        self.catalog.load_async(
+            lambda chips, cached: wx.CallAfter(self.on_chip_list_loaded, chips, cached),
+            lambda e: wx.CallAfter(self.on_chip_list_failed, e)
+        )
 
-        
-    def populate_chip_list(self):
-        chip_list = self.load_chip_list()
-        self.chip_combo.Set(chip_list)
+    def on_chip_list_loaded(self, chips, cached):
+        source = "cache" if cached else self.catalog.version or "flashrom -L"
+        self.set_status(f"Loaded {len(chips)} chips from {source}")
+        catalog = self.catalog
+        # Indexing the whole catalog takes tens of ms; keep it off the UI thread
+        threading.Thread(target=lambda: wx.CallAfter(self.chip_combo.set_index, catalog.index()),
+                         daemon=True).start()
+        self.on_chip_list_ready()
+
+    def on_chip_list_failed(self, error):
+        self.log_output(f"Failed to load chip list:\n{error}")
+        self.on_chip_list_ready()
+
+    def on_chip_list_ready(self):
+        if self.chips_ready:
+            return
+        self.chips_ready = True
+        self.startup.mark("chips_loaded")
+        # Interactive once the event loop has handled the combo update
+        wx.CallAfter(self.on_startup_interactive)
+
+    def on_startup_interactive(self):
+        self.startup.mark("interactive")
+        if self.on_interactive:
+            self.on_interactive()
+
+    def preload_icons(self):
+        # Decode the hover and disabled states before the first hover
+        for icon in self.icon_widgets.values():
+            bitmap_cache.preload(icon.state_paths())
 
-            
-    def __init__(self, parent, title):
+    def on_panel_first_paint(self, event):
+        event.Skip()
+        self.panel.Unbind(wx.EVT_PAINT, handler=self.on_panel_first_paint)
+        self.startup.mark("first_paint")
+        # Nothing non-essential competes with the first paint; the chip
+        # list is loaded once the window is on screen.
+        wx.CallAfter(self.populate_chip_list)
+        wx.CallAfter(self.open_operation_log)
+        wx.CallAfter(self.preload_icons)
+        wx.CallAfter(self.start_hotplug_watcher)
+        wx.CallAfter(self.connect_agents, self.agent_addresses)
+        if self.on_first_paint:
+            self.on_first_paint()
+
+    def __init__(self, parent, title, startup=None, use_libflashrom=False, agents=()):
         super().__init__(parent, title=title, size=wx.Size(800, 600))
+        self.agent_addresses = list(agents)
+        self.startup = startup or StartupTimer()
+        self.on_first_paint = None
+        self.on_interactive = None
+        self.chips_ready = False
         app_icon = resource_path("assets/icons/icon.ico")
         self.SetIcon(wx.Icon(app_icon, wx.BITMAP_TYPE_ANY))
         self.statusbar = self.CreateStatusBar()
@@ -199,7 +279,32 @@ class FlashromGUI(wx.Frame):
 
         self.timer = wx.Timer(self)
         self.Bind(wx.EVT_TIMER, self.on_timer_tick, self.timer)
-        self.progress_value = 0
+        self.progress = FlashromProgress()
+        self.progress_revision = -1
+        self.log_buffer = LogBuffer()
+        self.log_buffer.spill_path = self.open_session_log()
+        self.log_view_lines = 0
+        # Log output is only pushed into the text control on this timer, so
+        # a flood of flashrom -VVV output costs one append per interval.
+        self.log_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_log_tick, self.log_timer)
+        self.log_timer.Start(LOG_FLUSH_INTERVAL)
+        self.telemetry = TelemetryStore()
+        self.backend = None
+        if use_libflashrom:
+            from flashrom_lib import LibflashromBackend
+            self.backend = LibflashromBackend.load()
+            if self.backend is None:
+                self.log_buffer.write("libflashrom not found; using the flashrom command line.\n")
+        # Opened after the first paint; it brings in sqlite3
+        self.oplog = None
+        # Jobs on "<programmer>@<agent>" go to that bench agent, the rest run here
+        self.executor = AgentPool(JobExecutor(telemetry=self.telemetry, backend=self.backend))
+        self.current_job = None
+        self.contents_history = ChipContentsHistory()
+        self.probe_cache = ProbeCache(ttl=PROBE_CACHE_TTL)
+        self.image_analysis = None
+        self.backup_store = None
 
         frame_sizer = wx.BoxSizer(wx.VERTICAL)
         frame_sizer.Add(self.panel, 1, wx.EXPAND)
@@ -236,8 +341,8 @@ class FlashromGUI(wx.Frame):
         chip_zoom_sizer = wx.BoxSizer(wx.VERTICAL)
         chip_zoom_sizer.Add(icon_panel, 0, wx.ALIGN_CENTER | wx.TOP, 10)
         chip_zoom_sizer.AddSpacer(10)
-        self.chip_combo = wx.ComboBox(self.panel, choices=[], style=wx.CB_DROPDOWN)
-        wx.CallAfter(self.populate_chip_list)
+        self.chip_combo = ChipPicker(self.panel)
+        self.catalog = None
         label = wx.StaticText(self.panel, wx.ID_ANY, "Select Chip")
         label.SetFont(wx.Font(9, wx.FONTFAMILY_SWISS, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
         label.SetForegroundColour(wx.Colour(255, 255, 255))  # white text
@@ -248,8 +353,33 @@ class FlashromGUI(wx.Frame):
         file_sizer = wx.BoxSizer(wx.HORIZONTAL)
         self.file_path_ctrl = wx.TextCtrl(self.panel)
         self.browse_button = wx.Button(self.panel, label="Browse")
+        self.view_button = wx.Button(self.panel, label="View")
+        self.view_button.SetToolTip("Hex view of the image, side by side with the chip's last known contents")
         file_sizer.Add(self.file_path_ctrl, 1, wx.EXPAND | wx.ALL, 5)
         file_sizer.Add(self.browse_button, 0, wx.ALL, 5)
+        file_sizer.Add(self.view_button, 0, wx.TOP | wx.BOTTOM | wx.RIGHT, 5)
+        self.incremental_check = wx.CheckBox(self.panel, label="Write changed blocks only")
+        self.incremental_check.SetToolTip(
+            "Compare the image with this session's last dump or write of this chip and programmer, "
+            "write only the erase blocks that differ, and verify the whole chip"
+        )
+        file_sizer.Add(self.incremental_check, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
+        self.stable_read_check = wx.CheckBox(self.panel, label="Stable read")
+        self.stable_read_check.SetToolTip(
+            "Read the chip up to the given number of times and save the dump only once two "
+            "reads are identical; recommended for in-circuit clips"
+        )
+        file_sizer.Add(self.stable_read_check, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
+        self.stable_passes_ctrl = wx.SpinCtrl(self.panel, min=2, max=MAX_PASSES, initial=DEFAULT_PASSES,
+                                              size=wx.Size(60, -1))
+        self.stable_passes_ctrl.SetToolTip("Most reads attempted by Stable read")
+        file_sizer.Add(self.stable_passes_ctrl, 0, wx.ALIGN_CENTER_VERTICAL | wx.TOP | wx.BOTTOM | wx.RIGHT, 5)
+        self.backup_check = wx.CheckBox(self.panel, label="Back up")
+        self.backup_check.SetToolTip(
+            "Keep reads in the deduplicated backup store; without Stable read "
+            "the dump goes straight into the store and no file is saved"
+        )
+        file_sizer.Add(self.backup_check, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
 
         log_sizer = wx.BoxSizer(wx.HORIZONTAL)
         log_sizer.AddSpacer(5)
@@ -265,15 +395,10 @@ class FlashromGUI(wx.Frame):
         label.SetForegroundColour(wx.Colour(255, 255, 255))  # white text
         label.SetBackgroundColour(wx.Colour(35, 38, 37))
         combo_sizer.Add(label, 0, wx.LEFT | wx.BOTTOM, 5)
-        self.programmer_combo = wx.ComboBox(self.panel, choices=[
-            "ch341a_spi", "internal", "dummy", "nic3com", "nicrealtek", "nicnatsemi", "gfxnvidia",
-            "raiden_debug_spi", "drkaiser", "satasii", "atahpt", "atavia", "atapromise", "it8212",
-            "ft2232_spi", "serprog", "buspirate_spi", "dediprog", "developerbox", "rayer_spi",
-            "pony_spi", "nicintel", "nicintel_spi", "nicintel_eeprom", "ogp_spi", "satamv",
-            "linux_mtd", "linux_spi", "parade_lspcon", "mediatek_i2c_spi", "realtek_mst_i2c_spi",
-            "usbblaster_spi", "mstarddc_spi", "pickit2_spi", "ch347_spi", "digilent_spi",
-            "jlink_spi", "ni845x_spi", "stlinkv3_spi", "dirtyjtag_spi", "spidriver"
-        ], style=wx.CB_DROPDOWN)
+        self.programmer_combo = wx.ComboBox(self.panel, choices=list(PROGRAMMERS), style=wx.CB_DROPDOWN)
+        self.connected_programmers = []
+        self.local_programmers = []
+        self.hotplug_watcher = None
         combo_sizer.Add(self.programmer_combo, 0, wx.ALIGN_RIGHT | wx.BOTTOM, 10)
         programmer_sizer.Add(combo_sizer, 0, wx.RIGHT | wx.BOTTOM, 10)
 
@@ -287,75 +412,326 @@ class FlashromGUI(wx.Frame):
         self.main_sizer.Add(programmer_sizer, 0, wx.EXPAND)
         self.main_sizer.Add(self.progress_bar, flag=wx.EXPAND | wx.ALL, border=10)
         
-        self.copy_log_button = wx.Button(self.panel, label="Copy Log")
-        self.main_sizer.Add(self.copy_log_button, 0, wx.ALIGN_RIGHT | wx.RIGHT | wx.BOTTOM, 10)
+        button_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.cancel_button = wx.Button(self.panel, label="Cancel")
+        self.cancel_button.Disable()
+        self.copy_log_button = wx.Button(self.panel, label="Save Log...")
+        self.batch_button = wx.Button(self.panel, label="Batch...")
+        self.stats_button = wx.Button(self.panel, label="Stats...")
+        self.backups_button = wx.Button(self.panel, label="Backups...")
+        self.regions_button = wx.Button(self.panel, label="Read Regions...")
+        self.regions_button.SetToolTip("Read only named regions (descriptor, GbE/MAC, NVRAM...) instead of the whole chip")
+        self.recipes_button = wx.Button(self.panel, label="Recipes...")
+        self.logs_button = wx.Button(self.panel, label="Logs...")
+        self.logs_button.SetToolTip("Search the output of every past operation")
+        self.agents_button = wx.Button(self.panel, label="Agents...")
+        self.agents_button.SetToolTip("Run jobs on programmers attached to other machines")
+        button_sizer.Add(self.batch_button, 0, wx.RIGHT, 5)
+        button_sizer.Add(self.stats_button, 0, wx.RIGHT, 5)
+        button_sizer.Add(self.backups_button, 0, wx.RIGHT, 5)
+        button_sizer.Add(self.regions_button, 0, wx.RIGHT, 5)
+        button_sizer.Add(self.recipes_button, 0, wx.RIGHT, 5)
+        button_sizer.Add(self.logs_button, 0, wx.RIGHT, 5)
+        button_sizer.Add(self.agents_button, 0, wx.RIGHT, 5)
+        button_sizer.Add(self.cancel_button, 0, wx.RIGHT, 5)
+        button_sizer.Add(self.copy_log_button, 0)
+        self.main_sizer.Add(button_sizer, 0, wx.ALIGN_RIGHT | wx.RIGHT | wx.BOTTOM, 10)
 
         self.panel.SetSizer(self.main_sizer)
         self.panel.Layout()
         self.Layout()
 
         self.Bind(wx.EVT_BUTTON, self.on_browse, self.browse_button)
+        self.Bind(wx.EVT_BUTTON, self.on_view, self.view_button)
         self.Bind(wx.EVT_COMBOBOX, self.on_chip_selected, self.chip_combo)
         self.Bind(wx.EVT_COMBOBOX, self.on_programmer_selected, self.programmer_combo)
         self.Bind(wx.EVT_BUTTON, self.on_copy_log, self.copy_log_button)
-        self.controller = FlashromController(on_output=self.log_output)
+        self.Bind(wx.EVT_BUTTON, self.on_cancel, self.cancel_button)
+        self.Bind(wx.EVT_BUTTON, self.on_batch, self.batch_button)
+        self.Bind(wx.EVT_BUTTON, self.on_stats, self.stats_button)
+        self.Bind(wx.EVT_BUTTON, self.on_backups, self.backups_button)
+        self.Bind(wx.EVT_BUTTON, self.on_read_regions, self.regions_button)
+        self.Bind(wx.EVT_BUTTON, self.on_recipes, self.recipes_button)
+        self.Bind(wx.EVT_BUTTON, self.on_logs, self.logs_button)
+        self.Bind(wx.EVT_BUTTON, self.on_agents, self.agents_button)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+        self.panel.Bind(wx.EVT_PAINT, self.on_panel_first_paint)
+        self.startup.mark("frame_built")
     
-    def detect_chip(self):
-        try:
-            result = subprocess.run(
-                ["flashrom", "-p", "internal"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            output = result.stdout
-            self.log_ctrl.AppendText(output + "\n")
-            
-           # Try to extract
-            match = re.search(r"Found\s+([^\n]+?)\s+flash\s+chip", output)
-            if match:
-                detected_chip = match.group(1).strip()
-                self.log_ctrl.AppendText(f"Detected chip: {detected_chip}\n")
-                self.sync_chip_selection(detected_chip)
-            else:
-                self.log_ctrl.AppendText("No chip detected.\n")
-                
-        except subprocess.CalledProcessError as e:
-            self.log_ctrl.AppendText(f"Detection failed:\n{e.stderr}\n")
-            
     def sync_chip_selection(self, detected_chip):
-        choices = [choice.lower() for choice in self.chip_combo.GetItems()]
-        if detected_chip.lower() in choices:
-            self.chip_combo.SetValue(detected_chip)
-            self.log_ctrl.AppendText(f"Chip auto-selected: {detected_chip}\n")
-        else:
-            self.log_ctrl.AppendText(f"Detected chip not in list. Please select manually.\n")
+        matches = self.chip_combo.index.match(detected_chip)
+        if matches and matches[0][0] >= ALIAS_MATCH:
+            device = matches[0][1].device
+            self.chip_combo.SetValue(device)
+            if device == detected_chip:
+                self.log_buffer.write(f"Chip auto-selected: {device}\n")
+            else:
+                self.log_buffer.write(f"Chip auto-selected: {device} (catalog entry for {detected_chip})\n")
+            return
+        if matches:
+            # Only similar; selecting it could pass the wrong -c
+            names = ", ".join(chip.device for _, chip in matches[:3])
+            self.log_buffer.write(f"Detected chip not in list; closest entries: {names}. Please select manually.\n")
+            return
+        self.log_buffer.write(f"Detected chip not in list. Please select manually.\n")
             
     def set_icons_enabled(self, enabled):
         for icon in self.icon_widgets.values():
             icon.Enable(enabled)
 
     def on_timer_tick(self, event):
-        self.progress_value += 2
-        if self.progress_value >= 100:
-            self.timer.Stop()
-            self.progress_bar.Hide()
+        self.flush_output()
+        snapshot = self.progress.snapshot()
+        if snapshot["percent"] is None:
+            self.progress_bar.Pulse()
+        elif snapshot["revision"] != self.progress_revision:
+            self.progress_bar.SetValue(snapshot["percent"])
+        self.progress_revision = snapshot["revision"]
+
+        status = format_progress(snapshot)
+        if snapshot["idle"] >= 10:
+            status += f" - no output for {int(snapshot['idle'])}s"
+        self.statusbar.SetStatusText(status)
+
+    def open_session_log(self):
+        try:
+            return session_log_path()
+        except OSError as e:
+            self.log_buffer.write(f"Session log disabled: {e}\n")
+            return None
+
+    def open_operation_log(self):
+        from flashrom_oplog import OperationLog
+        try:
+            self.oplog = OperationLog()
+        except OSError as e:
+            self.log_buffer.write(f"Operation log disabled: {e}\n")
+            return
+        self.executor.local.oplog = self.oplog
+
+    def queue_output(self, text, stream="stdout"):
+        # Called from reader threads; drained on the UI timer.
+        self.log_buffer.write(text)
+
+    def on_log_tick(self, event):
+        if self.log_buffer.has_pending():
+            self.flush_output()
+
+    def flush_output(self):
+        text, replace, status = self.log_buffer.drain()
+        if replace or self.log_view_lines > self.log_buffer.max_lines * 3 // 2:
+            # Rebuild from the ring instead of letting the control grow
+            self.log_ctrl.ChangeValue(self.log_buffer.text())
+            self.log_ctrl.ShowPosition(self.log_ctrl.GetLastPosition())
+            self.log_view_lines = self.log_buffer.line_count()
+        elif text:
+            self.log_ctrl.AppendText(text)
+            self.log_view_lines += text.count("\n")
+        if status is not None:
+            self.statusbar.SetStatusText(status)
+
+    def set_status(self, text):
+        self.log_buffer.write("", status=text)
+
+    def reset_log(self, text):
+        self.log_buffer.clear()
+        self.log_buffer.write(text)
+
+    def start_progress(self):
+        self.progress.reset()
+        self.progress_revision = -1
+        self.progress_bar.SetValue(0)
+        self.progress_bar.Show()
+        self.panel.Layout()
+        self.timer.Start(100)
+
+    def finish_progress(self, job):
+        self.timer.Stop()
+        self.flush_output()
+        self.progress_bar.Hide()
+        self.cancel_button.Disable()
+        self.panel.Layout()
+        self.set_icons_enabled(True)
+
+        if job.state == ERROR:
+            self.log_output(f"Error: {job.error}")
+            self.set_status("Error")
+        elif job.state == CANCELLED:
+            self.log_output(f"Cancelled after {job.duration:.1f}s")
+        elif job.state == TIMED_OUT:
+            self.log_output(f"Timed out after {job.duration:.1f}s; flashrom was stopped")
         else:
-            self.progress_bar.SetValue(self.progress_value)
+            result = "Done" if job.returncode == 0 else f"Failed (exit code {job.returncode})"
+            self.set_status(f"{result} in {job.duration:.1f}s")
 
     def log_output(self, message):
-        self.log_ctrl.AppendText(message + "\n")
-        self.statusbar.SetStatusText(message)
+        self.log_buffer.write(message + "\n", status=message)
 
     def on_browse(self, event):
         with wx.FileDialog(self, "Open file", wildcard="*.*",
                            style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as dlg:
             if dlg.ShowModal() == wx.ID_OK:
                 self.file_path_ctrl.SetValue(dlg.GetPath())
+                self.start_image_analysis(dlg.GetPath())
+
+    def on_view(self, event):
+        from flashrom_hexview_gui import HexViewFrame
+        path = self.get_filepath()
+        if not path or not os.path.isfile(path):
+            wx.MessageBox("Choose an existing file first.", "Hex view", wx.OK | wx.ICON_INFORMATION)
+            return
+        chip = self.chip_combo.GetValue()
+        last = self.contents_history.latest(chip, self.get_programmer()) if chip else None
+        compare_path = None
+        if last is not None and os.path.abspath(last["path"]) != os.path.abspath(path):
+            compare_path = last["path"]
+        try:
+            HexViewFrame(self, path, compare_path).Show()
+        except OSError as e:
+            wx.MessageBox(f"Cannot open {path}:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+
+    def start_image_analysis(self, path):
+        # Done while the user is still choosing chip and programmer, so
+        # Write can reject a bad image without waiting for anything
+        from flashrom_image import analyze_image
+        self.image_analysis = None
+
+        def task():
+            try:
+                analysis = analyze_image(path)
+                wx.CallAfter(self.on_image_analyzed, path, analysis)
+            except OSError as e:
+                wx.CallAfter(self.on_image_analyzed, path, None, e)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_image_analyzed(self, path, analysis, error=None):
+        if path != self.get_filepath():
+            # Another file was chosen in the meantime
+            return
+        if error is not None:
+            self.log_output(f"Cannot read image: {error}")
+            return
+        self.image_analysis = analysis
+        self.log_buffer.write(analysis.summary() + "\n")
+        for problem in analysis.region_problems():
+            self.log_buffer.write(f"Warning: {problem}\n")
+        size_problem = analysis.size_problem(self.selected_chip_info())
+        if size_problem:
+            self.log_output(f"Warning: {size_problem}")
+
+    def selected_chip_info(self):
+        """ChipInfo for the selected (or last detected) chip, or None."""
+        chip = self.chip_combo.GetValue()
+        if chip and self.catalog is not None:
+            info = self.catalog.find(chip)
+            if info is not None:
+                return info
+        cached = self.probe_cache.lookup(self.get_programmer())
+        if cached is not None and (not chip or chip.lower() == cached.chip.lower()):
+            return ChipInfo(cached.vendor, cached.chip, cached.size_kb, "", "", "", "")
+        return None
+
+    def image_preflight(self, image_path):
+        """Checks run before any write; False if the write should not start."""
+        analysis = self.image_analysis
+        if analysis is None or analysis.path != os.path.abspath(image_path) or not analysis.is_current():
+            from flashrom_image import analyze_image
+            try:
+                with wx.BusyCursor():
+                    analysis = self.image_analysis = analyze_image(image_path)
+            except OSError as e:
+                wx.MessageBox(f"Cannot read image:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+                return False
+
+        chip_info = self.selected_chip_info()
+        size_problem = analysis.size_problem(chip_info)
+        if size_problem:
+            self.log_output(f"Write refused: {size_problem}")
+            wx.MessageBox(f"{size_problem}.\nNothing was written.", "Wrong image size", wx.OK | wx.ICON_ERROR)
+            return False
+
+        chip = chip_info.device if chip_info else self.chip_combo.GetValue()
+        last = self.contents_history.latest(chip, self.get_programmer()) if chip else None
+        if analysis.matches(last):
+            answer = wx.MessageBox(
+                f"The chip already holds this image (sha256 {analysis.sha256[:16]}..., "
+                f"last {last['source']} {time.strftime('%Y-%m-%d %H:%M', time.localtime(last['recorded']))}).\n"
+                "Write it anyway?",
+                "Image unchanged", wx.YES_NO | wx.NO_DEFAULT | wx.ICON_INFORMATION
+            )
+            if answer != wx.YES:
+                self.log_output("Write skipped: the chip already holds this image.")
+                return False
+        return True
+
+    def start_hotplug_watcher(self):
+        self.hotplug_watcher = HotplugWatcher(
+            lambda programmers: wx.CallAfter(self.on_programmers_changed, programmers)
+        ).start()
+
+    def on_programmers_changed(self, programmers):
+        self.local_programmers = programmers
+        self.update_programmers()
+
+    def connect_agents(self, addresses):
+        """Connect to bench agents in the background; their programmers join the combo."""
+        def task(address):
+            from flashrom_agent import AgentClient, parse_address
+            try:
+                client = AgentClient(*parse_address(address))
+            except (OSError, ValueError) as e:
+                wx.CallAfter(self.log_output, f"Cannot connect to agent {address}: {e}")
+                return
+            client.on_disconnect = lambda client: wx.CallAfter(self.on_agent_disconnected, client)
+            self.executor.add(client)
+            wx.CallAfter(self.on_agent_connected, client)
+
+        for address in addresses:
+            threading.Thread(target=task, args=(address,), daemon=True).start()
+
+    def on_agent_connected(self, client):
+        if not self:
+            return
+        self.log_output(f"Connected to agent {client.name} ({client.address})")
+        self.update_programmers()
+
+    def on_agent_disconnected(self, client):
+        if not self:
+            return
+        self.log_output(f"Agent {client.name} disconnected")
+        self.update_programmers()
+
+    def update_programmers(self):
+        if not self:
+            return
+        programmers = list(self.local_programmers) + self.executor.remote_programmers()
+        previous = {entry.programmer for entry in self.connected_programmers}
+        current = self.programmer_combo.GetValue()
+        self.connected_programmers = programmers
+        self.programmer_combo.Set(programmer_choices(programmers, current))
+
+        for entry in programmers:
+            if entry.programmer not in previous:
+                self.log_buffer.write(f"Programmer connected: {entry.programmer} ({entry.description})\n")
+        for programmer in previous - {entry.programmer for entry in programmers}:
+            self.log_buffer.write(f"Programmer disconnected: {programmer}\n")
+            # Whatever is on it when it comes back may be another board
+            self.forget_contents(programmer)
+
+        # The selection is never switched to another device, local or on an
+        # agent: the next write would go to a board the user did not pick.
+        self.programmer_combo.SetValue(current)
+        connected = {entry.programmer for entry in programmers}
+        if current in previous and current not in connected:
+            self.log_buffer.write(f"Warning: the selected programmer {current} is disconnected\n")
+            self.set_status(f"{current} disconnected; reconnect it or choose another programmer")
+        elif current in connected and current not in previous:
+            self.set_status(f"{current} connected")
 
     def on_chip_selected(self, event):
         chip = self.chip_combo.GetValue()
-        self.log_ctrl.AppendText(f"Chip selected: {chip}\n")
+        self.log_buffer.write(f"Chip selected: {chip}\n")
 
     def get_filepath(self):
         return self.file_path_ctrl.GetValue()
@@ -365,122 +741,497 @@ class FlashromGUI(wx.Frame):
         
     def on_programmer_selected(self, event):
         programmer = self.programmer_combo.GetValue()
-        self.log_ctrl.AppendText(f"Programmer selected: {programmer}\n")
+        self.log_buffer.write(f"Programmer selected: {programmer}\n")
+
+    def run_flashrom(self, args, action_label, timeout=None, on_done=None, collect_output=False,
+                     keep_log=False):
+        if self.current_job is not None:
+            self.log_output("Another operation is still running.")
+            return None
+
+        self.set_status(action_label)
+        header = f"{action_label}\nRunning: flashrom {' '.join(args)}\n"
+        if keep_log:
+            self.log_buffer.write(header)
+        else:
+            self.reset_log(header)
 
-    def run_flashrom(self, args, action_label):
-        self.statusbar.SetStatusText(action_label)
-        self.log_ctrl.SetValue(f"{action_label}\nRunning: flashrom {' '.join(args)}\n")
+        try:
+            # Cross‑platform flashrom path
+            flashrom_path = get_flashrom_path()
+        except Exception as e:
+            if self.backend is not None or split_remote(self.get_programmer())[1]:
+                # Only libflashrom or an agent can run it; the name is for logs and telemetry
+                flashrom_path = "flashrom"
+            else:
+                self.log_output(f"Error: {e}")
+                self.set_status("Error")
+                return None
 
         self.set_icons_enabled(False)
+        self.cancel_button.SetLabel("Cancel")
+        self.cancel_button.Enable()
+        self.start_progress()
+
+        self.current_job = self.executor.submit(
+            [flashrom_path] + args,
+            self.get_programmer(),
+            label=action_label,
+            on_output=self.queue_output,
+            on_done=lambda job: wx.CallAfter(self.on_job_done, job, on_done),
+            progress=self.progress,
+            timeout=timeout,
+            collect_output=collect_output
+        )
+        return self.current_job
+
+    def on_job_done(self, job, on_done):
+        if job is self.current_job:
+            self.current_job = None
+        self.finish_progress(job)
+        self.update_probe_cache(job)
+        if on_done:
+            on_done(job)
+
+    def on_cancel(self, event):
+        job = self.current_job
+        if job is None:
+            return
+        if self.cancel_button.GetLabel() == "Kill":
+            self.log_output("Killing flashrom...")
+            job.kill()
+            return
+        if "-w" in job.cmd or "-E" in job.cmd:
+            answer = wx.MessageBox(
+                "Stopping a write or erase can leave the chip unbootable.\nCancel anyway?",
+                "Cancel", wx.YES_NO | wx.ICON_WARNING
+            )
+            if answer != wx.YES:
+                return
+        self.log_output("Cancelling...")
+        job.cancel()
+        # A second press skips the grace period
+        self.cancel_button.SetLabel("Kill")
+
+    def on_batch(self, event):
+        # Imported on first use; the batch window is not needed at startup
+        from flashrom_batch_gui import BatchFrame
+        frame = BatchFrame(self, self.executor, self.get_filepath(), self.get_programmer())
+        frame.Show()
+
+    def on_stats(self, event):
+        from flashrom_stats_gui import StatsFrame
+        StatsFrame(self, self.telemetry).Show()
+
+    def on_logs(self, event):
+        if self.oplog is None:
+            wx.MessageBox("The operation log could not be opened.", "Logs", wx.OK | wx.ICON_ERROR)
+            return
+        from flashrom_logsearch_gui import LogSearchFrame
+        LogSearchFrame(self, self.oplog).Show()
+
+    def on_agents(self, event):
+        from flashrom_agents_gui import AgentsFrame
+        AgentsFrame(self, self.executor, self.connect_agents, self.update_programmers).Show()
+
+    def on_close(self, event):
+        self.timer.Stop()
+        self.log_timer.Stop()
+        if self.hotplug_watcher is not None:
+            self.hotplug_watcher.stop()
+        self.executor.shutdown()
+        if self.backend is not None:
+            self.backend.close()
+        if self.oplog is not None:
+            self.oplog.close()
+        self.log_buffer.close()
+        event.Skip()
 
-        def task():
-            try:
-                # Cross‑platform flashrom path
-                flashrom_path = get_flashrom_path()
-                full_cmd = [flashrom_path] + args
-
-                result = subprocess.run(
-                    full_cmd,
-                    capture_output=True,
-                    text=True
-                )
+    def chip_args(self, programmer):
+        """-c for the chip detected earlier on this programmer, if still valid."""
+        cached = self.probe_cache.lookup(programmer)
+        return cached.chip_args() if cached else []
 
-                wx.CallAfter(
-                    self.log_ctrl.AppendText,
-                    result.stdout + "\n" + result.stderr
-                )
-                wx.CallAfter(
-                    self.statusbar.SetStatusText,
-                    "Done" if result.returncode == 0 else "Failed"
-                )
+    def update_probe_cache(self, job):
+        if job.returncode is None:
+            return
+        if job.returncode != 0:
+            if "-c" in job.cmd:
+                # Wrong or swapped chip; probe from scratch next time
+                self.probe_cache.invalidate(job.programmer)
+                self.forget_contents(job.programmer)
+            return
+        snapshot = self.progress.snapshot()
+        if snapshot["chip"] and "-c" not in job.cmd and any(flag in job.cmd for flag in ("-r", "-w", "-v")):
+            self.probe_cache.store(job.programmer, [("", snapshot["chip"], snapshot["chip_size"] // 1024, "")])
 
-            except Exception as e:
-                wx.CallAfter(self.log_output, f"Error: {e}")
-                wx.CallAfter(self.statusbar.SetStatusText, "Error")
+    def forget_contents(self, programmer):
+        try:
+            self.contents_history.forget_programmer(programmer)
+        except OSError as e:
+            self.log_buffer.write(f"Could not update chip contents: {e}\n")
 
-            finally:
-                wx.CallAfter(self.timer.Stop)
-                wx.CallAfter(self.progress_bar.Hide)
-                wx.CallAfter(self.set_icons_enabled, True)
+    def on_detect(self, event=None):
+        args = ["-p", self.get_programmer()]
+        self.run_flashrom(args, "Detecting chip...", timeout=PROBE_TIMEOUT,
+                          on_done=self.on_detect_done, collect_output=True)
 
-        threading.Thread(target=task).start()
+    def on_detect_done(self, job):
+        if job.returncode is None:
+            return
+        found = parse_found_chips(job.output_text())
+        if not found:
+            self.log_output("No chip detected.")
+            return
+        if len(found) > 1:
+            names = ", ".join(chip for _, chip, _, _ in found)
+            self.log_output(f"Multiple chip definitions match: {names}")
+        detected_chip = found[0][1]
+        self.log_output(f"Detected chip: {detected_chip}")
+        self.sync_chip_selection(detected_chip)
+        if self.probe_cache.store(job.programmer, found) is not None:
+            self.log_output(f"Later operations pass -c {detected_chip} until the programmer is re-plugged.")
 
 
-    def on_detect(self, event=None):
-        if not hasattr(self, 'controller'):
-            self.log_output("Flashrom controller not initialized.")
+    def on_read(self, event=None):
+        if self.backup_check.GetValue() and not self.stable_read_check.GetValue():
+            self.read_to_backup()
             return
 
-        try:
-            exe_path = get_flashrom_path()
-
-            result = subprocess.run(
-                [exe_path, "-p", "internal"],
-                capture_output=True,
-                text=True
-            )
+        with wx.FileDialog(
+            self,
+            message="Save ROM dump as...",
+            wildcard="ROM files (*.bin)|*.bin|All files (*.*)|*.*",
+            style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT
+        ) as save_dialog:
+            if save_dialog.ShowModal() == wx.ID_CANCEL:
+                return
 
-            output = result.stdout
-            self.log_output(output)
-
-            # Corrected regex (your original had args reversed)
-            match = re.search(r"Found\s+([^\n]+?\s+flash\s+chip)", output)
-            if match:
-                detected_chip = match.group(1).strip()
-                self.log_output(f"Detected chip: {detected_chip}")
-
-                # Sync with dropdown
-                choices = [c.lower() for c in self.chip_combo.GetItems()]
-                if detected_chip.lower() in choices:
-                    self.chip_combo.SetValue(detected_chip)
-                    self.log_output(f"Chip auto-selected: {detected_chip}")
-                else:
-                    self.log_output("Detected chip not in list. Please select manually.")
-            else:
-                self.log_output("No chip detected.")
+            save_path = save_dialog.GetPath()
 
-        except Exception as e:
-            self.log_output(f"Detection failed:\n{e}")
+        if self.stable_read_check.GetValue():
+            self.read_stable(save_path)
+            return
 
-        # Controller fallback
         programmer = self.get_programmer()
-        chip_name = self.controller.on_detect_chip(programmer)
-        self.chip_combo.SetValue(chip_name if chip_name else "Unknown")
-
+        args = ["-p", programmer] + self.chip_args(programmer) + ["-r", save_path]
+        self.run_flashrom(args, "Reading chip...", on_done=lambda job: self.remember_contents(job, save_path, "read"))
+
+    def on_read_regions(self, event):
+        from flashrom_regions import RegionPresets
+        from flashrom_regions_gui import RegionReadDialog
+        with RegionReadDialog(self, RegionPresets()) as dlg:
+            if dlg.ShowModal() != wx.ID_OK:
+                return
+            region_read = dlg.get_region_read()
+            split = dlg.split
 
-    def on_read(self, event=None):
         with wx.FileDialog(
             self,
-            message="Save ROM dump as...",
+            message="Save regions as...",
             wildcard="ROM files (*.bin)|*.bin|All files (*.*)|*.*",
             style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT
         ) as save_dialog:
             if save_dialog.ShowModal() == wx.ID_CANCEL:
                 return
-
             save_path = save_dialog.GetPath()
 
-        self.progress_value = 0
-        self.progress_bar.SetValue(0)
-        self.progress_bar.Show()
-        self.timer.Start(100)
+        fd, layout_path = tempfile.mkstemp(prefix="flashromgui-", suffix=".layout")
+        os.close(fd)
+        region_read.prepare(layout_path)
+        if region_read.layout_path != layout_path:
+            # The layout file (or --ifd) is used as is
+            os.remove(layout_path)
+        programmer = self.get_programmer()
+        args = ["-p", programmer] + self.chip_args(programmer) + region_read.read_args(save_path)
+        # Not remembered as the chip's contents: the rest of the image is filler
+        job = self.run_flashrom(args, f"Reading {', '.join(region_read.include)}...",
+                                on_done=lambda job: self.on_regions_read(job, region_read, save_path, split))
+        if job is None:
+            region_read.cleanup()
+
+    def on_regions_read(self, job, region_read, path, split):
+        region_read.cleanup()
+        if job.returncode != 0:
+            return
+        try:
+            paths = region_read.finish(path, split)
+        except (OSError, ValueError) as e:
+            self.log_output(f"Region read failed: {e}")
+            return
+        for saved in paths:
+            self.log_output(f"Saved {saved}")
+
+    def get_backup_store(self):
+        if self.backup_store is None:
+            from flashrom_backup import BackupStore
+            self.backup_store = BackupStore()
+        return self.backup_store
+
+    def read_to_backup(self):
+        programmer = self.get_programmer()
+        try:
+            writer = self.get_backup_store().writer(self.chip_combo.GetValue(), programmer)
+        except OSError as e:
+            wx.MessageBox(f"Cannot open the backup store:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+            return
+
+        if hasattr(os, "mkfifo"):
+            # flashrom writes into a pipe that feeds the store directly
+            from flashrom_backup import FifoSink
+            sink = FifoSink(writer)
+            target = sink.path
+        else:
+            sink = None
+            fd, target = tempfile.mkstemp(prefix="flashromgui-", suffix=".bin")
+            os.close(fd)
+
+        args = ["-p", programmer] + self.chip_args(programmer) + ["-r", target]
+        job = self.run_flashrom(args, "Backing up chip...",
+                                on_done=lambda job: self.on_backup_read(job, writer, sink, target))
+        if job is None:
+            self.finish_backup(None, writer, sink, target)
+
+    def on_backup_read(self, job, writer, sink, target):
+        if not writer.chip:
+            writer.chip = self.progress.snapshot()["chip"] or ""
+        self.set_icons_enabled(False)
+        threading.Thread(target=self.finish_backup, args=(job, writer, sink, target), daemon=True).start()
+
+    def finish_backup(self, job, writer, sink, target):
+        manifest = error = None
+        try:
+            received = sink.close() if sink is not None else True
+            if job is not None and job.returncode == 0:
+                if sink is not None and not received:
+                    raise OSError(sink.error or "flashrom wrote no data")
+                if sink is None:
+                    with open(target, "rb") as f:
+                        for block in iter(lambda: f.read(1 << 20), b""):
+                            writer.write(block)
+                manifest = writer.finish()
+        except (OSError, ValueError) as e:
+            error = e
+        finally:
+            if manifest is None:
+                # Failed or cancelled: drop the chunks this dump already added
+                writer.abort()
+            if sink is None and os.path.exists(target):
+                os.remove(target)
+        if job is not None:
+            wx.CallAfter(self.on_backup_stored, manifest, error)
+
+    def on_backup_stored(self, manifest, error):
+        self.set_icons_enabled(True)
+        if error is not None:
+            self.log_output(f"Backup failed: {error}")
+            return
+        if manifest is None:
+            self.log_output("Backup aborted; nothing was stored.")
+            return
+        seen = manifest["seen_before"]
+        self.log_buffer.write(
+            f"Stored {manifest['size'] // 1024} KiB as {len(manifest['chunks'])} chunks, "
+            f"{manifest['new_chunks']} new ({manifest['stored_bytes'] // 1024} KiB on disk)\n"
+        )
+        if seen:
+            self.log_output(f"Backup {manifest['id']}: identical to {len(seen)} earlier backup(s), first {seen[0]}")
+        else:
+            self.log_output(f"Backup {manifest['id']}: firmware not seen before")
+
+    def ingest_backup(self, path, chip, programmer):
+        def task():
+            try:
+                manifest = self.get_backup_store().ingest_file(path, chip, programmer, "read")
+                wx.CallAfter(self.on_backup_stored, manifest, None)
+            except (OSError, ValueError) as e:
+                wx.CallAfter(self.on_backup_stored, None, e)
+
+        self.set_icons_enabled(False)
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_backups(self, event):
+        from flashrom_backup_gui import BackupFrame
+        try:
+            store = self.get_backup_store()
+        except OSError as e:
+            wx.MessageBox(f"Cannot open the backup store:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+            return
+        BackupFrame(self, store, on_write_image=self.write_restored_image).Show()
+
+    def on_recipes(self, event):
+        from flashrom_pipeline_gui import PipelineFrame
+        try:
+            store = self.get_backup_store()
+        except OSError as e:
+            self.log_output(f"Backup store unavailable, backups stay in the pipeline folder: {e}")
+            store = None
+        PipelineFrame(self, self.executor, self.get_filepath(), self.get_programmer(), store=store,
+                      probe_cache=self.probe_cache, on_finished=self.on_pipeline_finished).Show()
+
+    def on_pipeline_finished(self, state):
+        self.log_output(state.summary())
+        data = state.data
+        write = state.stage("write")
+        if not data["chip"] or write is None:
+            return
+        try:
+            if write["status"] in ("done", "skipped") and state.status == "done":
+                self.contents_history.record(data["chip"], data["programmer"], data["image"], "write",
+                                             data["image_sha256"])
+            elif data["chip_dirty"]:
+                self.contents_history.forget(data["chip"], data["programmer"])
+        except OSError as e:
+            self.log_output(f"Could not record chip contents: {e}")
+
+    def write_restored_image(self, path):
+        self.file_path_ctrl.SetValue(path)
+        self.log_output(f"Restored backup to {path}")
+        self.on_write()
+
+    def read_stable(self, save_path):
+        from flashrom_stable_read import StableRead
+        try:
+            stable = StableRead(save_path, self.stable_passes_ctrl.GetValue())
+        except (OSError, ValueError) as e:
+            wx.MessageBox(f"Cannot start stable read:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+            return
+        self.reset_log(f"Stable read into {save_path} (up to {stable.passes} passes)\n")
+        self.read_stable_pass(stable, self.get_programmer())
+
+    def read_stable_pass(self, stable, programmer):
+        try:
+            path = stable.next_path()
+        except OSError as e:
+            self.log_output(f"Cannot create a temporary dump: {e}")
+            return
+        label = f"Reading chip (pass {len(stable.completed) + 1} of {stable.passes})..."
+        job = self.run_flashrom(
+            ["-p", programmer] + self.chip_args(programmer) + ["-r", path], label, keep_log=True,
+            on_done=lambda job: self.on_stable_pass_done(job, stable, path, programmer)
+        )
+        if job is None:
+            stable.cleanup()
+
+    def on_stable_pass_done(self, job, stable, path, programmer):
+        if job.returncode != 0:
+            stable.cleanup()
+            self.log_output("Stable read aborted; nothing was saved.")
+            return
 
-        args = ["-p", self.get_programmer(), "-r", save_path]
-        self.run_flashrom(args, "Reading chip...")
+        # Hash off the UI thread; large dumps take a moment
+        self.set_icons_enabled(False)
 
+        def task():
+            try:
+                read = stable.add_pass(path)
+                wx.CallAfter(self.on_stable_pass_checked, job, stable, read, programmer)
+            except (OSError, ValueError) as e:
+                wx.CallAfter(self.on_stable_pass_checked, job, stable, None, programmer, e)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_stable_pass_checked(self, job, stable, read, programmer, error=None):
+        self.set_icons_enabled(True)
+        if error is not None:
+            stable.cleanup()
+            self.log_output(f"Stable read failed: {error}")
+            return
+        self.log_buffer.write(stable.describe(read) + "\n")
+
+        if stable.is_stable:
+            try:
+                path = stable.commit()
+            except OSError as e:
+                stable.cleanup()
+                self.log_output(f"Could not save the dump: {e}")
+                return
+            if stable.unstable_blocks:
+                self.log_buffer.write(stable.unstable_summary() + "\n")
+            self.log_output(f"Stable dump saved to {path} after {read.number} passes")
+            self.remember_contents(job, path, "read", sha256=read.sha256)
+            if self.backup_check.GetValue():
+                self.ingest_backup(path, self.chip_combo.GetValue() or job.progress.snapshot()["chip"] or "", programmer)
+        elif stable.is_finished:
+            self.log_buffer.write(stable.unstable_summary() + "\n")
+            stable.cleanup()
+            self.log_output(
+                f"Stable read FAILED: no two of {stable.passes} passes agree; nothing was saved. "
+                "Check the clip and the programmer's power supply."
+            )
+        else:
+            self.read_stable_pass(stable, programmer)
+
+    def remember_contents(self, job, path, source, sha256=None):
+        # The file now matches the chip; later writes can diff against it
+        chip = self.chip_combo.GetValue()
+        if not chip:
+            return
+        try:
+            if job.returncode == 0:
+                self.contents_history.record(chip, job.programmer, path, source, sha256)
+            elif source == "write":
+                # Partially written; nothing on disk matches the chip any more
+                self.contents_history.forget(chip, job.programmer)
+        except OSError as e:
+            self.log_output(f"Could not record chip contents: {e}")
 
     def on_write(self, event=None):
         if not self.get_filepath():
             wx.MessageBox("Please select a ROM file.", "Error", wx.OK | wx.ICON_ERROR)
             return
 
-        self.progress_value = 0
-        self.progress_bar.SetValue(0)
-        self.progress_bar.Show()
-        self.timer.Start(100)
+        image_path = self.get_filepath()
+        if not self.image_preflight(image_path):
+            return
+        if self.incremental_check.GetValue():
+            self.write_incremental(image_path)
+            return
+
+        programmer = self.get_programmer()
+        args = ["-p", programmer] + self.chip_args(programmer) + ["-w", image_path]
+        self.run_flashrom(args, "Writing chip...", on_done=lambda job: self.remember_contents(job, image_path, "write"))
+
+    def write_incremental(self, image_path):
+        chip = self.chip_combo.GetValue()
+        programmer = self.get_programmer()
+        # Only a dump of this board: one from an earlier session or before a
+        # re-plug may be another board of the same model
+        last = self.contents_history.latest(chip, programmer, DUMP_MAX_AGE, this_session=True) if chip else None
+        if last is None:
+            self.log_output("No recent dump of this chip; writing the full image.")
+            args = ["-p", programmer] + self.chip_args(programmer) + ["-w", image_path]
+            self.run_flashrom(args, "Writing chip...", on_done=lambda job: self.remember_contents(job, image_path, "write"))
+            return
+
+        try:
+            with wx.BusyCursor():
+                diff = IncrementalWrite(last["path"], image_path)
+        except (OSError, ValueError) as e:
+            wx.MessageBox(f"Cannot compare with last dump:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+            return
+
+        if not diff.ranges:
+            self.log_output(f"Image matches {last['path']}; verifying the chip instead of writing.")
+            args = ["-p", programmer, "-c", chip, "-v", image_path]
+            self.run_flashrom(args, "Verifying chip...", on_done=lambda job: self.remember_contents(job, image_path, "write"))
+            return
+
+        fd, layout_path = tempfile.mkstemp(prefix="flashromgui-", suffix=".layout")
+        os.close(fd)
+        diff.prepare(layout_path)
+        self.log_output(
+            f"Writing {len(diff.ranges)} changed region(s), {diff.changed_bytes // 1024} KiB "
+            f"(compared with {last['path']})"
+        )
+
+        def on_done(job):
+            diff.cleanup()
+            self.remember_contents(job, image_path, "write")
 
-        args = ["-p", self.get_programmer(), "-w", self.get_filepath()]
-        self.run_flashrom(args, "Writing chip...")
+        args = ["-p", programmer, "-c", chip] + diff.write_args()
+        if self.run_flashrom(args, "Writing changed blocks...", on_done=on_done) is None:
+            diff.cleanup()
 
 
     def on_verify(self, event=None):
@@ -488,26 +1239,72 @@ class FlashromGUI(wx.Frame):
             wx.MessageBox("Please select a ROM file.", "Error", wx.OK | wx.ICON_ERROR)
             return
 
-        self.progress_value = 0
-        self.progress_bar.SetValue(0)
-        self.progress_bar.Show()
-        self.timer.Start(100)
+        image_path = self.get_filepath()
+        dump = self.recent_dump()
+        if dump is None:
+            programmer = self.get_programmer()
+            args = ["-p", programmer] + self.chip_args(programmer) + ["-v", image_path]
+            self.run_flashrom(args, "Verifying chip...")
+            return
 
-        args = ["-p", self.get_programmer(), "-v", self.get_filepath()]
-        self.run_flashrom(args, "Verifying chip...")
+        from flashrom_verify import compare_files
+        self.reset_log(f"Verifying {image_path}\nagainst dump {dump['path']}\n")
+        self.set_status("Verifying against dump...")
+        self.set_icons_enabled(False)
+
+        def task():
+            try:
+                result = compare_files(image_path, dump["path"])
+                wx.CallAfter(self.on_dump_verified, result)
+            except OSError as e:
+                wx.CallAfter(self.on_dump_verified, None, e)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def recent_dump(self):
+        """Last read of this chip if nothing has been written since."""
+        chip = self.chip_combo.GetValue()
+        if not chip:
+            return None
+        entry = self.contents_history.latest(chip, self.get_programmer())
+        if entry is None or entry.get("source") != "read":
+            return None
+        if time.time() - entry["recorded"] > DUMP_MAX_AGE:
+            return None
+        return entry
+
+    def on_dump_verified(self, result, error=None):
+        self.set_icons_enabled(True)
+        if error is not None:
+            self.log_output(f"Verify failed: {error}")
+            return
+        self.log_buffer.write(result.summary() + "\n")
+        self.set_status("Verified" if result.ok else "Verify FAILED")
 
-        
     def on_probe(self, event):
-        output = self.controller.on_probe_chip()
-        self.log_output(output)
+        self.run_flashrom([], "Probing...", timeout=PROBE_TIMEOUT)
         
     def on_copy_log(self, event):
-        log_text = self.log_ctrl.GetValue()
+        self.flush_output()
+        spill_path = self.log_buffer.spill_path
+        if spill_path and os.path.exists(spill_path):
+            # The panel only holds the tail; the session log has everything
+            with open(spill_path, 'r', encoding='utf-8', errors='replace') as file:
+                log_text = file.read()
+        else:
+            log_text = self.log_buffer.text()
         if not log_text.strip():
             wx.MessageBox("Log is empty.", "Save Log", wx.ICON_INFORMATION)
             return
-            
-        log_path = os.path.join(os.getcwd(), "log_file.txt")
+
+        with wx.FileDialog(
+            self, "Save session log", defaultFile=time.strftime("flashrom-session-%Y%m%d-%H%M%S.log"),
+            wildcard="Log files (*.log)|*.log|All files (*.*)|*.*",
+            style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT
+        ) as save_dialog:
+            if save_dialog.ShowModal() == wx.ID_CANCEL:
+                return
+            log_path = save_dialog.GetPath()
         try:
             with open(log_path, 'w', encoding='utf-8') as file:
                 file.write(log_text)
@@ -516,5 +1313,22 @@ class FlashromGUI(wx.Frame):
             wx.MessageBox(f"Failed to save log:\n{e}", "Error", wx.ICON_ERROR)
 
 if __name__ == "__main__":
-    app = MyApp(0)
+    parser = argparse.ArgumentParser(description="Flashrom GUI")
+    parser.add_argument("--no-splash", action="store_true",
+                        help="start without the splash screen (also FLASHROMGUI_NO_SPLASH=1)")
+    parser.add_argument("--startup-bench", action="store_true",
+                        help="print startup timings and exit once the window is interactive")
+    parser.add_argument("--libflashrom", action="store_true",
+                        help="run operations through libflashrom with the programmer kept open, "
+                             "falling back to the flashrom command line (also FLASHROMGUI_LIBFLASHROM=1)")
+    parser.add_argument("--agent", action="append", default=[], metavar="HOST[:PORT]",
+                        help="connect to a bench agent; repeat for several "
+                             "(also FLASHROMGUI_AGENTS, comma separated)")
+    # Unknown arguments (e.g. macOS -psn_*) are ignored
+    options, _ = parser.parse_known_args()
+    show_splash = not (options.no_splash or os.environ.get("FLASHROMGUI_NO_SPLASH") == "1")
+    use_libflashrom = options.libflashrom or os.environ.get("FLASHROMGUI_LIBFLASHROM") == "1"
+    agents = options.agent + [address for address in os.environ.get("FLASHROMGUI_AGENTS", "").split(",") if address]
+    app = MyApp(show_splash=show_splash, startup_bench=options.startup_bench, use_libflashrom=use_libflashrom,
+                agents=agents)
     app.MainLoop()
\ No newline at end of file
@@ -0,0 +1,189 @@
+# flashrom_hexdata.py
+import bisect
+import mmap
+import os
+import threading
+
+from flashrom_diff import DEFAULT_BLOCK_SIZE, parse_layout
+from flashrom_image import ImageRegion, parse_fmap, parse_ifd
+
+BYTES_PER_ROW = 16
+
+# Slices compared in one go while building the diff index.
+DIFF_STRIDE = 1 << 20
+
+# Printable ASCII, everything else shown as "."
+_ASCII = bytes(byte if 0x20 <= byte < 0x7f else 0x2e for byte in range(256))
+
+
+class MappedFile:
+    """Read-only mapping of a file of any size; nothing is read up front."""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._file = open(self.path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size:
+            self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.buf = b""
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+        self._file.close()
+
+
+class DiffIndex:
+    """Sorted start offsets of the blocks that differ between two files."""
+
+    def __init__(self, blocks, block_size, size):
+        self.blocks = blocks
+        self.block_size = block_size
+        self.size = size
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def next(self, offset):
+        """First differing block after the one containing offset, or None."""
+        index = bisect.bisect_right(self.blocks, offset - offset % self.block_size)
+        return self.blocks[index] if index < len(self.blocks) else None
+
+    def previous(self, offset):
+        index = bisect.bisect_left(self.blocks, offset - offset % self.block_size) - 1
+        return self.blocks[index] if index >= 0 else None
+
+    def contains(self, offset):
+        block = offset - offset % self.block_size
+        index = bisect.bisect_left(self.blocks, block)
+        return index < len(self.blocks) and self.blocks[index] == block
+
+
+def build_diff_index(a, b, block_size=DEFAULT_BLOCK_SIZE, cancelled=None):
+    """
+    Compare two buffers block by block. Equal megabyte slices are skipped
+    with a single memcmp; bytes past the end of the shorter buffer count as
+    different. cancelled() is polled between slices.
+    """
+    common = min(len(a), len(b))
+    stride = max(block_size, DIFF_STRIDE) // block_size * block_size
+    blocks = []
+    for chunk in range(0, common, stride):
+        if cancelled is not None and cancelled():
+            return None
+        chunk_end = min(chunk + stride, common)
+        if a[chunk:chunk_end] == b[chunk:chunk_end]:
+            continue
+        for start in range(chunk, chunk_end, block_size):
+            end = min(start + block_size, chunk_end)
+            if a[start:end] != b[start:end]:
+                blocks.append(start)
+    size = max(len(a), len(b))
+    if size > common:
+        tail = common - common % block_size
+        if blocks and blocks[-1] == tail:
+            tail += block_size
+        blocks.extend(range(tail, size, block_size))
+    return DiffIndex(blocks, block_size, size)
+
+
+class HexDocument:
+    """
+    Row model for the hex viewer: one file, optionally a second one to
+    compare with, and the regions to overlay. Rows are sliced out of the
+    mappings on demand, so memory use does not depend on the file size.
+
+    close() while build_diff() runs on another thread is deferred until
+    that thread is done slicing the mappings; it unmaps them on its way out.
+    """
+
+    def __init__(self, path, compare_path=None):
+        self.file = MappedFile(path)
+        self.compare = MappedFile(compare_path) if compare_path else None
+        self.diff = None
+        self.regions = []
+        self._region_starts = []
+        self._lock = threading.Lock()
+        self._diffing = 0
+        self._closing = False
+        self.set_regions(self.detect_regions())
+
+    @property
+    def size(self):
+        return max(self.file.size, self.compare.size if self.compare else 0)
+
+    @property
+    def rows(self):
+        return (self.size + BYTES_PER_ROW - 1) // BYTES_PER_ROW
+
+    def row(self, index):
+        """(offset, bytes of the file, bytes of the compare file or None)."""
+        offset = index * BYTES_PER_ROW
+        data = self.file.buf[offset:offset + BYTES_PER_ROW]
+        other = self.compare.buf[offset:offset + BYTES_PER_ROW] if self.compare else None
+        return offset, data, other
+
+    def detect_regions(self):
+        regions = parse_ifd(self.file.buf) + parse_fmap(self.file.buf)
+        return [region for region in regions if region.start < self.file.size]
+
+    def load_layout(self, path):
+        """Overlay the regions of a flashrom layout file instead of the detected ones."""
+        self.set_regions([ImageRegion("layout", name, start, end) for start, end, name in parse_layout(path)])
+
+    def set_regions(self, regions):
+        self.regions = sorted(regions, key=lambda region: (region.start, -region.end))
+        self._region_starts = [region.start for region in self.regions]
+
+    def region_at(self, offset):
+        """Innermost region containing offset, or None."""
+        index = bisect.bisect_right(self._region_starts, offset)
+        best = None
+        for region in self.regions[:index]:
+            if offset < region.end and (best is None or region.end - region.start < best.end - best.start):
+                best = region
+        return best
+
+    def build_diff(self, block_size=DEFAULT_BLOCK_SIZE, cancelled=None):
+        with self._lock:
+            if self.compare is None or self._closing:
+                return None
+            self._diffing += 1
+        try:
+            diff = build_diff_index(self.file.buf, self.compare.buf, block_size, cancelled)
+        finally:
+            with self._lock:
+                self._diffing -= 1
+                close_now = self._closing and not self._diffing
+            if close_now:
+                self._unmap()
+        if diff is not None:
+            self.diff = diff
+        return diff
+
+    def close(self):
+        """Unmap the files now, or when a running build_diff() returns."""
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            if self._diffing:
+                return
+        self._unmap()
+
+    def _unmap(self):
+        self.file.close()
+        if self.compare:
+            self.compare.close()
+
+
+def format_hex(data):
+    return data.hex(" ")
+
+
+def format_ascii(data):
+    return bytes(data).translate(_ASCII).decode("ascii")
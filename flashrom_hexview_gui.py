@@ -0,0 +1,278 @@
+# flashrom_hexview_gui.py
+import os
+import threading
+import wx
+from flashrom_hexdata import BYTES_PER_ROW, HexDocument, format_ascii, format_hex
+
+REGION_COLOURS = (
+    wx.Colour(225, 240, 255), wx.Colour(230, 255, 230), wx.Colour(255, 245, 220),
+    wx.Colour(245, 230, 255), wx.Colour(225, 250, 250), wx.Colour(255, 235, 240),
+)
+DIFF_ROW_COLOUR = wx.Colour(255, 225, 225)
+DIFF_BYTE_COLOUR = wx.Colour(200, 0, 0)
+OFFSET_COLOUR = wx.Colour(110, 110, 110)
+
+# Characters per column group
+OFFSET_CHARS = 10
+HEX_CHARS = BYTES_PER_ROW * 3 + 1
+ASCII_CHARS = BYTES_PER_ROW + 3
+
+
+class HexList(wx.VListBox):
+    """
+    Owner-drawn virtual list: one row per 16 bytes, drawn straight from the
+    document's mappings when it scrolls into view.
+    """
+
+    def __init__(self, parent, document):
+        super().__init__(parent)
+        self.document = document
+        self.font = wx.Font(10, wx.FONTFAMILY_TELETYPE, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL)
+        dc = wx.ClientDC(self)
+        dc.SetFont(self.font)
+        self.char_width, self.char_height = dc.GetTextExtent("0")
+        self.region_brushes = [wx.Brush(colour) for colour in REGION_COLOURS]
+        self.diff_brush = wx.Brush(DIFF_ROW_COLOUR)
+        self.SetItemCount(document.rows)
+
+    def set_document(self, document):
+        self.document = document
+        self.SetItemCount(document.rows)
+        self.Refresh()
+
+    def OnMeasureItem(self, index):
+        return self.char_height + 2
+
+    def OnDrawBackground(self, dc, rect, index):
+        if self.IsSelected(index):
+            super().OnDrawBackground(dc, rect, index)
+            return
+        offset = index * BYTES_PER_ROW
+        document = self.document
+        brush = None
+        if document.diff is not None and document.diff.contains(offset):
+            brush = self.diff_brush
+        else:
+            region = document.region_at(offset)
+            if region is not None:
+                brush = self.region_brushes[document.regions.index(region) % len(self.region_brushes)]
+        if brush is not None:
+            dc.SetPen(wx.TRANSPARENT_PEN)
+            dc.SetBrush(brush)
+            dc.DrawRectangle(rect)
+
+    def OnDrawItem(self, dc, rect, index):
+        offset, data, other = self.document.row(index)
+        dc.SetFont(self.font)
+        y = rect.y + 1
+        x = rect.x + 4
+        dc.SetTextForeground(OFFSET_COLOUR)
+        dc.DrawText(f"{offset:08x}", x, y)
+        x += OFFSET_CHARS * self.char_width
+        self.draw_pane(dc, x, y, data, other)
+        x += (HEX_CHARS + ASCII_CHARS) * self.char_width
+        if other is not None:
+            dc.SetTextForeground(OFFSET_COLOUR)
+            dc.DrawText("|", x - 2 * self.char_width, y)
+            self.draw_pane(dc, x, y, other, data)
+            x += (HEX_CHARS + ASCII_CHARS) * self.char_width
+        # Label the row a region starts in
+        region = self.document.region_at(offset)
+        if region is not None and offset <= region.start < offset + BYTES_PER_ROW:
+            dc.SetTextForeground(OFFSET_COLOUR)
+            dc.DrawText(f"{region.source}:{region.name}", x, y)
+
+    def draw_pane(self, dc, x, y, data, other):
+        dc.SetTextForeground(wx.SystemSettings.GetColour(wx.SYS_COLOUR_LISTBOXTEXT))
+        dc.DrawText(format_hex(data), x, y)
+        ascii_x = x + HEX_CHARS * self.char_width
+        dc.DrawText(format_ascii(data), ascii_x, y)
+        if other is None or data == other:
+            return
+        # Bytes that differ from the other file, redrawn in red
+        dc.SetTextForeground(DIFF_BYTE_COLOUR)
+        font = dc.GetFont()
+        dc.SetFont(font.Bold())
+        for column, byte in enumerate(data):
+            if column >= len(other) or other[column] != byte:
+                dc.DrawText(f"{byte:02x}", x + column * 3 * self.char_width, y)
+                dc.DrawText(format_ascii(data[column:column + 1]), ascii_x + column * self.char_width, y)
+        dc.SetFont(font)
+
+
+class HexViewFrame(wx.Frame):
+    """Hex/ASCII viewer with an optional side-by-side comparison."""
+
+    def __init__(self, parent, path, compare_path=None):
+        super().__init__(parent, title=f"Hex view - {os.path.basename(path)}", size=wx.Size(1250, 650))
+        self.document = HexDocument(path, compare_path)
+        self.diff_cancelled = threading.Event()
+        panel = wx.Panel(self)
+
+        self.goto_ctrl = wx.TextCtrl(panel, style=wx.TE_PROCESS_ENTER, size=wx.Size(120, -1))
+        self.goto_ctrl.SetHint("offset (hex)")
+        self.prev_button = wx.Button(panel, label="< Diff")
+        self.next_button = wx.Button(panel, label="Diff >")
+        self.region_choice = wx.Choice(panel)
+        self.compare_button = wx.Button(panel, label="Compare...")
+        self.layout_button = wx.Button(panel, label="Layout...")
+        self.status = wx.StaticText(panel, label="")
+        self.position = wx.StaticText(panel, label="")
+        self.list = HexList(panel, self.document)
+
+        toolbar = wx.BoxSizer(wx.HORIZONTAL)
+        toolbar.Add(wx.StaticText(panel, label="Go to"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        toolbar.Add(self.goto_ctrl, 0, wx.RIGHT, 10)
+        toolbar.Add(self.prev_button, 0, wx.RIGHT, 5)
+        toolbar.Add(self.next_button, 0, wx.RIGHT, 10)
+        toolbar.Add(self.region_choice, 0, wx.RIGHT, 10)
+        toolbar.Add(self.compare_button, 0, wx.RIGHT, 5)
+        toolbar.Add(self.layout_button, 0, wx.RIGHT, 10)
+        toolbar.Add(self.status, 1, wx.ALIGN_CENTER_VERTICAL)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(toolbar, 0, wx.EXPAND | wx.ALL, 5)
+        sizer.Add(self.list, 1, wx.EXPAND)
+        sizer.Add(self.position, 0, wx.EXPAND | wx.ALL, 5)
+        panel.SetSizer(sizer)
+
+        self.Bind(wx.EVT_TEXT_ENTER, self.on_goto, self.goto_ctrl)
+        self.Bind(wx.EVT_BUTTON, lambda event: self.jump_diff(forward=False), self.prev_button)
+        self.Bind(wx.EVT_BUTTON, lambda event: self.jump_diff(forward=True), self.next_button)
+        self.Bind(wx.EVT_CHOICE, self.on_region, self.region_choice)
+        self.Bind(wx.EVT_BUTTON, self.on_compare, self.compare_button)
+        self.Bind(wx.EVT_BUTTON, self.on_layout, self.layout_button)
+        self.list.Bind(wx.EVT_LISTBOX, self.on_row_selected)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+
+        self.update_regions()
+        self.start_diff()
+
+    def start_diff(self):
+        document = self.document
+        self.prev_button.Enable(False)
+        self.next_button.Enable(False)
+        if document.compare is None:
+            self.status.SetLabel(f"{document.file.size} bytes")
+            return
+        self.status.SetLabel("Comparing...")
+        cancelled = self.diff_cancelled
+
+        def task():
+            diff = document.build_diff(cancelled=cancelled.is_set)
+            if diff is not None:
+                wx.CallAfter(self.on_diff_ready, document, diff)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_diff_ready(self, document, diff):
+        if not self or document is not self.document:
+            return
+        self.list.Refresh()
+        self.prev_button.Enable(bool(diff))
+        self.next_button.Enable(bool(diff))
+        sizes = f"{document.file.size} vs {document.compare.size} bytes"
+        if diff:
+            self.status.SetLabel(f"{len(diff)} differing {diff.block_size // 1024} KiB blocks ({sizes})")
+            self.goto(diff.blocks[0])
+        else:
+            self.status.SetLabel(f"Identical ({sizes})")
+
+    def update_regions(self):
+        self.region_choice.Set(
+            ["Regions"] + [f"{region.source}:{region.name} @ 0x{region.start:x}" for region in self.document.regions]
+        )
+        self.region_choice.SetSelection(0)
+        self.region_choice.Enable(bool(self.document.regions))
+
+    def goto(self, offset):
+        row = min(max(offset, 0) // BYTES_PER_ROW, max(self.document.rows - 1, 0))
+        self.list.SetSelection(row)
+        self.list.ScrollToRow(max(row - 2, 0))
+        self.show_row(row)
+
+    def current_offset(self):
+        row = self.list.GetSelection()
+        if row == wx.NOT_FOUND:
+            row = self.list.GetVisibleRowsBegin()
+        return row * BYTES_PER_ROW
+
+    def jump_diff(self, forward):
+        diff = self.document.diff
+        if diff is None:
+            return
+        offset = diff.next(self.current_offset()) if forward else diff.previous(self.current_offset())
+        if offset is None:
+            wx.Bell()
+            return
+        self.goto(offset)
+
+    def on_goto(self, event):
+        text = self.goto_ctrl.GetValue().strip().lower()
+        try:
+            offset = int(text[2:] if text.startswith("0x") else text, 16)
+        except ValueError:
+            wx.Bell()
+            return
+        self.goto(offset)
+
+    def on_region(self, event):
+        index = self.region_choice.GetSelection()
+        if index > 0:
+            self.goto(self.document.regions[index - 1].start)
+
+    def on_row_selected(self, event):
+        self.show_row(event.GetSelection())
+
+    def show_row(self, row):
+        offset, data, other = self.document.row(row)
+        region = self.document.region_at(offset)
+        parts = [f"0x{offset:08x}"]
+        if region is not None:
+            parts.append(f"{region.source}:{region.name} +0x{offset - region.start:x}")
+        if other is not None and data != other:
+            parts.append("differs")
+        self.position.SetLabel("  ".join(parts))
+
+    def replace_document(self, compare_path):
+        self.diff_cancelled.set()
+        self.diff_cancelled = threading.Event()
+        old = self.document
+        self.document = HexDocument(old.file.path, compare_path)
+        if old.regions and old.regions[0].source == "layout":
+            self.document.set_regions(old.regions)
+        self.list.set_document(self.document)
+        # Deferred by the document until the old diff thread stops reading it
+        old.close()
+        self.update_regions()
+        self.start_diff()
+
+    def on_compare(self, event):
+        with wx.FileDialog(self, "Compare with", wildcard="*.*",
+                           style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as dlg:
+            if dlg.ShowModal() != wx.ID_OK:
+                return
+            path = dlg.GetPath()
+        try:
+            self.replace_document(path)
+        except OSError as e:
+            wx.MessageBox(f"Cannot open {path}:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+
+    def on_layout(self, event):
+        with wx.FileDialog(self, "Open layout file", wildcard="Layout files (*.layout;*.txt)|*.layout;*.txt|All files (*.*)|*.*",
+                           style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as dlg:
+            if dlg.ShowModal() != wx.ID_OK:
+                return
+            path = dlg.GetPath()
+        try:
+            self.document.load_layout(path)
+        except (OSError, ValueError) as e:
+            wx.MessageBox(f"Cannot read layout:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+            return
+        self.update_regions()
+        self.list.Refresh()
+
+    def on_close(self, event):
+        self.diff_cancelled.set()
+        self.document.close()
+        event.Skip()
@@ -0,0 +1,195 @@
+# flashrom_image.py
+import hashlib
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+# Intel Flash Descriptor signature, at 0x10 on current chipsets and at 0x0
+# on ICH8 and older
+IFD_SIGNATURE = 0x0FF0A55A
+
+# Region names as accepted by flashrom --ifd -i
+IFD_REGION_NAMES = (
+    "fd", "bios", "me", "gbe", "pd", "reg5", "reg6", "reg7",
+    "ec", "reg9", "reg10", "reg11", "reg12", "reg13", "reg14", "reg15",
+)
+
+FMAP_SIGNATURE = b"__FMAP__"
+FV_SIGNATURE = b"_FVH"
+
+# Offsets probed for AMD's embedded firmware table (PSP/ABL directories),
+# as addresses in the 16 MiB SPI window
+AMD_EFS_OFFSETS = (0xFA0000, 0xF20000, 0xE20000, 0xC20000, 0x820000, 0x020000)
+AMD_EFS_SIGNATURE = 0x55AA55AA
+AMD_SPI_WINDOW = 0x1000000
+
+# Headers beyond this many are ignored; a corrupt image can be full of them.
+MAX_HEADERS = 64
+
+ImageRegion = namedtuple("ImageRegion", "source name start end")
+
+
+def parse_ifd(buf):
+    """
+    Regions of an Intel Flash Descriptor, read in place from buf (bytes or
+    mmap). Returns [] if buf has no descriptor. end is exclusive.
+    """
+    size = len(buf)
+    for sig_offset in (0x10, 0x0):
+        if size >= sig_offset + 8 and struct.unpack_from("<I", buf, sig_offset)[0] == IFD_SIGNATURE:
+            break
+    else:
+        return []
+
+    flmap0 = struct.unpack_from("<I", buf, sig_offset + 4)[0]
+    frba = ((flmap0 >> 16) & 0xff) << 4
+    regions = []
+    for index, name in enumerate(IFD_REGION_NAMES):
+        offset = frba + index * 4
+        if offset + 4 > size:
+            break
+        flreg = struct.unpack_from("<I", buf, offset)[0]
+        base = (flreg & 0x7fff) << 12
+        limit = (((flreg >> 16) & 0x7fff) << 12) | 0xfff
+        if flreg == 0xffffffff or (index and flreg == 0) or base > limit:
+            # Unused region, or padding past the chipset's last region
+            continue
+        regions.append(ImageRegion("ifd", name, base, limit + 1))
+    return regions
+
+
+def parse_fmap(buf):
+    """Areas of a coreboot/ChromeOS FMAP, if the image has one."""
+    offset = buf.find(FMAP_SIGNATURE)
+    # "__FMAP__" also appears in code; a real header has version 1.x
+    while offset >= 0:
+        if offset + 56 <= len(buf) and buf[offset + 8] == 1:
+            break
+        offset = buf.find(FMAP_SIGNATURE, offset + 1)
+    if offset < 0:
+        return []
+
+    count = struct.unpack_from("<H", buf, offset + 54)[0]
+    regions = []
+    for index in range(min(count, MAX_HEADERS)):
+        area = offset + 56 + index * 42
+        if area + 42 > len(buf):
+            break
+        start, length = struct.unpack_from("<II", buf, area)
+        name = bytes(buf[area + 8:area + 40]).split(b"\0", 1)[0].decode("ascii", "replace")
+        regions.append(ImageRegion("fmap", name, start, start + length))
+    return regions
+
+
+def parse_firmware_volumes(buf):
+    """UEFI firmware volumes, located by their _FVH signature."""
+    regions = []
+    offset = buf.find(FV_SIGNATURE)
+    while offset >= 0 and len(regions) < MAX_HEADERS:
+        start = offset - 40
+        if start >= 0 and start % 8 == 0:
+            length = struct.unpack_from("<Q", buf, start + 32)[0]
+            if 0 < length <= len(buf) - start:
+                regions.append(ImageRegion("uefi", f"fv{len(regions)}", start, start + length))
+                offset = buf.find(FV_SIGNATURE, start + length)
+                continue
+        offset = buf.find(FV_SIGNATURE, offset + 1)
+    return regions
+
+
+def find_amd_efs(buf):
+    size = len(buf)
+    for offset in AMD_EFS_OFFSETS:
+        local = offset & (AMD_SPI_WINDOW - 1)
+        if size < AMD_SPI_WINDOW:
+            # Smaller images are mapped at the top of the window, ending at its end
+            local -= AMD_SPI_WINDOW - size
+        if local >= 0 and local + 4 <= size and struct.unpack_from("<I", buf, local)[0] == AMD_EFS_SIGNATURE:
+            return [ImageRegion("amd", "efs", local, local + 0x4A)]
+    return []
+
+
+class ImageAnalysis:
+    """
+    What is known about an image before anything is sent to flashrom:
+    size, sha256 and the regions of any descriptor or flash map found in it.
+    """
+
+    def __init__(self, path, size, mtime, sha256, regions, kind):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.sha256 = sha256
+        self.regions = regions
+        self.kind = kind
+
+    def is_current(self):
+        """False once the file was replaced or edited after the analysis."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return st.st_size == self.size and st.st_mtime_ns == self.mtime
+
+    def size_problem(self, chip_info):
+        """Error text if the image cannot fit chip_info (a ChipInfo), else None."""
+        if chip_info is None or not chip_info.size_kb:
+            return None
+        chip_size = chip_info.size_kb * 1024
+        if self.size == chip_size:
+            return None
+        return (
+            f"Image is {self.size} bytes ({self.size / 1048576:.2f} MiB) but {chip_info.device} "
+            f"is {chip_size} bytes ({chip_size / 1048576:.2f} MiB)"
+        )
+
+    def matches(self, entry):
+        """True if entry (ChipContentsHistory.latest) holds exactly this image."""
+        return bool(entry) and entry.get("size") == self.size and entry.get("sha256") == self.sha256
+
+    def region_problems(self):
+        return [
+            f"{region.source} region {region.name} (0x{region.start:08x}-0x{region.end - 1:08x}) "
+            f"extends past the end of the image"
+            for region in self.regions if region.end > self.size
+        ]
+
+    def summary(self):
+        lines = [f"Image: {self.size} bytes, sha256 {self.sha256[:16]}..., {self.kind}"]
+        for region in self.regions:
+            lines.append(
+                f"  {region.source:<5} {region.name:<16} 0x{region.start:08x}-0x{region.end - 1:08x} "
+                f"({(region.end - region.start) // 1024} KiB)"
+            )
+        return "\n".join(lines)
+
+
+def analyze_image(path):
+    """Memory-map path and return an ImageAnalysis; headers are parsed in place."""
+    path = os.path.abspath(path)
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            return ImageAnalysis(path, 0, st.st_mtime_ns, hashlib.sha256().hexdigest(), [], "empty file")
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            # hashlib reads the mapping through the buffer protocol; no copy
+            sha256 = hashlib.sha256(buf).hexdigest()
+            regions = parse_ifd(buf)
+            kind = "Intel flash descriptor" if regions else "no flash descriptor"
+            fmap = parse_fmap(buf)
+            if fmap:
+                regions += fmap
+                kind += ", FMAP"
+            volumes = parse_firmware_volumes(buf)
+            if volumes:
+                regions += volumes
+                kind += f", {len(volumes)} UEFI volume(s)"
+            efs = find_amd_efs(buf)
+            if efs:
+                regions += efs
+                kind += ", AMD firmware table"
+        finally:
+            buf.close()
+    return ImageAnalysis(path, st.st_size, st.st_mtime_ns, sha256, regions, kind)
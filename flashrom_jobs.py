@@ -0,0 +1,257 @@
+# flashrom_jobs.py
+import itertools
+import subprocess
+import threading
+import time
+
+from flashrom_process import FlashromProcess, TERMINATE_GRACE
+from flashrom_telemetry import make_record
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timeout"
+ERROR = "error"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED, TIMED_OUT, ERROR)
+
+_job_ids = itertools.count(1)
+
+
+class FlashromJob:
+    """
+    One flashrom invocation managed by a JobExecutor.
+
+    on_done(job) is called from the worker thread once the job reaches a
+    finished state; inspect job.state, job.returncode and job.error.
+
+    chain=True says the caller's next job on this programmer continues on
+    the same board, so state a backend keeps about the chip (the contents
+    libflashrom read) may carry over to it.
+    """
+
+    def __init__(self, cmd, programmer, label="", on_output=None, on_done=None,
+                 progress=None, timeout=None, collect_output=False, chain=False):
+        self.id = next(_job_ids)
+        self.cmd = cmd
+        self.programmer = programmer
+        self.label = label or " ".join(cmd[1:])
+        self.on_output = on_output
+        self.on_done = on_done
+        self.progress = progress
+        self.timeout = timeout
+        self.chain = chain
+        self.output = [] if collect_output else None
+        self.state = QUEUED
+        self.returncode = None
+        self.error = None
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.spawn_time = None
+        self._process = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    def _handle_output(self, text, stream):
+        if self.output is not None:
+            self.output.append(text)
+        if self.on_output:
+            self.on_output(text, stream)
+
+    def output_text(self):
+        return "".join(self.output or ())
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def is_finished(self):
+        return self.state in FINISHED_STATES
+
+    def cancel(self):
+        """Ask flashrom to stop (SIGTERM to its process group)."""
+        self._cancel.set()
+        process = self._process
+        if process is not None:
+            process.terminate()
+
+    def kill(self):
+        """Kill flashrom's process group without waiting for a clean exit."""
+        self._cancel.set()
+        process = self._process
+        if process is not None:
+            process.kill()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+
+class JobExecutor:
+    """
+    Runs flashrom jobs on worker threads.
+
+    Jobs that name the same programmer are serialised: a second job for a
+    busy programmer stays queued until the first one finishes. Jobs on
+    different programmers run concurrently.
+
+    With a TelemetryStore every job that got as far as starting flashrom
+    is recorded there before on_done runs.
+
+    With a LibflashromBackend, jobs it can handle run through libflashrom
+    on a programmer session that stays open; the rest spawn flashrom.
+
+    With an OperationLog, the output of every started job is kept there
+    with its metadata, also before on_done runs.
+    """
+
+    def __init__(self, telemetry=None, backend=None, oplog=None):
+        self.telemetry = telemetry
+        self.backend = backend
+        self.oplog = oplog
+        self._lock = threading.Lock()
+        self._programmer_locks = {}
+        self._jobs = []
+
+    def _programmer_lock(self, programmer):
+        with self._lock:
+            lock = self._programmer_locks.get(programmer)
+            if lock is None:
+                lock = self._programmer_locks[programmer] = threading.Lock()
+            return lock
+
+    def submit(self, cmd, programmer, **kwargs):
+        if self.oplog is not None:
+            kwargs["collect_output"] = True
+        job = FlashromJob(cmd, programmer, **kwargs)
+        with self._lock:
+            self._jobs.append(job)
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job
+
+    def _run(self, job):
+        lock = self._programmer_lock(job.programmer)
+        try:
+            with lock:
+                if job._cancel.is_set():
+                    job.state = CANCELLED
+                    return
+                self._execute(job)
+        except Exception as e:
+            job.error = e
+            job.state = ERROR
+        finally:
+            job.finished = time.monotonic()
+            with self._lock:
+                if job in self._jobs:
+                    self._jobs.remove(job)
+            self.record(job)
+            job._done.set()
+            if job.on_done:
+                job.on_done(job)
+
+    def _execute(self, job):
+        job.state = RUNNING
+        job.started = time.monotonic()
+        process = None
+        if self.backend is not None:
+            process = self.backend.operation(job.cmd, job._handle_output, job.progress, job.chain)
+            if process is None:
+                # The CLI needs the programmer to itself
+                self.backend.release(job.programmer)
+        if process is None:
+            process = FlashromProcess(job.cmd, job._handle_output, job.progress)
+        job._process = process.start()
+        job.spawn_time = job._process.spawn_time
+        if job._cancel.is_set():
+            # Cancelled between start() and _process being visible
+            job._process.terminate()
+
+        deadline = job.started + job.timeout if job.timeout else None
+        timed_out = False
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                timed_out = True
+                job.returncode = job._process.stop()
+                break
+            try:
+                job.returncode = job._process.wait(min(remaining or 0.5, 0.5))
+                break
+            except subprocess.TimeoutExpired:
+                if job._cancel.is_set():
+                    job.returncode = self._stop_cancelled(job)
+                    break
+
+        if timed_out:
+            job.state = TIMED_OUT
+        elif job._cancel.is_set():
+            job.state = CANCELLED
+        else:
+            job.state = DONE if job.returncode == 0 else FAILED
+
+    def record(self, job):
+        """Add a finished job to the telemetry and the operation log, also one run on an agent."""
+        if job.started is None:
+            return
+        if self.telemetry is not None:
+            try:
+                self.telemetry.append(make_record(
+                    job.cmd, job.programmer, job.state, job.returncode,
+                    job.started, job.duration, job.spawn_time, job.progress
+                ))
+            except OSError:
+                # Telemetry must never fail a flash operation
+                pass
+        if self.oplog is not None:
+            from flashrom_oplog import make_entry
+            output = job.output_text()
+            if job.error is not None:
+                output += f"\nError: {job.error}\n"
+            chip = job.progress.snapshot()["chip"] if job.progress is not None else None
+            try:
+                self.oplog.append(make_entry(
+                    job.cmd, job.programmer, job.state, job.returncode,
+                    time.time() - (time.monotonic() - job.started), job.duration, output, chip, job.label
+                ), output)
+            except OSError:
+                pass
+
+    def _stop_cancelled(self, job):
+        # cancel() already sent SIGTERM; escalate if flashrom ignores it
+        try:
+            return job._process.wait(TERMINATE_GRACE)
+        except subprocess.TimeoutExpired:
+            job._process.kill()
+            return job._process.wait()
+
+    def active_jobs(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def is_busy(self, programmer=None):
+        with self._lock:
+            return any(
+                programmer is None or job.programmer == programmer
+                for job in self._jobs
+            )
+
+    def cancel_all(self, kill=False):
+        for job in self.active_jobs():
+            if kill:
+                job.kill()
+            else:
+                job.cancel()
+
+    def shutdown(self, timeout=TERMINATE_GRACE):
+        """Cancel everything and wait briefly; used when the frame closes."""
+        self.cancel_all()
+        deadline = time.monotonic() + timeout
+        for job in self.active_jobs():
+            if not job.wait(max(deadline - time.monotonic(), 0)):
+                job.kill()
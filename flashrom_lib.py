@@ -0,0 +1,498 @@
+# flashrom_lib.py
+import ctypes
+import ctypes.util
+import mmap
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from flashrom_progress import parse_found_chips
+
+# Messages above this level (debug, spew) are dropped, like flashrom without -V.
+LOG_INFO = 2
+
+# enum flashrom_flag
+FLAG_VERIFY_AFTER_WRITE = 2
+
+# enum flashrom_progress_stage, in order
+PROGRESS_PHASES = ("reading", "writing", "erasing")
+
+# flashrom_flash_probe() results other than 0
+PROBE_NOT_FOUND = 2
+PROBE_MULTIPLE = 3
+
+# Longest log message kept; flashrom's are a line or two.
+LOG_BUFFER_SIZE = 4096
+
+_OPERATION_FLAGS = {
+    "-r": "read", "--read": "read",
+    "-w": "write", "--write": "write",
+    "-v": "verify", "--verify": "verify",
+    "-E": "erase", "--erase": "erase",
+}
+
+LOG_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_void_p)
+PROGRESS_CALLBACK = ctypes.CFUNCTYPE(None, ctypes.c_void_p)
+
+
+class ProgressState(ctypes.Structure):
+    # struct flashrom_progress
+    _fields_ = [
+        ("stage", ctypes.c_int),
+        ("current", ctypes.c_size_t),
+        ("total", ctypes.c_size_t),
+        ("user_data", ctypes.c_void_p),
+    ]
+
+
+def find_library():
+    """Path of libflashrom, or None. FLASHROM_LIBRARY overrides the search."""
+    override = os.environ.get("FLASHROM_LIBRARY")
+    if override:
+        return override
+    if sys.platform == "win32":
+        path = os.path.join(os.getcwd(), "flashrom", "libflashrom.dll")
+        return path if os.path.exists(path) else None
+    return ctypes.util.find_library("flashrom")
+
+
+def _vsnprintf():
+    if sys.platform == "win32":
+        function = ctypes.cdll.msvcrt._vsnprintf
+    else:
+        function = ctypes.CDLL(ctypes.util.find_library("c")).vsnprintf
+    function.argtypes = [ctypes.c_char_p, ctypes.c_size_t, ctypes.c_char_p, ctypes.c_void_p]
+    function.restype = ctypes.c_int
+    return function
+
+
+def parse_command(args):
+    """
+    (operation, programmer, chip, path, verify) for the flashrom arguments
+    the library backend understands, or None for anything else (layouts,
+    region includes, -L, ...), which is left to the CLI.
+    """
+    operation = "probe"
+    programmer = chip = path = None
+    verify = True
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        value = args[index + 1] if index + 1 < len(args) else None
+        if arg in ("-p", "--programmer") and value:
+            programmer = value
+            index += 2
+        elif arg in ("-c", "--chip") and value:
+            chip = value
+            index += 2
+        elif arg in _OPERATION_FLAGS and operation == "probe":
+            operation = _OPERATION_FLAGS[arg]
+            index += 1
+            if operation != "erase":
+                if not value:
+                    return None
+                path = value
+                index += 1
+        elif arg in ("-n", "--noverify"):
+            verify = False
+            index += 1
+        else:
+            return None
+    if not programmer:
+        return None
+    return operation, programmer, chip, path, verify
+
+
+class Libflashrom:
+    """ctypes binding for the part of libflashrom's API used here."""
+
+    def __init__(self, path):
+        self.path = path
+        lib = self.lib = ctypes.CDLL(path)
+        c_void_p_p = ctypes.POINTER(ctypes.c_void_p)
+        for name, restype, argtypes in (
+            ("flashrom_init", ctypes.c_int, [ctypes.c_int]),
+            ("flashrom_shutdown", ctypes.c_int, []),
+            ("flashrom_set_log_callback", None, [LOG_CALLBACK]),
+            ("flashrom_programmer_init", ctypes.c_int, [c_void_p_p, ctypes.c_char_p, ctypes.c_char_p]),
+            ("flashrom_programmer_shutdown", ctypes.c_int, [ctypes.c_void_p]),
+            ("flashrom_flash_probe", ctypes.c_int, [c_void_p_p, ctypes.c_void_p, ctypes.c_char_p]),
+            ("flashrom_flash_getsize", ctypes.c_size_t, [ctypes.c_void_p]),
+            ("flashrom_flash_release", None, [ctypes.c_void_p]),
+            ("flashrom_flag_set", None, [ctypes.c_void_p, ctypes.c_int, ctypes.c_bool]),
+            ("flashrom_image_read", ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]),
+            ("flashrom_image_write", ctypes.c_int,
+             [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]),
+            ("flashrom_image_verify", ctypes.c_int, [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]),
+            ("flashrom_flash_erase", ctypes.c_int, [ctypes.c_void_p]),
+        ):
+            function = getattr(lib, name)
+            function.restype = restype
+            function.argtypes = argtypes
+        # Only in libflashrom 1.4 and later; without it progress is per operation
+        self.has_progress = hasattr(lib, "flashrom_set_progress_callback")
+        if self.has_progress:
+            lib.flashrom_set_progress_callback.restype = None
+            lib.flashrom_set_progress_callback.argtypes = [
+                ctypes.c_void_p, PROGRESS_CALLBACK, ctypes.POINTER(ProgressState)
+            ]
+
+        self.on_log = None
+        self.log_level = LOG_INFO
+        self._vsnprintf = _vsnprintf()
+        self._log_callback = LOG_CALLBACK(self._log)
+        lib.flashrom_set_log_callback(self._log_callback)
+        if lib.flashrom_init(1) != 0:
+            raise OSError(f"libflashrom at {path} failed its self-check")
+
+    def _log(self, level, fmt, args):
+        if level > self.log_level or self.on_log is None:
+            return 0
+        buffer = ctypes.create_string_buffer(LOG_BUFFER_SIZE)
+        self._vsnprintf(buffer, LOG_BUFFER_SIZE, fmt, args)
+        self.on_log(buffer.value.decode("utf-8", "replace"))
+        return 0
+
+    def shutdown(self):
+        self.lib.flashrom_shutdown()
+
+
+def _c_buffer(data):
+    """ctypes view of a writable buffer (bytearray, mmap) without copying it."""
+    return (ctypes.c_char * len(data)).from_buffer(data)
+
+
+class LibflashromSession:
+    """
+    A programmer opened through libflashrom and the chip found on it, both
+    kept open between operations.
+
+    The session also remembers the chip contents after a read, a verified
+    write or a successful verify, and hands them to flashrom_image_write()
+    as the reference, so a write after a backup does not read the chip
+    again. Anything that leaves the contents uncertain forgets them, and
+    the backend drops them after every job that is not chained to the next.
+    """
+
+    def __init__(self, lib, programmer):
+        self.lib = lib
+        self.programmer = programmer
+        self.chip = None
+        self.size = 0
+        self.found_line = ""
+        self.contents = None
+        self.progress = None
+        self._flash = None
+        self._progress_state = ProgressState()
+        self._progress_callback = PROGRESS_CALLBACK(self._on_progress)
+        self._handle = ctypes.c_void_p()
+        name, _, params = programmer.partition(":")
+        rc = lib.lib.flashrom_programmer_init(ctypes.byref(self._handle), name.encode(), params.encode() or None)
+        if rc != 0:
+            raise OSError(f"Programmer {programmer} failed to initialise (error {rc})")
+
+    def _on_progress(self, flash):
+        state = self._progress_state
+        if self.progress is not None and state.stage < len(PROGRESS_PHASES):
+            self.progress.set_position(PROGRESS_PHASES[state.stage], state.current, state.total)
+
+    def _phase(self, phase, done=0):
+        # Without a progress callback the phase is all the bar can show
+        if self.progress is not None:
+            self.progress.set_position(phase, done, self.size)
+
+    def probe(self, chip=None, force=False):
+        """
+        Find the chip unless it was found before; returns libflashrom's
+        result code. A forced probe keeps the contents only if it finds the
+        same chip again.
+        """
+        lib = self.lib
+        if self._flash is not None and not force and chip in (None, self.chip):
+            # Same chip as before; replay what flashrom said about it
+            lib.on_log(self.found_line)
+            return 0
+        previous = (self.chip, self.size, self.contents)
+        self.release_chip()
+        said = []
+        on_log = lib.on_log
+        lib.on_log = lambda text: (said.append(text), on_log(text))
+        try:
+            flash = ctypes.c_void_p()
+            rc = lib.lib.flashrom_flash_probe(ctypes.byref(flash), self._handle, chip.encode() if chip else None)
+        finally:
+            lib.on_log = on_log
+        if rc == PROBE_MULTIPLE:
+            on_log("Multiple flash chip definitions match the detected chip(s); specify one with -c.\n")
+        if rc != 0:
+            return rc
+        self._flash = flash
+        self.size = lib.lib.flashrom_flash_getsize(flash)
+        found = parse_found_chips("".join(said))
+        if found:
+            vendor, self.chip, size_kb, bus = found[0]
+            self.found_line = f'Found {vendor} flash chip "{self.chip}" ({size_kb} kB, {bus}).\n'
+        else:
+            self.chip = chip
+            self.found_line = f'Found flash chip "{chip}" ({self.size // 1024} kB, unknown).\n'
+        if lib.has_progress:
+            lib.lib.flashrom_set_progress_callback(flash, self._progress_callback, ctypes.byref(self._progress_state))
+        if previous[:2] == (self.chip, self.size):
+            self.contents = previous[2]
+        return 0
+
+    def read(self):
+        """Read the whole chip into a new bytearray; returns (rc, data)."""
+        data = bytearray(self.size)
+        self._phase("reading")
+        view = _c_buffer(data)
+        rc = self.lib.lib.flashrom_image_read(self._flash, view, self.size)
+        del view
+        self.contents = data if rc == 0 else None
+        return rc, data
+
+    def write(self, image, verify=True):
+        """image is a writable buffer of exactly the chip size (libflashrom may modify it)."""
+        self.lib.lib.flashrom_flag_set(self._flash, FLAG_VERIFY_AFTER_WRITE, verify)
+        reference = self.contents if self.contents is not None and len(self.contents) == len(image) else None
+        view = _c_buffer(image)
+        reference_view = _c_buffer(reference) if reference is not None else None
+        self.contents = None
+        self._phase("writing")
+        rc = self.lib.lib.flashrom_image_write(self._flash, view, len(image), reference_view)
+        del view, reference_view
+        if rc == 0 and verify:
+            self.contents = bytearray(image)
+        return rc
+
+    def verify(self, image):
+        self._phase("verifying")
+        view = _c_buffer(image)
+        rc = self.lib.lib.flashrom_image_verify(self._flash, view, len(image))
+        del view
+        self.contents = bytearray(image) if rc == 0 else None
+        return rc
+
+    def erase(self):
+        self.contents = None
+        self._phase("erasing")
+        return self.lib.lib.flashrom_flash_erase(self._flash)
+
+    def release_chip(self):
+        if self._flash is not None:
+            self.lib.lib.flashrom_flash_release(self._flash)
+            self._flash = None
+        self.chip = None
+        self.contents = None
+
+    def close(self):
+        self.release_chip()
+        if self._handle:
+            self.lib.lib.flashrom_programmer_shutdown(self._handle)
+            self._handle = ctypes.c_void_p()
+
+
+class LibflashromOperation:
+    """
+    One flashrom command line run on a LibflashromSession in a thread, with
+    the interface of FlashromProcess so JobExecutor can run either.
+
+    libflashrom cannot be interrupted: terminate() and kill() only stop an
+    operation that has not reached the library yet.
+    """
+
+    def __init__(self, backend, cmd, command, on_output=None, progress=None, chain=False):
+        self.backend = backend
+        self.cmd = cmd
+        self.command = command
+        self.chain = chain
+        self.on_output = on_output
+        self.progress = progress
+        self.returncode = None
+        self.spawn_time = 0.0
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def pid(self):
+        return None
+
+    def _emit(self, text, stream="stdout"):
+        if self.progress is not None:
+            self.progress.feed(text, stream)
+        if self.on_output:
+            self.on_output(text, stream)
+
+    def _run(self):
+        try:
+            self.returncode = self.backend._execute(self.command, self._emit, self.progress, self._cancel, self.chain)
+        except Exception as e:
+            self._emit(f"Error: {e}\n", "stderr")
+            self.returncode = 1
+        finally:
+            self.backend._lock.release()
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        """Like Popen.wait(); raises subprocess.TimeoutExpired."""
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise subprocess.TimeoutExpired(self.cmd, timeout)
+        return self.returncode
+
+    def terminate(self):
+        self._cancel.set()
+
+    def kill(self):
+        self._cancel.set()
+
+    def stop(self, grace=None):
+        self.terminate()
+        return self.wait()
+
+
+class LibflashromBackend:
+    """
+    Runs flashrom command lines through libflashrom instead of spawning
+    flashrom, keeping a session per programmer open between jobs so the
+    programmer is initialised and the chip probed once, not per operation.
+
+    libflashrom has global state, so one operation runs at a time;
+    operation() returns None when the library is busy or the arguments need
+    the CLI, and the caller spawns flashrom instead. Before that it must
+    call release() so the CLI can claim the programmer.
+    """
+
+    def __init__(self, lib):
+        self.lib = lib
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=None):
+        """A backend on the installed libflashrom, or None if there is none."""
+        path = path or find_library()
+        if not path:
+            return None
+        try:
+            return cls(Libflashrom(path))
+        except (OSError, AttributeError):
+            return None
+
+    def operation(self, cmd, on_output=None, progress=None, chain=False):
+        command = parse_command(cmd[1:])
+        if command is None or not self._lock.acquire(blocking=False):
+            return None
+        # Released by the operation's thread when it finishes
+        return LibflashromOperation(self, cmd, command, on_output, progress, chain)
+
+    def release(self, programmer):
+        """Close the session on programmer, e.g. before the CLI uses it."""
+        with self._lock:
+            self._close(programmer)
+
+    def _close(self, programmer):
+        session = self.sessions.pop(programmer, None)
+        if session is not None:
+            self.lib.on_log = None
+            session.close()
+
+    def _execute(self, command, emit, progress, cancelled, chain=False):
+        operation, programmer, chip, path, verify = command
+        lib = self.lib
+        lib.on_log = emit
+        try:
+            if cancelled.is_set():
+                return 1
+            session = self.sessions.get(programmer)
+            if session is None:
+                session = self.sessions[programmer] = LibflashromSession(lib, programmer)
+            session.progress = progress
+            # The chip may have been swapped since the last job; never
+            # change its contents on the strength of an old probe
+            rc = session.probe(chip, force=operation in ("probe", "write", "erase"))
+            if rc != 0:
+                if rc == PROBE_NOT_FOUND:
+                    emit("No EEPROM/flash device found.\n")
+                self._close(programmer)
+                return rc
+            if cancelled.is_set():
+                return 1
+            try:
+                rc = getattr(self, "_" + operation)(session, path, verify, emit)
+            except ValueError as e:
+                # Wrong image; nothing happened to the chip or the session
+                emit(f"Error: {e}\n", "stderr")
+                return 1
+            if rc != 0:
+                # Unplugged programmer, swapped chip...; start from scratch next time
+                self._close(programmer)
+            elif not chain:
+                # Only a chained job may count on the board staying put
+                session.contents = None
+            return rc
+        except OSError:
+            self._close(programmer)
+            raise
+        finally:
+            lib.on_log = None
+
+    def _probe(self, session, path, verify, emit):
+        return 0
+
+    def _read(self, session, path, verify, emit):
+        emit("Reading flash... ")
+        started = time.monotonic()
+        rc, data = session.read()
+        if rc != 0:
+            emit(f"FAILED (error {rc}).\n")
+            return rc
+        with open(path, "wb") as f:
+            f.write(data)
+        emit(f"done.\nRead {len(data) // 1024} kB in {time.monotonic() - started:.1f}s through libflashrom.\n")
+        return 0
+
+    def _map_image(self, session, path):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size != session.size:
+                raise ValueError(f"Image size ({size} B) doesn't match the expected size ({session.size} B)!")
+            # Copy-on-write: libflashrom gets the file's pages without a copy
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    def _write(self, session, path, verify, emit):
+        image = self._map_image(session, path)
+        try:
+            return session.write(image, verify)
+        finally:
+            image.close()
+
+    def _verify(self, session, path, verify, emit):
+        image = self._map_image(session, path)
+        try:
+            emit("Verifying flash... ")
+            rc = session.verify(image)
+        finally:
+            image.close()
+        emit("VERIFIED.\n" if rc == 0 else f"FAILED (error {rc}).\n")
+        return rc
+
+    def _erase(self, session, path, verify, emit):
+        emit("Erasing flash chip... ")
+        rc = session.erase()
+        emit("Erase done.\n" if rc == 0 else f"FAILED (error {rc}).\n")
+        return rc
+
+    def close(self):
+        with self._lock:
+            for programmer in list(self.sessions):
+                self._close(programmer)
+            self.lib.shutdown()
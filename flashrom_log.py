@@ -0,0 +1,142 @@
+# flashrom_log.py
+import os
+import threading
+import time
+from collections import deque
+
+from flashrom_paths import user_data_dir
+
+# Lines kept in memory and shown in the log panel.
+MAX_LINES = 5000
+
+# Session spill files kept on disk; older ones are deleted at startup.
+MAX_SESSION_LOGS = 50
+
+
+def prune_session_logs(log_dir, keep=MAX_SESSION_LOGS):
+    """Delete all but the keep newest session logs in log_dir."""
+    names = sorted(name for name in os.listdir(log_dir) if name.startswith("session-") and name.endswith(".log"))
+    # The timestamp in the name sorts oldest first
+    for name in names[:max(len(names) - keep, 0)]:
+        try:
+            os.remove(os.path.join(log_dir, name))
+        except OSError:
+            pass
+
+
+def session_log_path(keep=MAX_SESSION_LOGS):
+    """Path for this session's spill file; makes room for it among the kept ones."""
+    log_dir = os.path.join(user_data_dir(), "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    prune_session_logs(log_dir, keep - 1)
+    return os.path.join(log_dir, time.strftime("session-%Y%m%d-%H%M%S.log"))
+
+
+class LogBuffer:
+    """
+    Bounded log with a full copy spilled to disk.
+
+    write() may be called from any thread. The UI calls drain() on a timer
+    and gets everything written since the previous drain as one string, or,
+    if more than max_lines arrived in between (or clear() was called), the
+    whole retained tail with replace=True so the panel is reset instead of
+    appended to.
+    """
+
+    def __init__(self, max_lines=MAX_LINES, spill_path=None):
+        self.max_lines = max_lines
+        self.spill_path = spill_path
+        self._spill = None
+        self._lock = threading.Lock()
+        self._lines = deque(maxlen=max_lines)
+        self._partial = ""
+        self._pending = []
+        self._pending_lines = 0
+        self._replace = False
+        self.status = None
+        self.total_lines = 0
+
+    def _open_spill(self):
+        if self._spill is None and self.spill_path:
+            self._spill = open(self.spill_path, "a", encoding="utf-8", errors="replace")
+        return self._spill
+
+    def write(self, text, status=None):
+        if not text and status is None:
+            return
+        with self._lock:
+            if status is not None:
+                self.status = status
+            if not text:
+                return
+
+            spill = self._open_spill()
+            if spill is not None:
+                spill.write(text)
+
+            parts = (self._partial + text).split("\n")
+            self._partial = parts.pop()
+            self._lines.extend(parts)
+            self.total_lines += len(parts)
+
+            if self._replace:
+                return
+            self._pending.append(text)
+            self._pending_lines += len(parts)
+            if self._pending_lines > self.max_lines:
+                # Too much to append; the next drain redraws from the ring
+                self._pending.clear()
+                self._pending_lines = 0
+                self._replace = True
+
+    def clear(self):
+        """Empty the panel view; the spill file keeps everything."""
+        with self._lock:
+            self._lines.clear()
+            self._partial = ""
+            self._pending.clear()
+            self._pending_lines = 0
+            self._replace = True
+
+    def has_pending(self):
+        return bool(self._pending) or self._replace or self.status is not None
+
+    def drain(self):
+        """(text, replace, status) accumulated since the last drain."""
+        with self._lock:
+            if self._spill is not None:
+                self._spill.flush()
+            status = self.status
+            self.status = None
+            if self._replace:
+                self._replace = False
+                self._pending.clear()
+                self._pending_lines = 0
+                return self._text(), True, status
+            text = "".join(self._pending)
+            self._pending.clear()
+            self._pending_lines = 0
+            return text, False, status
+
+    def _text(self):
+        lines = list(self._lines)
+        if self._partial:
+            lines.append(self._partial)
+        elif lines:
+            lines.append("")
+        return "\n".join(lines)
+
+    def text(self):
+        """Everything still held in memory."""
+        with self._lock:
+            return self._text()
+
+    def line_count(self):
+        with self._lock:
+            return len(self._lines)
+
+    def close(self):
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
@@ -0,0 +1,219 @@
+# flashrom_logsearch_gui.py
+import threading
+import time
+import wx
+from flashrom_diff import file_sha256
+
+PERIODS = (("Any time", None), ("Last 7 days", 7), ("Last 30 days", 30), ("Last year", 365))
+OPERATIONS = ("Any operation", "probe", "read", "write", "verify", "erase")
+
+# Milliseconds of no typing before the search runs.
+SEARCH_DELAY = 150
+
+# Matches listed per search.
+MAX_RESULTS = 500
+
+# Occurrences of each search word marked in the output pane.
+MAX_HIGHLIGHTS = 200
+
+
+class ResultList(wx.ListCtrl):
+    """Virtual list; rows come from the frame's current search results."""
+
+    def __init__(self, parent, get_text):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.LC_VIRTUAL)
+        self.get_text = get_text
+
+    def OnGetItemText(self, row, column):
+        return self.get_text(row, column)
+
+
+class LogSearchFrame(wx.Frame):
+    """Full-text search over the output of past operations."""
+
+    COLUMNS = (("Time", 140), ("Operation", 70), ("Programmer", 120), ("Chip", 110),
+               ("Exit", 40), ("File", 260), ("SHA-256", 120))
+
+    def __init__(self, parent, oplog, query=""):
+        super().__init__(parent, title="Operation Log", size=wx.Size(1000, 650))
+        self.oplog = oplog
+        self.entries = []
+        self.generation = 0
+        panel = wx.Panel(self)
+
+        self.search_ctrl = wx.SearchCtrl(panel, value=query)
+        self.search_ctrl.ShowCancelButton(True)
+        self.search_ctrl.SetDescriptiveText("Chip, file, hash, serial, any output...")
+        self.operation_choice = wx.Choice(panel, choices=list(OPERATIONS))
+        self.operation_choice.SetSelection(0)
+        self.period_choice = wx.Choice(panel, choices=[label for label, _ in PERIODS])
+        self.period_choice.SetSelection(0)
+        self.file_button = wx.Button(panel, label="Find File...")
+        self.file_button.SetToolTip("Search for the sessions that read, wrote or verified a file with the same contents")
+        self.summary = wx.StaticText(panel, label="")
+
+        splitter = wx.SplitterWindow(panel, style=wx.SP_LIVE_UPDATE)
+        self.results = ResultList(splitter, self.get_item_text)
+        for index, (title, width) in enumerate(self.COLUMNS):
+            self.results.InsertColumn(index, title, width=width)
+        self.output_ctrl = wx.TextCtrl(splitter, style=wx.TE_MULTILINE | wx.TE_READONLY | wx.HSCROLL | wx.TE_RICH2)
+        self.output_ctrl.SetFont(wx.Font(9, wx.FONTFAMILY_TELETYPE, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
+        splitter.SplitHorizontally(self.results, self.output_ctrl, 260)
+        splitter.SetMinimumPaneSize(80)
+        self.save_button = wx.Button(panel, label="Save Output...")
+        self.save_button.Disable()
+
+        toolbar = wx.BoxSizer(wx.HORIZONTAL)
+        toolbar.Add(self.search_ctrl, 1, wx.RIGHT, 5)
+        toolbar.Add(self.operation_choice, 0, wx.RIGHT, 5)
+        toolbar.Add(self.period_choice, 0, wx.RIGHT, 5)
+        toolbar.Add(self.file_button, 0)
+        bottom = wx.BoxSizer(wx.HORIZONTAL)
+        bottom.Add(self.summary, 1, wx.ALIGN_CENTER_VERTICAL)
+        bottom.Add(self.save_button, 0)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(toolbar, 0, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(splitter, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+        sizer.Add(bottom, 0, wx.EXPAND | wx.ALL, 10)
+        panel.SetSizer(sizer)
+
+        self.search_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_search, self.search_timer)
+        self.Bind(wx.EVT_TEXT, self.on_text, self.search_ctrl)
+        self.Bind(wx.EVT_SEARCHCTRL_SEARCH_BTN, self.on_search, self.search_ctrl)
+        self.Bind(wx.EVT_SEARCHCTRL_CANCEL_BTN, lambda event: self.search_ctrl.SetValue(""), self.search_ctrl)
+        self.Bind(wx.EVT_CHOICE, self.on_search, self.operation_choice)
+        self.Bind(wx.EVT_CHOICE, self.on_search, self.period_choice)
+        self.Bind(wx.EVT_BUTTON, self.on_find_file, self.file_button)
+        self.Bind(wx.EVT_BUTTON, self.on_save, self.save_button)
+        self.Bind(wx.EVT_LIST_ITEM_SELECTED, self.on_selected, self.results)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+        self.on_search(None)
+
+    def get_item_text(self, row, column):
+        entry = self.entries[row]
+        if column == 0:
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["time"]))
+        value = (None, entry["operation"], entry["programmer"], entry["chip"], entry["returncode"],
+                 entry["path"], entry["sha256"])[column]
+        return "" if value is None else str(value)
+
+    def on_text(self, event):
+        self.search_timer.StartOnce(SEARCH_DELAY)
+
+    def on_search(self, event):
+        self.search_timer.Stop()
+        self.generation += 1
+        generation = self.generation
+        text = self.search_ctrl.GetValue()
+        operation = self.operation_choice.GetSelection()
+        operation = OPERATIONS[operation] if operation > 0 else None
+        days = PERIODS[self.period_choice.GetSelection()][1]
+        since = time.time() - days * 86400 if days else None
+
+        # Opening the index may first catch up on entries from other processes
+        def task():
+            started = time.perf_counter()
+            try:
+                entries = self.oplog.search(text, MAX_RESULTS, since, operation=operation)
+                error = None
+            except Exception as e:
+                entries, error = [], e
+            wx.CallAfter(self.on_results, generation, entries, time.perf_counter() - started, error)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_results(self, generation, entries, seconds, error):
+        if not self or generation != self.generation:
+            # A newer search is on its way
+            return
+        self.entries = entries
+        self.results.SetItemCount(len(entries))
+        self.results.Refresh()
+        self.output_ctrl.Clear()
+        self.save_button.Disable()
+        if error is not None:
+            self.summary.SetLabel(f"Search failed: {error}")
+            return
+        more = "+" if len(entries) == MAX_RESULTS else ""
+        self.summary.SetLabel(f"{len(entries)}{more} operations in {seconds * 1000:.0f} ms")
+        if entries:
+            self.results.Select(0)
+
+    def selected_entry(self):
+        row = self.results.GetFirstSelected()
+        return self.entries[row] if 0 <= row < len(self.entries) else None
+
+    def on_selected(self, event):
+        entry = self.selected_entry()
+        if entry is None:
+            return
+        try:
+            output = self.oplog.output(entry)
+        except OSError as e:
+            output = f"Cannot read the log segment: {e}"
+        header = [entry["label"], f"Programmer: {entry['programmer']}", f"Chip: {entry['chip'] or '-'}"]
+        if entry["path"]:
+            header.append(f"File: {entry['path']}")
+        if entry["sha256"]:
+            header.append(f"SHA-256: {entry['sha256']}")
+        header.append(f"Result: {entry['state']} (exit {entry['returncode']}) in {entry['duration']}s")
+        text = "\n".join(header) + "\n\n" + output
+        self.output_ctrl.ChangeValue(text)
+        self.save_button.Enable()
+        self.highlight(text)
+
+    def highlight(self, text):
+        lowered = text.lower()
+        first = None
+        style = wx.TextAttr(wx.BLACK, wx.Colour(255, 235, 120))
+        for word in self.search_ctrl.GetValue().lower().split():
+            start = lowered.find(word)
+            marked = 0
+            while start != -1 and marked < MAX_HIGHLIGHTS:
+                marked += 1
+                self.output_ctrl.SetStyle(start, start + len(word), style)
+                first = start if first is None else min(first, start)
+                start = lowered.find(word, start + len(word))
+        if first is not None:
+            self.output_ctrl.ShowPosition(first)
+
+    def on_find_file(self, event):
+        with wx.FileDialog(self, "Find sessions for file", wildcard="*.*",
+                           style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as dlg:
+            if dlg.ShowModal() != wx.ID_OK:
+                return
+            path = dlg.GetPath()
+        self.summary.SetLabel("Hashing...")
+
+        def task():
+            try:
+                digest = file_sha256(path)
+            except OSError as e:
+                wx.CallAfter(self.summary.SetLabel, f"Cannot read {path}: {e}")
+                return
+            wx.CallAfter(self.search_ctrl.SetValue, digest)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_save(self, event):
+        entry = self.selected_entry()
+        if entry is None:
+            return
+        default = time.strftime(f"flashrom-{entry['operation']}-%Y%m%d-%H%M%S.log", time.localtime(entry["time"]))
+        with wx.FileDialog(self, "Save output", defaultFile=default,
+                           wildcard="Log files (*.log)|*.log|All files (*.*)|*.*",
+                           style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT) as dlg:
+            if dlg.ShowModal() != wx.ID_OK:
+                return
+            path = dlg.GetPath()
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.output_ctrl.GetValue())
+        except OSError as e:
+            wx.MessageBox(f"Failed to save log:\n{e}", "Error", wx.ICON_ERROR)
+
+    def on_close(self, event):
+        self.search_timer.Stop()
+        event.Skip()
@@ -0,0 +1,372 @@
+# flashrom_oplog.py
+import argparse
+import json
+import os
+import re
+import sqlite3
+import stat
+import sys
+import threading
+import time
+
+from flashrom_diff import file_sha256
+from flashrom_paths import user_data_dir
+from flashrom_progress import parse_found_chips
+from flashrom_telemetry import file_argument, operation_name
+
+LOG_DIR_NAME = "oplog"
+INDEX_NAME = "index.sqlite"
+
+# A new segment is started once the current one reaches this size, and every month.
+SEGMENT_BYTES = 32 * 1024 * 1024
+
+# Output kept per operation; -VVV floods beyond this are cut.
+MAX_OUTPUT_CHARS = 8 * 1024 * 1024
+
+# First byte of an entry's header line inside a segment.
+_RECORD_MARK = b"\x1e"
+
+_SEGMENT_RE = re.compile(r"^(\d{6})-(\d{3})\.log$")
+
+_COLUMNS = (
+    "uid", "time", "label", "operation", "programmer", "chip", "path", "sha256",
+    "returncode", "state", "duration",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    uid TEXT UNIQUE,
+    time REAL,
+    label TEXT,
+    operation TEXT,
+    programmer TEXT,
+    chip TEXT,
+    path TEXT,
+    sha256 TEXT,
+    returncode INTEGER,
+    state TEXT,
+    duration REAL,
+    segment TEXT,
+    offset INTEGER,
+    length INTEGER
+);
+CREATE INDEX IF NOT EXISTS entries_time ON entries (time);
+CREATE INDEX IF NOT EXISTS entries_segment ON entries (segment, offset);
+"""
+
+_SELECT = "SELECT " + ", ".join(f"e.{column}" for column in ("id", "segment", "offset", "length") + _COLUMNS) + " FROM entries"
+
+
+def _rows(cursor):
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def make_entry(cmd, programmer, state, returncode, started, duration, output="", chip=None, label=""):
+    """
+    Metadata for one operation. started is wall-clock time; the chip is
+    taken from the output when not given, and the file is hashed unless it
+    is a dump from a failed read or not a regular file.
+    """
+    operation = operation_name(cmd)
+    path = file_argument(cmd)
+    if not chip:
+        found = parse_found_chips(output)
+        chip = found[0][1] if found else None
+    sha256 = None
+    if path and (operation != "read" or returncode == 0):
+        try:
+            # A backup read goes into a FIFO; opening it here would block forever
+            if stat.S_ISREG(os.stat(path).st_mode):
+                sha256 = file_sha256(path)
+        except OSError:
+            pass
+    return {
+        "uid": os.urandom(16).hex(),
+        "time": started,
+        "label": label or " ".join(cmd[1:]),
+        "operation": operation,
+        "programmer": programmer,
+        "chip": chip,
+        "path": os.path.abspath(path) if path else None,
+        "sha256": sha256,
+        "returncode": returncode,
+        "state": state,
+        "duration": None if duration is None else round(duration, 3),
+        "cmd": list(cmd),
+    }
+
+
+def fts_query(text):
+    """
+    FTS5 query requiring every word of text. A word's last token may be a
+    prefix unless it is very short ("W25Q128.V" would otherwise expand "v"
+    to every word starting with v).
+    """
+    words = []
+    for word in text.split():
+        tokens = re.findall(r"[^\W_]+", word)
+        if tokens:
+            words.append('"' + word.replace('"', '""') + '"' + ("*" if len(tokens[-1]) >= 3 else ""))
+    return " ".join(words)
+
+
+def _meta_text(entry):
+    path = entry.get("path") or ""
+    values = (
+        entry.get("label"), entry.get("operation"), entry.get("programmer"), entry.get("chip"),
+        os.path.basename(path), path, entry.get("sha256"), entry.get("state"),
+        f"exit {entry.get('returncode')}",
+    )
+    return " ".join(str(value) for value in values if value)
+
+
+def _read_records(path, start=0):
+    """(header, body offset, body bytes) for each complete entry from start on."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        while True:
+            line = f.readline()
+            if not line.startswith(_RECORD_MARK) or not line.endswith(b"\n"):
+                # End of file, or an entry still being written
+                return
+            try:
+                header = json.loads(line[1:])
+                length = int(header["length"])
+            except (ValueError, KeyError, TypeError):
+                return
+            offset = f.tell()
+            body = f.read(length)
+            if len(body) < length or f.read(1) != b"\n":
+                return
+            yield header, offset, body
+
+
+class OperationLog:
+    """
+    Append-only store of every flashrom operation's output and metadata.
+
+    Output goes into segment files (<data>/oplog/YYYYMM-NNN.log) that are
+    only ever appended to and rotate by size and month. A SQLite index,
+    full-text (FTS5) where the SQLite build has it, points into them; it
+    holds nothing that cannot be rebuilt from the segments, and entries
+    written while it was unavailable are picked up the next time it opens.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(user_data_dir(), LOG_DIR_NAME)
+        os.makedirs(self.root, exist_ok=True)
+        self.fts = False
+        self._lock = threading.Lock()
+        self._db = None
+        self._segment = None
+
+    def _connect(self):
+        if self._db is None:
+            db = sqlite3.connect(os.path.join(self.root, INDEX_NAME), timeout=10, check_same_thread=False)
+            try:
+                db.executescript(_SCHEMA)
+                try:
+                    db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS entries_text USING fts5(body, meta, content='')")
+                    self.fts = True
+                except sqlite3.OperationalError:
+                    # SQLite without FTS5; search falls back to the metadata
+                    self.fts = False
+                self._catch_up(db)
+                db.commit()
+            except sqlite3.Error:
+                db.close()
+                raise
+            self._db = db
+        return self._db
+
+    def segments(self):
+        return sorted(name for name in os.listdir(self.root) if _SEGMENT_RE.match(name))
+
+    def _current_segment(self):
+        month = time.strftime("%Y%m")
+        name = self._segment
+        if name is None or not name.startswith(month):
+            existing = [name for name in self.segments() if name.startswith(month)]
+            name = existing[-1] if existing else f"{month}-001.log"
+        try:
+            full = os.path.getsize(os.path.join(self.root, name)) >= SEGMENT_BYTES
+        except FileNotFoundError:
+            full = False
+        if full:
+            number = int(_SEGMENT_RE.match(name).group(2)) + 1
+            name = f"{month}-{number:03d}.log"
+        self._segment = name
+        return name
+
+    def _index(self, db, header, segment, offset, text):
+        cursor = db.execute(
+            f"INSERT OR IGNORE INTO entries ({', '.join(_COLUMNS)}, segment, offset, length) "
+            f"VALUES ({', '.join('?' * (len(_COLUMNS) + 3))})",
+            [header.get(column) for column in _COLUMNS] + [segment, offset, header["length"]]
+        )
+        if cursor.rowcount and self.fts:
+            db.execute(
+                "INSERT INTO entries_text (rowid, body, meta) VALUES (?, ?, ?)",
+                (cursor.lastrowid, text, _meta_text(header))
+            )
+
+    def _catch_up(self, db):
+        """Index entries that reached the segments but not the index."""
+        for segment in self.segments():
+            end = db.execute(
+                "SELECT offset + length FROM entries WHERE segment = ? ORDER BY offset DESC LIMIT 1", (segment,)
+            ).fetchone()
+            start = end[0] + 1 if end else 0
+            path = os.path.join(self.root, segment)
+            if os.path.getsize(path) <= start:
+                continue
+            for header, offset, body in _read_records(path, start):
+                self._index(db, header, segment, offset, body.decode("utf-8", "replace"))
+
+    def append(self, entry, output):
+        """Store one operation; an index failure is repaired on a later open."""
+        if len(output) > MAX_OUTPUT_CHARS:
+            output = output[:MAX_OUTPUT_CHARS] + "\n[output truncated]\n"
+        body = output.encode("utf-8", "replace")
+        header = dict(entry, length=len(body))
+        blob = _RECORD_MARK + json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n" + body + b"\n"
+        with self._lock:
+            segment = self._current_segment()
+            with open(os.path.join(self.root, segment), "ab") as f:
+                f.write(blob)
+                f.flush()
+                # O_APPEND: our offset is the end of our own write even if
+                # another process appended to the same segment meanwhile
+                offset = f.tell() - len(body) - 1
+            try:
+                db = self._connect()
+                self._index(db, header, segment, offset, output)
+                db.commit()
+            except sqlite3.Error:
+                self._close_db()
+
+    def search(self, text="", limit=200, since=None, programmer=None, operation=None):
+        """Latest entries first whose output or metadata contain every word of text."""
+        where = []
+        params = []
+        if since is not None:
+            where.append("e.time >= ?")
+            params.append(since)
+        if programmer:
+            where.append("e.programmer = ?")
+            params.append(programmer)
+        if operation:
+            where.append("e.operation = ?")
+            params.append(operation)
+        sql = _SELECT + " e"
+        order = "e.id"
+        with self._lock:
+            db = self._connect()
+            query = fts_query(text)
+            if query and self.fts:
+                # Newest first is rowid order, which FTS5 walks without sorting
+                sql += " JOIN entries_text t ON t.rowid = e.id"
+                order = "t.rowid"
+                where.insert(0, "entries_text MATCH ?")
+                params.insert(0, query)
+            elif query:
+                for term in text.split():
+                    where.append(
+                        "(coalesce(e.label, '') || ' ' || coalesce(e.chip, '') || ' ' || coalesce(e.path, '') "
+                        "|| ' ' || coalesce(e.sha256, '') || ' ' || coalesce(e.programmer, '')) LIKE ?"
+                    )
+                    params.append(f"%{term}%")
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += f" ORDER BY {order} DESC LIMIT ?"
+            return _rows(db.execute(sql, params + [limit]))
+
+    def get(self, entry_id):
+        """The entry with this id, as search() returns it, or None."""
+        with self._lock:
+            rows = _rows(self._connect().execute(_SELECT + " e WHERE e.id = ?", (entry_id,)))
+        return rows[0] if rows else None
+
+    def count(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def output(self, entry):
+        """The output stored for a search() result."""
+        with open(os.path.join(self.root, entry["segment"]), "rb") as f:
+            f.seek(entry["offset"])
+            return f.read(entry["length"]).decode("utf-8", "replace")
+
+    def reindex(self):
+        """Rebuild the index from the segments."""
+        with self._lock:
+            db = self._connect()
+            db.execute("DROP TABLE IF EXISTS entries_text")
+            db.execute("DROP TABLE IF EXISTS entries")
+            db.commit()
+            self._close_db()
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _close_db(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def close(self):
+        with self._lock:
+            self._close_db()
+
+
+def format_entry(entry):
+    """One line per search() result for the command line."""
+    when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["time"]))
+    return (
+        f"{entry['id']:>6}  {when}  {entry['operation']:<7} {entry['programmer'] or '-':<16} "
+        f"{entry['chip'] or '-':<14} exit {entry['returncode']}  {entry['path'] or ''}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the output of past flashrom operations")
+    parser.add_argument("words", nargs="*", help="words that must appear in the output or metadata")
+    parser.add_argument("-p", "--programmer")
+    parser.add_argument("--operation", choices=("probe", "read", "write", "verify", "erase"))
+    parser.add_argument("--days", type=float, help="only the last N days")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--show", type=int, metavar="ID", help="print the full output of entry ID")
+    parser.add_argument("--json", action="store_true", help="print the matches as JSON lines")
+    parser.add_argument("--reindex", action="store_true", help="rebuild the index from the log segments")
+    parser.add_argument("--root", help="log directory")
+    args = parser.parse_args(argv)
+
+    log = OperationLog(args.root)
+    try:
+        if args.reindex:
+            print(f"Indexed {log.reindex()} entries")
+            return 0
+        if args.show is not None:
+            entry = log.get(args.show)
+            if entry is None:
+                print(f"No entry {args.show}", file=sys.stderr)
+                return 1
+            sys.stdout.write(log.output(entry))
+            return 0
+        since = time.time() - args.days * 86400 if args.days else None
+        started = time.perf_counter()
+        entries = log.search(" ".join(args.words), args.limit, since, args.programmer, args.operation)
+        for entry in entries:
+            print(json.dumps(entry) if args.json else format_entry(entry))
+        if not args.json:
+            print(f"{len(entries)} matches in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+        return 0 if entries else 1
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        log.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# flashrom_paths.py
+import os
+import platform
+import shutil
+
+
+def get_flashrom_path():
+    # Explicit override, e.g. a wrapper script or the benchmark stand-in
+    override = os.environ.get("FLASHROM_PATH")
+    if override:
+        return override
+
+    system = platform.system()
+
+    if system == "Windows":
+        # Your bundled EXE
+        return os.path.join(os.getcwd(), "flashrom", "flashrom.exe")
+
+    if system == "Darwin": # macOS
+        # 1. Try MacPorts
+        macports_path = "/opt/local/bin/flashrom"
+        if os.path.exists(macports_path):
+            return macports_path
+
+        # 2. Try Homebrew (Intel)
+        brew_path_intel = "/usr/local/bin/flashrom"
+        if os.path.exists(brew_path_intel):
+            return brew_path_intel
+
+        # 3. Try Homebrew (Apple Silicon)
+        brew_path_arm = "/opt/homebrew/bin/flashrom"
+        if os.path.exists(brew_path_arm):
+            return brew_path_arm
+
+        # 4. Try PATH
+        path = shutil.which("flashrom")
+        if path:
+            return path
+
+        raise FileNotFoundError("flashrom not found on macOS")
+
+    if system == "Linux":
+        path = shutil.which("flashrom")
+        if path:
+            return path
+        raise FileNotFoundError("flashrom not found on Linux")
+
+    raise RuntimeError("Unsupported OS")
+
+
+def _app_dir(windows_env, mac_subdir, xdg_env, xdg_default):
+    system = platform.system()
+    home = os.path.expanduser("~")
+
+    if system == "Windows":
+        base = os.environ.get(windows_env) or os.path.join(home, "AppData", "Local")
+        return os.path.join(base, "FlashromGUI")
+
+    if system == "Darwin":
+        return os.path.join(home, "Library", mac_subdir, "FlashromGUI")
+
+    base = os.environ.get(xdg_env) or os.path.join(home, xdg_default)
+    return os.path.join(base, "flashromgui")
+
+
+def user_cache_dir():
+    """Directory for data that can be rebuilt at any time (chip catalog etc)."""
+    path = _app_dir("LOCALAPPDATA", "Caches", "XDG_CACHE_HOME", ".cache")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def user_data_dir():
+    """Directory for data that must survive cache cleanups (history, backups)."""
+    path = _app_dir("APPDATA", "Application Support", "XDG_DATA_HOME", os.path.join(".local", "share"))
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,477 @@
+# flashrom_pipeline.py
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from flashrom_diff import IncrementalWrite, file_sha256
+from flashrom_jobs import JobExecutor, DONE as JOB_DONE
+from flashrom_paths import get_flashrom_path, user_data_dir
+from flashrom_progress import FlashromProgress
+
+# Stages in the only order that makes sense on a chip.
+STAGES = ("backup", "write", "verify", "archive")
+
+Recipe = namedtuple("Recipe", "name stages fold_verify incremental")
+
+RECIPES = {
+    "rework": Recipe("rework", ("backup", "write", "verify", "archive"), True, True),
+    "rework-full-verify": Recipe("rework-full-verify", ("backup", "write", "verify", "archive"), False, True),
+    "backup": Recipe("backup", ("backup", "archive"), True, False),
+    "write+verify": Recipe("write+verify", ("write", "verify"), True, False),
+}
+
+# Stage and pipeline states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+
+STATE_NAME = "state.json"
+ARCHIVE_NAME = "archive.jsonl"
+
+
+def default_root():
+    return os.path.join(user_data_dir(), "pipelines")
+
+
+def recipe_from_dict(data):
+    """Validate a recipe as found in a JSON file: {"name", "stages", "fold_verify", "incremental"}."""
+    stages = tuple(data.get("stages") or ())
+    if not stages:
+        raise ValueError("A recipe needs at least one stage")
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)}; use {', '.join(STAGES)}")
+    if list(stages) != sorted(set(stages), key=STAGES.index):
+        raise ValueError(f"Stages must appear once each, in the order {', '.join(STAGES)}")
+    return Recipe(
+        str(data.get("name") or "+".join(stages)),
+        stages,
+        bool(data.get("fold_verify", True)),
+        bool(data.get("incremental", True)),
+    )
+
+
+def load_recipe(name_or_path):
+    """A built-in recipe by name, or one read from a JSON file."""
+    if name_or_path in RECIPES:
+        return RECIPES[name_or_path]
+    with open(name_or_path, "r", encoding="utf-8") as f:
+        return recipe_from_dict(json.load(f))
+
+
+class PipelineError(Exception):
+    pass
+
+
+class PipelineState:
+    """
+    Persistent record of one pipeline run in <root>/<id>/state.json.
+
+    The file is rewritten atomically before and after every stage, so a
+    crash, power cut or closed window loses at most the stage that was
+    running. A stage found "running" on load was interrupted.
+    """
+
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+
+    @classmethod
+    def create(cls, recipe, programmer, image_path=None, root=None):
+        if any(stage in ("write", "verify") for stage in recipe.stages) and not image_path:
+            raise ValueError("An image file is required for write/verify")
+        now = time.time()
+        pipeline_id = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + "-" + os.urandom(3).hex()
+        directory = os.path.join(root or default_root(), pipeline_id)
+        os.makedirs(directory)
+        state = cls(os.path.join(directory, STATE_NAME), {
+            "id": pipeline_id,
+            "recipe": recipe._asdict(),
+            "programmer": programmer,
+            "image": os.path.abspath(image_path) if image_path else None,
+            "image_sha256": file_sha256(image_path) if image_path else None,
+            "chip": None,
+            "created": now,
+            "status": PENDING,
+            "chip_dirty": False,
+            "backup": None,
+            "stages": [{"name": name, "status": PENDING, "detail": "", "attempts": 0, "duration": 0.0}
+                       for name in recipe.stages],
+        })
+        state.save()
+        return state
+
+    @classmethod
+    def load(cls, path):
+        if os.path.isdir(path):
+            path = os.path.join(path, STATE_NAME)
+        with open(path, "r", encoding="utf-8") as f:
+            state = cls(path, json.load(f))
+        for stage in state.stages:
+            if stage["status"] == RUNNING:
+                stage["status"] = INTERRUPTED
+                state.data["status"] = INTERRUPTED
+        return state
+
+    @property
+    def id(self):
+        return self.data["id"]
+
+    @property
+    def directory(self):
+        return os.path.dirname(self.path)
+
+    @property
+    def recipe(self):
+        return recipe_from_dict(self.data["recipe"])
+
+    @property
+    def stages(self):
+        return self.data["stages"]
+
+    @property
+    def status(self):
+        return self.data["status"]
+
+    @property
+    def is_finished(self):
+        return self.status == DONE
+
+    def stage(self, name):
+        for stage in self.stages:
+            if stage["name"] == name:
+                return stage
+        return None
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        parts = [f"{stage['name']} {stage['status']}" for stage in self.stages]
+        return f"{self.id} ({self.data['recipe']['name']}, {self.data['programmer']}): " + ", ".join(parts)
+
+
+def list_pipelines(root=None, unfinished=False):
+    """Saved pipelines, newest first; unfinished=True for those that can be resumed."""
+    root = root or default_root()
+    states = []
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return states
+    for name in sorted(names, reverse=True):
+        path = os.path.join(root, name, STATE_NAME)
+        if not os.path.exists(path):
+            continue
+        try:
+            state = PipelineState.load(path)
+        except (OSError, ValueError):
+            continue
+        if not unfinished or not state.is_finished:
+            states.append(state)
+    return states
+
+
+class PipelineRunner:
+    """
+    Runs the stages of a PipelineState in order on one programmer.
+
+    Stages share what earlier stages learned instead of asking flashrom
+    again: the chip found by the first run is passed as -c to every later
+    one, the backup dump is the reference for an incremental write, and
+    with fold_verify the write's own verification replaces a separate
+    flashrom -v pass over the whole chip.
+
+    A backup read before the pipeline was resumed is kept for restoring,
+    but never used as the write's reference: the board may have been
+    swapped for another of the same model in the meantime, so a resumed
+    pipeline writes the full image.
+
+    Every flashrom run is a job on the shared JobExecutor. on_update(state)
+    is called from the worker thread whenever a stage changes state.
+    """
+
+    def __init__(self, state, executor=None, flashrom_path=None, store=None, probe_cache=None,
+                 on_update=None, on_output=None):
+        self.state = state
+        self.executor = executor or JobExecutor()
+        self.flashrom_path = flashrom_path or get_flashrom_path()
+        self.store = store
+        self.probe_cache = probe_cache
+        self.on_update = on_update
+        self.on_output = on_output
+        self.progress = FlashromProgress()
+        self.job = None
+        self.current = None
+        # A resumed pipeline probes once more, so a swapped board is noticed
+        self._reprobe = state.status != PENDING
+        # Set once this runner has read the backup itself
+        self._backup_read = False
+        self._stop = threading.Event()
+
+    @property
+    def programmer(self):
+        return self.state.data["programmer"]
+
+    def _notify(self):
+        self.state.save()
+        if self.on_update:
+            self.on_update(self.state)
+
+    def run(self):
+        """Run every stage that has not completed yet; returns the final status."""
+        state = self.state
+        recipe = state.recipe
+        self._stop.clear()
+        state.data["status"] = RUNNING
+        self._notify()
+        for stage in state.stages:
+            if stage["status"] in (DONE, SKIPPED):
+                continue
+            if self._stop.is_set():
+                state.data["status"] = INTERRUPTED
+                break
+            self.current = stage
+            stage.update(status=RUNNING, detail="", attempts=stage["attempts"] + 1)
+            self._notify()
+            started = time.monotonic()
+            try:
+                status, detail = getattr(self, "_" + stage["name"])(recipe)
+            except (PipelineError, OSError, ValueError) as e:
+                status, detail = (INTERRUPTED if self._stop.is_set() else FAILED), str(e)
+            stage.update(status=status, detail=detail, duration=round(time.monotonic() - started, 3))
+            if status in (FAILED, INTERRUPTED):
+                state.data["status"] = status
+            self._notify()
+            if status in (FAILED, INTERRUPTED):
+                break
+        else:
+            state.data["status"] = DONE
+            self._cleanup()
+        self.current = None
+        self._notify()
+        return state.status
+
+    def start(self, on_finished=None):
+        """run() on a background thread."""
+        def task():
+            status = self.run()
+            if on_finished:
+                on_finished(self.state, status)
+
+        thread = threading.Thread(target=task, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self, kill=False):
+        self._stop.set()
+        job = self.job
+        if job is not None and not job.is_finished:
+            if kill:
+                job.kill()
+            else:
+                job.cancel()
+
+    def _chip_args(self):
+        if self._reprobe:
+            return []
+        chip = self.state.data["chip"]
+        if not chip and self.probe_cache is not None:
+            cached = self.probe_cache.lookup(self.programmer)
+            chip = cached.chip if cached else None
+        return ["-c", chip] if chip else []
+
+    def _flashrom(self, args, label, chain=False):
+        self.progress.reset()
+        cmd = [self.flashrom_path, "-p", self.programmer] + self._chip_args() + args
+        self.job = self.executor.submit(
+            cmd, self.programmer,
+            label=f"{self.state.id}: {label}",
+            on_output=self.on_output,
+            progress=self.progress,
+            chain=chain,
+        )
+        self.job.wait()
+        job = self.job
+        snapshot = self.progress.snapshot()
+        found = snapshot["chip"]
+        if found:
+            known = self.state.data["chip"]
+            if known and found != known:
+                raise PipelineError(f"Chip changed: the pipeline started on {known}, found {found}")
+            self.state.data["chip"] = found
+            self._reprobe = False
+            if self.probe_cache is not None and job.state == JOB_DONE and "-c" not in cmd:
+                self.probe_cache.store(self.programmer, [("", found, snapshot["chip_size"] // 1024, "")])
+        if job.state != JOB_DONE:
+            if job.error:
+                raise PipelineError(f"{label}: {job.error}")
+            raise PipelineError(f"{label} {job.state} (exit code {job.returncode})")
+        return job
+
+    def _backup(self, recipe):
+        path = os.path.join(self.state.directory, "backup.bin")
+        # The write follows on the same board; libflashrom can use what was read
+        self._flashrom(["-r", path], "backup", chain="write" in recipe.stages)
+        backup = {"path": path, "size": os.path.getsize(path), "sha256": file_sha256(path), "id": None}
+        detail = f"{backup['size'] // 1024} KiB, sha256 {backup['sha256'][:16]}"
+        if self.store is not None:
+            manifest = self.store.ingest_file(path, self.state.data["chip"] or "", self.programmer, "read")
+            backup["id"] = manifest["id"]
+            detail += f", stored as {manifest['id']}"
+        self.state.data["backup"] = backup
+        self._backup_read = True
+        return DONE, detail
+
+    def _write(self, recipe):
+        data = self.state.data
+        image = data["image"]
+        if file_sha256(image) != data["image_sha256"]:
+            raise PipelineError(f"{image} changed since the pipeline was created")
+        backup = data["backup"]
+        noverify = [] if recipe.fold_verify else ["-n"]
+        diff = None
+        # An interrupted write leaves the chip in an unknown state, and a
+        # backup from before a resume may be of another board; only a
+        # backup this run just read describes the chip
+        if recipe.incremental and backup and self._backup_read and not data["chip_dirty"]:
+            diff = IncrementalWrite(backup["path"], image)
+            if not diff.ranges:
+                return SKIPPED, "chip already holds the image"
+            diff.prepare(os.path.join(self.state.directory, "write.layout"))
+            args = diff.write_args() + noverify
+            detail = f"wrote {len(diff.ranges)} changed region(s), {diff.changed_bytes // 1024} KiB"
+        else:
+            args = ["-w", image] + noverify
+            detail = "wrote the full image"
+            if recipe.incremental and backup and not self._backup_read:
+                detail += " (resumed: the backup is not used as the reference)"
+
+        if self._reprobe:
+            # Find out what is attached before writing to it, not afterwards
+            self._flashrom([], "probe")
+        data["chip_dirty"] = True
+        self.state.save()
+        try:
+            self._flashrom(args, "write")
+        finally:
+            if diff is not None:
+                diff.cleanup()
+        data["chip_dirty"] = False
+        return DONE, detail + (", verified by flashrom" if recipe.fold_verify else "")
+
+    def _verify(self, recipe):
+        write = self.state.stage("write")
+        if write is not None:
+            if write["status"] == SKIPPED:
+                return SKIPPED, "the backup already matches the image"
+            if recipe.fold_verify:
+                return SKIPPED, "verified during the write"
+        self._flashrom(["-v", self.state.data["image"]], "verify")
+        return DONE, "chip matches the image"
+
+    def _archive(self, recipe):
+        data = self.state.data
+        record = {
+            "id": data["id"],
+            "time": time.time(),
+            "recipe": data["recipe"]["name"],
+            "programmer": self.programmer,
+            "chip": data["chip"],
+            "image": data["image"],
+            "image_sha256": data["image_sha256"],
+            "backup_sha256": data["backup"]["sha256"] if data["backup"] else None,
+            "backup_id": data["backup"]["id"] if data["backup"] else None,
+            "stages": {stage["name"]: stage["status"] for stage in self.state.stages if stage["name"] != "archive"},
+        }
+        with open(os.path.join(os.path.dirname(self.state.directory), ARCHIVE_NAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        data["archive"] = record
+        return DONE, f"image sha256 {(data['image_sha256'] or '-')[:16]}"
+
+    def _cleanup(self):
+        # The dump is only needed to resume; once it is in the store the
+        # store's copy is the one to restore from
+        backup = self.state.data["backup"]
+        if backup and backup["id"] and os.path.exists(backup["path"]):
+            os.remove(backup["path"])
+
+
+def discard(state):
+    """Forget a pipeline that will not be resumed, dump included."""
+    shutil.rmtree(state.directory, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a backup/write/verify/archive recipe as one job")
+    parser.add_argument("recipe", nargs="?",
+                        help=f"built-in recipe ({', '.join(sorted(RECIPES))}) or a JSON recipe file")
+    parser.add_argument("-p", "--programmer", help="flashrom programmer string")
+    parser.add_argument("--image", help="image to write/verify")
+    parser.add_argument("--separate-verify", action="store_true",
+                        help="verify with its own flashrom -v run instead of during the write")
+    parser.add_argument("--no-store", action="store_true", help="do not put the backup in the backup store")
+    parser.add_argument("--no-log", action="store_true", help="do not keep the output in the searchable operation log")
+    parser.add_argument("--resume", metavar="ID", help="continue an interrupted pipeline")
+    parser.add_argument("--list", action="store_true", help="list pipelines that can be resumed")
+    parser.add_argument("--root", help="where pipeline state is kept")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for state in list_pipelines(args.root, unfinished=True):
+            print(state.summary())
+        return 0
+
+    try:
+        if args.resume:
+            state = PipelineState.load(os.path.join(args.root or default_root(), args.resume))
+        else:
+            if not args.recipe or not args.programmer:
+                parser.error("a recipe and -p are required unless --resume or --list is given")
+            recipe = load_recipe(args.recipe)
+            if args.separate_verify:
+                recipe = recipe._replace(fold_verify=False)
+            state = PipelineState.create(recipe, args.programmer, args.image, args.root)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    store = None
+    if not args.no_store and "backup" in state.recipe.stages:
+        from flashrom_backup import BackupStore
+        store = BackupStore()
+
+    def on_update(state):
+        stage = runner.current
+        if stage is not None and stage["status"] != RUNNING:
+            print(f"{stage['name']}: {stage['status']} {stage['detail']}", flush=True)
+
+    oplog = None
+    if not args.no_log:
+        from flashrom_oplog import OperationLog
+        oplog = OperationLog()
+
+    runner = PipelineRunner(state, executor=JobExecutor(oplog=oplog), store=store, on_update=on_update)
+    print(f"Pipeline {state.id}: {' -> '.join(state.recipe.stages)}", flush=True)
+    status = runner.run()
+    if oplog is not None:
+        oplog.close()
+    print(f"Pipeline {state.id} {status}")
+    if status != DONE:
+        print(f"Resume with: --resume {state.id}")
+    return 0 if status == DONE else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+# flashrom_pipeline_gui.py
+import time
+import wx
+from flashrom_pipeline import (
+    DONE, PENDING, RECIPES, RUNNING, PipelineRunner, PipelineState, discard, list_pipelines, load_recipe
+)
+from flashrom_progress import format_progress
+
+
+class PipelineFrame(wx.Frame):
+    """Runs a recipe (backup, write, verify, archive) as one job; resumes interrupted ones."""
+
+    COLUMNS = ("Stage", "Status", "Time", "Detail")
+
+    def __init__(self, parent, executor, image_path="", programmer="", store=None, probe_cache=None,
+                 on_finished=None):
+        super().__init__(parent, title="Recipes", size=wx.Size(800, 480))
+        self.executor = executor
+        self.store = store
+        self.probe_cache = probe_cache
+        self.on_finished = on_finished
+        self.runner = None
+        self.recipes = dict(RECIPES)
+        self.unfinished = []
+        panel = wx.Panel(self)
+
+        self.recipe_choice = wx.Choice(panel, choices=sorted(self.recipes))
+        self.recipe_choice.SetStringSelection("rework")
+        self.load_button = wx.Button(panel, label="Load...")
+        self.fold_check = wx.CheckBox(panel, label="Verify during the write")
+        self.fold_check.SetToolTip(
+            "Let flashrom verify while writing instead of reading the whole chip again in a separate verify stage"
+        )
+        self.programmer_ctrl = wx.TextCtrl(panel, value=programmer)
+        self.image_ctrl = wx.TextCtrl(panel, value=image_path)
+        self.resume_choice = wx.Choice(panel)
+        self.resume_button = wx.Button(panel, label="Resume")
+        self.discard_button = wx.Button(panel, label="Discard")
+        self.start_button = wx.Button(panel, label="Start")
+        self.stop_button = wx.Button(panel, label="Stop")
+        self.stop_button.Disable()
+
+        self.grid = wx.ListCtrl(panel, style=wx.LC_REPORT | wx.LC_SINGLE_SEL)
+        for index, title in enumerate(self.COLUMNS):
+            self.grid.InsertColumn(index, title, width=420 if title == "Detail" else 90)
+        self.summary = wx.StaticText(panel, label="")
+
+        recipe_row = wx.BoxSizer(wx.HORIZONTAL)
+        recipe_row.Add(self.recipe_choice, 0, wx.RIGHT, 5)
+        recipe_row.Add(self.load_button, 0, wx.RIGHT, 10)
+        recipe_row.Add(self.fold_check, 0, wx.ALIGN_CENTER_VERTICAL)
+        resume_row = wx.BoxSizer(wx.HORIZONTAL)
+        resume_row.Add(self.resume_choice, 1, wx.RIGHT, 5)
+        resume_row.Add(self.resume_button, 0, wx.RIGHT, 5)
+        resume_row.Add(self.discard_button, 0)
+
+        form = wx.FlexGridSizer(cols=2, vgap=5, hgap=5)
+        form.AddGrowableCol(1)
+        form.Add(wx.StaticText(panel, label="Recipe"))
+        form.Add(recipe_row, 1, wx.EXPAND)
+        form.Add(wx.StaticText(panel, label="Programmer"))
+        form.Add(self.programmer_ctrl, 1, wx.EXPAND)
+        form.Add(wx.StaticText(panel, label="Image"))
+        form.Add(self.image_ctrl, 1, wx.EXPAND)
+        form.Add(wx.StaticText(panel, label="Unfinished"))
+        form.Add(resume_row, 1, wx.EXPAND)
+
+        buttons = wx.BoxSizer(wx.HORIZONTAL)
+        buttons.Add(self.summary, 1, wx.ALIGN_CENTER_VERTICAL)
+        buttons.Add(self.start_button, 0, wx.RIGHT, 5)
+        buttons.Add(self.stop_button, 0)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(form, 0, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(self.grid, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+        sizer.Add(buttons, 0, wx.EXPAND | wx.ALL, 10)
+        panel.SetSizer(sizer)
+
+        self.timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_timer_tick, self.timer)
+        self.Bind(wx.EVT_CHOICE, self.on_recipe, self.recipe_choice)
+        self.Bind(wx.EVT_BUTTON, self.on_load, self.load_button)
+        self.Bind(wx.EVT_BUTTON, self.on_start, self.start_button)
+        self.Bind(wx.EVT_BUTTON, self.on_stop, self.stop_button)
+        self.Bind(wx.EVT_BUTTON, self.on_resume, self.resume_button)
+        self.Bind(wx.EVT_BUTTON, self.on_discard, self.discard_button)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+        self.on_recipe(None)
+        self.refresh_unfinished()
+
+    def selected_recipe(self):
+        recipe = self.recipes[self.recipe_choice.GetStringSelection()]
+        return recipe._replace(fold_verify=self.fold_check.GetValue())
+
+    def on_recipe(self, event):
+        recipe = self.recipes[self.recipe_choice.GetStringSelection()]
+        self.fold_check.SetValue(recipe.fold_verify)
+        self.fold_check.Enable("write" in recipe.stages and "verify" in recipe.stages)
+
+    def on_load(self, event):
+        with wx.FileDialog(self, "Load recipe", wildcard="Recipes (*.json)|*.json|All files (*.*)|*.*",
+                           style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as dlg:
+            if dlg.ShowModal() != wx.ID_OK:
+                return
+            path = dlg.GetPath()
+        try:
+            recipe = load_recipe(path)
+        except (OSError, ValueError) as e:
+            wx.MessageBox(f"Cannot load {path}:\n{e}", "Recipes", wx.OK | wx.ICON_ERROR)
+            return
+        self.recipes[recipe.name] = recipe
+        self.recipe_choice.Set(sorted(self.recipes))
+        self.recipe_choice.SetStringSelection(recipe.name)
+        self.on_recipe(None)
+
+    def refresh_unfinished(self):
+        self.unfinished = list_pipelines(unfinished=True)
+        self.resume_choice.Set([state.summary() for state in self.unfinished])
+        if self.unfinished:
+            self.resume_choice.SetSelection(0)
+        self.update_buttons()
+
+    def update_buttons(self):
+        idle = self.runner is None
+        self.start_button.Enable(idle)
+        self.stop_button.Enable(not idle)
+        self.resume_button.Enable(idle and bool(self.unfinished))
+        self.discard_button.Enable(idle and bool(self.unfinished))
+
+    def on_start(self, event):
+        programmer = self.programmer_ctrl.GetValue().strip()
+        if not programmer:
+            wx.MessageBox("Enter a programmer.", "Recipes", wx.OK | wx.ICON_ERROR)
+            return
+        try:
+            state = PipelineState.create(self.selected_recipe(), programmer, self.image_ctrl.GetValue().strip() or None)
+        except (OSError, ValueError) as e:
+            wx.MessageBox(str(e), "Recipes", wx.OK | wx.ICON_ERROR)
+            return
+        self.run(state)
+
+    def on_resume(self, event):
+        index = self.resume_choice.GetSelection()
+        if index == wx.NOT_FOUND:
+            return
+        state = self.unfinished[index]
+        if state.data["chip_dirty"]:
+            message = "The last write on this pipeline did not finish, so the chip is written in full again.\n"
+        elif state.data["backup"]:
+            message = (f"This pipeline was started {time.strftime('%Y-%m-%d %H:%M', time.localtime(state.data['created']))}; "
+                       "the image is written in full and its backup is only kept for restoring.\n")
+        else:
+            message = ""
+        if message:
+            answer = wx.MessageBox(
+                message + "Make sure the same board is still attached. Continue?",
+                "Resume", wx.YES_NO | wx.NO_DEFAULT | wx.ICON_WARNING
+            )
+            if answer != wx.YES:
+                return
+        self.run(state)
+
+    def on_discard(self, event):
+        index = self.resume_choice.GetSelection()
+        if index == wx.NOT_FOUND:
+            return
+        state = self.unfinished[index]
+        if wx.MessageBox(f"Discard pipeline {state.id} and its backup dump?", "Recipes",
+                         wx.YES_NO | wx.ICON_WARNING) != wx.YES:
+            return
+        discard(state)
+        self.refresh_unfinished()
+
+    def run(self, state):
+        if self.executor.is_busy(state.data["programmer"]):
+            wx.MessageBox("The programmer is busy.", "Recipes", wx.OK | wx.ICON_ERROR)
+            return
+        try:
+            self.runner = PipelineRunner(
+                state, executor=self.executor, store=self.store, probe_cache=self.probe_cache,
+                on_update=lambda state: wx.CallAfter(self.show_state, state)
+            )
+        except (OSError, RuntimeError) as e:
+            wx.MessageBox(f"Error: {e}", "Recipes", wx.OK | wx.ICON_ERROR)
+            return
+        self.show_state(state)
+        self.update_buttons()
+        self.timer.Start(250)
+        on_finished = self.on_finished
+
+        def finished(state, status):
+            wx.CallAfter(self.on_runner_finished, state, status)
+            # Not through the frame: it may be closed by then, and the main
+            # window still has to learn what happened to the chip
+            if on_finished:
+                wx.CallAfter(on_finished, state)
+
+        self.runner.start(finished)
+
+    def show_state(self, state):
+        if not self:
+            return
+        self.grid.DeleteAllItems()
+        for stage in state.stages:
+            duration = f"{stage['duration']:.1f}s" if stage["status"] not in (PENDING, RUNNING) else ""
+            self.grid.Append([stage["name"], stage["status"], duration, stage["detail"]])
+        self.summary.SetLabel(f"Pipeline {state.id}: {state.status}")
+
+    def on_timer_tick(self, event):
+        runner = self.runner
+        if runner is None or runner.current is None:
+            return
+        row = runner.state.stages.index(runner.current)
+        text = format_progress(runner.progress.snapshot())
+        if self.grid.GetItemText(row, 3) != text:
+            self.grid.SetItem(row, 3, text)
+
+    def on_runner_finished(self, state, status):
+        if not self:
+            return
+        self.timer.Stop()
+        self.runner = None
+        self.show_state(state)
+        if status != DONE:
+            self.summary.SetLabel(f"Pipeline {state.id}: {status}; it can be resumed from the list above")
+        else:
+            self.summary.SetLabel(f"Pipeline {state.id} done at {time.strftime('%H:%M:%S')}")
+        self.refresh_unfinished()
+
+    def confirm_stop(self):
+        """False if a write is running and the user wants it to go on."""
+        if self.runner and self.runner.current and self.runner.current["name"] == "write":
+            answer = wx.MessageBox(
+                "Stopping a write can leave the chip unbootable.\nStop anyway?",
+                "Recipes", wx.YES_NO | wx.ICON_WARNING
+            )
+            return answer == wx.YES
+        return True
+
+    def on_stop(self, event):
+        if self.runner and self.confirm_stop():
+            self.runner.stop()
+
+    def on_close(self, event):
+        if self.runner:
+            if event.CanVeto() and not self.confirm_stop():
+                event.Veto()
+                return
+            self.runner.stop()
+        self.timer.Stop()
+        event.Skip()
@@ -0,0 +1,138 @@
+# flashrom_probe_cache.py
+import json
+import os
+import threading
+import time
+
+from flashrom_paths import user_cache_dir
+from flashrom_usb import device_identity
+
+# Seconds a probe result is trusted when nothing was re-plugged. Chips in
+# a ZIF socket or clip can be swapped without unplugging the programmer.
+DEFAULT_TTL = 10 * 60
+
+CACHE_NAME = "probe_cache.json"
+
+
+class ProbeResult:
+    def __init__(self, programmer, identity, chip, size_kb, vendor, candidates, probed):
+        self.programmer = programmer
+        self.identity = identity
+        self.chip = chip
+        self.size_kb = size_kb
+        self.vendor = vendor
+        # Every definition that matched; flashrom needs -c when there are several
+        self.candidates = candidates
+        self.probed = probed
+
+    @property
+    def age(self):
+        return time.time() - self.probed
+
+    def chip_args(self):
+        return ["-c", self.chip] if self.chip else []
+
+    def as_dict(self):
+        return {
+            "identity": self.identity,
+            "chip": self.chip,
+            "size_kb": self.size_kb,
+            "vendor": self.vendor,
+            "candidates": self.candidates,
+            "probed": self.probed,
+        }
+
+
+class ProbeCache:
+    """
+    Chip detected per programmer, so operations can pass -c and skip
+    flashrom's probing of every chip definition.
+
+    Entries are keyed by the programmer string and remember the identity
+    of the attached USB device (bus, port, device number, serial). An entry
+    is dropped once that identity changes, i.e. after any hotplug, or
+    after `ttl` seconds.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, sysfs_root="/sys"):
+        self.path = path or os.path.join(user_cache_dir(), CACHE_NAME)
+        self.ttl = ttl
+        self.sysfs_root = sysfs_root
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, entries):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def identity(self, programmer):
+        return device_identity(programmer, self.sysfs_root)
+
+    def lookup(self, programmer):
+        """The cached ProbeResult for programmer, or None if stale or unknown."""
+        with self._lock:
+            entry = self._load().get(programmer)
+        if not entry or not entry.get("chip"):
+            return None
+        if self.ttl is not None and time.time() - entry["probed"] > self.ttl:
+            self.invalidate(programmer)
+            return None
+        identity = self.identity(programmer)
+        if identity is None or identity != entry["identity"]:
+            self.invalidate(programmer)
+            return None
+        return ProbeResult(programmer, **entry)
+
+    def store(self, programmer, found, selected=None):
+        """
+        Record the chips flashrom reported, as returned by parse_found_chips.
+
+        With several matching definitions the cached chip is `selected` if
+        it is one of them, otherwise the entry is left empty: guessing
+        the -c name could drive the wrong chip.
+        """
+        identity = self.identity(programmer)
+        if not found or identity is None:
+            self.invalidate(programmer)
+            return None
+
+        names = [chip for _, chip, _, _ in found]
+        match = None
+        if len(found) == 1:
+            match = found[0]
+        elif selected:
+            for candidate in found:
+                if candidate[1].lower() == selected.lower():
+                    match = candidate
+                    break
+        if match is None:
+            self.invalidate(programmer)
+            return None
+
+        vendor, chip, size_kb, _ = match
+        result = ProbeResult(programmer, identity, chip, size_kb, vendor, names, time.time())
+        with self._lock:
+            entries = self._load()
+            entries[programmer] = result.as_dict()
+            self._save(entries)
+        return result
+
+    def invalidate(self, programmer=None):
+        """Forget one programmer, or everything when programmer is None."""
+        with self._lock:
+            entries = self._load()
+            if programmer is None:
+                changed = bool(entries)
+                entries = {}
+            else:
+                changed = entries.pop(programmer, None) is not None
+            if changed:
+                self._save(entries)
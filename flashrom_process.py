@@ -0,0 +1,140 @@
+# flashrom_process.py
+import codecs
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+CHUNK_SIZE = 4096
+
+# How long a terminated flashrom gets to release the programmer before it
+# is killed outright.
+TERMINATE_GRACE = 3.0
+
+
+def _pump(pipe, stream, on_output, progress):
+    # Raw reads return as soon as flashrom flushes anything, which matters
+    # because its progress lines are not newline terminated.
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while True:
+            data = pipe.read(CHUNK_SIZE)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if not text:
+                continue
+            if progress is not None:
+                progress.feed(text, stream)
+            if on_output:
+                on_output(text, stream)
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            if progress is not None:
+                progress.feed(tail, stream)
+            if on_output:
+                on_output(tail, stream)
+    finally:
+        pipe.close()
+
+
+def signal_process_group(proc, sig):
+    """
+    Send sig to proc's process group. On Windows SIGTERM becomes
+    CTRL_BREAK_EVENT and anything else kills the process.
+    """
+    try:
+        if sys.platform == "win32":
+            if sig == signal.SIGTERM:
+                proc.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                proc.kill()
+        else:
+            os.killpg(proc.pid, sig)
+    except OSError:
+        # Already gone
+        pass
+
+
+class FlashromProcess:
+    """
+    A flashrom child process in its own process group with streamed output.
+
+    on_output(text, stream) is called from reader threads with stream set to
+    "stdout" or "stderr"; progress, if given, is a FlashromProgress that is
+    fed the same text.
+    """
+
+    def __init__(self, cmd, on_output=None, progress=None):
+        self.cmd = cmd
+        self.on_output = on_output
+        self.progress = progress
+        self.proc = None
+        self.spawn_time = None
+        self._readers = []
+
+    def start(self):
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+
+        started = time.monotonic()
+        self.proc = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+            **kwargs
+        )
+        self.spawn_time = time.monotonic() - started
+        self._readers = [
+            threading.Thread(target=_pump, args=(self.proc.stdout, "stdout", self.on_output, self.progress), daemon=True),
+            threading.Thread(target=_pump, args=(self.proc.stderr, "stderr", self.on_output, self.progress), daemon=True),
+        ]
+        for reader in self._readers:
+            reader.start()
+        return self
+
+    @property
+    def pid(self):
+        return self.proc.pid if self.proc else None
+
+    def poll(self):
+        return self.proc.poll()
+
+    def wait(self, timeout=None):
+        """Wait for exit and drained output; raises subprocess.TimeoutExpired."""
+        returncode = self.proc.wait(timeout)
+        for reader in self._readers:
+            reader.join(TERMINATE_GRACE)
+        return returncode
+
+    def _signal_group(self, sig):
+        if self.proc is None or self.proc.poll() is not None:
+            return
+        signal_process_group(self.proc, sig)
+
+    def terminate(self):
+        self._signal_group(signal.SIGTERM)
+
+    def kill(self):
+        self._signal_group(getattr(signal, "SIGKILL", None))
+
+    def stop(self, grace=TERMINATE_GRACE):
+        """Terminate the process group, killing it if it outlives grace."""
+        self.terminate()
+        try:
+            return self.wait(grace)
+        except subprocess.TimeoutExpired:
+            self.kill()
+            return self.wait()
+
+
+def stream_flashrom(cmd, on_output=None, progress=None):
+    """Run a flashrom command to completion and return its exit code."""
+    return FlashromProcess(cmd, on_output, progress).start().wait()
@@ -0,0 +1,199 @@
+# flashrom_progress.py
+import re
+import threading
+import time
+
+PHASES = ("probing", "reading", "erasing", "writing", "verifying")
+
+PHASE_LABELS = {
+    "probing": "Probing",
+    "reading": "Reading",
+    "erasing": "Erasing",
+    "writing": "Writing",
+    "verifying": "Verifying",
+}
+
+# flashrom prints most progress on a single line without newlines
+# ("Reading flash... [READ] 3% complete... [READ] 4% complete..."), so
+# everything below is matched against a rolling buffer rather than lines.
+_TOKEN_RE = re.compile(
+    r"(?P<found>Found (?P<vendor>.+?) flash chip \"(?P<chip>[^\"]+)\" \((?P<size>\d+) kB)"
+    r"|(?P<stage>\[(?P<stage_name>READ|WRITE|ERASE)\] (?P<stage_pc>\d+)% complete)"
+    r"|(?P<block>0x(?P<start>[0-9a-fA-F]+)-0x(?P<end>[0-9a-fA-F]+):(?P<action>[SEWV]+))"
+    r"|(?P<probing>Probing for |Calibrating delay loop)"
+    r"|(?P<reading>Reading flash\.\.\.|Reading old flash chip contents\.\.\.|Reading ich descriptor)"
+    r"|(?P<erasing>Erasing flash chip\.\.\.)"
+    r"|(?P<writing>Erasing and writing flash chip\.\.\.)"
+    r"|(?P<verifying>Verifying flash\.\.\.)"
+    r"|(?P<verified>VERIFIED\.)"
+    r"|(?P<failed>FAILED|Error: )"
+)
+
+_STAGE_PHASES = {"READ": "reading", "WRITE": "writing", "ERASE": "erasing"}
+
+# Longest fragment kept around while waiting for the rest of a token.
+_MAX_PENDING = 4096
+
+
+class FlashromProgress:
+    """
+    Progress model built from flashrom's console output.
+
+    Output chunks from the reader threads go through feed(); the UI polls
+    snapshot() on its own timer, so any number of chunks between two ticks
+    collapse into a single gauge/status update.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self.phase = None
+            self.chip = None
+            self.chip_size = 0
+            self.done_bytes = 0
+            self.percent = None
+            self.blocks = 0
+            self.failed = False
+            self.verified = False
+            self.started = time.monotonic()
+            self.last_activity = self.started
+            self.revision = 0
+            # Timestamps for telemetry (time.monotonic)
+            self.first_output_at = None
+            self.found_at = None
+            self.phase_durations = {}
+            self._phase_started = None
+
+    def feed(self, text, stream="stdout"):
+        if not text:
+            return
+        with self._lock:
+            self.last_activity = time.monotonic()
+            if self.first_output_at is None:
+                self.first_output_at = self.last_activity
+            data = self._pending.get(stream, "") + text
+            consumed = 0
+            for match in _TOKEN_RE.finditer(data):
+                self._apply(match)
+                consumed = match.end()
+            newline = max(data.rfind("\n"), data.rfind("\r"))
+            consumed = max(consumed, newline + 1)
+            self._pending[stream] = data[consumed:][-_MAX_PENDING:]
+
+    def _apply(self, match):
+        kind = match.lastgroup
+        if kind == "found":
+            if self.found_at is None:
+                self.found_at = time.monotonic()
+            self.chip = match.group("chip")
+            self.chip_size = int(match.group("size")) * 1024
+        elif kind == "stage":
+            phase = _STAGE_PHASES[match.group("stage_name")]
+            if phase == "reading" and self.phase == "verifying":
+                # flashrom reports the read-back of a verify as [READ]
+                phase = "verifying"
+            self._set_phase(phase)
+            self.percent = min(int(match.group("stage_pc")), 100)
+            if self.chip_size:
+                self.done_bytes = self.chip_size * self.percent // 100
+        elif kind == "block":
+            end = int(match.group("end"), 16) + 1
+            self.blocks += 1
+            self.done_bytes = max(self.done_bytes, end)
+            if self.chip_size:
+                self.percent = min(self.done_bytes * 100 // self.chip_size, 100)
+        elif kind in PHASES:
+            self._set_phase(kind)
+        elif kind == "verified":
+            self.verified = True
+            self.percent = 100
+        elif kind == "failed":
+            self.failed = True
+        self.revision += 1
+
+    def set_position(self, phase, done, total):
+        """Progress reported directly rather than printed, e.g. by libflashrom."""
+        with self._lock:
+            self.last_activity = time.monotonic()
+            if phase == "reading" and self.phase == "verifying":
+                phase = "verifying"
+            self._set_phase(phase)
+            self.done_bytes = done
+            self.percent = min(done * 100 // total, 100) if total else None
+            self.revision += 1
+
+    def _set_phase(self, phase):
+        if phase != self.phase:
+            now = time.monotonic()
+            if self.phase is not None:
+                self.phase_durations[self.phase] = (
+                    self.phase_durations.get(self.phase, 0.0) + now - self._phase_started
+                )
+            self._phase_started = now
+            self.phase = phase
+            self.percent = None
+            self.done_bytes = 0
+            self.blocks = 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "phase": self.phase,
+                "chip": self.chip,
+                "chip_size": self.chip_size,
+                "done_bytes": self.done_bytes,
+                "percent": self.percent,
+                "blocks": self.blocks,
+                "failed": self.failed,
+                "verified": self.verified,
+                "elapsed": time.monotonic() - self.started,
+                "idle": time.monotonic() - self.last_activity,
+                "revision": self.revision,
+            }
+
+
+    def timings(self):
+        """
+        Seconds spent in each phase so far, plus the monotonic times of the
+        first output and of the "Found ... flash chip" line (None if unseen).
+        """
+        with self._lock:
+            phases = dict(self.phase_durations)
+            if self.phase is not None:
+                phases[self.phase] = phases.get(self.phase, 0.0) + time.monotonic() - self._phase_started
+            return {
+                "first_output_at": self.first_output_at,
+                "found_at": self.found_at,
+                "last_activity": self.last_activity,
+                "phases": phases,
+            }
+
+
+def format_progress(snapshot):
+    """Short status bar text for a snapshot()."""
+    label = PHASE_LABELS.get(snapshot["phase"], "Running")
+    parts = [label + "..."]
+    if snapshot["percent"] is not None:
+        parts.append(f"{snapshot['percent']}%")
+    if snapshot["chip_size"] and snapshot["done_bytes"]:
+        parts.append(
+            f"({snapshot['done_bytes'] / 1048576:.1f}/{snapshot['chip_size'] / 1048576:.1f} MiB)"
+        )
+    parts.append(f"{int(snapshot['elapsed'])}s")
+    return " ".join(parts)
+
+
+_FOUND_RE = re.compile(r"Found (?P<vendor>.+?) flash chip \"(?P<chip>[^\"]+)\" \((?P<size>\d+) kB, (?P<bus>[^)]+)\)")
+
+
+def parse_found_chips(output):
+    """(vendor, chip, size_kb, bus) for every "Found ... flash chip" line."""
+    return [
+        (m.group("vendor"), m.group("chip"), int(m.group("size")), m.group("bus"))
+        for m in _FOUND_RE.finditer(output)
+    ]
@@ -0,0 +1,235 @@
+# flashrom_regions.py
+import json
+import mmap
+import os
+import threading
+
+from flashrom_diff import layout_args, parse_layout
+from flashrom_image import IFD_REGION_NAMES, parse_ifd
+from flashrom_paths import user_data_dir
+
+PRESETS_NAME = "region_presets.json"
+
+# Bytes outside the selected regions are set to this in a merged image, so
+# it reads like erased flash instead of whatever flashrom left there.
+ERASED = 0xff
+
+# IFD regions offered for selection; the rest are rarely populated.
+IFD_COMMON_REGIONS = ("fd", "bios", "me", "gbe", "pd", "ec")
+
+# Presets available on every machine; saved presets with the same name win.
+BUILTIN_PRESETS = {
+    "Intel descriptor": {"source": "ifd", "include": ["fd"]},
+    "Intel GbE (MAC address)": {"source": "ifd", "include": ["gbe"]},
+    "Intel descriptor + GbE": {"source": "ifd", "include": ["fd", "gbe"]},
+}
+
+
+def write_named_layout(regions, path):
+    """Write (start, end, name) regions as a flashrom layout file, names unchanged."""
+    with open(path, "w", encoding="ascii") as f:
+        for start, end, name in regions:
+            f.write(f"{start:08x}:{end - 1:08x} {name}\n")
+
+
+def ifd_ranges(image_path):
+    """{name: (start, end)} of the flash descriptor in image_path; {} if it has none."""
+    with open(image_path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return {region.name: (region.start, region.end) for region in parse_ifd(buf)}
+        finally:
+            buf.close()
+
+
+def region_file_path(image_path, name):
+    """dump.bin -> dump.gbe.bin"""
+    base, ext = os.path.splitext(image_path)
+    return f"{base}.{name}{ext or '.bin'}"
+
+
+class RegionRead:
+    """
+    Read of named regions instead of the whole chip.
+
+    Regions come from a layout (a file or a preset's ranges) or from the
+    descriptor on the chip itself (--ifd). flashrom only reads the
+    included ranges, so pulling a 4 KiB GbE region takes as long as the
+    probe, not a full-chip read. With --ifd the descriptor region is
+    always read too: it is what says where the other regions are when
+    the image is cut up afterwards.
+    """
+
+    def __init__(self, include, regions=None, layout_path=None):
+        if not include:
+            raise ValueError("No regions selected")
+        self.include = list(include)
+        self.regions = regions
+        self.layout_path = layout_path
+        self._temp_layout = None
+        if regions is not None:
+            known = {name for _, _, name in regions}
+            missing = [name for name in self.include if name not in known]
+            if missing:
+                raise ValueError(f"Not in the layout: {', '.join(missing)}")
+        else:
+            unknown = [name for name in self.include if name not in IFD_REGION_NAMES]
+            if unknown:
+                raise ValueError(f"Not an IFD region: {', '.join(unknown)}")
+
+    @classmethod
+    def from_layout(cls, path, include):
+        return cls(include, parse_layout(path), path)
+
+    @classmethod
+    def from_ifd(cls, include):
+        return cls(include)
+
+    @classmethod
+    def from_preset(cls, preset):
+        if preset.get("source") == "ifd":
+            return cls.from_ifd(preset["include"])
+        return cls(preset["include"], [tuple(region) for region in preset["regions"]])
+
+    @property
+    def uses_ifd(self):
+        return self.regions is None
+
+    def names(self):
+        """Regions passed to -i; with --ifd "fd" is added first if missing."""
+        if self.uses_ifd and "fd" not in self.include:
+            return ["fd"] + self.include
+        return list(self.include)
+
+    def selected_bytes(self):
+        """Bytes flashrom will read, or None when the ranges are only known from the chip."""
+        if self.uses_ifd:
+            return None
+        return sum(end - start for start, end, name in self.regions if name in self.include)
+
+    def read_bytes(self, image_path):
+        """Bytes flashrom read into image_path; with --ifd its descriptor says how many."""
+        by_name = self._locate(image_path)
+        return sum(end - start for start, end in (by_name[name] for name in self.names() if name in by_name))
+
+    def prepare(self, layout_path):
+        """Write the layout for flashrom when it is not already a file; returns self."""
+        if not self.uses_ifd and self.layout_path is None:
+            write_named_layout(self.regions, layout_path)
+            self.layout_path = self._temp_layout = layout_path
+        return self
+
+    def args(self):
+        """Arguments to add to `-r image`."""
+        if self.uses_ifd:
+            args = ["--ifd"]
+            for name in self.names():
+                args += ["-i", name]
+            return args
+        if self.layout_path is None:
+            raise ValueError("prepare() writes the layout first")
+        return layout_args(self.layout_path, self.names())
+
+    def read_args(self, image_path):
+        return ["-r", image_path] + self.args()
+
+    def _locate(self, image_path):
+        """{name: (start, end)} for the regions flashrom read into image_path."""
+        if not self.uses_ifd:
+            return {name: (start, end) for start, end, name in self.regions}
+        by_name = ifd_ranges(image_path)
+        if not by_name:
+            raise ValueError("No flash descriptor in the data read from the chip")
+        return by_name
+
+    def finish(self, image_path, split=False):
+        """
+        Turn flashrom's output into the result: the image with everything
+        outside the regions read set to ERASED, and with split=True also
+        one file per included region next to it (region_file_path).
+        Returns the paths written, image first.
+        """
+        by_name = self._locate(image_path)
+        missing = [name for name in self.include if name not in by_name]
+        if missing:
+            raise ValueError(f"The chip's descriptor has no {', '.join(missing)} region")
+        with open(image_path, "r+b") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                raise ValueError(f"{image_path} is empty")
+            buf = mmap.mmap(f.fileno(), 0)
+            try:
+                position = 0
+                for start, end in sorted(by_name[name] for name in self.names()) + [(size, size)]:
+                    if start > position:
+                        buf[position:start] = bytes([ERASED]) * (start - position)
+                    position = max(position, min(end, size))
+                buf.flush()
+                if not split:
+                    return [image_path]
+                paths = [image_path]
+                for name in self.include:
+                    start, end = by_name[name]
+                    path = region_file_path(image_path, name)
+                    with open(path, "wb") as out:
+                        out.write(buf[start:min(end, size)])
+                    paths.append(path)
+                return paths
+            finally:
+                buf.close()
+
+    def cleanup(self):
+        if self._temp_layout and os.path.exists(self._temp_layout):
+            os.remove(self._temp_layout)
+        self._temp_layout = None
+
+
+class RegionPresets:
+    """
+    Named region selections, e.g. one per board: either IFD region names
+    or layout ranges with the names to read. Saved as JSON next to the
+    other user data; BUILTIN_PRESETS fill in what is not saved.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(user_data_dir(), PRESETS_NAME)
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, presets):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(presets, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def all(self):
+        with self._lock:
+            presets = dict(BUILTIN_PRESETS)
+            presets.update(self._load())
+        return presets
+
+    def get(self, name):
+        return self.all().get(name)
+
+    def save(self, name, region_read):
+        preset = {"source": "ifd" if region_read.uses_ifd else "layout", "include": region_read.include}
+        if not region_read.uses_ifd:
+            preset["regions"] = [list(region) for region in region_read.regions]
+        with self._lock:
+            presets = self._load()
+            presets[name] = preset
+            self._save(presets)
+        return preset
+
+    def delete(self, name):
+        """Remove a saved preset; a built-in one of the same name shows again."""
+        with self._lock:
+            presets = self._load()
+            if presets.pop(name, None) is not None:
+                self._save(presets)
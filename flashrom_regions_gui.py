@@ -0,0 +1,138 @@
+# flashrom_regions_gui.py
+import wx
+from flashrom_diff import parse_layout
+from flashrom_regions import IFD_COMMON_REGIONS, RegionRead
+
+SOURCES = ("Preset", "Layout file", "Chip descriptor (IFD)")
+PRESET, LAYOUT, IFD = range(3)
+
+
+class RegionReadDialog(wx.Dialog):
+    """Pick the regions to read: from a preset, a layout file or the chip's descriptor."""
+
+    def __init__(self, parent, presets):
+        super().__init__(parent, title="Read Regions", size=wx.Size(460, 480),
+                         style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.presets = presets
+        self.regions = None
+        self.layout_path = None
+        self.region_names = []
+
+        self.source_box = wx.RadioBox(self, label="Regions from", choices=list(SOURCES),
+                                      majorDimension=1, style=wx.RA_SPECIFY_COLS)
+        self.preset_choice = wx.Choice(self)
+        self.delete_button = wx.Button(self, label="Delete")
+        self.layout_picker = wx.FilePickerCtrl(self, message="Choose a flashrom layout file",
+                                               wildcard="Layout files (*.layout;*.txt)|*.layout;*.txt|All files (*.*)|*.*")
+        self.region_list = wx.CheckListBox(self)
+        self.output_box = wx.RadioBox(self, label="Save as", choices=["Merged image", "Merged image and one file per region"],
+                                      majorDimension=1, style=wx.RA_SPECIFY_COLS)
+        self.save_button = wx.Button(self, label="Save as Preset...")
+        self.save_button.SetToolTip("Keep this selection, e.g. under the board's name")
+
+        preset_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        preset_sizer.Add(self.preset_choice, 1, wx.RIGHT, 5)
+        preset_sizer.Add(self.delete_button, 0)
+        buttons = wx.BoxSizer(wx.HORIZONTAL)
+        buttons.Add(self.save_button, 0)
+        buttons.AddStretchSpacer()
+        buttons.Add(self.CreateButtonSizer(wx.OK | wx.CANCEL), 0)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.source_box, 0, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(preset_sizer, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
+        sizer.Add(self.layout_picker, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
+        sizer.Add(self.region_list, 1, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
+        sizer.Add(self.output_box, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
+        sizer.Add(buttons, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
+        self.SetSizer(sizer)
+
+        self.Bind(wx.EVT_RADIOBOX, self.on_source, self.source_box)
+        self.Bind(wx.EVT_CHOICE, self.on_source, self.preset_choice)
+        self.Bind(wx.EVT_FILEPICKER_CHANGED, self.on_source, self.layout_picker)
+        self.Bind(wx.EVT_BUTTON, self.on_delete, self.delete_button)
+        self.Bind(wx.EVT_BUTTON, self.on_save, self.save_button)
+        self.Bind(wx.EVT_BUTTON, self.on_ok, id=wx.ID_OK)
+        self.load_presets()
+        self.on_source(None)
+
+    def load_presets(self, select=None):
+        names = sorted(self.presets.all())
+        self.preset_choice.Set(names)
+        if names:
+            self.preset_choice.SetSelection(names.index(select) if select in names else 0)
+
+    def on_source(self, event):
+        source = self.source_box.GetSelection()
+        self.preset_choice.Enable(source == PRESET)
+        self.delete_button.Enable(source == PRESET)
+        self.layout_picker.Enable(source == LAYOUT)
+        self.regions = self.layout_path = None
+        checked = []
+        if source == PRESET:
+            preset = self.presets.get(self.preset_choice.GetStringSelection())
+            if preset is not None:
+                checked = preset["include"]
+                if preset.get("source") != "ifd":
+                    self.regions = [tuple(region) for region in preset["regions"]]
+        elif source == LAYOUT and self.layout_picker.GetPath():
+            try:
+                self.regions = parse_layout(self.layout_picker.GetPath())
+                self.layout_path = self.layout_picker.GetPath()
+            except (OSError, ValueError) as e:
+                wx.MessageBox(f"Cannot use this layout:\n{e}", "Read Regions", wx.OK | wx.ICON_ERROR)
+        if self.regions is not None:
+            names = [f"{name}  ({(end - start) // 1024 or 1} KiB @ 0x{start:x})" for start, end, name in self.regions]
+            self.region_names = [name for _, _, name in self.regions]
+        elif source == LAYOUT:
+            names = self.region_names = []
+        else:
+            names = list(IFD_COMMON_REGIONS)
+            names += [name for name in checked if name not in names]
+            self.region_names = list(names)
+        self.region_list.Set(names)
+        self.region_list.SetCheckedItems([i for i, name in enumerate(self.region_names) if name in checked])
+
+    def get_region_read(self):
+        """RegionRead for the current selection; raises ValueError if it is incomplete."""
+        include = [self.region_names[i] for i in self.region_list.GetCheckedItems()]
+        if self.regions is None and self.source_box.GetSelection() == LAYOUT:
+            raise ValueError("Choose a layout file")
+        return RegionRead(include, self.regions, self.layout_path)
+
+    @property
+    def split(self):
+        return self.output_box.GetSelection() == 1
+
+    def on_ok(self, event):
+        try:
+            self.get_region_read()
+        except ValueError as e:
+            wx.MessageBox(str(e), "Read Regions", wx.OK | wx.ICON_WARNING)
+            return
+        event.Skip()
+
+    def on_save(self, event):
+        try:
+            region_read = self.get_region_read()
+        except ValueError as e:
+            wx.MessageBox(str(e), "Read Regions", wx.OK | wx.ICON_WARNING)
+            return
+        name = wx.GetTextFromUser("Preset name (e.g. the board):", "Save as Preset", parent=self).strip()
+        if not name:
+            return
+        try:
+            self.presets.save(name, region_read)
+        except OSError as e:
+            wx.MessageBox(f"Failed to save the preset:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
+            return
+        self.load_presets(name)
+        self.source_box.SetSelection(PRESET)
+        self.on_source(None)
+
+    def on_delete(self, event):
+        name = self.preset_choice.GetStringSelection()
+        if name:
+            self.presets.delete(name)
+            self.load_presets()
+            self.on_source(None)
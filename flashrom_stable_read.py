@@ -0,0 +1,158 @@
+# flashrom_stable_read.py
+import hashlib
+import os
+import tempfile
+
+from flashrom_diff import DEFAULT_BLOCK_SIZE
+from flashrom_verify import compare_files
+
+# Reads attempted before giving up on getting two identical dumps; the
+# GUI and CLI let the user raise it for a marginal clip.
+DEFAULT_PASSES = 3
+
+# Upper bound offered in the GUI; every pass is a full chip read.
+MAX_PASSES = 10
+
+# Read size while hashing a finished pass.
+HASH_CHUNK = 1 << 20
+
+
+def stream_sha256(path):
+    """sha256 of path, read in fixed slices so large dumps never sit in memory."""
+    digest = hashlib.sha256()
+    buf = bytearray(HASH_CHUNK)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buf)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+
+class ReadPass:
+    def __init__(self, number, path):
+        self.number = number
+        self.path = path
+        self.sha256 = None
+        self.size = None
+        # VerifyResult against the previous pass, when the hashes differ
+        self.diff = None
+
+
+class StableRead:
+    """
+    Reads the chip up to `passes` times into temporary files next to
+    dest_path and commits a dump only once two passes are identical.
+
+    The caller runs flashrom for every path returned by next_path() and
+    hands the finished file to add_pass(). Passes are hashed as they come
+    in; only when a hash is new is the pass compared block by block with
+    the previous one, so the differing erase blocks can be reported.
+    """
+
+    def __init__(self, dest_path, passes=DEFAULT_PASSES, block_size=DEFAULT_BLOCK_SIZE):
+        if passes < 2:
+            raise ValueError("A stable read needs at least two passes")
+        self.dest_path = os.path.abspath(dest_path)
+        self.passes = passes
+        self.block_size = block_size
+        self.completed = []
+        self.match = None
+        self.unstable_blocks = set()
+        self._pending = None
+
+    @property
+    def is_stable(self):
+        return self.match is not None
+
+    @property
+    def is_finished(self):
+        return self.is_stable or len(self.completed) >= self.passes
+
+    def next_path(self):
+        """Temporary file for the next pass; same directory so commit() is a rename."""
+        if self.is_finished:
+            return None
+        directory, name = os.path.split(self.dest_path)
+        fd, path = tempfile.mkstemp(
+            prefix=f".{name}.pass{len(self.completed) + 1}-", suffix=".tmp", dir=directory
+        )
+        os.close(fd)
+        self._pending = ReadPass(len(self.completed) + 1, path)
+        return path
+
+    def add_pass(self, path):
+        """Hash a finished pass; returns the ReadPass. Safe to call off the UI thread."""
+        read = self._pending
+        if read is None or read.path != path:
+            raise ValueError(f"{path} is not the pending pass")
+        self._pending = None
+        read.size = os.path.getsize(path)
+        read.sha256 = stream_sha256(path)
+
+        for earlier in self.completed:
+            if earlier.sha256 == read.sha256 and earlier.size == read.size:
+                self.match = (earlier, read)
+                break
+        else:
+            if self.completed:
+                previous = self.completed[-1]
+                read.diff = compare_files(previous.path, path, self.block_size)
+                self.unstable_blocks.update(read.diff.bad_blocks)
+        self.completed.append(read)
+        return read
+
+    def discard_pending(self):
+        """Drop the pass in progress, e.g. after flashrom failed."""
+        if self._pending is not None:
+            _remove(self._pending.path)
+            self._pending = None
+
+    def commit(self):
+        """Move the agreeing dump to dest_path and delete the other passes."""
+        if not self.is_stable:
+            raise ValueError("No two passes agree")
+        keep = self.match[1]
+        os.replace(keep.path, self.dest_path)
+        for read in self.completed:
+            if read is not keep:
+                _remove(read.path)
+        self.completed = []
+        return self.dest_path
+
+    def cleanup(self):
+        self.discard_pending()
+        for read in self.completed:
+            _remove(read.path)
+        self.completed = []
+
+    def describe(self, read, limit=10):
+        """One line per pass for the log; differing blocks when the hash is new."""
+        line = f"Pass {read.number}: sha256 {read.sha256[:16]}..., {read.size} bytes"
+        if self.match and self.match[1] is read:
+            return f"{line} - matches pass {self.match[0].number}"
+        if read.diff is None:
+            return line
+        return f"{line} - differs from pass {read.number - 1}\n{read.diff.summary(limit)}"
+
+    def unstable_summary(self, limit=16):
+        blocks = sorted(self.unstable_blocks)
+        if not blocks:
+            return "Passes differ in size only"
+        shown = ", ".join(
+            f"0x{block * self.block_size:08x}" for block in blocks[:limit]
+        )
+        more = f" and {len(blocks) - limit} more" if len(blocks) > limit else ""
+        return (
+            f"{len(blocks)} erase block(s) ({self.block_size // 1024} KiB) read back "
+            f"differently: {shown}{more}"
+        )
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
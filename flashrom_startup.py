@@ -0,0 +1,71 @@
+# flashrom_startup.py
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Set as early as possible; flashrom_gui imports this module first.
+PROCESS_START = time.perf_counter()
+
+BENCH_PREFIX = "STARTUP "
+
+
+class StartupTimer:
+    """Named timestamps relative to the start of the process."""
+
+    def __init__(self, origin=PROCESS_START):
+        self.origin = origin
+        self.marks = {}
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.origin
+        return self.marks[name]
+
+    def report(self):
+        return {name: round(seconds * 1000, 1) for name, seconds in self.marks.items()}
+
+    def print_report(self):
+        print(BENCH_PREFIX + json.dumps(self.report()), flush=True)
+
+
+def run_benchmark(runs, extra_args=()):
+    """Launch the GUI runs times with --startup-bench and collect its marks."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "flashrom_gui.py")
+    samples = {}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, script, "--startup-bench", "--no-splash", *extra_args],
+            capture_output=True,
+            text=True,
+            timeout=120
+        ).stdout
+        for line in output.splitlines():
+            if line.startswith(BENCH_PREFIX):
+                for name, value in json.loads(line[len(BENCH_PREFIX):]).items():
+                    samples.setdefault(name, []).append(value)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure FlashromGUI time-to-first-paint and time-to-interactive")
+    parser.add_argument("-n", "--runs", type=int, default=5)
+    args, extra = parser.parse_known_args(argv)
+
+    samples = run_benchmark(args.runs, extra)
+    if not samples:
+        print("No timings reported; is a display available?")
+        return 1
+    for name, values in sorted(samples.items(), key=lambda item: statistics.median(item[1])):
+        print(
+            f"{name:>16}: median {statistics.median(values):7.1f} ms  "
+            f"min {min(values):7.1f} ms  max {max(values):7.1f} ms  (n={len(values)})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
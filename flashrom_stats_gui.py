@@ -0,0 +1,90 @@
+# flashrom_stats_gui.py
+import threading
+import time
+import wx
+from flashrom_telemetry import STAT_COLUMNS, export_csv, export_json, summarize
+
+PERIODS = (("All runs", None), ("Last 24 hours", 1), ("Last 7 days", 7), ("Last 30 days", 30))
+
+
+class StatsFrame(wx.Frame):
+    """Run time percentiles per programmer, chip and operation."""
+
+    def __init__(self, parent, telemetry):
+        super().__init__(parent, title="Operation Statistics", size=wx.Size(1000, 450))
+        self.telemetry = telemetry
+        self.rows = []
+        self.loading = False
+        panel = wx.Panel(self)
+
+        self.period_choice = wx.Choice(panel, choices=[label for label, _ in PERIODS])
+        self.period_choice.SetSelection(0)
+        self.refresh_button = wx.Button(panel, label="Refresh")
+        self.csv_button = wx.Button(panel, label="Export CSV...")
+        self.json_button = wx.Button(panel, label="Export JSON...")
+        self.summary = wx.StaticText(panel, label="")
+
+        self.grid = wx.ListCtrl(panel, style=wx.LC_REPORT | wx.LC_SINGLE_SEL)
+        for index, title in enumerate(STAT_COLUMNS):
+            self.grid.InsertColumn(index, title, width=160 if index < 2 else 80)
+
+        toolbar = wx.BoxSizer(wx.HORIZONTAL)
+        toolbar.Add(self.period_choice, 0, wx.RIGHT, 5)
+        toolbar.Add(self.refresh_button, 0, wx.RIGHT, 5)
+        toolbar.Add(self.summary, 1, wx.ALIGN_CENTER_VERTICAL)
+        toolbar.Add(self.csv_button, 0, wx.RIGHT, 5)
+        toolbar.Add(self.json_button, 0)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(toolbar, 0, wx.EXPAND | wx.ALL, 10)
+        sizer.Add(self.grid, 1, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
+        panel.SetSizer(sizer)
+
+        self.Bind(wx.EVT_CHOICE, self.on_refresh, self.period_choice)
+        self.Bind(wx.EVT_BUTTON, self.on_refresh, self.refresh_button)
+        self.Bind(wx.EVT_BUTTON, lambda event: self.on_export(export_csv, "CSV files (*.csv)|*.csv"), self.csv_button)
+        self.Bind(wx.EVT_BUTTON, lambda event: self.on_export(export_json, "JSON files (*.json)|*.json"), self.json_button)
+        self.on_refresh(None)
+
+    def on_refresh(self, event):
+        if self.loading:
+            return
+        self.loading = True
+        self.summary.SetLabel("Loading...")
+        days = PERIODS[self.period_choice.GetSelection()][1]
+        since = time.time() - days * 86400 if days else None
+
+        # The history only grows; read it off the UI thread
+        def task():
+            try:
+                rows = summarize(self.telemetry.records(since))
+                wx.CallAfter(self.on_loaded, rows)
+            except OSError as e:
+                wx.CallAfter(self.on_loaded, [], e)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def on_loaded(self, rows, error=None):
+        self.loading = False
+        if not self:
+            return
+        self.rows = rows
+        self.grid.DeleteAllItems()
+        for row in rows:
+            self.grid.Append(["" if row[column] is None else str(row[column]) for column in STAT_COLUMNS])
+        if error is not None:
+            self.summary.SetLabel(f"Could not read history: {error}")
+        else:
+            runs = sum(row["runs"] for row in rows)
+            self.summary.SetLabel(f"{runs} runs in {len(rows)} groups")
+
+    def on_export(self, exporter, wildcard):
+        with wx.FileDialog(self, "Export statistics", wildcard=wildcard,
+                           style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT) as dlg:
+            if dlg.ShowModal() != wx.ID_OK:
+                return
+            path = dlg.GetPath()
+        try:
+            exporter(self.rows, path)
+        except OSError as e:
+            wx.MessageBox(f"Export failed:\n{e}", "Error", wx.OK | wx.ICON_ERROR)
@@ -0,0 +1,266 @@
+# flashrom_telemetry.py
+import argparse
+import csv
+import json
+import os
+import stat
+import sys
+import threading
+import time
+
+from flashrom_diff import parse_layout
+from flashrom_paths import user_data_dir
+from flashrom_progress import PHASES
+
+HISTORY_NAME = "telemetry.jsonl"
+
+# Runs per group treated as "recent" when looking for a slowdown.
+RECENT_RUNS = 10
+
+STAT_COLUMNS = (
+    "programmer", "chip", "operation", "runs", "failures",
+    "p50_s", "p90_s", "p99_s", "recent_p50_s", "trend_pct",
+    "p50_mib_s", "p50_spawn_ms", "p50_probe_s",
+) + tuple(f"p50_{phase}_s" for phase in PHASES if phase != "probing")
+
+_OPERATION_FLAGS = (("-w", "write"), ("-v", "verify"), ("-r", "read"), ("-E", "erase"))
+
+
+def operation_name(cmd):
+    """read/write/verify/erase from a flashrom command line, else probe."""
+    for flag, name in _OPERATION_FLAGS:
+        if flag in cmd:
+            return name
+    return "probe"
+
+
+def file_argument(cmd):
+    """The file after -r/-w/-v in a flashrom command line, if any."""
+    for flag in ("-r", "-w", "-v"):
+        if flag in cmd:
+            index = cmd.index(flag) + 1
+            return cmd[index] if index < len(cmd) else None
+    return None
+
+
+def included_regions(cmd):
+    """Region names after -i/--include, without any ":file" suffix."""
+    return [
+        cmd[index + 1].split(":", 1)[0]
+        for index, arg in enumerate(cmd[:-1])
+        if arg in ("-i", "--include")
+    ]
+
+
+def transferred_bytes(cmd, chip_size=0):
+    """
+    Bytes a successful run moved: the included layout or descriptor
+    regions, else the size of the image file, else the whole chip (e.g. a
+    read into a pipe).
+    """
+    names = included_regions(cmd)
+    if names and "--layout" in cmd:
+        try:
+            regions = parse_layout(cmd[cmd.index("--layout") + 1])
+            return sum(end - start for start, end, name in regions if name in names)
+        except (OSError, ValueError, IndexError):
+            pass
+    path = file_argument(cmd)
+    try:
+        # stat first: the file may be a FIFO that must not be opened here
+        info = os.stat(path) if path is not None else None
+    except OSError:
+        info = None
+    if info is None or not stat.S_ISREG(info.st_mode) or not info.st_size:
+        return chip_size or 0
+    if names and "--ifd" in cmd:
+        from flashrom_regions import ifd_ranges
+        try:
+            regions = ifd_ranges(path)
+            if regions:
+                return sum(end - start for name, (start, end) in regions.items() if name in names)
+        except (OSError, ValueError):
+            pass
+    return info.st_size
+
+
+def _round(value, digits=4):
+    return None if value is None else round(value, digits)
+
+
+def make_record(cmd, programmer, state, returncode, started, duration, spawn_time=None, progress=None):
+    """
+    One history entry. started is the monotonic start of the run; progress
+    is the FlashromProgress that was fed the run's output, if any.
+    """
+    operation = operation_name(cmd)
+    record = {
+        "time": time.time() - (time.monotonic() - started) if started else time.time(),
+        "operation": operation,
+        "programmer": programmer,
+        "chip": None,
+        "state": state,
+        "returncode": returncode,
+        "duration": _round(duration),
+        "spawn": _round(spawn_time),
+        "first_output": None,
+        "probe": None,
+        "phases": {},
+        "bytes": 0,
+        "throughput": None,
+    }
+
+    chip_size = 0
+    if progress is not None:
+        snapshot = progress.snapshot()
+        timings = progress.timings()
+        record["chip"] = snapshot["chip"]
+        chip_size = snapshot["chip_size"]
+        if started and timings["first_output_at"]:
+            record["first_output"] = _round(timings["first_output_at"] - started)
+        if started and timings["found_at"]:
+            record["probe"] = _round(timings["found_at"] - started)
+        record["phases"] = {phase: _round(seconds) for phase, seconds in timings["phases"].items()}
+
+    # A failed run's byte count says nothing about throughput
+    if operation != "probe" and returncode == 0:
+        record["bytes"] = transferred_bytes(cmd, chip_size)
+    if record["bytes"] and duration:
+        record["throughput"] = round(record["bytes"] / duration)
+    return record
+
+
+class TelemetryStore:
+    """
+    Append-only history of flashrom runs, one JSON object per line.
+
+    Appending never rewrites earlier entries, so recording a run costs one
+    short write regardless of how long the history has grown.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(user_data_dir(), HISTORY_NAME)
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def records(self, since=None):
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+                if since is None or record.get("time", 0) >= since:
+                    yield record
+
+
+def percentile(ordered, q):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _p50(values):
+    values = sorted(value for value in values if value is not None)
+    return percentile(values, 50)
+
+
+def summarize(records):
+    """Rows of STAT_COLUMNS, one per programmer/chip/operation."""
+    groups = {}
+    for record in records:
+        key = (record.get("programmer") or "", record.get("chip") or "", record.get("operation") or "")
+        groups.setdefault(key, []).append(record)
+
+    rows = []
+    for (programmer, chip, operation), runs in sorted(groups.items()):
+        runs.sort(key=lambda record: record.get("time", 0))
+        ok = [record for record in runs if record.get("returncode") == 0]
+        durations = sorted(record["duration"] for record in ok if record.get("duration") is not None)
+        recent = sorted(record["duration"] for record in ok[-RECENT_RUNS:] if record.get("duration") is not None)
+        p50 = percentile(durations, 50)
+        recent_p50 = percentile(recent, 50)
+        throughput = _p50(record.get("throughput") for record in ok)
+        spawn = _p50(record.get("spawn") for record in runs)
+        row = {
+            "programmer": programmer,
+            "chip": chip,
+            "operation": operation,
+            "runs": len(runs),
+            "failures": len(runs) - len(ok),
+            "p50_s": _round(p50, 3),
+            "p90_s": _round(percentile(durations, 90), 3),
+            "p99_s": _round(percentile(durations, 99), 3),
+            "recent_p50_s": _round(recent_p50, 3),
+            # Positive when the latest runs are slower than the history
+            "trend_pct": round((recent_p50 / p50 - 1) * 100, 1) if p50 and recent_p50 and len(ok) > RECENT_RUNS else None,
+            "p50_mib_s": _round(throughput / 1048576 if throughput else None, 2),
+            "p50_spawn_ms": _round(spawn * 1000 if spawn is not None else None, 1),
+            "p50_probe_s": _round(_p50(record.get("probe") for record in ok), 3),
+        }
+        for phase in PHASES:
+            if phase != "probing":
+                row[f"p50_{phase}_s"] = _round(_p50((record.get("phases") or {}).get(phase) for record in ok), 3)
+        rows.append(row)
+    return rows
+
+
+def export_csv(rows, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=STAT_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def export_json(rows, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=1)
+
+
+def format_stats(rows):
+    lines = []
+    for row in rows:
+        trend = f", trend {row['trend_pct']:+.0f}%" if row["trend_pct"] is not None else ""
+        speed = f", {row['p50_mib_s']} MiB/s" if row["p50_mib_s"] else ""
+        timing = f"p50 {row['p50_s']}s p90 {row['p90_s']}s" if row["p50_s"] is not None else "no successful runs"
+        lines.append(
+            f"{row['programmer']} / {row['chip'] or '?'} / {row['operation']}: "
+            f"{row['runs']} runs, {row['failures']} failed, {timing}{speed}{trend}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise recorded flashrom run times")
+    parser.add_argument("--days", type=float, help="only runs from the last N days")
+    parser.add_argument("--csv", help="write the statistics as CSV")
+    parser.add_argument("--json", help="write the statistics as JSON")
+    args = parser.parse_args(argv)
+
+    since = time.time() - args.days * 86400 if args.days else None
+    rows = summarize(TelemetryStore().records(since))
+    if args.csv:
+        export_csv(rows, args.csv)
+    if args.json:
+        export_json(rows, args.json)
+    print(format_stats(rows) or "No runs recorded yet.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
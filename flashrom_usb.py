@@ -0,0 +1,147 @@
+# flashrom_usb.py
+import os
+from collections import namedtuple
+
+# (vendor id, product id) pairs of USB programmers, as listed in flashrom's
+# programmer drivers. Used to tell which attached device a programmer
+# string refers to.
+USB_PROGRAMMERS = {
+    "ch341a_spi": [(0x1a86, 0x5512)],
+    "ch347_spi": [(0x1a86, 0x55db), (0x1a86, 0x55de)],
+    "ft2232_spi": [
+        (0x0403, 0x6010), (0x0403, 0x6011), (0x0403, 0x6014), (0x0403, 0x8a98),
+        (0x0403, 0x8a99), (0x15ba, 0x002b), (0x15ba, 0x0003), (0x15ba, 0x0004),
+        (0x15ba, 0x002a), (0x0403, 0xbdc8),
+    ],
+    "dediprog": [(0x0483, 0xdada)],
+    "developerbox": [(0x10c4, 0xea60)],
+    "digilent_spi": [(0x1443, 0x0007)],
+    "dirtyjtag_spi": [(0x1209, 0xc0ca)],
+    "jlink_spi": [(0x1366, 0x0101), (0x1366, 0x0105), (0x1366, 0x1015), (0x1366, 0x1020)],
+    "pickit2_spi": [(0x04d8, 0x0033)],
+    "raiden_debug_spi": [(0x18d1, 0x501f), (0x18d1, 0x5014), (0x18d1, 0x504a)],
+    "stlinkv3_spi": [(0x0483, 0x374e), (0x0483, 0x374f), (0x0483, 0x3753)],
+    "usbblaster_spi": [(0x09fb, 0x6001)],
+}
+
+# Programmers reached through a serial port given as dev=/dev/tty...
+SERIAL_PROGRAMMERS = ("serprog", "buspirate_spi", "spidriver", "pony_spi")
+
+UsbDevice = namedtuple("UsbDevice", "name bus devnum port vid pid serial product")
+
+
+def _read_attr(path, name):
+    try:
+        with open(os.path.join(path, name), "r", encoding="ascii", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_device(path):
+    vid = _read_attr(path, "idVendor")
+    pid = _read_attr(path, "idProduct")
+    if vid is None or pid is None:
+        return None
+    try:
+        return UsbDevice(
+            name=os.path.basename(path),
+            bus=int(_read_attr(path, "busnum") or 0),
+            devnum=int(_read_attr(path, "devnum") or 0),
+            port=_read_attr(path, "devpath") or "",
+            vid=int(vid, 16),
+            pid=int(pid, 16),
+            serial=_read_attr(path, "serial") or "",
+            product=_read_attr(path, "product") or "",
+        )
+    except ValueError:
+        return None
+
+
+def scan_usb_devices(sysfs_root="/sys"):
+    """Attached USB devices from sysfs; empty where there is no sysfs."""
+    base = os.path.join(sysfs_root, "bus", "usb", "devices")
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return []
+    devices = []
+    for name in sorted(names):
+        # Interfaces ("1-2:1.0") have no idVendor; root hubs are "usbN"
+        if ":" in name:
+            continue
+        device = _read_device(os.path.join(base, name))
+        if device is not None:
+            devices.append(device)
+    return devices
+
+
+def parse_programmer(programmer):
+    """Split "name:key=value,key=value" into (name, {key: value})."""
+    name, _, params = programmer.partition(":")
+    options = {}
+    for item in params.split(","):
+        key, sep, value = item.partition("=")
+        if sep:
+            options[key.strip()] = value.strip()
+    return name.strip(), options
+
+
+def _tty_device(tty_path, sysfs_root):
+    """The USB device behind /dev/ttyUSB0 and friends, or None."""
+    tty = os.path.basename(os.path.realpath(tty_path))
+    node = os.path.realpath(os.path.join(sysfs_root, "class", "tty", tty, "device"))
+    root = os.path.realpath(sysfs_root)
+    while node.startswith(root) and node != root:
+        if os.path.exists(os.path.join(node, "idVendor")):
+            return _read_device(node)
+        node = os.path.dirname(node)
+    return None
+
+
+def _format_identity(device):
+    return f"{device.bus}-{device.port}#{device.devnum}:{device.vid:04x}:{device.pid:04x}:{device.serial}"
+
+
+def programmer_devices(programmer, sysfs_root="/sys", devices=None):
+    """Attached USB devices that `programmer` may refer to."""
+    name, options = parse_programmer(programmer)
+    if name in SERIAL_PROGRAMMERS and options.get("dev"):
+        device = _tty_device(options["dev"].split(":")[0], sysfs_root)
+        return [device] if device else []
+    ids = USB_PROGRAMMERS.get(name)
+    if not ids:
+        return []
+    if devices is None:
+        devices = scan_usb_devices(sysfs_root)
+    matches = [device for device in devices if (device.vid, device.pid) in ids]
+    serial = options.get("serial")
+    if serial:
+        matches = [device for device in matches if device.serial.startswith(serial)]
+    return matches
+
+
+def device_identity(programmer, sysfs_root="/sys", devices=None):
+    """
+    String identifying the hardware behind `programmer`: bus, port, device
+    number and serial of every matching USB device. The device number
+    changes whenever a device is re-plugged, so any hotplug changes the
+    identity.
+
+    Returns "" for programmers that are not USB devices (internal, dummy,
+    linux_spi, ...) and None for USB programmers that are not attached.
+    """
+    name, options = parse_programmer(programmer)
+    is_usb = name in USB_PROGRAMMERS or (name in SERIAL_PROGRAMMERS and options.get("dev"))
+    if not is_usb:
+        return ""
+    if not os.path.isdir(os.path.join(sysfs_root, "bus", "usb")):
+        # No sysfs (Windows, macOS): nothing to compare, rely on the TTL
+        return ""
+    matches = programmer_devices(programmer, sysfs_root, devices)
+    if not matches:
+        if name in SERIAL_PROGRAMMERS and os.path.exists(options["dev"].split(":")[0]):
+            # A built-in UART, not a USB adapter
+            return ""
+        return None
+    return ";".join(sorted(_format_identity(device) for device in matches))
@@ -0,0 +1,127 @@
+# flashrom_verify.py
+import mmap
+import os
+import re
+
+from flashrom_diff import DEFAULT_BLOCK_SIZE
+
+# Size of the slices compared with a single memcmp before looking closer.
+CHUNK_SIZE = 1 << 20
+
+# Slices inside a differing chunk that are XORed as one big integer.
+WORD_SIZE = 1 << 16
+
+# Stop collecting individual ranges past this; counters keep going.
+MAX_RANGES = 4096
+
+_NONZERO_RE = re.compile(rb"[^\x00]+")
+
+
+class VerifyResult:
+    def __init__(self, size, block_size):
+        self.size = size
+        self.block_size = block_size
+        self.ranges = []
+        self.truncated = False
+        self.mismatched_bytes = 0
+        self.bit_flips = 0
+        self.bad_blocks = set()
+        self.size_mismatch = None
+
+    @property
+    def ok(self):
+        return self.mismatched_bytes == 0 and self.size_mismatch is None
+
+    def _add_range(self, start, end):
+        if self.ranges and self.ranges[-1][1] == start:
+            self.ranges[-1] = (self.ranges[-1][0], end)
+        elif len(self.ranges) < MAX_RANGES:
+            self.ranges.append((start, end))
+        else:
+            self.truncated = True
+
+    def summary(self, limit=10):
+        if self.size_mismatch is not None:
+            ref_size, dump_size = self.size_mismatch
+            return f"FAILED: image is {ref_size} bytes but the chip contents are {dump_size} bytes"
+        if self.ok:
+            return f"VERIFIED: {self.size} bytes match"
+
+        lines = [
+            f"FAILED: {self.mismatched_bytes} bytes differ ({self.bit_flips} bit flips) "
+            f"in {len(self.bad_blocks)} of {(self.size + self.block_size - 1) // self.block_size} "
+            f"erase blocks ({self.block_size // 1024} KiB)"
+        ]
+        for start, end in self.ranges[:limit]:
+            first = start // self.block_size
+            last = (end - 1) // self.block_size
+            blocks = f"block {first}" if first == last else f"blocks {first}-{last}"
+            lines.append(f"  0x{start:08x}-0x{end - 1:08x} ({end - start} bytes, {blocks})")
+        remaining = len(self.ranges) - limit
+        if remaining > 0 or self.truncated:
+            lines.append(f"  ... {max(remaining, 0)} more range(s){' and others not listed' if self.truncated else ''}")
+        return "\n".join(lines)
+
+
+def _compare_slice(result, offset, ref, dump):
+    size = len(ref)
+    diff = int.from_bytes(ref, "little") ^ int.from_bytes(dump, "little")
+    diff_bytes = diff.to_bytes(size, "little")
+    result.bit_flips += diff.bit_count()
+    result.mismatched_bytes += size - diff_bytes.count(0)
+
+    block_size = result.block_size
+    first = offset // block_size
+    last = (offset + size - 1) // block_size
+    for block in range(first, last + 1):
+        start = max(block * block_size, offset) - offset
+        end = min((block + 1) * block_size, offset + size) - offset
+        if ref[start:end] != dump[start:end]:
+            result.bad_blocks.add(block)
+
+    if not result.truncated:
+        for match in _NONZERO_RE.finditer(diff_bytes):
+            result._add_range(offset + match.start(), offset + match.end())
+            if result.truncated:
+                break
+
+
+def compare_buffers(ref, dump, block_size=DEFAULT_BLOCK_SIZE):
+    """Compare two equally sized buffers (bytes or mmap)."""
+    size = len(ref)
+    result = VerifyResult(size, block_size)
+    if len(dump) != size:
+        result.size_mismatch = (size, len(dump))
+        return result
+
+    for chunk in range(0, size, CHUNK_SIZE):
+        chunk_end = min(chunk + CHUNK_SIZE, size)
+        if ref[chunk:chunk_end] == dump[chunk:chunk_end]:
+            continue
+        for offset in range(chunk, chunk_end, WORD_SIZE):
+            end = min(offset + WORD_SIZE, chunk_end)
+            ref_slice = ref[offset:end]
+            dump_slice = dump[offset:end]
+            if ref_slice != dump_slice:
+                _compare_slice(result, offset, ref_slice, dump_slice)
+    return result
+
+
+def compare_files(ref_path, dump_path, block_size=DEFAULT_BLOCK_SIZE):
+    """Memory-map both files and compare them; returns a VerifyResult."""
+    with open(ref_path, "rb") as ref_file, open(dump_path, "rb") as dump_file:
+        ref_size = os.fstat(ref_file.fileno()).st_size
+        dump_size = os.fstat(dump_file.fileno()).st_size
+        if ref_size != dump_size or ref_size == 0:
+            result = VerifyResult(ref_size, block_size)
+            if ref_size != dump_size:
+                result.size_mismatch = (ref_size, dump_size)
+            return result
+
+        ref = mmap.mmap(ref_file.fileno(), 0, access=mmap.ACCESS_READ)
+        dump = mmap.mmap(dump_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return compare_buffers(ref, dump, block_size)
+        finally:
+            ref.close()
+            dump.close()
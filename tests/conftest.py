@@ -0,0 +1,27 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_FLASHROM = os.path.join(ROOT, "bench", "fake_flashrom.py")
+
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def user_dirs(tmp_path, monkeypatch):
+    """Keep caches, telemetry and logs out of the real user directories."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+
+
+@pytest.fixture
+def fake_flashrom(monkeypatch):
+    """bench/fake_flashrom.py as flashrom, with a small fast chip."""
+    monkeypatch.setenv("FLASHROM_PATH", FAKE_FLASHROM)
+    monkeypatch.setenv("FAKE_FLASHROM_SIZE_KB", "64")
+    monkeypatch.setenv("FAKE_FLASHROM_PROBE_DELAY", "0")
+    monkeypatch.setenv("FAKE_FLASHROM_SPEED", str(64.0 * 1024 * 1024))
+    return FAKE_FLASHROM
@@ -0,0 +1,217 @@
+# tests/test_agent.py
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+import flashrom_agent
+from flashrom_agent import AgentClient, AgentError, AgentPool, AgentServer, AgentSession, UploadCache
+from flashrom_discovery import Programmer
+from flashrom_jobs import CANCELLED, DONE, ERROR, RUNNING, JobExecutor
+from flashrom_oplog import OperationLog
+from flashrom_progress import FlashromProgress
+from flashrom_telemetry import TelemetryStore
+
+CHIP_BYTES = 64 * 1024
+
+
+@pytest.fixture
+def server(fake_flashrom, tmp_path):
+    server = AgentServer(("127.0.0.1", 0), None, JobExecutor(), fake_flashrom, "bench",
+                         UploadCache(str(tmp_path / "uploads")), str(tmp_path / "jobs"))
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    client = AgentClient(*server.server_address[:2])
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "image.bin"
+    path.write_bytes(os.urandom(CHIP_BYTES))
+    return str(path)
+
+
+def count_uploads(server, monkeypatch):
+    begun = []
+    begin = server.uploads.begin
+    monkeypatch.setattr(server.uploads, "begin", lambda *args: begun.append(args) or begin(*args))
+    return begun
+
+
+def test_same_image_is_uploaded_once(server, client, image, monkeypatch):
+    begun = count_uploads(server, monkeypatch)
+    first = client.upload(image)
+    # A second connection finds it in the agent's cache too
+    other = AgentClient(*server.server_address[:2])
+    try:
+        assert other.upload(image) == first
+    finally:
+        other.close()
+    assert client.upload(image) == first
+    assert len(begun) == 1
+    with open(server.uploads.path(first), "rb") as cached, open(image, "rb") as original:
+        assert cached.read() == original.read()
+
+
+def test_damaged_chunk_is_sent_again(server, client, image, monkeypatch):
+    begun = count_uploads(server, monkeypatch)
+    write = flashrom_agent._Upload.write
+    damaged = []
+
+    def damage_first(upload, offset, data, crc32):
+        if not damaged:
+            damaged.append(offset)
+            data = b"\0" + data[1:]
+        write(upload, offset, data, crc32)
+
+    monkeypatch.setattr(flashrom_agent._Upload, "write", damage_first)
+    sha256 = client.upload(image)
+    assert damaged == [0]
+    assert len(begun) == 2
+    with open(server.uploads.path(sha256), "rb") as cached, open(image, "rb") as original:
+        assert cached.read() == original.read()
+
+
+def test_write_and_read_back(client, image, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_IMAGE", image)
+    job = client.submit(["flashrom", "-p", "dummy", "-w", image], "dummy@bench")
+    job.wait()
+    assert (job.state, job.returncode, job.error) == (DONE, 0, None)
+
+    dump = str(tmp_path / "dump.bin")
+    job = client.submit(["flashrom", "-p", "dummy", "-r", dump], "dummy@bench")
+    job.wait()
+    assert (job.state, job.error) == (DONE, None)
+    with open(dump, "rb") as read, open(image, "rb") as original:
+        assert read.read() == original.read()
+
+
+def test_damaged_download_fails_the_job(client, tmp_path, monkeypatch):
+    send = AgentSession.send
+
+    def damage(session, header, payload=b"", **kwargs):
+        if "offset" in header and payload:
+            payload = b"\0" + payload[1:]
+        send(session, header, payload, **kwargs)
+
+    monkeypatch.setattr(AgentSession, "send", damage)
+    job = client.submit(["flashrom", "-p", "dummy", "-r", str(tmp_path / "dump.bin")], "dummy@bench")
+    job.wait()
+    assert job.state == ERROR
+    assert isinstance(job.error, AgentError)
+    assert "Checksum mismatch" in str(job.error)
+
+
+def test_cancel_stops_the_remote_job(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_FAIL", "hang")
+    job = client.submit(["flashrom", "-p", "dummy", "-r", str(tmp_path / "dump.bin")], "dummy@bench")
+    deadline = time.monotonic() + 10
+    while not job._submitted and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.state == RUNNING
+    job.cancel()
+    assert job.wait(10)
+    assert job.state == CANCELLED
+    assert not os.path.exists(tmp_path / "dump.bin")
+
+
+@pytest.mark.parametrize("args", [
+    ["-p", "dummy:emulate=W25Q128FV,image=/etc/passwd"],
+    ["-p", "linux_spi:dev=/dev/mem"],
+    ["-p", "dummy:emulate=W25Q128FV,spi_status=../../etc/hostname"],
+    ["--programmer=linux_mtd:dev=/dev/mtd0"],
+    ["-p", "dummy", "--flash-contents", "/etc/hostname"],
+    ["-p", "dummy", "--flash-contents=/etc/hostname"],
+    ["-p", "dummy", "-r", "/tmp/dump.bin"],
+    ["-p", "dummy", "--read=/tmp/dump.bin"],
+    ["-p", "dummy", "-i", "bios:/tmp/bios.bin"],
+    ["-p", "dummy", "/etc/hostname"],
+    ["-p", "dummy", "-r"],
+])
+def test_paths_on_the_agent_are_refused(server, client, args):
+    with pytest.raises(AgentError):
+        client.call({"type": "submit", "job": 1, "args": args})
+    assert server.executor.active_jobs() == []
+
+
+def test_listed_device_programmer_is_allowed(server, client, monkeypatch):
+    spidev = Programmer("linux_spi:dev=/dev/spidev0.0", "SPI controller spidev0.0", "spidev")
+    monkeypatch.setattr(flashrom_agent, "discover", lambda: [spidev])
+    job = client.submit(["flashrom", "-p", spidev.programmer, "-E"], spidev.programmer + "@bench")
+    job.wait()
+    assert (job.state, job.error) == (DONE, None)
+    with pytest.raises(AgentError):
+        client.call({"type": "submit", "job": 2, "args": ["-p", "linux_spi:dev=/dev/spidev1.0"]})
+
+
+def test_stalled_client_does_not_stall_the_job(server, monkeypatch):
+    monkeypatch.setattr(flashrom_agent, "SEND_TIMEOUT", 0.5)
+    # A lot of output: one line per 16 bytes of a 1 MiB chip
+    monkeypatch.setenv("FAKE_FLASHROM_SIZE_KB", "1024")
+    monkeypatch.setenv("FAKE_FLASHROM_BLOCK", "16")
+    monkeypatch.setenv("FAKE_FLASHROM_VERBOSE", "1")
+    sessions = []
+    init = AgentSession.__init__
+
+    def small_buffers(session, server, sock, address):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        sessions.append(session)
+        init(session, server, sock, address)
+
+    monkeypatch.setattr(AgentSession, "__init__", small_buffers)
+
+    # A client that stops reading without closing the connection
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect(server.server_address[:2])
+    try:
+        flashrom_agent.send_frame(sock, {"type": "hello", "version": flashrom_agent.PROTOCOL_VERSION})
+        assert flashrom_agent.recv_frame(sock)[0]["type"] == "welcome"
+        flashrom_agent.send_frame(sock, {"type": "submit", "id": 1, "job": 1, "args": ["-p", "dummy", "-E"]})
+        deadline = time.monotonic() + 20
+        while not server.executor.active_jobs() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        job = server.executor.active_jobs()[0]
+        assert job.wait(20)
+        assert job.state == DONE
+        deadline = time.monotonic() + 10
+        while sessions[0].connected and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not sessions[0].connected
+    finally:
+        sock.close()
+
+
+def test_pool_records_remote_jobs_locally(server, client, tmp_path):
+    telemetry = TelemetryStore(str(tmp_path / "telemetry.jsonl"))
+    oplog = OperationLog(str(tmp_path / "oplog"))
+    pool = AgentPool(JobExecutor(telemetry=telemetry, oplog=oplog))
+    pool.add(client)
+    try:
+        dump = str(tmp_path / "dump.bin")
+        done = []
+        job = pool.submit(["flashrom", "-p", "dummy", "-r", dump], "dummy@bench", progress=FlashromProgress(),
+                          on_done=done.append)
+        job.wait(10)
+        deadline = time.monotonic() + 10
+        while not done and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert done == [job]
+        [record] = telemetry.records()
+        assert (record["programmer"], record["operation"], record["bytes"]) == ("dummy@bench", "read", CHIP_BYTES)
+        [entry] = oplog.search("W25Q128")
+        assert (entry["programmer"], entry["operation"], entry["path"]) == ("dummy@bench", "read", dump)
+        assert "Reading flash" in oplog.output(entry)
+    finally:
+        oplog.close()
@@ -0,0 +1,74 @@
+# tests/test_backup.py
+import os
+
+import pytest
+
+from flashrom_backup import BackupStore
+
+CHUNK = 4096
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BackupStore(str(tmp_path / "backups"), chunk_size=CHUNK)
+
+
+def stored_chunks(store):
+    return sorted(name for _, _, names in os.walk(store.chunk_dir) for name in names)
+
+
+def image(*fills):
+    return b"".join(bytes([fill]) * CHUNK for fill in fills)
+
+
+def test_dumps_share_chunks(store):
+    first = store.writer()
+    first.write(image(1, 2, 0xff, 0xff))
+    manifest = first.finish()
+    assert manifest["new_chunks"] == 3
+    second = store.writer()
+    second.write(image(1, 2, 3, 0xff))
+    assert second.finish()["new_chunks"] == 1
+    assert len(stored_chunks(store)) == 4
+
+
+def test_abort_removes_only_its_own_chunks(store):
+    kept = store.writer()
+    kept.write(image(1, 2))
+    kept.finish()
+    before = stored_chunks(store)
+
+    aborted = store.writer()
+    aborted.write(image(1, 7, 8))
+    assert len(stored_chunks(store)) == len(before) + 2
+    aborted.abort()
+    assert stored_chunks(store) == before
+
+
+def test_abort_keeps_chunks_an_open_writer_uses(store):
+    aborted = store.writer()
+    aborted.write(image(5))
+    other = store.writer()
+    other.write(image(5, 6))
+    aborted.abort()
+    manifest = other.finish()
+    store.restore(manifest["id"], os.path.join(os.path.dirname(store.root), "out.bin"))
+
+
+def test_ingest_failure_leaves_nothing(store, tmp_path):
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError):
+        store.ingest_file(str(empty))
+    assert stored_chunks(store) == []
+    assert store.manifests() == []
+
+
+def test_same_image_twice_gets_two_ids(store, tmp_path):
+    path = tmp_path / "dump.bin"
+    path.write_bytes(image(1, 2))
+    first = store.ingest_file(str(path))
+    second = store.ingest_file(str(path))
+    assert first["id"] != second["id"]
+    assert second["seen_before"] == [first["id"]]
+    assert len(store.manifests()) == 2
@@ -0,0 +1,102 @@
+# tests/test_batch.py
+import threading
+import time
+
+import pytest
+
+from flashrom_batch import BatchRunner, BatchSlot, FAILED, PASSED, STOPPED, SWAP
+from flashrom_jobs import JobExecutor
+
+
+def make_slots(count):
+    return [BatchSlot(f"slot{i}", f"dummy:slot={i}") for i in range(1, count + 1)]
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "image.bin"
+    path.write_bytes(b"\xff" * 64 * 1024)
+    return str(path)
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_slots_run_concurrently(fake_flashrom, image, tmp_path):
+    slots = make_slots(3)
+    runner = BatchRunner(slots, "write+verify", image, str(tmp_path), executor=JobExecutor())
+    report = runner.run()
+    assert report["boards"] == 3
+    assert report["failures"] == 0
+    assert all(slot.state == PASSED for slot in slots)
+
+
+def test_read_dumps_are_kept_per_board(fake_flashrom, tmp_path):
+    slots = make_slots(2)
+    runner = BatchRunner(slots, "read", output_dir=str(tmp_path), swap_delay=0)
+    runner.run(rounds=2)
+    dumps = sorted(path.name for path in tmp_path.glob("slot*.bin"))
+    assert [name[:10] for name in dumps] == ["slot1-0001", "slot1-0002", "slot2-0001", "slot2-0002"]
+
+
+def test_failed_step_stops_the_board(fake_flashrom, image, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_FAIL", "write")
+    slots = make_slots(2)
+    report = BatchRunner(slots, "write+verify", image, str(tmp_path)).run()
+    assert report["boards"] == 0
+    assert report["failures"] == 2
+    for slot in slots:
+        assert slot.state == FAILED
+        assert slot.message.startswith("write failed")
+
+
+def test_next_round_waits_for_the_board_swap(fake_flashrom, image, tmp_path):
+    slots = make_slots(2)
+    runner = BatchRunner(slots, "write", image, str(tmp_path))
+    finished = threading.Event()
+    runner.start(rounds=2, on_finished=lambda report: finished.set())
+
+    wait_for(lambda: all(slot.state == SWAP for slot in slots))
+    assert [slot.boards for slot in slots] == [1, 1]
+    runner.board_ready(slots[0])
+    wait_for(lambda: slots[0].boards == 2)
+    assert slots[1].state == SWAP
+    assert slots[1].boards == 1
+    assert not finished.is_set()
+
+    runner.board_ready(slots[1])
+    assert finished.wait(10)
+    assert runner.report()["boards"] == 4
+
+
+def test_stop_while_waiting_for_a_board(fake_flashrom, image, tmp_path):
+    slots = make_slots(1)
+    runner = BatchRunner(slots, "write", image, str(tmp_path))
+    thread = runner.start(rounds=3)
+    wait_for(lambda: slots[0].state == SWAP)
+    runner.stop()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert slots[0].state == STOPPED
+    assert slots[0].boards == 1
+
+
+def test_write_needs_an_image():
+    with pytest.raises(ValueError):
+        BatchRunner(make_slots(1), "write+verify", flashrom_path="flashrom")
+
+
+def test_writing_slots(fake_flashrom, image, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_FAIL", "hang")
+    slots = make_slots(2)
+    runner = BatchRunner(slots, "write+verify", image, str(tmp_path))
+    thread = runner.start()
+    wait_for(lambda: len(runner.writing_slots()) == 2)
+    runner.stop()
+    thread.join(10)
+    assert runner.writing_slots() == []
+    assert all(slot.state == FAILED for slot in slots)
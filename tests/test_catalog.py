@@ -0,0 +1,103 @@
+# tests/test_catalog.py
+import pytest
+
+from flashrom_catalog import ALIAS_MATCH, ChipIndex, ChipInfo, chip_aliases, normalize_chip_name
+
+
+def chip(vendor, device, size_kb=16384):
+    return ChipInfo(vendor, device, size_kb, "SPI", "2.7-3.6", "PREW", "")
+
+
+CHIPS = [
+    chip("Winbond", "W25Q128.V"),
+    chip("Winbond", "W25Q128.V..M"),
+    chip("Winbond", "W25Q64BV/W25Q64CV/W25Q64FV", 8192),
+    chip("Winbond", "W25X64", 8192),
+    chip("Macronix", "MX25L12805D/MX25L12806E", 16384),
+    chip("Macronix", "MX25L6405", 8192),
+    chip("GigaDevice", "GD25Q128C"),
+    chip("SST", "SST25VF016B", 2048),
+]
+
+
+@pytest.fixture
+def index():
+    return ChipIndex(CHIPS)
+
+
+def devices(chips):
+    return [entry.device for entry in chips]
+
+
+def test_normalisation():
+    assert normalize_chip_name("w25q128 fv") == "W25Q128FV"
+    assert normalize_chip_name("MX25L-128_05D") == "MX25L12805D"
+    assert chip_aliases("MX25L12805D/MX25L12806E") == ["MX25L12805D", "MX25L12806E"]
+
+
+def test_find_is_exact_and_case_insensitive(index):
+    assert index.find("w25q128.v").device == "W25Q128.V"
+    assert index.find("W25Q128") is None
+    assert len(index) == len(CHIPS)
+
+
+def test_empty_query_lists_the_catalog(index):
+    assert index.search("") == CHIPS
+    assert index.search("  ", limit=2) == CHIPS[:2]
+
+
+def test_exact_then_prefix_then_substring(index):
+    assert devices(index.search("W25Q64")) == ["W25Q64BV/W25Q64CV/W25Q64FV"]
+    assert devices(index.search("25Q128")) == ["W25Q128.V", "W25Q128.V..M", "GD25Q128C"]
+    # Exact device name first, then longer names starting with it
+    assert devices(index.search("w25q128.v")) == ["W25Q128.V", "W25Q128.V..M"]
+
+
+def test_real_part_number_finds_the_wildcard_entry(index):
+    # flashrom lists W25Q128BV/FV/JV as "W25Q128.V"
+    assert devices(index.search("W25Q128FV")) == ["W25Q128.V", "W25Q128.V..M"]
+    assert devices(index.search("w25q128 jv")) == ["W25Q128.V", "W25Q128.V..M"]
+
+
+def test_alternative_names_are_searched(index):
+    assert devices(index.search("12806E")) == ["MX25L12805D/MX25L12806E"]
+
+
+def test_every_word_must_match(index):
+    assert devices(index.search("macronix 6405")) == ["MX25L6405"]
+    assert devices(index.search("winbond x64")) == ["W25X64"]
+    assert index.search("winbond 6405") == []
+
+
+def test_vendor_matches_rank_last(index):
+    result = devices(index.search("SST"))
+    assert result == ["SST25VF016B"]
+    assert devices(index.search("giga")) == ["GD25Q128C"]
+
+
+def test_limit(index):
+    assert len(index.search("W25", limit=2)) == 2
+
+
+def test_match_exact_entry(index):
+    assert index.match("W25Q128.V") == [(1.0, CHIPS[0])]
+
+
+def test_match_alias_and_wildcard(index):
+    score, found = index.match("W25Q128FV")[0]
+    assert found.device == "W25Q128.V"
+    assert score == ALIAS_MATCH
+    score, found = index.match("w25q64-fv")[0]
+    assert found.device == "W25Q64BV/W25Q64CV/W25Q64FV"
+    assert score > ALIAS_MATCH
+
+
+def test_match_similar_names_score_below_an_alias(index):
+    matches = index.match("MX25L6406E")
+    assert matches
+    assert matches[0][1].device == "MX25L6405"
+    assert matches[0][0] < ALIAS_MATCH
+
+
+def test_match_unknown_family(index):
+    assert index.match("AT25DF321") == []
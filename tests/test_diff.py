@@ -0,0 +1,129 @@
+# tests/test_diff.py
+import os
+import time
+
+import pytest
+
+from flashrom_diff import (ChipContentsHistory, IncrementalWrite, changed_blocks, limit_regions, parse_layout,
+                           write_layout)
+
+BLOCK = 16
+
+
+def write(path, data):
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+@pytest.fixture
+def old(tmp_path):
+    return write(tmp_path / "old.bin", b"\xff" * (4 * BLOCK + 5))
+
+
+def changed(tmp_path, old, *offsets):
+    data = bytearray(open(old, "rb").read())
+    for offset in offsets:
+        data[offset] ^= 0x01
+    return write(tmp_path / "new.bin", data)
+
+
+def test_identical_files_have_no_changes(tmp_path, old):
+    assert changed_blocks(old, changed(tmp_path, old), BLOCK) == []
+
+
+def test_changes_are_block_aligned_and_merged(tmp_path, old):
+    new = changed(tmp_path, old, 1, BLOCK + 3, 3 * BLOCK)
+    assert changed_blocks(old, new, BLOCK) == [(0, 2 * BLOCK), (3 * BLOCK, 4 * BLOCK)]
+
+
+def test_unaligned_tail_ends_at_the_file_size(tmp_path, old):
+    new = changed(tmp_path, old, 4 * BLOCK + 4)
+    assert changed_blocks(old, new, BLOCK) == [(4 * BLOCK, 4 * BLOCK + 5)]
+
+
+def test_size_mismatch_is_refused(tmp_path, old):
+    new = write(tmp_path / "new.bin", b"\xff" * (4 * BLOCK))
+    with pytest.raises(ValueError):
+        changed_blocks(old, new, BLOCK)
+
+
+def test_empty_files(tmp_path):
+    assert changed_blocks(write(tmp_path / "a", b""), write(tmp_path / "b", b""), BLOCK) == []
+
+
+def test_limit_regions_merges_the_closest_neighbours():
+    ranges = [(0, 16), (32, 48), (200, 216), (220, 236)]
+    assert limit_regions(ranges, 3) == [(0, 16), (32, 48), (200, 236)]
+    assert limit_regions(ranges, 1) == [(0, 236)]
+    assert limit_regions(ranges, 4) == ranges
+
+
+def test_layout_round_trip(tmp_path):
+    path = str(tmp_path / "diff.layout")
+    names = write_layout([(0, 0x1000), (0x3000, 0x3005)], path)
+    assert names == ["diff0", "diff1"]
+    assert parse_layout(path) == [(0, 0x1000, "diff0"), (0x3000, 0x3005, "diff1")]
+
+
+def test_incremental_write_args(tmp_path, old):
+    new = changed(tmp_path, old, BLOCK + 1)
+    diff = IncrementalWrite(old, new, BLOCK).prepare(str(tmp_path / "write.layout"))
+    try:
+        assert diff.ranges == [(BLOCK, 2 * BLOCK)]
+        assert diff.changed_bytes == BLOCK
+        args = diff.write_args()
+        assert args[:2] == ["-w", new]
+        assert args[2:] == ["--layout", diff.layout_path, "-i", "diff0"]
+        # flashrom has to verify the whole chip, not only the written regions
+        assert "-N" not in args and "--noverify-all" not in args
+        assert parse_layout(diff.layout_path) == [(BLOCK, 2 * BLOCK, "diff0")]
+    finally:
+        diff.cleanup()
+    assert not os.path.exists(diff.layout_path)
+
+
+@pytest.fixture
+def history(tmp_path):
+    return ChipContentsHistory(str(tmp_path / "history.json"))
+
+
+def test_history_returns_the_unchanged_file(history, old):
+    entry = history.record("W25Q128.V", "ch341a_spi", old)
+    assert history.latest("W25Q128.V", "ch341a_spi") == entry
+    assert history.latest("W25Q128.V", "ft2232_spi") is None
+
+
+def test_history_ignores_an_edited_file(history, old):
+    history.record("W25Q128.V", "ch341a_spi", old)
+    with open(old, "r+b") as f:
+        f.write(b"\x00")
+    stat = os.stat(old)
+    # Same size; only the mtime tells
+    os.utime(old, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert history.latest("W25Q128.V", "ch341a_spi") is None
+
+
+def test_history_of_another_session_is_not_a_diff_base(history, old):
+    history.record("W25Q128.V", "ch341a_spi", old)
+    later = ChipContentsHistory(history.path)
+    assert later.latest("W25Q128.V", "ch341a_spi") is not None
+    assert later.latest("W25Q128.V", "ch341a_spi", this_session=True) is None
+    assert history.latest("W25Q128.V", "ch341a_spi", this_session=True) is not None
+
+
+def test_history_max_age(history, old, monkeypatch):
+    history.record("W25Q128.V", "ch341a_spi", old)
+    assert history.latest("W25Q128.V", "ch341a_spi", max_age=60) is not None
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert history.latest("W25Q128.V", "ch341a_spi", max_age=60) is None
+
+
+def test_forget_programmer(history, old):
+    history.record("W25Q128.V", "ch341a_spi", old)
+    history.record("MX25L6405", "ch341a_spi", old)
+    history.record("W25Q128.V", "ft2232_spi", old)
+    history.forget_programmer("ch341a_spi")
+    assert history.latest("W25Q128.V", "ch341a_spi") is None
+    assert history.latest("MX25L6405", "ch341a_spi") is None
+    assert history.latest("W25Q128.V", "ft2232_spi") is not None
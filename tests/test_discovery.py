@@ -0,0 +1,87 @@
+# tests/test_discovery.py
+import os
+
+import pytest
+
+from flashrom_discovery import HotplugWatcher, discover, programmer_choices
+
+
+def add_usb(sysfs, name, vid, pid, serial="", product=""):
+    path = sysfs / "bus" / "usb" / "devices" / name
+    path.mkdir(parents=True)
+    attrs = {"idVendor": f"{vid:04x}", "idProduct": f"{pid:04x}", "busnum": "1", "devnum": "5", "devpath": name}
+    if serial:
+        attrs["serial"] = serial
+    if product:
+        attrs["product"] = product
+    for attr, value in attrs.items():
+        (path / attr).write_text(value + "\n")
+    return path
+
+
+@pytest.fixture
+def roots(tmp_path):
+    sysfs = tmp_path / "sys"
+    dev = tmp_path / "dev"
+    (sysfs / "bus" / "usb" / "devices").mkdir(parents=True)
+    dev.mkdir()
+    return sysfs, dev
+
+
+def programmers(roots):
+    sysfs, dev = roots
+    return [entry.programmer for entry in discover(str(sysfs), str(dev))]
+
+
+def test_empty_tree(roots):
+    assert programmers(roots) == []
+
+
+def test_known_usb_ids_are_found(roots):
+    sysfs, _ = roots
+    add_usb(sysfs, "1-2", 0x1a86, 0x5512, product="USB Serial")
+    # Not a programmer, and an interface directory without ids
+    add_usb(sysfs, "1-3", 0x046d, 0xc52b)
+    (sysfs / "bus" / "usb" / "devices" / "1-2:1.0").mkdir()
+    entries = discover(str(sysfs), str(roots[1]))
+    assert [(entry.programmer, entry.source) for entry in entries] == [("ch341a_spi", "usb")]
+    assert entries[0].description == "USB Serial on USB 1-2"
+
+
+def test_ftdi_type_and_serial_only_when_ambiguous(roots):
+    sysfs, _ = roots
+    add_usb(sysfs, "1-1", 0x0403, 0x6014, serial="FT1")
+    assert programmers(roots) == ["ft2232_spi:type=232H"]
+    add_usb(sysfs, "1-4", 0x0403, 0x6014, serial="FT2")
+    assert programmers(roots) == ["ft2232_spi:type=232H,serial=FT1", "ft2232_spi:type=232H,serial=FT2"]
+
+
+def test_spidev_and_mtd_nodes(roots):
+    sysfs, dev = roots
+    for name in ("spidev0.0", "mtd0", "mtd0ro", "mtd1"):
+        (dev / name).touch()
+    (sysfs / "class" / "mtd" / "mtd0").mkdir(parents=True)
+    (sysfs / "class" / "mtd" / "mtd0" / "name").write_text("BIOS\n")
+    entries = discover(str(sysfs), str(dev))
+    assert [(entry.programmer, entry.description) for entry in entries] == [
+        (f"linux_spi:dev={os.path.join(str(dev), 'spidev0.0')}", "SPI controller spidev0.0"),
+        ("linux_mtd:dev=0", "MTD mtd0 BIOS"),
+        ("linux_mtd:dev=1", "MTD mtd1"),
+    ]
+
+
+def test_choices_keep_a_disconnected_selection(roots):
+    choices = programmer_choices([], "ch341a_spi:serial=gone")
+    assert choices[0] == "ch341a_spi:serial=gone"
+    assert "ch341a_spi" in choices
+
+
+def test_watcher_reports_only_changes(roots):
+    sysfs, _ = roots
+    changes = []
+    watcher = HotplugWatcher(changes.append, str(sysfs), str(roots[1]), use_uevents=False)
+    watcher.rescan()
+    watcher.rescan()
+    add_usb(sysfs, "1-2", 0x1a86, 0x5512)
+    watcher.rescan()
+    assert [[entry.programmer for entry in change] for change in changes] == [[], ["ch341a_spi"]]
@@ -0,0 +1,54 @@
+# tests/test_hexdata.py
+import threading
+
+import pytest
+
+from flashrom_hexdata import DIFF_STRIDE, HexDocument
+
+
+@pytest.fixture
+def files(tmp_path):
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    data = bytearray(b"\xff" * (4 * DIFF_STRIDE))
+    a.write_bytes(data)
+    data[3 * DIFF_STRIDE + 5] = 0
+    b.write_bytes(data)
+    return str(a), str(b)
+
+
+def test_diff_finds_the_changed_block(files):
+    document = HexDocument(*files)
+    diff = document.build_diff(block_size=4096)
+    assert diff.blocks == [3 * DIFF_STRIDE]
+    document.close()
+
+
+def test_close_waits_for_a_running_diff(files):
+    document = HexDocument(*files)
+    in_diff = threading.Event()
+    closed = threading.Event()
+    results = []
+
+    def cancelled():
+        # Hold the diff between slices until close() has been called
+        in_diff.set()
+        closed.wait(5)
+        return False
+
+    thread = threading.Thread(target=lambda: results.append(document.build_diff(cancelled=cancelled)))
+    thread.start()
+    assert in_diff.wait(5)
+    document.close()
+    assert not document.file.buf.closed
+    closed.set()
+    thread.join(5)
+    assert results[0].blocks == [3 * DIFF_STRIDE]
+    assert document.file.buf.closed
+    assert document.compare.buf.closed
+
+
+def test_no_diff_after_close(files):
+    document = HexDocument(*files)
+    document.close()
+    assert document.build_diff() is None
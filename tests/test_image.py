@@ -0,0 +1,32 @@
+# tests/test_image.py
+import struct
+
+import pytest
+
+from flashrom_image import AMD_EFS_SIGNATURE, find_amd_efs
+
+
+def image_with_efs(size, local):
+    buf = bytearray(b"\xff" * size)
+    struct.pack_into("<I", buf, local, AMD_EFS_SIGNATURE)
+    return bytes(buf)
+
+
+@pytest.mark.parametrize("size, local", [
+    (16 << 20, 0x020000),
+    (16 << 20, 0xFA0000),
+    # 8 MiB: window address 0x820000 is 0x20000 into the image
+    (8 << 20, 0x020000),
+    # 4 MiB: 0xC20000 -> 0x020000, 0xE20000 -> 0x220000
+    (4 << 20, 0x220000),
+    (32 << 20, 0x020000),
+])
+def test_efs_found_relative_to_the_image_end(size, local):
+    regions = find_amd_efs(image_with_efs(size, local))
+    assert [(region.start, region.end) for region in regions] == [(local, local + 0x4A)]
+
+
+def test_efs_not_taken_from_a_wrapped_offset():
+    # offset % size put 0xFA0000 at 0x0A0000 in a 3 MiB image; the window maps it to 0x2A0000
+    assert find_amd_efs(image_with_efs(3 << 20, 0x0A0000)) == []
+    assert find_amd_efs(image_with_efs(3 << 20, 0x2A0000))[0].start == 0x2A0000
@@ -0,0 +1,125 @@
+# tests/test_jobs.py
+import os
+import sys
+import time
+
+import pytest
+
+import flashrom_jobs
+from flashrom_jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, TIMED_OUT, JobExecutor
+from flashrom_progress import FlashromProgress
+
+
+@pytest.fixture
+def executor():
+    executor = JobExecutor()
+    yield executor
+    executor.shutdown()
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def hang(monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_FAIL", "hang")
+
+
+def test_job_runs_and_reports(fake_flashrom, executor):
+    done = []
+    progress = FlashromProgress()
+    job = executor.submit([fake_flashrom, "-p", "dummy", "-E"], "dummy", progress=progress,
+                          collect_output=True, on_done=done.append)
+    assert job.wait(10)
+    wait_for(lambda: done)
+    assert (job.state, job.returncode, job.error) == (DONE, 0, None)
+    assert "Erase done." in job.output_text()
+    assert progress.snapshot()["chip"] == "W25Q128.V"
+    assert done == [job]
+    assert executor.active_jobs() == []
+
+
+def test_failure_is_reported(fake_flashrom, executor, monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_FAIL", "write")
+    job = executor.submit([fake_flashrom, "-p", "dummy", "-w", os.devnull], "dummy")
+    assert job.wait(10)
+    assert (job.state, job.returncode) == (FAILED, 1)
+
+
+def test_jobs_on_one_programmer_run_in_turn(fake_flashrom, executor, monkeypatch):
+    hang(monkeypatch)
+    first = executor.submit([fake_flashrom, "-p", "dummy", "-r", os.devnull], "dummy")
+    wait_for(lambda: first.state == RUNNING)
+    second = executor.submit([fake_flashrom, "-p", "dummy", "-r", os.devnull], "dummy")
+    time.sleep(0.2)
+    assert second.state == QUEUED
+    assert executor.is_busy("dummy") and not executor.is_busy("other")
+
+    first.cancel()
+    assert first.wait(10)
+    assert first.state == CANCELLED
+    wait_for(lambda: second.state == RUNNING)
+    second.cancel()
+    assert second.wait(10)
+
+
+def test_jobs_on_different_programmers_run_together(fake_flashrom, executor, monkeypatch):
+    hang(monkeypatch)
+    jobs = [executor.submit([fake_flashrom, "-p", name], name) for name in ("dummy:a", "dummy:b")]
+    wait_for(lambda: all(job.state == RUNNING for job in jobs))
+    executor.cancel_all()
+    for job in jobs:
+        assert job.wait(10)
+        assert job.state == CANCELLED
+
+
+def test_cancel_before_start(fake_flashrom, executor, monkeypatch):
+    hang(monkeypatch)
+    first = executor.submit([fake_flashrom, "-p", "dummy"], "dummy")
+    queued = executor.submit([fake_flashrom, "-p", "dummy"], "dummy")
+    queued.cancel()
+    first.cancel()
+    assert queued.wait(10) and first.wait(10)
+    assert queued.state == CANCELLED
+    assert queued.started is None and queued.returncode is None
+
+
+def test_kill(fake_flashrom, executor, monkeypatch):
+    hang(monkeypatch)
+    job = executor.submit([fake_flashrom, "-p", "dummy"], "dummy")
+    wait_for(lambda: job.state == RUNNING and job._process is not None)
+    job.kill()
+    assert job.wait(10)
+    assert job.state == CANCELLED
+    assert job.returncode != 0
+
+
+def test_cancel_escalates_when_flashrom_ignores_it(executor, tmp_path, monkeypatch):
+    monkeypatch.setattr(flashrom_jobs, "TERMINATE_GRACE", 0.2)
+    script = tmp_path / "stubborn.py"
+    script.write_text(
+        "import signal, sys, time\n"
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+        "print('ready', flush=True)\n"
+        "time.sleep(60)\n"
+    )
+    output = []
+    job = executor.submit([sys.executable, str(script)], "dummy", on_output=lambda text, stream: output.append(text))
+    wait_for(lambda: "ready" in "".join(output))
+    started = time.monotonic()
+    job.cancel()
+    assert job.wait(10)
+    # Killed after the (shortened) grace period, not after the script's 60 s
+    assert time.monotonic() - started < 2
+    assert job.state == CANCELLED
+
+
+def test_timeout(fake_flashrom, executor, monkeypatch):
+    hang(monkeypatch)
+    job = executor.submit([fake_flashrom, "-p", "dummy"], "dummy", timeout=0.3)
+    assert job.wait(10)
+    assert job.state == TIMED_OUT
+    assert 0.3 <= job.duration < 5
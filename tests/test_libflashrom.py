@@ -0,0 +1,114 @@
+# tests/test_libflashrom.py
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from conftest import ROOT
+from flashrom_jobs import DONE, FAILED, JobExecutor
+from flashrom_lib import LibflashromBackend
+
+# Debug level, where the stub logs its "stub: ..." lines
+LOG_DEBUG = 3
+
+
+@pytest.fixture(scope="session")
+def stub_library(tmp_path_factory):
+    compiler = shutil.which("cc") or shutil.which("gcc")
+    if compiler is None:
+        pytest.skip("no C compiler to build bench/stub_libflashrom.c")
+    path = str(tmp_path_factory.mktemp("stub") / "libflashrom_stub.so")
+    subprocess.run([compiler, "-shared", "-fPIC", "-O2", "-o", path,
+                    os.path.join(ROOT, "bench", "stub_libflashrom.c")], check=True)
+    return path
+
+
+@pytest.fixture
+def backend(stub_library, fake_flashrom, tmp_path):
+    # The stub's chip is a global of the loaded library; a copy per test
+    # gets a fresh one
+    path = str(tmp_path / "libflashrom_stub.so")
+    shutil.copy(stub_library, path)
+    backend = LibflashromBackend.load(path)
+    backend.lib.log_level = LOG_DEBUG
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def executor(backend):
+    return JobExecutor(backend=backend)
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "image.bin"
+    path.write_bytes(bytes(range(256)) * 256)
+    return str(path)
+
+
+def run(executor, *args, chain=False):
+    job = executor.submit([os.environ["FLASHROM_PATH"], "-p", "dummy"] + list(args), "dummy",
+                          collect_output=True, chain=chain)
+    assert job.wait(10)
+    return job
+
+
+def test_session_stays_open_between_jobs(executor, backend, tmp_path):
+    first = run(executor, "-r", str(tmp_path / "a.bin"))
+    second = run(executor, "-r", str(tmp_path / "b.bin"))
+    assert first.state == second.state == DONE
+    output = first.output_text() + second.output_text()
+    assert output.count("stub: programmer init") == 1
+    assert output.count("stub: probe") == 1
+    assert 'Found Winbond flash chip "W25Q128.V"' in second.output_text()
+    assert (tmp_path / "a.bin").read_bytes() == b"\xff" * 64 * 1024
+
+
+def test_write_and_erase_probe_again(executor, image, tmp_path):
+    run(executor, "-r", str(tmp_path / "a.bin"))
+    write = run(executor, "-w", image)
+    erase = run(executor, "-E")
+    assert write.state == erase.state == DONE
+    assert "stub: probe" in write.output_text()
+    assert "stub: probe" in erase.output_text()
+
+
+def test_contents_are_dropped_after_an_unchained_job(executor, backend, image, tmp_path):
+    run(executor, "-r", str(tmp_path / "a.bin"))
+    assert backend.sessions["dummy"].contents is None
+    write = run(executor, "-w", image)
+    assert write.state == DONE
+    assert "stub: using reference contents" not in write.output_text()
+    assert "Reading old flash chip contents" in write.output_text()
+    assert backend.sessions["dummy"].contents is None
+
+
+def test_chained_read_is_the_write_reference(executor, backend, image, tmp_path):
+    run(executor, "-r", str(tmp_path / "a.bin"), chain=True)
+    assert backend.sessions["dummy"].contents is not None
+    write = run(executor, "-w", image)
+    assert write.state == DONE
+    assert "stub: using reference contents" in write.output_text()
+    verify = run(executor, "-v", image)
+    assert verify.state == DONE
+
+
+def test_cli_fallback_releases_the_programmer(executor, backend, tmp_path):
+    run(executor, "-r", str(tmp_path / "a.bin"))
+    assert "dummy" in backend.sessions
+    layout = tmp_path / "regions.layout"
+    layout.write_text("00000000:00000fff fd\n")
+    job = run(executor, "-r", str(tmp_path / "b.bin"), "--layout", str(layout), "-i", "fd")
+    assert job.state == DONE
+    # Spawned bench/fake_flashrom.py, not the library
+    assert "flashrom v1.3.0-fake" in job.output_text()
+    assert "dummy" not in backend.sessions
+
+
+def test_failed_write_closes_the_session(executor, backend, image, monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_FAIL", "write")
+    job = run(executor, "-w", image)
+    assert job.state == FAILED
+    assert "dummy" not in backend.sessions
@@ -0,0 +1,33 @@
+# tests/test_log.py
+import os
+
+from flashrom_log import LogBuffer, prune_session_logs, session_log_path
+
+
+def test_old_session_logs_are_pruned(tmp_path):
+    for day in range(1, 8):
+        (tmp_path / f"session-202601{day:02d}-120000.log").write_text("x")
+    (tmp_path / "notes.txt").write_text("kept")
+    prune_session_logs(str(tmp_path), keep=3)
+    assert sorted(os.listdir(tmp_path)) == [
+        "notes.txt", "session-20260105-120000.log", "session-20260106-120000.log", "session-20260107-120000.log",
+    ]
+
+
+def test_new_session_log_counts_against_the_limit(tmp_path, monkeypatch):
+    log_dir = tmp_path / "logs"
+    monkeypatch.setattr("flashrom_log.user_data_dir", lambda: str(tmp_path))
+    path = session_log_path(keep=2)
+    assert os.path.dirname(path) == str(log_dir)
+    for day in range(1, 4):
+        (log_dir / f"session-202601{day:02d}-120000.log").write_text("x")
+    session_log_path(keep=2)
+    assert os.listdir(log_dir) == ["session-20260103-120000.log"]
+
+
+def test_drain_replaces_after_overflow():
+    buffer = LogBuffer(max_lines=3)
+    buffer.write("a\nb\n")
+    assert buffer.drain() == ("a\nb\n", False, None)
+    buffer.write("1\n2\n3\n4\n")
+    assert buffer.drain() == ("2\n3\n4\n", True, None)
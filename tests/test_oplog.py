@@ -0,0 +1,53 @@
+# tests/test_oplog.py
+import hashlib
+import os
+import threading
+
+from flashrom_oplog import OperationLog, make_entry
+
+FOUND = 'Found Winbond flash chip "W25Q128.V" (16384 kB, SPI) on ch341a_spi.\n'
+
+
+def test_dump_is_hashed(tmp_path):
+    path = tmp_path / "dump.bin"
+    path.write_bytes(b"\x5a" * 4096)
+    entry = make_entry(["flashrom", "-p", "ch341a_spi", "-r", str(path)], "ch341a_spi", "done", 0, 1.0, 2.0, FOUND)
+    assert entry["operation"] == "read"
+    assert entry["chip"] == "W25Q128.V"
+    assert entry["sha256"] == hashlib.sha256(b"\x5a" * 4096).hexdigest()
+
+
+def test_failed_read_is_not_hashed(tmp_path):
+    path = tmp_path / "dump.bin"
+    path.write_bytes(b"partial")
+    entry = make_entry(["flashrom", "-p", "x", "-r", str(path)], "x", "failed", 1, 1.0, 2.0)
+    assert entry["sha256"] is None
+
+
+def test_fifo_is_never_opened(tmp_path):
+    fifo = str(tmp_path / "dump.bin")
+    os.mkfifo(fifo)
+    entries = []
+    # Nothing writes to the FIFO, so opening it for reading would hang
+    thread = threading.Thread(
+        target=lambda: entries.append(make_entry(["flashrom", "-p", "x", "-r", fifo], "x", "done", 0, 1.0, 2.0)),
+        daemon=True,
+    )
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert entries[0]["sha256"] is None
+    assert entries[0]["path"] == fifo
+
+
+def test_append_and_search(tmp_path):
+    log = OperationLog(str(tmp_path / "oplog"))
+    try:
+        entry = make_entry(["flashrom", "-p", "ch341a_spi", "-E"], "ch341a_spi", "done", 0, 1.0, 2.0, FOUND)
+        log.append(entry, FOUND + "Erase done.\n")
+        found = log.search("W25Q128")
+        assert [row["operation"] for row in found] == ["erase"]
+        assert "Erase done." in log.output(found[0])
+        assert log.search("nothing-like-this") == []
+    finally:
+        log.close()
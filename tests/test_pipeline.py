@@ -0,0 +1,132 @@
+# tests/test_pipeline.py
+import json
+import os
+
+import pytest
+
+from flashrom_jobs import JobExecutor
+from flashrom_pipeline import (DONE, FAILED, INTERRUPTED, RECIPES, SKIPPED, PipelineRunner, PipelineState,
+                               list_pipelines)
+
+CHIP_BYTES = 64 * 1024
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "image.bin"
+    path.write_bytes(b"\xff" * 0x3000 + b"\x5a" * 0x1000 + b"\xff" * (CHIP_BYTES - 0x4000))
+    return str(path)
+
+
+@pytest.fixture
+def executor():
+    executor = JobExecutor()
+    executor.commands = []
+    submit = executor.submit
+    executor.submit = lambda cmd, *args, **kwargs: executor.commands.append(cmd[1:]) or submit(cmd, *args, **kwargs)
+    yield executor
+    executor.shutdown()
+
+
+def start(image, tmp_path, executor, recipe="rework"):
+    state = PipelineState.create(RECIPES[recipe], "dummy", image, str(tmp_path / "pipelines"))
+    return state, PipelineRunner(state, executor=executor).run()
+
+
+def resume(state, executor):
+    state = PipelineState.load(state.directory)
+    executor.commands.clear()
+    return state, PipelineRunner(state, executor=executor).run()
+
+
+def statuses(state):
+    return {stage["name"]: stage["status"] for stage in state.stages}
+
+
+def test_rework_writes_only_the_changed_blocks(fake_flashrom, image, tmp_path, executor):
+    state, status = start(image, tmp_path, executor)
+    assert status == DONE
+    assert statuses(state) == {"backup": DONE, "write": DONE, "verify": SKIPPED, "archive": DONE}
+    assert state.data["chip"] == "W25Q128.V"
+    write = executor.commands[1]
+    assert "--layout" in write and "-N" not in write
+    assert "1 changed region(s), 4 KiB" in state.stage("write")["detail"]
+    # The chip found by the backup is passed on, not probed again
+    assert write[2:4] == ["-c", "W25Q128.V"]
+    with open(os.path.join(str(tmp_path / "pipelines"), "archive.jsonl")) as f:
+        assert json.loads(f.readline())["id"] == state.id
+
+
+def test_write_is_skipped_when_the_backup_matches(fake_flashrom, image, tmp_path, executor, monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_IMAGE", image)
+    state, status = start(image, tmp_path, executor)
+    assert status == DONE
+    assert statuses(state)["write"] == SKIPPED
+    assert statuses(state)["verify"] == SKIPPED
+    assert len(executor.commands) == 1
+
+
+def test_failed_write_is_resumed_with_the_full_image(fake_flashrom, image, tmp_path, executor, monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_FAIL", "write")
+    state, status = start(image, tmp_path, executor)
+    assert status == FAILED
+    assert state.data["chip_dirty"]
+    assert [s.id for s in list_pipelines(str(tmp_path / "pipelines"), unfinished=True)] == [state.id]
+
+    monkeypatch.delenv("FAKE_FLASHROM_FAIL")
+    state, status = resume(state, executor)
+    assert status == DONE
+    assert not state.data["chip_dirty"]
+    # The backup is not read again, and the write is not diffed against it
+    assert executor.commands == [["-p", "dummy"], ["-p", "dummy", "-c", "W25Q128.V", "-w", image]]
+    assert state.stage("write")["detail"].startswith("wrote the full image")
+    assert state.stage("write")["attempts"] == 2
+
+
+def test_interrupted_stage_is_run_again_on_resume(fake_flashrom, image, tmp_path, executor):
+    state, _ = start(image, tmp_path, executor, "backup")
+    # As left behind by a crash in the middle of the write
+    state.data["status"] = "running"
+    state.data["recipe"] = RECIPES["rework"]._asdict()
+    state.data["stages"] = [state.stage("backup")] + [
+        {"name": name, "status": "running" if name == "write" else "pending", "detail": "", "attempts": 0,
+         "duration": 0.0}
+        for name in ("write", "verify", "archive")
+    ]
+    state.save()
+
+    loaded = PipelineState.load(state.directory)
+    assert loaded.status == INTERRUPTED
+    assert statuses(loaded)["write"] == INTERRUPTED
+
+    state, status = resume(state, executor)
+    assert status == DONE
+    # A resumed pipeline probes again instead of trusting the saved chip,
+    # and writes in full: the backup may be of another board
+    assert executor.commands == [["-p", "dummy"], ["-p", "dummy", "-c", "W25Q128.V", "-w", image]]
+    assert "resumed" in state.stage("write")["detail"]
+
+
+def test_chip_change_aborts_a_resume(fake_flashrom, image, tmp_path, executor, monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_FAIL", "write")
+    state, _ = start(image, tmp_path, executor)
+    monkeypatch.delenv("FAKE_FLASHROM_FAIL")
+    monkeypatch.setenv("FAKE_FLASHROM_CHIP", "MX25L6405")
+    state, status = resume(state, executor)
+    assert status == FAILED
+    assert state.stage("write")["detail"].startswith("Chip changed")
+    assert state.data["chip"] == "W25Q128.V"
+    # Noticed by a probe, before anything was written
+    assert executor.commands == [["-p", "dummy"]]
+
+
+def test_changed_image_is_refused(fake_flashrom, image, tmp_path, executor, monkeypatch):
+    monkeypatch.setenv("FAKE_FLASHROM_FAIL", "write")
+    state, _ = start(image, tmp_path, executor)
+    monkeypatch.delenv("FAKE_FLASHROM_FAIL")
+    with open(image, "r+b") as f:
+        f.write(b"\x00")
+    state, status = resume(state, executor)
+    assert status == FAILED
+    assert "changed since the pipeline was created" in state.stage("write")["detail"]
+    assert executor.commands == []
@@ -0,0 +1,65 @@
+# tests/test_regions.py
+import json
+import struct
+
+import pytest
+
+import flashrom_cli
+from flashrom_regions import RegionRead
+from flashrom_telemetry import TelemetryStore, transferred_bytes
+
+CHIP_BYTES = 64 * 1024
+
+# (name, start, end) in IFD_REGION_NAMES order; ME is left unused
+IFD_LAYOUT = (("fd", 0x0000, 0x1000), ("bios", 0x3000, 0x10000), ("me", None, None), ("gbe", 0x1000, 0x3000))
+
+
+def flreg(start, end):
+    if start is None:
+        return 0
+    return (start >> 12) | (((end - 1) >> 12) << 16)
+
+
+@pytest.fixture
+def ifd_image(tmp_path):
+    data = bytearray(b"\xff" * CHIP_BYTES)
+    struct.pack_into("<II", data, 0x10, 0x0FF0A55A, 0x04 << 16)
+    for index, (_, start, end) in enumerate(IFD_LAYOUT):
+        struct.pack_into("<I", data, 0x40 + index * 4, flreg(start, end))
+    path = tmp_path / "board.bin"
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+def test_layout_read_counts_the_included_regions(tmp_path):
+    region_read = RegionRead(["nvram"], [(0, 0x1000, "boot"), (0x4000, 0x6000, "nvram")])
+    assert region_read.selected_bytes() == 0x2000
+    assert region_read.read_bytes(str(tmp_path / "unused.bin")) == 0x2000
+
+
+def test_ifd_read_counts_the_descriptor_regions(ifd_image):
+    region_read = RegionRead.from_ifd(["gbe"])
+    assert region_read.selected_bytes() is None
+    # The descriptor is always read along with the regions
+    assert region_read.read_bytes(ifd_image) == 0x1000 + 0x2000
+
+
+def test_telemetry_counts_ifd_regions(ifd_image):
+    cmd = ["flashrom", "-p", "x", "-r", ifd_image, "--ifd", "-i", "fd", "-i", "gbe"]
+    assert transferred_bytes(cmd, CHIP_BYTES) == 0x3000
+
+
+def test_telemetry_without_a_descriptor_counts_the_file(tmp_path):
+    path = tmp_path / "blank.bin"
+    path.write_bytes(b"\xff" * CHIP_BYTES)
+    cmd = ["flashrom", "-p", "x", "-r", str(path), "--ifd", "-i", "gbe"]
+    assert transferred_bytes(cmd, CHIP_BYTES) == CHIP_BYTES
+
+
+def test_cli_region_read_reports_the_region_bytes(fake_flashrom, ifd_image, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("FAKE_FLASHROM_IMAGE", ifd_image)
+    dump = str(tmp_path / "dump.bin")
+    assert flashrom_cli.main(["read", dump, "-p", "dummy", "--ifd", "-i", "gbe", "--json", "--no-log"]) == 0
+    result = json.loads(capsys.readouterr().out.splitlines()[-1])
+    assert result["bytes_processed"] == 0x3000
+    assert [record["bytes"] for record in TelemetryStore().records()] == [0x3000]
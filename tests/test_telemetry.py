@@ -0,0 +1,55 @@
+# tests/test_telemetry.py
+import os
+
+import pytest
+
+from flashrom_progress import FlashromProgress
+from flashrom_telemetry import make_record, transferred_bytes
+
+FOUND = 'Found Winbond flash chip "W25Q128.V" (16384 kB, SPI) on ch341a_spi.\n'
+CHIP_SIZE = 16384 * 1024
+
+
+def progress_for(text=FOUND):
+    progress = FlashromProgress()
+    progress.feed(text, "stdout")
+    return progress
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "image.bin"
+    path.write_bytes(b"\xff" * 8192)
+    return str(path)
+
+
+def test_write_counts_the_image_not_the_chip(image):
+    record = make_record(["flashrom", "-p", "x", "-w", image], "x", "done", 0, 1.0, 2.0, progress=progress_for())
+    assert record["chip"] == "W25Q128.V"
+    assert record["bytes"] == os.path.getsize(image)
+    assert record["throughput"] == os.path.getsize(image) // 2
+
+
+def test_layout_write_counts_only_the_included_regions(image, tmp_path):
+    layout = tmp_path / "diff.layout"
+    layout.write_text("00000000:00000fff diff0\n00010000:00011fff diff1\n00100000:001fffff other\n")
+    cmd = ["flashrom", "-p", "x", "-w", image, "--layout", str(layout), "-i", "diff0", "-i", "diff1"]
+    assert transferred_bytes(cmd, CHIP_SIZE) == 0x1000 + 0x2000
+
+
+def test_read_into_a_pipe_counts_the_chip(tmp_path):
+    fifo = str(tmp_path / "backup.fifo")
+    os.mkfifo(fifo)
+    # Must not open the FIFO: nothing is reading the other end
+    record = make_record(["flashrom", "-p", "x", "-r", fifo], "x", "done", 0, 1.0, 4.0, progress=progress_for())
+    assert record["bytes"] == CHIP_SIZE
+
+
+def test_erase_counts_the_chip():
+    assert transferred_bytes(["flashrom", "-p", "x", "-E"], CHIP_SIZE) == CHIP_SIZE
+
+
+def test_failed_runs_record_no_bytes(image):
+    record = make_record(["flashrom", "-p", "x", "-w", image], "x", "failed", 1, 1.0, 2.0, progress=progress_for())
+    assert record["bytes"] == 0
+    assert record["throughput"] is None